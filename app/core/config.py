@@ -5,6 +5,10 @@ from pathlib import Path
 CONFIG_DIR = Path.home() / ".academic_management_app"
 CONFIG_FILE = CONFIG_DIR / "config.json"
 
+# Name of the SQLite storage profile used when none is configured.
+# The available profiles are defined in app.data.database.STORAGE_PROFILES.
+DEFAULT_STORAGE_PROFILE = "desktop-safe"
+
 # Ensure the configuration directory exists
 CONFIG_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -38,3 +42,29 @@ def load_setting(key: str, default: any = None) -> any:
     """Loads a single setting."""
     settings = load_config()
     return settings.get(key, default)
+
+def get_storage_profile() -> str:
+    """Returns the name of the SQLite storage profile selected by the user."""
+    return load_setting("storage_profile", DEFAULT_STORAGE_PROFILE)
+
+def set_storage_profile(profile_name: str):
+    """Selects the SQLite storage profile. Takes effect on the next application start."""
+    save_setting("storage_profile", profile_name)
+
+# Defaults for the automatic database backups (see app.services.backup_service.BackupService).
+DEFAULT_BACKUP_SETTINGS = {
+    "enabled": True,
+    "interval_hours": 24,
+    "keep": 7,
+}
+
+def get_backup_settings() -> dict:
+    """Returns the automatic backup settings, filling in the defaults for missing keys."""
+    return {**DEFAULT_BACKUP_SETTINGS, **load_setting("backup", {})}
+
+def set_backup_settings(**settings):
+    """Updates the automatic backup settings (enabled, interval_hours, keep). Takes effect on the next application start."""
+    unknown = set(settings) - set(DEFAULT_BACKUP_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown backup settings: {', '.join(sorted(unknown))}")
+    save_setting("backup", {**load_setting("backup", {}), **settings})
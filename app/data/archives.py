@@ -0,0 +1,255 @@
+# Importa 're' para reconhecer os nomes dos arquivos de arquivo morto.
+import re
+# Importa 'Path' para montar os caminhos dos arquivos de arquivo morto.
+from pathlib import Path
+# Importa 'lru_cache' para reutilizar as cópias das tabelas associadas a cada esquema anexado.
+from functools import lru_cache
+# Importa as funções de construção de SQL e os tipos necessários do SQLAlchemy.
+from sqlalchemy import MetaData, create_engine, delete, select, union
+# Importa o INSERT do dialeto SQLite, que suporta ON CONFLICT (upsert).
+from sqlalchemy.dialects.sqlite import insert
+# Importa a classe Base declarativa, cujos metadados descrevem as tabelas dos modelos.
+from app.models.base import Base
+# Importa o pacote de modelos para garantir que todas as tabelas estejam registradas nos metadados.
+import app.models  # noqa: F401
+
+# Este módulo move anos letivos encerrados para bancos de arquivo morto, um arquivo SQLite por ano
+# (ex: 'archives/academic_management_2023.db'), mantendo o banco principal pequeno.
+#
+# - move_classes_to_archive() copia turmas inteiras (disciplinas, matrículas, avaliações, notas, aulas,
+#   incidentes e médias) para o arquivo do ano e as remove do banco principal, na mesma transação.
+#   Os alunos e cursos referenciados são copiados (não movidos): o arquivo é autossuficiente, mesmo que
+#   um aluno seja removido depois do banco principal.
+# - attach_archives() anexa (ATTACH) os arquivos existentes, em modo somente leitura, à conexão,
+#   com o nome de esquema 'archive_<ano>'. As consultas do DataService com 'include_archives=True'
+#   combinam o banco principal e os esquemas anexados em um único comando (UNION ALL).
+#
+# Os IDs são preservados na cópia, mas podem ser reutilizados no banco principal depois que as linhas
+# saem dele. Por isso, as linhas lidas de um arquivo são sempre identificadas pelo ano ('archive').
+
+# Diretório dos arquivos de arquivo morto (relativo, como o banco principal em DATABASE_URL).
+ARCHIVE_DIR = Path("archives")
+
+# Padrão do nome dos arquivos de arquivo morto.
+_ARCHIVE_FILE_PATTERN = re.compile(r"^academic_management_(\d{4})\.db$")
+
+# Tabelas de referência, copiadas para o arquivo (continuam no banco principal).
+SNAPSHOT_TABLES = ("students", "courses")
+# Tabelas movidas para o arquivo, em ordem de dependência (as referenciadas primeiro).
+MOVED_TABLES = (
+    "classes", "class_subjects", "class_enrollments", "assessments", "grades",
+    "lessons", "incidents", "student_subject_averages",
+)
+# Todas as tabelas presentes em um arquivo.
+ARCHIVED_TABLES = SNAPSHOT_TABLES + MOVED_TABLES
+
+
+# Define a função que retorna o caminho do arquivo de um ano letivo.
+def archive_path(school_year: int, directory: Path | None = None) -> Path:
+    """
+    Retorna o caminho do arquivo morto de um ano letivo.
+
+    :param school_year: Ano letivo (ex: 2023).
+    :param directory: Diretório dos arquivos. Se None, usa ARCHIVE_DIR.
+    :return: Caminho do arquivo (que pode ainda não existir).
+    """
+    return Path(directory or ARCHIVE_DIR) / f"academic_management_{int(school_year)}.db"
+
+
+# Define a função que lista os arquivos mortos existentes.
+def list_archives(directory: Path | None = None) -> dict[int, Path]:
+    """
+    Lista os arquivos mortos existentes no diretório.
+
+    :param directory: Diretório dos arquivos. Se None, usa ARCHIVE_DIR.
+    :return: Dicionário {ano letivo: caminho}, ordenado por ano.
+    """
+    directory = Path(directory or ARCHIVE_DIR)
+    if not directory.is_dir():
+        return {}
+    archives = {}
+    for path in directory.iterdir():
+        match = _ARCHIVE_FILE_PATTERN.match(path.name)
+        if match:
+            archives[int(match.group(1))] = path
+    return dict(sorted(archives.items()))
+
+
+# Define a função que retorna o nome do esquema com que o arquivo de um ano é anexado para leitura.
+def archive_schema(school_year: int) -> str:
+    """Retorna o nome do esquema somente leitura de um ano letivo (ex: 'archive_2023')."""
+    return f"archive_{int(school_year)}"
+
+
+# Define a função que retorna as tabelas dos modelos associadas a um esquema anexado.
+@lru_cache(maxsize=None)
+def schema_tables(schema: str | None = None) -> dict:
+    """
+    Retorna as tabelas dos modelos qualificadas com o nome de um esquema anexado.
+
+    :param schema: Nome do esquema (ex: 'archive_2023'). Se None, as tabelas do banco principal.
+    :return: Dicionário {nome da tabela: Table}.
+    """
+    if schema is None:
+        return dict(Base.metadata.tables)
+    metadata = MetaData(schema=schema)
+    return {name: Base.metadata.tables[name].to_metadata(metadata) for name in ARCHIVED_TABLES}
+
+
+# Retorna os esquemas anexados a uma conexão sqlite3: {nome: caminho do arquivo}.
+def _attached_databases(dbapi_connection) -> dict[str, str]:
+    cursor = dbapi_connection.cursor()
+    try:
+        return {row[1]: row[2] for row in cursor.execute("PRAGMA database_list")}
+    finally:
+        cursor.close()
+
+
+# Executa um comando diretamente na conexão sqlite3 (fora da contagem de comandos do DataService).
+def _execute_raw(dbapi_connection, statement: str, parameters: tuple = ()):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(statement, parameters)
+    finally:
+        cursor.close()
+
+
+# Desanexa os arquivos abertos para escrita por arquivamentos anteriores já concluídos.
+def _detach_idle_write_targets(dbapi_connection, attached: dict[str, str]):
+    # O SQLite não permite DETACH durante uma transação; nesse caso, o esquema é reaproveitado ou desanexado depois.
+    if dbapi_connection.in_transaction:
+        return
+    for schema in [name for name in attached if name.startswith("archive_write_")]:
+        _execute_raw(dbapi_connection, f"DETACH DATABASE {schema}")
+        del attached[schema]
+
+
+# Define a função que anexa os arquivos mortos existentes, somente leitura, a uma conexão.
+def attach_archives(dbapi_connection, directory: Path | None = None) -> list[int]:
+    """
+    Anexa (ATTACH) os arquivos mortos existentes à conexão, em modo somente leitura.
+
+    Os arquivos já anexados são mantidos; apenas os novos são anexados. Os comandos são executados
+    diretamente na conexão sqlite3, como os PRAGMAs de conexão, e não entram na contagem de comandos.
+    O SQLite anexa no máximo 10 bancos por conexão (limite de compilação SQLITE_MAX_ATTACHED).
+
+    :param dbapi_connection: Conexão sqlite3 crua (ex: ``session.connection().connection.dbapi_connection``).
+    :param directory: Diretório dos arquivos. Se None, usa ARCHIVE_DIR.
+    :return: Os anos letivos anexados, em ordem.
+    """
+    attached = _attached_databases(dbapi_connection)
+    _detach_idle_write_targets(dbapi_connection, attached)
+    years = []
+    for school_year, path in list_archives(directory).items():
+        schema = archive_schema(school_year)
+        if schema not in attached:
+            # 'mode=ro' impede qualquer escrita pelo esquema anexado.
+            _execute_raw(dbapi_connection, f"ATTACH DATABASE ? AS {schema}", (f"{path.resolve().as_uri()}?mode=ro",))
+        years.append(school_year)
+    return years
+
+
+# Define a função que cria (ou completa) o esquema de um arquivo morto.
+def create_archive(path: Path):
+    """
+    Cria o arquivo morto, com as tabelas arquivadas e seus índices, se ainda não existirem.
+
+    As tabelas de busca textual não são criadas: a busca (FTS5) cobre apenas o banco principal.
+
+    :param path: Caminho do arquivo.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    archive_engine = create_engine(f"sqlite:///{path}")
+    try:
+        with archive_engine.begin() as connection:
+            # 'Table.create' não dispara o evento 'after_create' dos metadados, que criaria as tabelas FTS5.
+            for table in Base.metadata.sorted_tables:
+                if table.name in ARCHIVED_TABLES:
+                    table.create(connection, checkfirst=True)
+    finally:
+        archive_engine.dispose()
+
+
+# Monta, para cada tabela, a consulta das linhas que pertencem às turmas arquivadas.
+def _archived_rows_queries(tables: dict, class_ids: list[int]) -> dict:
+    subject_ids = select(tables["class_subjects"].c.id).where(tables["class_subjects"].c.class_id.in_(class_ids))
+    assessment_ids = select(tables["assessments"].c.id).where(tables["assessments"].c.class_subject_id.in_(subject_ids))
+    # Alunos referenciados por matrículas, notas ou incidentes das turmas.
+    student_ids = union(
+        select(tables["class_enrollments"].c.student_id).where(tables["class_enrollments"].c.class_id.in_(class_ids)),
+        select(tables["grades"].c.student_id).where(tables["grades"].c.assessment_id.in_(assessment_ids)),
+        select(tables["incidents"].c.student_id).where(tables["incidents"].c.class_id.in_(class_ids)),
+    )
+    return {
+        "students": tables["students"].c.id.in_(student_ids),
+        "courses": tables["courses"].c.id.in_(
+            select(tables["class_subjects"].c.course_id).where(tables["class_subjects"].c.class_id.in_(class_ids))),
+        "classes": tables["classes"].c.id.in_(class_ids),
+        "class_subjects": tables["class_subjects"].c.class_id.in_(class_ids),
+        "class_enrollments": tables["class_enrollments"].c.class_id.in_(class_ids),
+        "assessments": tables["assessments"].c.class_subject_id.in_(subject_ids),
+        "grades": tables["grades"].c.assessment_id.in_(assessment_ids),
+        "lessons": tables["lessons"].c.class_subject_id.in_(subject_ids),
+        "incidents": tables["incidents"].c.class_id.in_(class_ids),
+        "student_subject_averages": tables["student_subject_averages"].c.class_subject_id.in_(subject_ids),
+    }
+
+
+# Define a função que move turmas inteiras do banco principal para o arquivo de um ano letivo.
+def move_classes_to_archive(session, class_ids: list[int], school_year: int, directory: Path | None = None) -> dict[str, int]:
+    """
+    Move turmas, com todos os seus dados, do banco principal para o arquivo morto do ano letivo.
+
+    As linhas são copiadas com INSERT ... SELECT pelo arquivo anexado e, em seguida, removidas do banco
+    principal, na transação da sessão. A cópia atualiza as linhas que já existem no arquivo (ON CONFLICT
+    DO UPDATE): se o banco principal estiver em modo WAL, o SQLite não garante a atomicidade entre os dois
+    arquivos em uma queda de energia, e repetir o arquivamento das mesmas turmas corrige uma cópia
+    interrompida. INSERT OR REPLACE não serve aqui, pois excluiria a linha antiga e, com ela, em cascata,
+    os dados já arquivados que a referenciam (ex: as notas de um aluno copiado novamente).
+
+    :param session: Sessão do SQLAlchemy (o commit fica a cargo de quem a abriu).
+    :param class_ids: IDs das turmas a arquivar.
+    :param school_year: Ano letivo do arquivo de destino.
+    :param directory: Diretório dos arquivos. Se None, usa ARCHIVE_DIR.
+    :return: Número de linhas copiadas por tabela.
+    """
+    class_ids = list(class_ids)
+    if not class_ids:
+        return {}
+    path = archive_path(school_year, directory)
+    create_archive(path)
+
+    # Anexa o arquivo para escrita, com um nome diferente do esquema somente leitura usado nas consultas.
+    session.flush()
+    dbapi_connection = session.connection().connection.dbapi_connection
+    write_schema = f"archive_write_{int(school_year)}"
+    attached = _attached_databases(dbapi_connection)
+    _detach_idle_write_targets(dbapi_connection, attached)
+    if write_schema not in attached:
+        _execute_raw(dbapi_connection, f"ATTACH DATABASE ? AS {write_schema}", (str(path.resolve()),))
+
+    main_tables = schema_tables()
+    archive_tables = schema_tables(write_schema)
+    conditions = _archived_rows_queries(main_tables, class_ids)
+
+    # Copia as linhas para o arquivo, das tabelas referenciadas para as dependentes.
+    copied = {}
+    for name in ARCHIVED_TABLES:
+        columns = [c.name for c in archive_tables[name].columns]
+        rows = select(*(main_tables[name].c[c] for c in columns)).where(conditions[name])
+        statement = insert(archive_tables[name]).from_select(columns, rows)
+        primary_key = [c.name for c in archive_tables[name].primary_key]
+        statement = statement.on_conflict_do_update(
+            index_elements=primary_key,
+            set_={c: statement.excluded[c] for c in columns if c not in primary_key},
+        )
+        result = session.execute(statement)
+        copied[name] = result.rowcount
+
+    # Remove as linhas movidas do banco principal, das tabelas dependentes para as referenciadas.
+    # Os gatilhos da busca textual removem as aulas e os incidentes dos índices FTS5.
+    for name in reversed(MOVED_TABLES):
+        session.execute(delete(main_tables[name]).where(conditions[name]))
+    # Os objetos das linhas removidas não devem continuar no mapa de identidade da sessão.
+    session.expire_all()
+    return copied
@@ -0,0 +1,168 @@
+# Importa o módulo de logging para registrar falhas nos assinantes sem interromper a publicação.
+import logging
+# Importa 'threading' para proteger a lista de assinantes, usada pela thread da interface e pelo pool de threads do banco.
+import threading
+# Importa 'dataclass' para definir o evento de alteração como um registro imutável.
+from dataclasses import dataclass
+# Importa 'event' para registrar os eventos de commit e rollback das sessões.
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Este módulo implementa o barramento de eventos de alteração do DataService: cada método de escrita
+# publica o que mudou (entidade, operação, IDs e a turma/disciplina afetada), e as telas atualizam
+# apenas as partes afetadas, inclusive quando a escrita foi feita pelo assistente.
+#
+# - Os eventos são registrados na sessão (publish_change) e só são entregues depois do commit; um
+#   rollback os descarta. Assim, uma tela nunca recarrega dados que não chegaram a ser gravados.
+# - Os assinantes podem pedir a entrega em uma fila (ex: 'main_app.async_queue'), no formato
+#   (callback, (evento,)) consumido pela thread do Tkinter. Sem fila, o callback é chamado na thread
+#   que fez o commit.
+
+# Operações possíveis de um evento.
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+
+# Chave usada em 'Session.info' para guardar os eventos da transação atual.
+_PENDING_EVENTS = "pending_change_events"
+
+
+# Define o evento de alteração publicado pelos métodos de escrita.
+@dataclass(frozen=True)
+class ChangeEvent:
+    """
+    Alteração confirmada no banco de dados.
+
+    :ivar entity: Entidade alterada: "student", "course", "class", "class_subject", "enrollment",
+        "assessment", "grade", "lesson" ou "incident".
+    :type entity: str
+    :ivar operation: Operação: ``CREATED``, ``UPDATED`` ou ``DELETED``.
+    :type operation: str
+    :ivar ids: IDs das linhas alteradas. Fica vazio quando um comando em lote não informa os IDs
+        (ex: o quadro de notas); nesse caso, o assinante atualiza tudo o que estiver no escopo do evento.
+    :type ids: tuple[int, ...]
+    :ivar class_id: Turma afetada, quando conhecida.
+    :type class_id: int | None
+    :ivar class_subject_id: Disciplina da turma afetada, quando conhecida.
+    :type class_subject_id: int | None
+    """
+    entity: str
+    operation: str
+    ids: tuple[int, ...] = ()
+    class_id: int | None = None
+    class_subject_id: int | None = None
+
+
+# Define o barramento de eventos.
+class ChangeEventBus:
+    """
+    Distribui os eventos de alteração aos assinantes, na thread que fez o commit ou em uma fila.
+    """
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    # Registra um assinante e retorna a função que cancela a assinatura.
+    def subscribe(self, callback, entities=None, queue=None):
+        """
+        Registra ``callback(evento)`` para os eventos das entidades informadas.
+
+        :param callback: Função chamada com cada :class:`ChangeEvent`.
+        :param entities: Entidades de interesse (ex: ``{"student", "enrollment"}``). None recebe todas.
+        :param queue: Fila thread-safe consumida pela thread da interface. Se informada, o evento é entregue
+            como ``(callback, (evento,))``, e o callback pode atualizar widgets com segurança.
+        :return: Função sem argumentos que cancela a assinatura.
+        """
+        subscriber = (callback, frozenset(entities) if entities is not None else None, queue)
+        with self._lock:
+            self._subscribers.append(subscriber)
+
+        def unsubscribe():
+            with self._lock:
+                if subscriber in self._subscribers:
+                    self._subscribers.remove(subscriber)
+        return unsubscribe
+
+    # Entrega os eventos aos assinantes interessados, na ordem em que foram publicados.
+    def publish(self, events):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for change in events:
+            for callback, entities, queue in subscribers:
+                if entities is not None and change.entity not in entities:
+                    continue
+                if queue is not None:
+                    queue.put((callback, (change,)))
+                    continue
+                try:
+                    callback(change)
+                except Exception as e:
+                    # Um assinante com erro não impede a entrega aos demais.
+                    logging.error(f"Falha ao entregar o evento de alteração {change}: {e}", exc_info=True)
+
+
+# Barramento compartilhado pelo DataService e pelas telas.
+change_events = ChangeEventBus()
+
+
+# Define a função chamada pelos métodos de escrita do DataService.
+def publish_change(session: Session, entity: str, operation: str, ids=(), class_id: int | None = None,
+                   class_subject_id: int | None = None):
+    """
+    Registra um evento de alteração, entregue quando a transação da sessão for confirmada.
+
+    Eventos consecutivos com a mesma entidade, operação e escopo são agrupados em um só (ex: várias
+    notas alteradas na mesma disciplina).
+
+    :param session: Sessão em que a alteração foi feita.
+    :param ids: IDs das linhas alteradas (vazio se desconhecidos).
+    """
+    ids = tuple(i for i in ids if i is not None)
+    pending = session.info.setdefault(_PENDING_EVENTS, [])
+    transaction = session.get_nested_transaction()
+    if pending:
+        last_transaction, last = pending[-1]
+        if (last_transaction is transaction and last.entity == entity and last.operation == operation
+                and last.class_id == class_id and last.class_subject_id == class_subject_id):
+            merged = last.ids + tuple(i for i in ids if i not in last.ids)
+            pending[-1] = (transaction, ChangeEvent(entity, operation, merged, class_id, class_subject_id))
+            return
+    # O savepoint ativo é guardado junto com o evento, para descartá-lo se apenas o savepoint for revertido.
+    pending.append((transaction, ChangeEvent(entity, operation, ids, class_id, class_subject_id)))
+
+
+# Retorna os eventos registrados na sessão que ainda aguardam o commit.
+def pending_changes(session: Session) -> list[ChangeEvent]:
+    return [change for _, change in session.info.get(_PENDING_EVENTS, ())]
+
+
+# Ao confirmar a transação, entrega os eventos registrados.
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session):
+    pending = session.info.pop(_PENDING_EVENTS, None)
+    if pending:
+        change_events.publish([change for _, change in pending])
+
+
+# Ao reverter a transação, descarta os eventos registrados. Se apenas um savepoint foi revertido (ex: uma
+# unidade de trabalho com erro dentro de uma sessão injetada), descarta só os eventos registrados nele.
+# ('after_rollback' não serve aqui: ele também é disparado pelo ROLLBACK TO SAVEPOINT.)
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_after_rollback(session, previous_transaction):
+    pending = session.info.get(_PENDING_EVENTS)
+    if not pending:
+        return
+    if not previous_transaction.nested:
+        session.info.pop(_PENDING_EVENTS, None)
+        return
+
+    def inside_savepoint(transaction):
+        while transaction is not None:
+            if transaction is previous_transaction:
+                return True
+            transaction = transaction.parent
+        return False
+
+    session.info[_PENDING_EVENTS] = [(transaction, change) for transaction, change in pending
+                                     if not inside_savepoint(transaction)]
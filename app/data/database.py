@@ -1,20 +1,136 @@
-# Importa a função create_engine do SQLAlchemy para criar a conexão com o banco de dados.
-from sqlalchemy import create_engine
+# Importa o módulo de logging para registrar avisos sobre a configuração do banco.
+import logging
+# Importa a função create_engine do SQLAlchemy para criar a conexão com o banco de dados e 'event' para os hooks de conexão.
+from sqlalchemy import create_engine, event
 # Importa a função sessionmaker para criar sessões de banco de dados.
 from sqlalchemy.orm import sessionmaker
 # Importa o contextmanager para criar gerenciadores de contexto (para a sessão do banco).
 from contextlib import contextmanager
 # Importa a classe Base declarativa da qual todos os modelos herdam.
 from app.models.base import Base
+# Importa as configurações do perfil de armazenamento escolhido pelo usuário.
+from app.core.config import get_storage_profile, DEFAULT_STORAGE_PROFILE
 
 # Define a URL de conexão para o banco de dados SQLite.
 # O banco será um arquivo chamado 'academic_management.db' no mesmo diretório.
 DATABASE_URL = "sqlite:///academic_management.db"
 
-# Cria a 'engine' do SQLAlchemy, que gerencia a conexão com o banco de dados.
-# connect_args={"check_same_thread": False} é necessário para o SQLite permitir conexões de múltiplas threads,
-# o que é comum em aplicações com interface gráfica.
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Perfis de armazenamento do SQLite. Cada perfil é um conjunto de PRAGMAs aplicados em toda nova conexão.
+# - journal_mode=WAL permite leituras concorrentes com uma escrita e reduz o custo de cada commit.
+# - synchronous controla quantos fsyncs o SQLite faz: FULL é o mais seguro, NORMAL (seguro em WAL) é mais rápido.
+# - cache_size negativo é expresso em KiB (ex: -16384 = 16 MiB de cache de páginas por conexão).
+# - mmap_size define quantos bytes do arquivo são lidos via memória mapeada.
+# - temp_store define onde ficam as tabelas/índices temporários (ordenações grandes, por exemplo).
+# - busy_timeout (ms) faz a conexão esperar por um lock em vez de falhar imediatamente com "database is locked".
+STORAGE_PROFILES = {
+    # Padrão: cada commit é durável mesmo em caso de queda de energia.
+    "desktop-safe": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16384,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+    # Escritas em lote (importações, quadro de notas): um commit recente pode ser perdido numa queda de energia,
+    # mas o banco nunca fica corrompido.
+    "throughput": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    # Bancos grandes consultados com frequência (relatórios, assistente): cache e mmap maiores.
+    "read-heavy": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -131072,
+        "mmap_size": 1024 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000,
+    },
+}
+
+# Ordem em que os PRAGMAs são aplicados. 'journal_mode' vem primeiro porque altera o arquivo do banco.
+_PRAGMA_ORDER = ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store", "busy_timeout")
+
+
+# Define uma função para resolver o nome de um perfil, caindo no padrão se o nome for desconhecido.
+def resolve_storage_profile(profile_name: str | None) -> str:
+    """
+    Retorna o nome de um perfil de armazenamento válido.
+
+    :param profile_name: Nome do perfil solicitado (pode ser None).
+    :return: O próprio nome, se existir em STORAGE_PROFILES, ou o perfil padrão.
+    """
+    if profile_name in STORAGE_PROFILES:
+        return profile_name
+    if profile_name is not None:
+        logging.warning(f"Perfil de armazenamento desconhecido '{profile_name}'. Usando '{DEFAULT_STORAGE_PROFILE}'.")
+    return DEFAULT_STORAGE_PROFILE
+
+
+# Define a função que aplica os PRAGMAs de um perfil em uma conexão DBAPI (sqlite3) recém-aberta.
+def apply_storage_profile(dbapi_connection, profile_name: str):
+    """
+    Aplica os PRAGMAs do perfil de armazenamento em uma conexão sqlite3.
+
+    :param dbapi_connection: Conexão sqlite3 crua, recebida do evento 'connect' do SQLAlchemy.
+    :param profile_name: Nome de um perfil existente em STORAGE_PROFILES.
+    """
+    pragmas = STORAGE_PROFILES[profile_name]
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _PRAGMA_ORDER:
+            cursor.execute(f"PRAGMA {pragma}={pragmas[pragma]}")
+    finally:
+        cursor.close()
+
+
+# Define a função que ativa a verificação das chaves estrangeiras em uma conexão DBAPI (sqlite3) recém-aberta.
+def enable_foreign_keys(dbapi_connection):
+    """
+    Ativa a verificação das chaves estrangeiras (e as ações ON DELETE CASCADE) na conexão sqlite3.
+
+    O SQLite vem com a verificação desligada e a configuração vale apenas para a conexão atual,
+    por isso ela é aplicada em cada nova conexão, independentemente do perfil de armazenamento.
+
+    :param dbapi_connection: Conexão sqlite3 crua, recebida do evento 'connect' do SQLAlchemy.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA foreign_keys=ON")
+    finally:
+        cursor.close()
+
+
+# Define uma função que cria uma engine SQLite já configurada com um perfil de armazenamento.
+def create_app_engine(url: str, profile_name: str | None = None):
+    """
+    Cria a engine do SQLAlchemy e registra o hook que aplica o perfil de armazenamento a cada conexão.
+
+    :param url: URL de conexão SQLite.
+    :param profile_name: Nome do perfil. Se None ou desconhecido, usa o perfil padrão.
+    :return: A engine configurada.
+    """
+    profile = resolve_storage_profile(profile_name)
+    # connect_args={"check_same_thread": False} é necessário para o SQLite permitir conexões de múltiplas threads,
+    # o que é comum em aplicações com interface gráfica.
+    new_engine = create_engine(url, connect_args={"check_same_thread": False})
+
+    # O evento 'connect' é disparado uma única vez para cada conexão física aberta pelo pool.
+    @event.listens_for(new_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        apply_storage_profile(dbapi_connection, profile)
+        enable_foreign_keys(dbapi_connection)
+
+    return new_engine
+
+
+# Cria a 'engine' do SQLAlchemy, que gerencia a conexão com o banco de dados, usando o perfil configurado.
+engine = create_app_engine(DATABASE_URL, get_storage_profile())
 # Cria uma classe 'SessionLocal' que será usada para criar novas sessões de banco de dados.
 # autocommit=False e autoflush=False garantem que as transações sejam controladas manualmente.
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -27,11 +143,11 @@ def init_db():
 
 # Usa o decorador @contextmanager para transformar a função em um gerenciador de contexto.
 @contextmanager
-# Define uma função para obter uma sessão de banco de dados de forma segura.
-def get_db_session():
-    """Fornece um escopo transacional para uma série de operações."""
-    # Cria uma nova instância de sessão a partir da classe SessionLocal.
-    db = SessionLocal()
+# Define uma função que fornece um escopo transacional a partir de qualquer fábrica de sessões.
+def session_scope(session_factory):
+    """Fornece um escopo transacional usando a fábrica de sessões informada."""
+    # Cria uma nova instância de sessão a partir da fábrica.
+    db = session_factory()
     try:
         # 'yield' entrega a sessão para o código que está dentro do bloco 'with'.
         yield db
@@ -47,3 +163,11 @@ def get_db_session():
     finally:
         # A sessão é fechada para liberar os recursos do banco de dados.
         db.close()
+
+# Usa o decorador @contextmanager para transformar a função em um gerenciador de contexto.
+@contextmanager
+# Define uma função para obter uma sessão de banco de dados de forma segura.
+def get_db_session():
+    """Fornece um escopo transacional para uma série de operações."""
+    with session_scope(SessionLocal) as db:
+        yield db
@@ -0,0 +1,222 @@
+# Importa 'inspect' para identificar os métodos que devem ser instrumentados.
+import inspect
+# Importa 'threading' para proteger as estatísticas globais, atualizadas por várias threads.
+import threading
+# Importa 'time' para medir a duração de cada comando SQL.
+import time
+# Importa 'wraps' para preservar o nome, a documentação e os atributos dos métodos instrumentados.
+from functools import wraps
+# Importa 'ContextVar' para manter os escopos de contagem isolados por thread e por tarefa asyncio.
+from contextvars import ContextVar
+# Importa 'event' para registrar os eventos de execução de comandos e 'Engine' para registrá-los em todas as engines.
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Este módulo conta os comandos SQL executados e o tempo gasto neles, por método do DataService.
+# Os eventos são registrados na classe Engine, então valem para a engine da aplicação e para as engines dos testes.
+#
+# - @instrument_queries (decorador de classe) abre um escopo de contagem em cada método público.
+#   Chamadas aninhadas são incluídas no total do método externo (ex: um método que chama outro por linha).
+# - @query_budget(n) declara o número máximo de comandos SQL que um método pode executar.
+# - enforce_query_budgets() faz os métodos que excederem seu orçamento levantarem QueryBudgetExceeded.
+#   Os testes ativam isso automaticamente (veja tests/conftest.py), para que regressões N+1 sejam detectadas.
+# - QueryCounter conta os comandos de um bloco 'with' qualquer e pode impor um limite próprio.
+# Comandos de controle de transação (ex: o SAVEPOINT aberto sob demanda por uma unidade de trabalho) não são
+# contados: eles dependem de onde o método é chamado, não das consultas que ele faz.
+
+# Pilha de escopos de contagem ativos no contexto atual.
+_active_scopes: ContextVar[tuple] = ContextVar("active_query_scopes", default=())
+# Indica se os orçamentos declarados devem ser impostos no contexto atual.
+_enforce_budgets: ContextVar[bool] = ContextVar("enforce_query_budgets", default=False)
+
+# Estatísticas acumuladas por método: {nome: {"calls": int, "statements": int, "total_time": float}}.
+_query_stats: dict[str, dict] = {}
+_stats_lock = threading.Lock()
+
+# Primeiras palavras dos comandos de controle de transação, que não são contados.
+_TRANSACTION_CONTROL = frozenset({"BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE"})
+
+
+# Define a exceção levantada quando um método ou bloco excede seu orçamento de comandos SQL.
+class QueryBudgetExceeded(AssertionError):
+    """Levantada quando um método ou bloco executa mais comandos SQL do que o seu orçamento permite."""
+
+
+# Define um escopo de contagem (um método instrumentado ou um bloco QueryCounter).
+class _QueryScope:
+    def __init__(self, name: str, record_statements: bool = False):
+        self.name = name
+        self.count = 0
+        self.total_time = 0.0
+        # Os textos dos comandos só são guardados quando pedidos (QueryCounter), para não acumular memória em produção.
+        self.statements = [] if record_statements else None
+
+
+# Indica se o comando é de controle de transação (ex: "SAVEPOINT sa_savepoint_1", "ROLLBACK TO SAVEPOINT ...").
+def _is_transaction_control(statement: str) -> bool:
+    words = statement.split(None, 1)
+    return bool(words) and words[0].upper() in _TRANSACTION_CONTROL
+
+
+# Antes de cada comando, guarda o instante de início na conexão.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_scopes.get() and not _is_transaction_control(statement):
+        conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+
+# Depois de cada comando, soma o comando e sua duração a todos os escopos ativos.
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    scopes = _active_scopes.get()
+    if not scopes or _is_transaction_control(statement):
+        return
+    start_times = conn.info.get("query_start_times")
+    elapsed = time.perf_counter() - start_times.pop() if start_times else 0.0
+    for scope in scopes:
+        scope.count += 1
+        scope.total_time += elapsed
+        if scope.statements is not None:
+            scope.statements.append(statement)
+
+
+# Define o decorador que declara o orçamento de comandos SQL de um método.
+def query_budget(max_statements: int):
+    """
+    Declara o número máximo de comandos SQL que um método pode executar (incluindo chamadas aninhadas).
+
+    O orçamento só é imposto dentro de :func:`enforce_query_budgets` (ativado nos testes).
+
+    :param max_statements: Número máximo de comandos SQL.
+    """
+    def decorator(func):
+        func.__query_budget__ = max_statements
+        return func
+    return decorator
+
+
+# Define o gerenciador de contexto que ativa a imposição dos orçamentos.
+class enforce_query_budgets:
+    """Faz os métodos com @query_budget levantarem QueryBudgetExceeded quando excedem o orçamento."""
+
+    def __enter__(self):
+        self._token = _enforce_budgets.set(True)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _enforce_budgets.reset(self._token)
+        return False
+
+
+# Define o gerenciador de contexto que conta os comandos SQL de um bloco.
+class QueryCounter:
+    """
+    Conta os comandos SQL executados dentro do bloco 'with' (na thread ou tarefa atual).
+
+    Exemplo:
+        with QueryCounter(max_statements=2) as counter:
+            data_service.get_grades_for_subject(subject_id)
+        print(counter.count, counter.total_time)
+
+    :param max_statements: Se informado, levanta QueryBudgetExceeded ao sair do bloco caso o limite seja excedido.
+    """
+
+    def __init__(self, max_statements: int | None = None, name: str = "QueryCounter"):
+        self.max_statements = max_statements
+        self._scope = _QueryScope(name, record_statements=True)
+
+    @property
+    def count(self) -> int:
+        return self._scope.count
+
+    @property
+    def total_time(self) -> float:
+        return self._scope.total_time
+
+    @property
+    def statements(self) -> list[str]:
+        return self._scope.statements
+
+    def __enter__(self):
+        self._token = _active_scopes.set(_active_scopes.get() + (self._scope,))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _active_scopes.reset(self._token)
+        if exc_type is None and self.max_statements is not None and self.count > self.max_statements:
+            raise QueryBudgetExceeded(_budget_message(self._scope.name, self.count, self.max_statements, self.statements))
+        return False
+
+
+# Monta a mensagem de erro de orçamento excedido, listando os comandos quando disponíveis.
+def _budget_message(name: str, count: int, budget: int, statements: list[str] | None) -> str:
+    message = f"{name} executed {count} SQL statements, over its budget of {budget}."
+    if statements:
+        message += "\n" + "\n".join(f"  {i}: {' '.join(sql.split())}" for i, sql in enumerate(statements, start=1))
+    return message
+
+
+# Acumula as estatísticas de uma chamada de método.
+def _record(name: str, scope: _QueryScope):
+    with _stats_lock:
+        stats = _query_stats.setdefault(name, {"calls": 0, "statements": 0, "total_time": 0.0})
+        stats["calls"] += 1
+        stats["statements"] += scope.count
+        stats["total_time"] += scope.total_time
+
+
+# Envolve um método em um escopo de contagem.
+def _instrument(name: str, func):
+    budget = getattr(func, "__query_budget__", None)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        # Guarda os comandos apenas quando o orçamento está sendo imposto, para uma mensagem de erro útil.
+        enforce = budget is not None and _enforce_budgets.get()
+        scope = _QueryScope(name, record_statements=enforce)
+        token = _active_scopes.set(_active_scopes.get() + (scope,))
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            _active_scopes.reset(token)
+            _record(name, scope)
+        if enforce and scope.count > budget:
+            raise QueryBudgetExceeded(_budget_message(name, scope.count, budget, scope.statements))
+        return result
+
+    return wrapper
+
+
+# Define o decorador de classe que instrumenta todos os métodos públicos.
+def instrument_queries(cls):
+    """
+    Instrumenta os métodos públicos de instância de uma classe, registrando comandos SQL e tempo por método.
+
+    Métodos estáticos, de classe, privados (iniciados por '_') e geradores/gerenciadores de contexto
+    não são instrumentados.
+    """
+    for attr_name, attr in list(vars(cls).items()):
+        if attr_name.startswith("_") or not inspect.isfunction(attr):
+            continue
+        if inspect.isgeneratorfunction(inspect.unwrap(attr)):
+            continue
+        setattr(cls, attr_name, _instrument(f"{cls.__name__}.{attr_name}", attr))
+    return cls
+
+
+# Retorna uma cópia das estatísticas acumuladas.
+def get_query_stats() -> dict[str, dict]:
+    """
+    Retorna as estatísticas por método: número de chamadas, de comandos SQL e tempo total (em segundos).
+
+    :return: Dicionário {nome do método: {"calls", "statements", "total_time"}}.
+    """
+    with _stats_lock:
+        return {name: dict(stats) for name, stats in _query_stats.items()}
+
+
+# Apaga as estatísticas acumuladas.
+def reset_query_stats():
+    """Zera as estatísticas acumuladas."""
+    with _stats_lock:
+        _query_stats.clear()
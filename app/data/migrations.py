@@ -0,0 +1,351 @@
+# Importa o módulo de logging para registrar as migrações aplicadas.
+import logging
+# Importa 'date' e 'datetime' para converter as datas gravadas como texto.
+from datetime import date, datetime
+# Importa 'text' para executar SQL textual, 'inspect' para consultar a estrutura das tabelas e 'Date' para verificar o tipo declarado.
+from sqlalchemy import Date, inspect, text
+from sqlalchemy.schema import CreateTable
+# Importa a classe Base declarativa, cujos metadados descrevem as tabelas e índices dos modelos.
+from app.models.base import Base
+# Importa o pacote de modelos para garantir que todas as tabelas estejam registradas nos metadados.
+import app.models  # noqa: F401
+# Importa a criação e a reconstrução dos índices de busca textual.
+from app.models.full_text import create_full_text_tables, rebuild_stale_full_text_tables
+# Importa os comandos que recalculam o agregado de médias por aluno e disciplina.
+from app.models.student_subject_average import build_refresh_statements
+# Importa a normalização usada para preencher a chave de busca dos alunos.
+from app.utils.text_normalization import normalize_name
+
+# Este módulo mantém a versão do esquema do banco de dados e as alterações que o 'create_all' não consegue
+# aplicar em bancos já existentes (o 'create_all' só cria tabelas novas; não altera tabelas nem cria índices
+# em tabelas que já existem).
+#
+# A versão do esquema fica gravada no cabeçalho do arquivo SQLite ('PRAGMA user_version') e corresponde ao
+# número de migrações já aplicadas. Na inicialização, se a versão gravada for igual a SCHEMA_VERSION,
+# nada mais é feito; caso contrário, apenas as migrações pendentes são executadas.
+#
+# Cada migração é uma função que recebe uma conexão dentro de uma transação. Elas devem ser idempotentes,
+# pois bancos criados antes do versionamento (versão 0) podem já ter parte das alterações.
+
+# Tabelas cujos índices foram definidos no plano de índices das chaves estrangeiras.
+_INDEXED_TABLES = ("grades", "assessments", "incidents", "lessons", "class_enrollments", "class_subjects")
+
+
+# Define a migração que cria os índices das chaves estrangeiras mais consultadas.
+def _create_foreign_key_indexes(connection):
+    """
+    Cria, em bancos existentes, os índices declarados nos modelos para as chaves estrangeiras.
+
+    Antes de criar o índice único de (student_id, assessment_id), remove as notas duplicadas,
+    mantendo a mais recente (maior id) de cada par.
+
+    :param connection: Conexão do SQLAlchemy dentro de uma transação.
+    """
+    # Remove notas duplicadas, que impediriam a criação do índice único.
+    result = connection.execute(text(
+        "DELETE FROM grades WHERE id NOT IN "
+        "(SELECT MAX(id) FROM grades GROUP BY student_id, assessment_id)"
+    ))
+    if result.rowcount:
+        logging.warning(f"{result.rowcount} nota(s) duplicada(s) removida(s) antes de criar o índice único de notas.")
+
+    # Cria cada índice declarado nos modelos, ignorando os que já existem.
+    for table_name in _INDEXED_TABLES:
+        for index in Base.metadata.tables[table_name].indexes:
+            index.create(bind=connection, checkfirst=True)
+
+
+# Define a migração que adiciona e preenche a coluna de busca normalizada dos alunos.
+def _add_student_search_name(connection):
+    """
+    Adiciona a coluna 'students.search_name' em bancos existentes, preenche-a e cria seu índice.
+
+    A normalização (remoção de acentos) é feita em Python, pois o SQLite não oferece uma função equivalente.
+
+    :param connection: Conexão do SQLAlchemy dentro de uma transação.
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("students")}
+    if "search_name" not in columns:
+        connection.execute(text("ALTER TABLE students ADD COLUMN search_name VARCHAR NOT NULL DEFAULT ''"))
+
+    # Preenche apenas as linhas que ainda não têm a chave de busca.
+    rows = connection.execute(text(
+        "SELECT id, first_name, last_name FROM students WHERE search_name IS NULL OR search_name = ''"
+    )).all()
+    if rows:
+        connection.execute(
+            text("UPDATE students SET search_name = :search_name WHERE id = :id"),
+            [{"id": row.id, "search_name": normalize_name(f"{row.first_name} {row.last_name}")} for row in rows],
+        )
+
+    for index in Base.metadata.tables["students"].indexes:
+        index.create(bind=connection, checkfirst=True)
+
+
+# Define a migração que cria e popula os índices de busca textual (FTS5).
+def _create_full_text_search(connection):
+    """
+    Cria as tabelas de busca textual em bancos existentes e indexa as linhas já gravadas.
+
+    :param connection: Conexão do SQLAlchemy dentro de uma transação.
+    """
+    create_full_text_tables(connection)
+    rebuilt = rebuild_stale_full_text_tables(connection)
+    if rebuilt:
+        logging.info(f"Índices de busca reconstruídos: {', '.join(rebuilt)}.")
+
+
+# Define a migração que cria e preenche o agregado de médias por aluno e disciplina.
+def _create_student_subject_averages(connection):
+    """
+    Cria a tabela 'student_subject_averages' e a preenche a partir de todas as notas existentes.
+
+    :param connection: Conexão do SQLAlchemy dentro de uma transação.
+    """
+    Base.metadata.tables["student_subject_averages"].create(bind=connection, checkfirst=True)
+    for statement in build_refresh_statements():
+        connection.execute(statement)
+
+
+# Tabelas cujas chaves estrangeiras passaram a declarar ações ON DELETE (CASCADE ou RESTRICT).
+_CASCADING_TABLES = (
+    "class_subjects", "class_enrollments", "assessments", "grades", "lessons", "incidents", "student_subject_averages",
+)
+
+
+# Retorna as ações ON DELETE das chaves estrangeiras de uma tabela: {coluna: ação}.
+def _on_delete_actions(connection, table_name: str) -> dict[str, str]:
+    rows = connection.execute(text(f"PRAGMA foreign_key_list({table_name})")).mappings()
+    return {row["from"]: row["on_delete"].upper() for row in rows}
+
+
+# Recria uma tabela com a definição atual do modelo, preservando as linhas (e os IDs).
+def _rebuild_table(connection, table):
+    """
+    Recria a tabela seguindo o procedimento recomendado pelo SQLite: cria a tabela nova, copia as linhas,
+    remove a antiga e renomeia a nova. Deve ser executada com 'PRAGMA foreign_keys=OFF' (veja run_migrations),
+    para que a remoção da tabela antiga não dispare as exclusões em cascata. Os gatilhos da busca textual
+    são removidos junto com a tabela antiga; recrie-os com 'create_full_text_tables'.
+
+    :param connection: Conexão do SQLAlchemy dentro de uma transação.
+    :param table: Tabela dos metadados dos modelos.
+    """
+    columns = ", ".join(column.name for column in table.columns)
+    new_name = f"_new_{table.name}"
+    # Cria a tabela nova (sem os índices, cujos nomes ainda pertencem à tabela antiga). As tabelas referenciadas
+    # são copiadas para os mesmos metadados, para que as chaves estrangeiras da tabela nova possam ser resolvidas.
+    metadata = type(Base.metadata)()
+    for foreign_key in table.foreign_keys:
+        if foreign_key.column.table.name not in metadata.tables:
+            foreign_key.column.table.to_metadata(metadata)
+    new_table = table.to_metadata(metadata, name=new_name)
+    connection.execute(CreateTable(new_table))
+    connection.execute(text(f"INSERT INTO {new_name} ({columns}) SELECT {columns} FROM {table.name}"))
+    # Remover a tabela antiga remove também seus índices e gatilhos.
+    connection.execute(text(f"DROP TABLE {table.name}"))
+    connection.execute(text(f"ALTER TABLE {new_name} RENAME TO {table.name}"))
+    for index in table.indexes:
+        index.create(bind=connection)
+
+
+# Define a migração que recria as tabelas com chaves estrangeiras ON DELETE CASCADE.
+def _rebuild_tables_with_cascading_foreign_keys(connection):
+    """
+    Recria as tabelas dependentes com as ações ON DELETE declaradas nos modelos.
+
+    O SQLite não altera restrições de tabelas existentes, então cada tabela é recriada (veja _rebuild_table).
+
+    Antes disso, remove as linhas órfãs deixadas pelas exclusões feitas sem verificação de chaves
+    estrangeiras (ex: notas de alunos já excluídos), como o ON DELETE CASCADE teria feito.
+
+    :param connection: Conexão do SQLAlchemy dentro de uma transação.
+    """
+    tables = [table for table in Base.metadata.sorted_tables if table.name in _CASCADING_TABLES]
+
+    # Remove as linhas órfãs, das tabelas referenciadas para as dependentes, para que a limpeza se propague.
+    for table in tables:
+        for foreign_key in table.foreign_keys:
+            parent = foreign_key.column
+            result = connection.execute(text(
+                f"DELETE FROM {table.name} WHERE {foreign_key.parent.name} IS NOT NULL "
+                f"AND {foreign_key.parent.name} NOT IN (SELECT {parent.name} FROM {parent.table.name})"
+            ))
+            if result.rowcount:
+                logging.warning(f"{result.rowcount} linha(s) órfã(s) removida(s) de '{table.name}'.")
+
+    for table in tables:
+        expected = {fk.parent.name: (fk.ondelete or "NO ACTION").upper() for fk in table.foreign_keys}
+        if _on_delete_actions(connection, table.name) == expected:
+            continue
+        _rebuild_table(connection, table)
+
+    # Recria os gatilhos da busca textual das tabelas recriadas (os IDs foram preservados, então os índices continuam válidos).
+    create_full_text_tables(connection)
+
+    violations = connection.execute(text("PRAGMA foreign_key_check")).all()
+    if violations:
+        raise RuntimeError(f"Foreign key violations after rebuilding tables: {violations[:5]}")
+
+
+# Define a migração que cria o índice da paginação por cursor da lista de alunos.
+def _create_student_name_order_index(connection):
+    """
+    Cria, em bancos existentes, o índice (first_name, last_name, id) usado pela paginação dos alunos.
+
+    :param connection: Conexão do SQLAlchemy dentro de uma transação.
+    """
+    for index in Base.metadata.tables["students"].indexes:
+        index.create(bind=connection, checkfirst=True)
+
+
+# Colunas de data que eram declaradas como texto: {tabela: coluna}.
+_DATE_COLUMNS = {"grades": "date_recorded", "students": "enrollment_date"}
+
+# Formatos aceitos ao converter datas gravadas fora do padrão ISO (ex: importadas de planilhas).
+_LEGACY_DATE_FORMATS = ("%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d")
+
+
+# Converte um texto de data fora do padrão ISO, retornando None se nenhum formato conhecido servir.
+def _parse_legacy_date(value) -> date | None:
+    for date_format in _LEGACY_DATE_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+# Define a migração que converte as datas gravadas como texto em colunas do tipo DATE indexadas.
+def _convert_date_columns(connection):
+    """
+    Converte 'grades.date_recorded' e 'students.enrollment_date' em colunas DATE e cria seus índices.
+
+    O SQLite guarda as datas como texto ISO (AAAA-MM-DD) nos dois casos, então a conversão consiste em:
+
+    - normalizar os valores: datas com hora (ex: '2024-03-01 10:00:00') perdem a hora e outros formatos
+      conhecidos (ex: '01/03/2024') são convertidos. Valores que não são datas recebem a data da migração,
+      com um aviso no log, pois o modelo os rejeitaria na leitura;
+    - recriar as tabelas ainda declaradas como texto, para que o esquema declare o tipo DATE;
+    - criar os índices, que tornam as consultas por período buscas por intervalo.
+
+    :param connection: Conexão do SQLAlchemy dentro de uma transação.
+    """
+    rebuilt = False
+    for table_name, column_name in _DATE_COLUMNS.items():
+        # Normaliza no banco os valores que o SQLite reconhece como data, mas não estão no formato AAAA-MM-DD.
+        connection.execute(text(
+            f"UPDATE {table_name} SET {column_name} = date({column_name}) "
+            f"WHERE date({column_name}) IS NOT NULL AND {column_name} IS NOT date({column_name})"
+        ))
+        rows = connection.execute(text(
+            f"SELECT id, {column_name} FROM {table_name} WHERE date({column_name}) IS NULL"
+        )).all()
+        if rows:
+            fixed = [(row[0], _parse_legacy_date(row[1])) for row in rows]
+            invalid = sum(1 for _, value in fixed if value is None)
+            if invalid:
+                logging.warning(f"{invalid} data(s) inválida(s) em '{table_name}.{column_name}' substituída(s) pela data de hoje.")
+            connection.execute(
+                text(f"UPDATE {table_name} SET {column_name} = :value WHERE id = :id"),
+                [{"id": row_id, "value": (value or date.today()).isoformat()} for row_id, value in fixed],
+            )
+
+        table = Base.metadata.tables[table_name]
+        declared = {column["name"]: column["type"] for column in inspect(connection).get_columns(table_name)}
+        if not isinstance(declared[column_name], Date):
+            _rebuild_table(connection, table)
+            rebuilt = True
+        else:
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
+
+    if rebuilt:
+        # Recria os gatilhos da busca textual dos alunos (os IDs foram preservados, então o índice continua válido).
+        create_full_text_tables(connection)
+
+
+# Lista ordenada das migrações. Novas migrações devem ser adicionadas sempre ao final.
+MIGRATIONS = [
+    ("foreign_key_indexes", _create_foreign_key_indexes),
+    ("student_search_name", _add_student_search_name),
+    ("full_text_search", _create_full_text_search),
+    ("student_subject_averages", _create_student_subject_averages),
+    ("cascading_foreign_keys", _rebuild_tables_with_cascading_foreign_keys),
+    ("student_name_order_index", _create_student_name_order_index),
+    ("typed_date_columns", _convert_date_columns),
+]
+
+
+# Versão do esquema esperada por esta versão da aplicação.
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+# Define a função que lê a versão do esquema gravada no banco.
+def get_schema_version(connection) -> int:
+    """
+    Retorna a versão do esquema gravada no banco ('PRAGMA user_version'). Bancos novos retornam 0.
+
+    :param connection: Conexão do SQLAlchemy.
+    """
+    return connection.execute(text("PRAGMA user_version")).scalar()
+
+
+# Define a função que aplica as migrações a partir de uma versão.
+def run_migrations(engine, from_version: int = 0):
+    """
+    Aplica as migrações pendentes em ordem, cada uma em sua própria transação.
+
+    A versão do esquema é atualizada na mesma transação da migração, então uma falha
+    no meio do processo não deixa o banco marcado com uma versão que não foi aplicada.
+
+    As migrações são executadas com a verificação de chaves estrangeiras desligada, pois recriar uma
+    tabela (DROP TABLE) com ela ligada dispararia as exclusões em cascata nas tabelas dependentes.
+
+    :param engine: Engine do SQLAlchemy conectada ao banco a ser atualizado.
+    :param from_version: Número de migrações já aplicadas no banco.
+    """
+    with engine.connect() as connection:
+        # 'PRAGMA foreign_keys' só tem efeito fora de uma transação.
+        foreign_keys = connection.execute(text("PRAGMA foreign_keys")).scalar()
+        connection.execute(text("PRAGMA foreign_keys=OFF"))
+        connection.commit()
+        try:
+            for version, (name, migration) in enumerate(MIGRATIONS[from_version:], start=from_version + 1):
+                with connection.begin():
+                    migration(connection)
+                    connection.execute(text(f"PRAGMA user_version = {version}"))
+                logging.info(f"Migração '{name}' aplicada (versão do esquema: {version}).")
+        finally:
+            # Restaura a configuração da conexão, que volta ao pool.
+            connection.rollback()
+            connection.execute(text(f"PRAGMA foreign_keys={'ON' if foreign_keys else 'OFF'}"))
+            connection.commit()
+
+
+# Define a função chamada na inicialização para garantir que o esquema esteja atualizado.
+def ensure_schema(engine) -> int:
+    """
+    Garante que o banco esteja na versão SCHEMA_VERSION.
+
+    Quando o esquema já está atualizado, faz apenas a leitura de 'PRAGMA user_version'.
+    Caso contrário, cria as tabelas que faltam e aplica as migrações pendentes.
+
+    :param engine: Engine do SQLAlchemy conectada ao banco.
+    :return: A versão do esquema encontrada antes da atualização.
+    """
+    with engine.connect() as connection:
+        current_version = get_schema_version(connection)
+
+    if current_version == SCHEMA_VERSION:
+        return current_version
+
+    if current_version > SCHEMA_VERSION:
+        logging.warning(f"O banco de dados está na versão {current_version} do esquema, mais nova que a "
+                        f"versão {SCHEMA_VERSION} desta aplicação. Nenhuma migração será aplicada.")
+        return current_version
+
+    logging.info(f"Atualizando o esquema do banco de dados da versão {current_version} para {SCHEMA_VERSION}...")
+    # O create_all ignora as tabelas que já existem.
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine, from_version=current_version)
+    return current_version
@@ -0,0 +1,207 @@
+# Importa 'copy' para que quem recebe um resultado do cache não altere a cópia guardada.
+import copy
+# Importa 'itertools' para gerar os números de versão das tabelas.
+import itertools
+# Importa 'threading' para proteger o cache, usado pela thread da interface e pelo pool de threads do banco.
+import threading
+# Importa 'OrderedDict' para manter as entradas na ordem de uso (LRU).
+from collections import OrderedDict
+# Importa 'event' para observar as escritas feitas pelas sessões e 'Session' para registrar os eventos.
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+# Importa a Base declarativa, cujos metadados descrevem as exclusões em cascata entre as tabelas.
+from app.models.base import Base
+
+# Este módulo implementa o cache de leitura dos dados de referência do DataService (cursos, turmas,
+# disciplinas, avaliações), que mudam pouco e são consultados o tempo todo pelas telas e pelo assistente.
+#
+# - Cada tabela tem um número de versão, incrementado sempre que uma sessão escreve nela: pelo ORM (flush)
+#   ou por comandos INSERT/UPDATE/DELETE executados na sessão. A exclusão de uma linha também incrementa
+#   as tabelas que o banco altera em cascata (ON DELETE CASCADE). As versões são incrementadas na escrita
+#   e de novo no fim da transação, pois outra thread pode ler os dados antigos entre a escrita e o commit.
+# - Cada entrada do cache guarda as versões das tabelas lidas; se alguma mudou, a entrada é descartada.
+# - 'PRAGMA data_version' detecta commits feitos por outras conexões (ex: outro processo usando o mesmo
+#   arquivo). Como o valor é próprio de cada conexão, o último valor visto é guardado no 'info' da conexão
+#   do pool, que acompanha a conexão sqlite3 enquanto ela existir.
+
+# Chave usada em 'Session.info' para guardar as tabelas escritas na transação atual.
+_WRITTEN_TABLES = "query_cache_written_tables"
+
+# Versões atuais das tabelas: {nome da tabela: versão}. Tabelas nunca escritas têm versão 0.
+_table_versions: dict[str, int] = {}
+_versions_lock = threading.Lock()
+_version_counter = itertools.count(1)
+
+
+# Retorna as tabelas alteradas pelo banco quando uma linha da tabela é excluída (ON DELETE CASCADE/SET NULL).
+def _cascade_targets(table_name: str) -> set[str]:
+    targets, pending = set(), [table_name]
+    while pending:
+        parent = pending.pop()
+        for table in Base.metadata.tables.values():
+            if table.name in targets:
+                continue
+            for foreign_key in table.foreign_keys:
+                if foreign_key.column.table.name == parent and foreign_key.ondelete in ("CASCADE", "SET NULL"):
+                    targets.add(table.name)
+                    pending.append(table.name)
+                    break
+    return targets
+
+
+# Incrementa a versão das tabelas informadas.
+def bump_table_versions(table_names):
+    """
+    Marca as tabelas como alteradas, invalidando as entradas de cache que dependem delas.
+
+    :param table_names: Nomes das tabelas alteradas.
+    """
+    with _versions_lock:
+        for table_name in table_names:
+            _table_versions[table_name] = next(_version_counter)
+
+
+# Retorna as versões atuais das tabelas informadas, na mesma ordem.
+def get_table_versions(table_names) -> tuple[int, ...]:
+    with _versions_lock:
+        return tuple(_table_versions.get(table_name, 0) for table_name in table_names)
+
+
+# Registra tabelas escritas por uma sessão: incrementa as versões agora e guarda-as para o fim da transação.
+def _record_writes(session, table_names: set[str]):
+    if not table_names:
+        return
+    bump_table_versions(table_names)
+    session.info.setdefault(_WRITTEN_TABLES, set()).update(table_names)
+
+
+# Escritas feitas pelo ORM (objetos novos, alterados ou excluídos) durante um flush.
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    table_names = set()
+    for obj in (*session.new, *session.dirty):
+        table = getattr(obj, "__table__", None)
+        if table is not None:
+            table_names.add(table.name)
+    for obj in session.deleted:
+        table = getattr(obj, "__table__", None)
+        if table is not None:
+            table_names.add(table.name)
+            table_names.update(_cascade_targets(table.name))
+    _record_writes(session, table_names)
+
+
+# Comandos INSERT, UPDATE e DELETE executados diretamente na sessão (ex: exclusões e upserts em lote).
+@event.listens_for(Session, "do_orm_execute")
+def _on_execute(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    if table is None:
+        return
+    table_names = {table.name}
+    if orm_execute_state.is_delete:
+        table_names.update(_cascade_targets(table.name))
+    _record_writes(orm_execute_state.session, table_names)
+
+
+# No fim da transação (commit ou rollback), incrementa novamente as tabelas escritas.
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _after_transaction(session):
+    bump_table_versions(session.info.pop(_WRITTEN_TABLES, ()))
+
+
+# Define o cache de leitura com invalidação por versão de tabela.
+class QueryCache:
+    """
+    Cache LRU, limitado em tamanho, para os resultados das consultas de dados de referência.
+
+    As entradas são identificadas pelo método e pelos argumentos e guardam as versões das tabelas
+    lidas. Uma entrada é descartada quando alguma dessas tabelas é escrita por qualquer sessão da
+    aplicação, e o cache inteiro é descartado quando outra conexão grava no banco ('PRAGMA data_version').
+
+    :param max_entries: Número máximo de entradas; as menos usadas recentemente são descartadas.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        if max_entries < 1:
+            raise ValueError("max_entries must be positive.")
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Chave do último 'PRAGMA data_version' visto por este cache no 'info' de cada conexão.
+        self._info_key = ("query_cache_data_version", id(self))
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    # Busca uma entrada válida. Retorna (True, valor) em caso de acerto e (False, None) caso contrário.
+    def lookup(self, key, table_names) -> tuple[bool, object]:
+        versions = get_table_versions(table_names)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == versions:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return True, copy.deepcopy(entry[1])
+            if entry is not None:
+                # A entrada ficou desatualizada por uma escrita em uma das tabelas.
+                del self._entries[key]
+            self._stats["misses"] += 1
+            return False, None
+
+    # Guarda um resultado, desde que as tabelas não tenham mudado desde 'versions' (lidas antes da consulta).
+    def store(self, key, value, table_names, versions: tuple[int, ...]):
+        if get_table_versions(table_names) != versions:
+            return
+        with self._lock:
+            self._entries[key] = (versions, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    # Descarta o cache se outra conexão gravou no banco desde a última verificação nesta conexão.
+    def check_data_version(self, pool_connection):
+        """
+        Compara o 'PRAGMA data_version' da conexão com o último valor visto nela.
+
+        O comando é executado diretamente na conexão sqlite3, fora da contagem de comandos do DataService.
+        Na primeira vez que uma conexão é vista, o cache também é descartado, pois não há como saber o que
+        outras conexões gravaram antes dela.
+
+        :param pool_connection: Conexão do pool usada pela sessão (ex: ``session.connection().connection``).
+        """
+        cursor = pool_connection.dbapi_connection.cursor()
+        try:
+            data_version = cursor.execute("PRAGMA data_version").fetchone()[0]
+        finally:
+            cursor.close()
+        with self._lock:
+            if pool_connection.info.get(self._info_key) != data_version:
+                pool_connection.info[self._info_key] = data_version
+                if self._entries:
+                    self._entries.clear()
+                    self._stats["invalidations"] += 1
+
+    # Descarta todas as entradas.
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # Retorna as estatísticas de uso do cache.
+    def stats(self) -> dict:
+        """
+        Retorna os acertos, as falhas, as entradas descartadas por tamanho ("evictions"), os descartes
+        por escrita de outra conexão ("invalidations"), o número de entradas ("size") e a taxa de acerto.
+        """
+        with self._lock:
+            stats = dict(self._stats, size=len(self._entries))
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    # Zera as estatísticas.
+    def reset_stats(self):
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = 0
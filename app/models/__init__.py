@@ -7,3 +7,6 @@ from .grade import Grade
 from .class_enrollment import ClassEnrollment
 from .lesson import Lesson
 from .incident import Incident
+from .student_subject_average import StudentSubjectAverage
+# Registra as tabelas de busca textual (FTS5), criadas junto com as tabelas acima.
+from . import full_text
@@ -33,7 +33,8 @@ class Assessment(Base):
     # Define a coluna 'weight' como um número de ponto flutuante (decimal), obrigatório, com valor padrão 1.0.
     weight = Column(Float, nullable=False, default=1.0)
     # Define a coluna 'class_subject_id' como um inteiro que é uma chave estrangeira.
-    class_subject_id = Column(Integer, ForeignKey('class_subjects.id'), nullable=False)
+    # Indexada porque todas as consultas de avaliações e notas partem da disciplina da turma.
+    class_subject_id = Column(Integer, ForeignKey('class_subjects.id', ondelete='CASCADE'), nullable=False, index=True)
 
     # Relacionamento com ClassSubject
     class_subject = relationship("ClassSubject", back_populates="assessments")
@@ -46,14 +46,16 @@ class Class(Base):
     # O campo é obrigatório e o valor padrão é 'arithmetic'.
     calculation_method = Column(Enum('arithmetic', 'weighted', name='calculation_methods'), nullable=False, default='arithmetic')
 
+    # Os dependentes da turma são excluídos pelo banco (ON DELETE CASCADE); 'passive_deletes=True' evita
+    # que o ORM os carregue na memória só para excluí-los.
     # Relacionamento com ClassSubject (Disciplinas da Turma)
-    subjects = relationship("ClassSubject", back_populates="class_", cascade="all, delete-orphan")
+    subjects = relationship("ClassSubject", back_populates="class_", cascade="all, delete-orphan", passive_deletes=True)
 
     # Define o relacionamento com ClassEnrollment (matrículas), criando a referência inversa.
-    enrollments = relationship("ClassEnrollment", back_populates="class_", cascade="all, delete-orphan")
+    enrollments = relationship("ClassEnrollment", back_populates="class_", cascade="all, delete-orphan", passive_deletes=True)
 
     # Define o relacionamento com Incident (incidentes).
-    incidents = relationship("Incident", back_populates="class_", cascade="all, delete-orphan")
+    incidents = relationship("Incident", back_populates="class_", cascade="all, delete-orphan", passive_deletes=True)
 
     # Define uma representação em string para o objeto Class, útil para depuração.
     def __repr__(self):
@@ -1,5 +1,5 @@
 # Importa os tipos de coluna necessários e a restrição de unicidade (UniqueConstraint) do SQLAlchemy.
-from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint, Index
 # Importa a função 'relationship' para definir relacionamentos entre modelos.
 from sqlalchemy.orm import relationship
 # Importa a classe 'Base' declarativa da qual todos os modelos devem herdar.
@@ -38,9 +38,9 @@ class ClassEnrollment(Base):
     # Define a coluna 'id' como um inteiro, chave primária e com autoincremento.
     id = Column(Integer, primary_key=True, autoincrement=True)
     # Define a coluna 'class_id' como uma chave estrangeira para a tabela 'classes'. Não pode ser nula.
-    class_id = Column(Integer, ForeignKey('classes.id'), nullable=False)
+    class_id = Column(Integer, ForeignKey('classes.id', ondelete='CASCADE'), nullable=False)
     # Define a coluna 'student_id' como uma chave estrangeira para a tabela 'students'. Não pode ser nula.
-    student_id = Column(Integer, ForeignKey('students.id'), nullable=False)
+    student_id = Column(Integer, ForeignKey('students.id', ondelete='CASCADE'), nullable=False)
     # Define a coluna 'call_number' (número de chamada) como um inteiro. Não pode ser nula.
     call_number = Column(Integer, nullable=False)
     # Define a coluna 'status' como uma string, com valor padrão 'Active'. Ex: "Active", "Inactive".
@@ -59,6 +59,8 @@ class ClassEnrollment(Base):
         UniqueConstraint('class_id', 'student_id', name='_class_student_uc'),
         # Garante que a combinação de 'class_id' e 'call_number' seja única. Não pode haver dois números de chamada iguais na mesma turma.
         UniqueConstraint('class_id', 'call_number', name='_class_call_number_uc'),
+        # As restrições acima já indexam 'class_id'. Este índice atende às buscas pelas matrículas de um aluno.
+        Index('ix_class_enrollments_student_id', 'student_id'),
     )
 
     # Define uma representação em string para o objeto ClassEnrollment, útil para depuração.
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.models.base import Base
 
@@ -14,19 +14,23 @@ class ClassSubject(Base):
     __tablename__ = 'class_subjects'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    class_id = Column(Integer, ForeignKey('classes.id'), nullable=False)
-    course_id = Column(Integer, ForeignKey('courses.id'), nullable=False)
+    class_id = Column(Integer, ForeignKey('classes.id', ondelete='CASCADE'), nullable=False)
+    course_id = Column(Integer, ForeignKey('courses.id', ondelete='RESTRICT'), nullable=False)
 
     # Relacionamentos
     class_ = relationship("Class", back_populates="subjects")
     course = relationship("Course", back_populates="class_subjects")
 
-    # Objetos dependentes dessa associação
-    assessments = relationship("Assessment", back_populates="class_subject", cascade="all, delete-orphan")
-    lessons = relationship("Lesson", back_populates="class_subject", cascade="all, delete-orphan")
+    # Objetos dependentes dessa associação. As chaves estrangeiras usam ON DELETE CASCADE, então o banco
+    # os remove junto com a disciplina (passive_deletes evita carregá-los na memória só para excluí-los).
+    assessments = relationship("Assessment", back_populates="class_subject", cascade="all, delete-orphan", passive_deletes=True)
+    lessons = relationship("Lesson", back_populates="class_subject", cascade="all, delete-orphan", passive_deletes=True)
+    student_averages = relationship("StudentSubjectAverage", cascade="all, delete-orphan", passive_deletes=True)
 
     __table_args__ = (
         UniqueConstraint('class_id', 'course_id', name='_class_course_uc'),
+        # A restrição acima já indexa 'class_id'; este índice atende às buscas a partir da disciplina (curso).
+        Index('ix_class_subjects_course_id', 'course_id'),
     )
 
     def __repr__(self):
@@ -0,0 +1,105 @@
+# Importa o módulo de expressões regulares para separar os termos de busca.
+import re
+# Importa 'event' para registrar a criação das tabelas de busca junto com as demais e 'text' para executar SQL.
+from sqlalchemy import event, text
+# Importa a classe 'Base' declarativa, cujos metadados disparam o evento de criação.
+from app.models.base import Base
+# Importa a normalização usada nos termos de busca.
+from app.utils.text_normalization import normalize_name
+
+# Índices de busca textual (SQLite FTS5) para alunos, aulas e incidentes.
+# São tabelas virtuais de "conteúdo externo": guardam apenas o índice invertido e leem o texto
+# da tabela original (content=...), então o texto não é duplicado no arquivo do banco.
+# Os gatilhos (triggers) mantêm o índice sincronizado em qualquer escrita, inclusive as feitas fora do DataService.
+# O tokenizador 'unicode61' com 'remove_diacritics 2' ignora acentos e maiúsculas ("JOÃO" encontra "joao").
+
+# Define, para cada tipo pesquisável, a tabela de origem e as colunas indexadas.
+FULL_TEXT_TABLES = {
+    "student": {"fts_table": "students_fts", "source_table": "students", "columns": ("first_name", "last_name")},
+    "lesson": {"fts_table": "lessons_fts", "source_table": "lessons", "columns": ("title", "content")},
+    "incident": {"fts_table": "incidents_fts", "source_table": "incidents", "columns": ("description",)},
+}
+
+# Opções do tokenizador usadas em todas as tabelas de busca.
+_TOKENIZER = "unicode61 remove_diacritics 2"
+
+
+# Gera os comandos SQL que criam a tabela virtual e os gatilhos de um tipo pesquisável.
+def _full_text_ddl(fts_table: str, source_table: str, columns: tuple) -> list[str]:
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        f"{column_list}, content='{source_table}', content_rowid='id', tokenize='{_TOKENIZER}')",
+        # Após inserir na tabela de origem, indexa a nova linha.
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {source_table} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END",
+        # Após excluir, remove a linha do índice (o comando especial 'delete' exige os valores antigos).
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {source_table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END",
+        # Após alterar uma coluna indexada, remove a versão antiga e indexa a nova.
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {column_list} ON {source_table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END",
+    ]
+
+
+# Define a função que cria (se necessário) todas as tabelas de busca e seus gatilhos.
+def create_full_text_tables(connection):
+    """
+    Cria as tabelas virtuais FTS5 e os gatilhos de sincronização, ignorando os que já existem.
+
+    :param connection: Conexão do SQLAlchemy.
+    """
+    for definition in FULL_TEXT_TABLES.values():
+        for statement in _full_text_ddl(**definition):
+            connection.execute(text(statement))
+
+
+# Define a função que reconstrói os índices de busca que estão fora de sincronia com a tabela de origem.
+def rebuild_stale_full_text_tables(connection) -> list[str]:
+    """
+    Reconstrói os índices de busca que não cobrem todas as linhas da tabela de origem.
+
+    Isso acontece quando a tabela de busca é criada em um banco que já tinha dados.
+    A tabela auxiliar '<tabela>_docsize' do FTS5 tem uma linha por documento indexado.
+
+    :param connection: Conexão do SQLAlchemy.
+    :return: Lista com os nomes das tabelas de busca reconstruídas.
+    """
+    rebuilt = []
+    for definition in FULL_TEXT_TABLES.values():
+        fts_table, source_table = definition["fts_table"], definition["source_table"]
+        indexed = connection.execute(text(f"SELECT COUNT(*) FROM {fts_table}_docsize")).scalar()
+        total = connection.execute(text(f"SELECT COUNT(*) FROM {source_table}")).scalar()
+        if indexed != total:
+            connection.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
+            rebuilt.append(fts_table)
+    return rebuilt
+
+
+# Define a função que converte o texto digitado pelo usuário em uma expressão MATCH segura do FTS5.
+def build_match_query(search_text: str | None) -> str | None:
+    """
+    Converte um texto livre em uma consulta FTS5 em que todos os termos devem aparecer como prefixo.
+
+    Exemplo:
+        build_match_query("João Sil") -> '"joao"* "sil"*'
+
+    Cada termo é colocado entre aspas, de modo que operadores do FTS5 (AND, OR, NEAR, '-', ':')
+    digitados pelo usuário sejam tratados como texto comum.
+
+    :param search_text: O texto de busca.
+    :return: A expressão MATCH ou None se o texto não tiver nenhum termo pesquisável.
+    """
+    terms = re.findall(r"\w+", normalize_name(search_text))
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+# Cria as tabelas de busca sempre que 'Base.metadata.create_all' for executado (banco novo ou testes).
+@event.listens_for(Base.metadata, "after_create")
+def _create_full_text_tables_after_create(target, connection, **kw):
+    create_full_text_tables(connection)
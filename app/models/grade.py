@@ -1,5 +1,5 @@
 # Importa os tipos de coluna necessários e a restrição de verificação (CheckConstraint) do SQLAlchemy.
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, CheckConstraint
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey, CheckConstraint, Index
 # Importa a função 'relationship' para definir relacionamentos entre modelos.
 from sqlalchemy.orm import relationship
 # Importa a classe 'Base' declarativa da qual todos os modelos devem herdar.
@@ -26,9 +26,8 @@ class Grade(Base):
     :ivar score: Nota obtida pelo aluno na avaliação em questão. Deve ser um número
         maior ou igual a 0.
     :type score: float
-    :ivar date_recorded: Data em que a nota foi registrada. Representada como uma
-        string. Em aplicações reais, idealmente deveria ser do tipo DateTime.
-    :type date_recorded: str
+    :ivar date_recorded: Data em que a nota foi registrada (indexada, para as consultas por período).
+    :type date_recorded: datetime.date
     """
     # Define o nome da tabela no banco de dados para este modelo.
     __tablename__ = 'grades'
@@ -36,14 +35,14 @@ class Grade(Base):
     # Define a coluna 'id' como um inteiro, chave primária e com autoincremento.
     id = Column(Integer, primary_key=True, autoincrement=True)
     # Define a coluna 'student_id' como uma chave estrangeira para a tabela 'students'. Não pode ser nula.
-    student_id = Column(Integer, ForeignKey('students.id'), nullable=False)
+    student_id = Column(Integer, ForeignKey('students.id', ondelete='CASCADE'), nullable=False)
     # Define a coluna 'assessment_id' como uma chave estrangeira para a tabela 'assessments'. Não pode ser nula.
-    assessment_id = Column(Integer, ForeignKey('assessments.id'), nullable=False)
+    assessment_id = Column(Integer, ForeignKey('assessments.id', ondelete='CASCADE'), nullable=False)
     # Define a coluna 'score' (nota) como um número de ponto flutuante. Não pode ser nula.
     score = Column(Float, nullable=False)
-    # Define a coluna 'date_recorded' (data de registro) como uma string. Não pode ser nula.
-    # Observação no código original: Em uma aplicação real, isso deveria ser do tipo DateTime.
-    date_recorded = Column(String, nullable=False)
+    # Define a coluna 'date_recorded' (data de registro) como do tipo Date. Não pode ser nula.
+    # O SQLite grava as datas como texto ISO (AAAA-MM-DD), cuja ordem de texto é a ordem das datas.
+    date_recorded = Column(Date, nullable=False)
 
     # Define o relacionamento com o modelo Student. 'back_populates' cria a referência inversa no modelo Student.
     student = relationship("Student", back_populates="grades")
@@ -54,6 +53,13 @@ class Grade(Base):
     __table_args__ = (
         # Garante que o valor da coluna 'score' seja sempre maior ou igual a 0.
         CheckConstraint('score >= 0', name='check_score_positive'),
+        # Garante que um aluno tenha no máximo uma nota por avaliação.
+        # O índice único também atende às buscas por 'student_id', pois é a coluna mais à esquerda.
+        Index('ix_grades_student_assessment', 'student_id', 'assessment_id', unique=True),
+        # Índice para buscar (e excluir) todas as notas de uma avaliação.
+        Index('ix_grades_assessment_id', 'assessment_id'),
+        # Atende às consultas por período (ex: notas lançadas no bimestre) como buscas por intervalo no índice.
+        Index('ix_grades_date_recorded', 'date_recorded'),
     )
 
     # Define uma representação em string para o objeto Grade, útil para depuração.
@@ -1,5 +1,5 @@
 # Importa os tipos de coluna necessários do SQLAlchemy.
-from sqlalchemy import Column, Integer, Text, Date, ForeignKey
+from sqlalchemy import Column, Integer, Text, Date, ForeignKey, Index
 # Importa a função 'relationship' para definir relacionamentos entre modelos.
 from sqlalchemy.orm import relationship
 # Importa a classe 'Base' declarativa da qual todos os modelos devem herdar.
@@ -41,15 +41,23 @@ class Incident(Base):
     description = Column(Text, nullable=False)
 
     # Define a coluna 'class_id' como uma chave estrangeira para a tabela 'classes'. Não pode ser nula.
-    class_id = Column(Integer, ForeignKey('classes.id'), nullable=False)
+    class_id = Column(Integer, ForeignKey('classes.id', ondelete='CASCADE'), nullable=False)
     # Define a coluna 'student_id' como uma chave estrangeira para a tabela 'students'. Não pode ser nula.
-    student_id = Column(Integer, ForeignKey('students.id'), nullable=False)
+    student_id = Column(Integer, ForeignKey('students.id', ondelete='CASCADE'), nullable=False)
 
     # Define o relacionamento com o modelo Class. 'back_populates' cria a referência inversa no modelo Class.
     class_ = relationship("Class", back_populates="incidents")
     # Define o relacionamento com o modelo Student. 'back_populates' cria a referência inversa no modelo Student.
     student = relationship("Student", back_populates="incidents")
 
+    # Define os índices da tabela.
+    __table_args__ = (
+        # Atende às consultas por turma e à contagem de incidentes de um aluno em uma turma.
+        Index('ix_incidents_class_student', 'class_id', 'student_id'),
+        # Atende às consultas (e exclusões) a partir do aluno.
+        Index('ix_incidents_student_id', 'student_id'),
+    )
+
     # Define uma representação em string para o objeto Incident, útil para depuração.
     def __repr__(self):
         # Retorna uma string formatada com o id do incidente e os IDs do aluno e da turma.
@@ -1,5 +1,5 @@
 # Importa os tipos de coluna necessários do SQLAlchemy.
-from sqlalchemy import Column, Integer, String, Text, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Date, ForeignKey, Index
 # Importa a função 'relationship' para definir relacionamentos entre modelos.
 from sqlalchemy.orm import relationship
 # Importa a classe 'Base' declarativa da qual todos os modelos devem herdar.
@@ -40,10 +40,16 @@ class Lesson(Base):
     content = Column(Text, nullable=True)
 
     # Define a coluna 'class_subject_id' como uma chave estrangeira para a tabela 'class_subjects'. Não pode ser nula.
-    class_subject_id = Column(Integer, ForeignKey('class_subjects.id'), nullable=False)
+    class_subject_id = Column(Integer, ForeignKey('class_subjects.id', ondelete='CASCADE'), nullable=False)
     # Define o relacionamento com o modelo ClassSubject.
     class_subject = relationship("ClassSubject", back_populates="lessons")
 
+    # Define os índices da tabela.
+    __table_args__ = (
+        # Atende à listagem das aulas de uma disciplina já ordenadas por data.
+        Index('ix_lessons_class_subject_date', 'class_subject_id', 'date'),
+    )
+
     # Define uma representação em string para o objeto Lesson, útil para depuração.
     def __repr__(self):
         # Retorna uma string formatada com o id, título da aula e o ID da disciplina da turma.
@@ -1,9 +1,11 @@
 # Importa os tipos de coluna necessários do SQLAlchemy.
-from sqlalchemy import Column, Integer, String, Date
+from sqlalchemy import Column, Integer, String, Date, Index
 # Importa a função 'relationship' para definir relacionamentos entre modelos.
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 # Importa a classe 'Base' declarativa da qual todos os modelos devem herdar.
 from app.models.base import Base
+# Importa a função que gera a chave de busca normalizada a partir do nome.
+from app.utils.text_normalization import normalize_name
 
 # Define a classe Student, que representa um aluno no banco de dados.
 class Student(Base):
@@ -25,7 +27,10 @@ class Student(Base):
     :ivar birth_date: Data de nascimento do estudante. Pode ser nula.
     :type birth_date: datetime.date
     :ivar enrollment_date: Data de matrícula do estudante. Não pode ser nula.
-    :type enrollment_date: str
+    :type enrollment_date: datetime.date
+    :ivar search_name: Nome completo normalizado (minúsculas e sem acentos), mantido
+        automaticamente a partir de `first_name` e `last_name`. Usado nas buscas por nome.
+    :type search_name: str
     :ivar grades: Relacionamento com as notas (`Grade`) associadas ao estudante. Um
         estudante pode ter várias notas.
     :type grades: List[Grade]
@@ -44,15 +49,38 @@ class Student(Base):
     last_name = Column(String, nullable=False)
     # Define a coluna 'birth_date' (data de nascimento) como do tipo Date, podendo ser nula.
     birth_date = Column(Date, nullable=True)
-    # Define a coluna 'enrollment_date' (data de matrícula) como uma string, não podendo ser nula.
-    enrollment_date = Column(String, nullable=False)
+    # Define a coluna 'enrollment_date' (data de matrícula) como do tipo Date, não podendo ser nula.
+    enrollment_date = Column(Date, nullable=False)
+    # Define a coluna 'search_name' (nome completo normalizado) como uma string indexada.
+    # É preenchida automaticamente pelo validador abaixo, para que "JOÃO" e "Joao" sejam encontrados da mesma forma.
+    search_name = Column(String, nullable=False, default="", index=True)
+
+    # Define os índices da tabela.
+    __table_args__ = (
+        # Atende à paginação por cursor da lista de alunos, ordenada por (first_name, last_name, id).
+        Index('ix_students_name_order', 'first_name', 'last_name', 'id'),
+        # Atende às consultas por data de matrícula (ex: alunos matriculados desde março).
+        Index('ix_students_enrollment_date', 'enrollment_date'),
+    )
 
     # Define o relacionamento com o modelo Grade (notas). Um aluno pode ter várias notas.
     # 'back_populates' cria a referência inversa no modelo Grade.
-    # 'cascade="all, delete-orphan"' garante que as notas de um aluno sejam excluídas se o aluno for excluído.
-    grades = relationship("Grade", back_populates="student", cascade="all, delete-orphan")
+    # As notas, incidentes, matrículas e médias do aluno são excluídos pelo banco (ON DELETE CASCADE) junto com o aluno;
+    # 'passive_deletes=True' evita que o ORM os carregue na memória só para excluí-los.
+    grades = relationship("Grade", back_populates="student", cascade="all, delete-orphan", passive_deletes=True)
     # Define o relacionamento com o modelo Incident (incidentes). Um aluno pode ter vários incidentes.
-    incidents = relationship("Incident", back_populates="student")
+    incidents = relationship("Incident", back_populates="student", cascade="all, delete-orphan", passive_deletes=True)
+    # Define o relacionamento com as médias agregadas por disciplina, excluídas junto com o aluno.
+    subject_averages = relationship("StudentSubjectAverage", cascade="all, delete-orphan", passive_deletes=True)
+
+    # Mantém 'search_name' sincronizado sempre que o nome ou o sobrenome forem atribuídos (na criação ou na atualização).
+    @validates('first_name', 'last_name')
+    def _sync_search_name(self, key, value):
+        # Usa o novo valor para o campo que está sendo alterado e o valor atual para o outro.
+        first_name = value if key == 'first_name' else self.first_name
+        last_name = value if key == 'last_name' else self.last_name
+        self.search_name = normalize_name(f"{first_name or ''} {last_name or ''}")
+        return value
 
     # Define uma representação em string para o objeto Student, útil para depuração.
     def __repr__(self):
@@ -0,0 +1,106 @@
+# Importa os tipos de coluna e as funções de construção de SQL necessários do SQLAlchemy.
+from sqlalchemy import Column, Integer, Float, ForeignKey, Index, delete, func, insert, select
+# Importa a classe 'Base' declarativa da qual todos os modelos devem herdar.
+from app.models.base import Base
+from app.models.assessment import Assessment
+from app.models.grade import Grade
+
+# Define a classe StudentSubjectAverage, o agregado persistido das notas de um aluno em uma disciplina de uma turma.
+class StudentSubjectAverage(Base):
+    """
+    Agregado das notas de um aluno em uma disciplina de uma turma (ClassSubject).
+
+    Guarda os componentes da média ponderada, para que ela seja lida sem reagregar as notas.
+    A média segue a regra de `DataService.calculate_weighted_average`: avaliações sem nota
+    contam como 0, então o denominador é o peso total de todas as avaliações da disciplina.
+
+    As linhas são recalculadas pelo DataService, na mesma transação, sempre que uma nota
+    ou avaliação da disciplina muda (veja `build_refresh_statements`). Um aluno sem nenhuma
+    nota na disciplina não tem linha (média 0).
+
+    :ivar student_id: ID do aluno.
+    :type student_id: int
+    :ivar class_subject_id: ID da disciplina da turma.
+    :type class_subject_id: int
+    :ivar weighted_sum: Soma de nota * peso das avaliações com nota.
+    :type weighted_sum: float
+    :ivar total_weight: Soma dos pesos de todas as avaliações da disciplina.
+    :type total_weight: float
+    :ivar grade_count: Número de notas lançadas.
+    :type grade_count: int
+    """
+    # Define o nome da tabela no banco de dados para este modelo.
+    __tablename__ = 'student_subject_averages'
+
+    # A chave primária composta (aluno, disciplina) também serve às buscas por aluno.
+    student_id = Column(Integer, ForeignKey('students.id', ondelete='CASCADE'), primary_key=True)
+    class_subject_id = Column(Integer, ForeignKey('class_subjects.id', ondelete='CASCADE'), primary_key=True)
+    # Componentes da média ponderada.
+    weighted_sum = Column(Float, nullable=False, default=0.0)
+    total_weight = Column(Float, nullable=False, default=0.0)
+    grade_count = Column(Integer, nullable=False, default=0)
+
+    # Define os índices da tabela.
+    __table_args__ = (
+        # Atende à leitura das médias de todos os alunos de uma disciplina.
+        Index('ix_student_subject_averages_class_subject', 'class_subject_id'),
+    )
+
+    # Retorna a média ponderada (0 se a disciplina não tiver avaliações com peso).
+    @property
+    def average(self) -> float:
+        return self.weighted_sum / self.total_weight if self.total_weight else 0.0
+
+    # Define uma representação em string para o objeto, útil para depuração.
+    def __repr__(self):
+        return (f"<StudentSubjectAverage(student_id={self.student_id}, class_subject_id={self.class_subject_id}, "
+                f"weighted_sum={self.weighted_sum}, total_weight={self.total_weight}, grade_count={self.grade_count})>")
+
+
+# Define a função que monta os comandos que recalculam o agregado a partir das notas.
+def build_refresh_statements(class_subject_ids: list[int] | None = None, student_ids: list[int] | None = None) -> list:
+    """
+    Monta os comandos (DELETE + INSERT ... SELECT) que recalculam as linhas do agregado.
+
+    O recálculo é feito no próprio banco, em dois comandos, para qualquer quantidade de linhas.
+    Os filtros limitam o recálculo às chaves afetadas por uma alteração.
+
+    :param class_subject_ids: Disciplinas a recalcular. Se None, todas.
+    :param student_ids: Alunos a recalcular. Se None, todos.
+    :return: Lista de comandos a executar, em ordem, na mesma transação da alteração.
+    """
+    # Remove as linhas afetadas.
+    delete_stmt = delete(StudentSubjectAverage)
+    if class_subject_ids is not None:
+        delete_stmt = delete_stmt.where(StudentSubjectAverage.class_subject_id.in_(class_subject_ids))
+    if student_ids is not None:
+        delete_stmt = delete_stmt.where(StudentSubjectAverage.student_id.in_(student_ids))
+
+    # Peso total de todas as avaliações da disciplina (o denominador da média).
+    all_assessments = Assessment.__table__.alias("all_assessments")
+    total_weight = (
+        select(func.coalesce(func.sum(all_assessments.c.weight), 0.0))
+        .where(all_assessments.c.class_subject_id == Assessment.class_subject_id)
+        .scalar_subquery()
+    )
+    # Agrega as notas de cada (aluno, disciplina) afetado.
+    aggregate = (
+        select(
+            Grade.student_id,
+            Assessment.class_subject_id,
+            func.sum(Grade.score * Assessment.weight),
+            total_weight,
+            func.count(Grade.id),
+        )
+        .join(Assessment, Grade.assessment_id == Assessment.id)
+        .group_by(Grade.student_id, Assessment.class_subject_id)
+    )
+    if class_subject_ids is not None:
+        aggregate = aggregate.where(Assessment.class_subject_id.in_(class_subject_ids))
+    if student_ids is not None:
+        aggregate = aggregate.where(Grade.student_id.in_(student_ids))
+
+    insert_stmt = insert(StudentSubjectAverage).from_select(
+        ["student_id", "class_subject_id", "weighted_sum", "total_weight", "grade_count"], aggregate
+    )
+    return [delete_stmt, insert_stmt]
@@ -1,8 +1,24 @@
 # Importa a classe DataService do arquivo data_service.py, que está no mesmo diretório.
 from .data_service import DataService
+# Importa o cache de leitura dos dados de referência (cursos, turmas, disciplinas, avaliações).
+from app.data.query_cache import QueryCache
 
 # Cria uma instância única e compartilhada do DataService.
 # Esta instância será importada por outras partes da aplicação (por exemplo, as 'tools' da IA)
 # para garantir que todos usem o mesmo objeto de serviço.
 # Isso ajuda a manter um estado consistente e a gerenciar as conexões com o banco de dados de forma centralizada.
-data_service = DataService()
+# A instância compartilhada usa o cache de leitura, pois as telas e o assistente repetem as mesmas consultas.
+data_service = DataService(query_cache=QueryCache())
+
+# Importa o resolvedor de nomes aproximados usado pelas ferramentas do assistente.
+from .name_resolver import NameResolver
+
+# Cria o resolvedor compartilhado. Seus índices em memória são descartados a cada escrita que altera nomes.
+name_resolver = NameResolver(data_service)
+
+# Importa a fachada assíncrona do DataService.
+from .async_data_service import AsyncDataService
+
+# Cria a fachada assíncrona compartilhada, que executa as chamadas ao banco em um pool de threads dedicado,
+# sem bloquear o loop do asyncio (assistente) nem a thread do Tkinter (telas).
+async_data_service = AsyncDataService(data_service)
@@ -1,3 +1,5 @@
+# Importa o módulo de logging para registrar falhas na execução das ferramentas.
+import logging
 # Importa a classe base para provedores de LLM e a estrutura de resposta do assistente.
 from app.core.llm.base import LLMProvider, AssistantResponse
 # Importa o provedor específico para a API da OpenAI.
@@ -16,12 +18,17 @@ from app.core.config import load_setting
 from app.core.tools.tool_registry import ToolRegistry
 # Importa o executor de ferramentas, que executa as chamadas de função da IA.
 from app.core.tools.tool_executor import ToolExecutor
+# Importa o DataService compartilhado, usado para agrupar as chamadas de ferramentas em uma unidade de trabalho,
+# e sua fachada assíncrona, que executa as ferramentas fora do loop do asyncio.
+from app.services import data_service, async_data_service
+from app.services.async_data_service import DatabaseBusyError
+from app.services.data_service import UnitOfWorkError
 
 # --- Importação das Ferramentas (Tools) ---
 # Importa as ferramentas de leitura e escrita do banco de dados.
 from app.tools.database_tools import (
     get_student_grades_by_course, list_courses_for_student,
-    list_all_classes, get_class_roster,
+    list_all_classes, get_class_roster, search_school_records,
     add_new_student, add_new_course, add_new_grade,
     create_new_class, add_subject_to_class, create_new_assessment,
     add_new_lesson, register_incident,
@@ -91,6 +98,7 @@ class AssistantService:
         self.tool_registry.register(list_courses_for_student)
         self.tool_registry.register(list_all_classes)
         self.tool_registry.register(get_class_roster)
+        self.tool_registry.register(search_school_records)
         # Ferramentas de análise
         self.tool_registry.register(get_student_performance_summary_tool)
         self.tool_registry.register(get_students_at_risk_tool)
@@ -175,6 +183,32 @@ class AssistantService:
             # Inicia o histórico de mensagens com o prompt de sistema.
             self.messages = [{"role": "system", "content": system_prompt}]
 
+    # Método que executa as chamadas de ferramenta de um turno (executado no pool de threads do banco de dados).
+    def _execute_tool_calls(self, tool_calls_list: list) -> list:
+        # Lista para armazenar os resultados das ferramentas.
+        tool_results = []
+        # Todas as ferramentas do turno compartilham uma única transação (um commit no final, ou nenhum em caso de falha).
+        try:
+            with data_service.unit_of_work():
+                # Itera sobre cada chamada de ferramenta solicitada pelo modelo.
+                for tool_call in tool_calls_list:
+                    # Executa a ferramenta em um savepoint próprio: se um comando dela falhar, só as alterações
+                    # dessa ferramenta são revertidas, e o resultado informa o modelo da falha.
+                    try:
+                        with data_service.savepoint():
+                            result = self.tool_executor.execute_tool_call(tool_call)
+                    except UnitOfWorkError as e:
+                        result = ToolExecutor._create_error_result(tool_call['id'], f"The changes could not be saved: {e}")
+                    tool_results.append(result)
+        except Exception as e:
+            # Se o commit falhar, nenhuma alteração foi salva: informa o modelo de que todas as chamadas falharam.
+            logging.error(f"Falha ao salvar as alterações das ferramentas: {e}", exc_info=True)
+            tool_results = [
+                ToolExecutor._create_error_result(tool_call['id'], f"The changes could not be saved: {e}")
+                for tool_call in tool_calls_list
+            ]
+        return tool_results
+
     # Método assíncrono para obter uma resposta do assistente.
     async def get_response(self, user_input: str) -> AssistantResponse:
         # Garante que o provedor esteja atualizado com as últimas configurações.
@@ -205,13 +239,13 @@ class AssistantService:
         # Adiciona a intenção de chamada de ferramenta ao histórico.
         self.messages.append({"role": "assistant", "tool_calls": tool_calls_list})
 
-        # Lista para armazenar os resultados das ferramentas.
-        tool_results = []
-        # Itera sobre cada chamada de ferramenta solicitada pelo modelo.
-        for tool_call in tool_calls_list:
-            # Executa a ferramenta e armazena o resultado.
-            result = self.tool_executor.execute_tool_call(tool_call)
-            tool_results.append(result)
+        # As ferramentas fazem chamadas bloqueantes ao banco de dados; executá-las no pool do banco mantém o loop livre.
+        # Sem timeout: uma escrita em andamento não deve ser abandonada no meio.
+        try:
+            tool_results = await async_data_service.run(self._execute_tool_calls, tool_calls_list, timeout=None)
+        except DatabaseBusyError as e:
+            # O banco está sobrecarregado: nenhuma ferramenta foi executada.
+            tool_results = [ToolExecutor._create_error_result(tool_call['id'], str(e)) for tool_call in tool_calls_list]
 
         # Passo 4: Adicionar os resultados das ferramentas ao histórico e obter a resposta final em linguagem natural.
         self.messages.extend(tool_results)
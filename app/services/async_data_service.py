@@ -0,0 +1,176 @@
+# Importa a biblioteca 'asyncio' para expor as chamadas ao banco como coroutines.
+import asyncio
+# Importa 'threading' para o semáforo de controle de fila e para os temporizadores de timeout.
+import threading
+# Importa o pool de threads e o tipo Future usados para executar as chamadas fora do loop e da thread da UI.
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Valor sentinela que indica "usar o timeout padrão do serviço" (None significa "sem timeout").
+_DEFAULT_TIMEOUT = object()
+
+
+# Define a exceção levantada quando há chamadas demais aguardando o banco de dados.
+class DatabaseBusyError(RuntimeError):
+    """Levantada quando a fila de chamadas ao banco de dados está cheia."""
+
+
+# Define a fachada assíncrona do DataService.
+class AsyncDataService:
+    """
+    Executa os métodos do DataService em um pool de threads dedicado ao banco de dados.
+
+    O SQLAlchemy e o SQLite são bloqueantes. Chamá-los diretamente no loop do asyncio (assistente)
+    ou na thread do Tkinter (telas) congela a aplicação durante consultas lentas. Esta fachada
+    envia as chamadas para um pool pequeno e limitado de threads e devolve:
+
+    - coroutines, para código assíncrono: ``await async_data_service.get_students_at_risk(class_id)``;
+    - ``concurrent.futures.Future``, via :meth:`submit`;
+    - callbacks entregues na fila da interface, via :meth:`submit_to_queue`.
+
+    Controle de fila (backpressure): no máximo ``max_workers + max_pending`` chamadas podem estar
+    em execução ou aguardando. Acima disso, a chamada falha imediatamente com :class:`DatabaseBusyError`,
+    em vez de acumular trabalho indefinidamente.
+
+    Timeouts: as chamadas aguardadas (coroutines e callbacks da interface) falham com ``TimeoutError``
+    após ``timeout`` segundos. Uma chamada que ainda não começou é cancelada; uma que já está em
+    execução termina normalmente em segundo plano, mas seu resultado é descartado.
+
+    :ivar default_timeout: Timeout padrão, em segundos, de cada chamada. None desativa o timeout.
+    :type default_timeout: float | None
+    """
+    # O construtor recebe o DataService que será executado no pool.
+    def __init__(self, data_service, max_workers: int = 2, max_pending: int = 32, default_timeout: float | None = 15.0):
+        # Armazena o serviço síncrono cujos métodos serão executados no pool.
+        self._data_service = data_service
+        # O pool é pequeno de propósito: o SQLite aceita uma escrita por vez, então mais threads só aumentariam a disputa.
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="database")
+        # Limita o número de chamadas em execução ou na fila.
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self.default_timeout = default_timeout
+
+    # Executa uma função qualquer no pool do banco de dados e retorna um Future.
+    def submit_call(self, func, *args, **kwargs) -> Future:
+        """
+        Agenda ``func(*args, **kwargs)`` no pool do banco de dados.
+
+        Útil para agrupar várias chamadas (por exemplo, dentro de ``data_service.unit_of_work()``)
+        em uma única tarefa.
+
+        :raises DatabaseBusyError: Se a fila estiver cheia.
+        :return: O Future da chamada.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise DatabaseBusyError("Too many pending database calls. Try again shortly.")
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        # Libera a vaga na fila quando a chamada termina (ou é cancelada).
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    # Executa um método do DataService, pelo nome, no pool do banco de dados.
+    def submit(self, method_name: str, *args, **kwargs) -> Future:
+        """
+        Agenda ``data_service.<method_name>(*args, **kwargs)`` no pool do banco de dados.
+
+        :raises DatabaseBusyError: Se a fila estiver cheia.
+        :return: O Future da chamada.
+        """
+        return self.submit_call(self._resolve(method_name), *args, **kwargs)
+
+    # Executa uma função no pool e aguarda o resultado sem bloquear o loop do asyncio.
+    async def run(self, func, *args, timeout=_DEFAULT_TIMEOUT, **kwargs):
+        """
+        Executa ``func(*args, **kwargs)`` no pool do banco de dados e aguarda o resultado.
+
+        :param timeout: Timeout em segundos. Se omitido, usa ``default_timeout``; None desativa o timeout.
+        :raises DatabaseBusyError: Se a fila estiver cheia.
+        :raises TimeoutError: Se a chamada não terminar dentro do timeout.
+        """
+        timeout = self.default_timeout if timeout is _DEFAULT_TIMEOUT else timeout
+        future = self.submit_call(func, *args, **kwargs)
+        try:
+            # Se o timeout expirar, 'wait_for' cancela o Future (o que só tem efeito se a chamada ainda não começou).
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Database call '{getattr(func, '__name__', func)}' timed out after {timeout} s.") from None
+
+    # Executa um método do DataService e entrega o resultado (ou a exceção) na fila da interface.
+    def submit_to_queue(self, queue, callback, method_name: str, *args, timeout=_DEFAULT_TIMEOUT, **kwargs) -> Future | None:
+        """
+        Executa um método do DataService em segundo plano e agenda ``callback(resultado)`` na fila da interface.
+
+        Segue a convenção de :func:`app.utils.async_utils.run_async_task`: a fila recebe a tupla
+        ``(callback, (resultado,))`` e, em caso de erro, ``(callback, (exceção,))``. A thread do Tkinter
+        consome a fila, então o callback pode atualizar widgets com segurança.
+
+        :param queue: Fila thread-safe consumida pela thread da interface (ex: ``main_app.async_queue``).
+        :param callback: Função chamada na thread da interface com o resultado ou a exceção.
+        :param method_name: Nome do método do DataService.
+        :param timeout: Timeout em segundos. Se omitido, usa ``default_timeout``; None desativa o timeout.
+        :return: O Future da chamada, ou None se ela foi recusada por excesso de chamadas pendentes.
+        """
+        timeout = self.default_timeout if timeout is _DEFAULT_TIMEOUT else timeout
+        # Garante que o callback receba exatamente uma entrega: o resultado ou o timeout, o que vier primeiro.
+        delivered = threading.Event()
+        lock = threading.Lock()
+
+        def deliver(value):
+            with lock:
+                if delivered.is_set():
+                    return
+                delivered.set()
+            queue.put((callback, (value,)))
+
+        try:
+            future = self.submit(method_name, *args, **kwargs)
+        except DatabaseBusyError as e:
+            deliver(e)
+            return None
+
+        timer = None
+        if timeout is not None:
+            def on_timeout():
+                future.cancel()
+                deliver(TimeoutError(f"Database call '{method_name}' timed out after {timeout} s."))
+            timer = threading.Timer(timeout, on_timeout)
+            timer.daemon = True
+            timer.start()
+
+        def on_done(done_future: Future):
+            if timer:
+                timer.cancel()
+            if done_future.cancelled():
+                return
+            error = done_future.exception()
+            deliver(error if error is not None else done_future.result())
+
+        future.add_done_callback(on_done)
+        return future
+
+    # Encerra o pool de threads (chamado ao fechar a aplicação).
+    def shutdown(self, wait: bool = True):
+        """Encerra o pool, cancelando as chamadas que ainda não começaram."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    # Obtém um método público do DataService pelo nome.
+    def _resolve(self, method_name: str):
+        if method_name.startswith("_"):
+            raise AttributeError(f"'{method_name}' is not a public DataService method.")
+        method = getattr(self._data_service, method_name)
+        if not callable(method):
+            raise AttributeError(f"'{method_name}' is not a DataService method.")
+        return method
+
+    # Expõe cada método público do DataService como uma coroutine de mesmo nome.
+    def __getattr__(self, name: str):
+        method = self._resolve(name)
+
+        async def call(*args, timeout=_DEFAULT_TIMEOUT, **kwargs):
+            return await self.run(method, *args, timeout=timeout, **kwargs)
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        return call
@@ -0,0 +1,197 @@
+# Importa o módulo de logging para registrar as cópias de segurança feitas e as falhas.
+import logging
+# Importa 'os' para substituir o arquivo final de forma atômica.
+import os
+# Importa a biblioteca sqlite3, que expõe a API de backup online do SQLite.
+import sqlite3
+# Importa 'threading' para executar as cópias periódicas em segundo plano.
+import threading
+# Importa 'time' para as pausas entre os passos da cópia e para medir a duração.
+import time
+# Importa 'datetime' para nomear os arquivos de cópia com a data e a hora.
+from datetime import datetime
+# Importa 'Path' para manipular os caminhos dos arquivos.
+from pathlib import Path
+
+# Diretório padrão das cópias de segurança (relativo, como o banco principal).
+BACKUP_DIR = Path("backups")
+# Formato da data e hora no nome dos arquivos de cópia.
+_TIMESTAMP_FORMAT = "%Y%m%d-%H%M%S-%f"
+
+
+# Define a exceção levantada quando a cópia gerada não passa na verificação de integridade.
+class BackupVerificationError(RuntimeError):
+    """Levantada quando a cópia de segurança gerada está corrompida ou incompleta."""
+
+
+# Define o serviço de cópias de segurança do banco de dados.
+class BackupService:
+    """
+    Faz cópias de segurança do banco SQLite enquanto a aplicação continua em uso.
+
+    Copiar o arquivo do banco durante uma escrita pode gerar uma cópia corrompida. Este serviço usa a
+    API de backup online do SQLite (``sqlite3.Connection.backup``), que copia o banco em passos de
+    ``pages_per_step`` páginas, com uma pausa de ``step_pause`` segundos entre eles:
+
+    - Em modo WAL (todos os perfis de armazenamento), a cópia lê de uma transação de leitura aberta no
+      início: o resultado é um retrato consistente do banco e as escritas da interface e do assistente
+      continuam normalmente, sem esperar pela cópia.
+    - Nos demais modos, cada passo mantém um bloqueio de leitura apenas enquanto copia suas páginas, e o
+      SQLite reinicia a cópia se outra conexão alterar o banco no meio dela.
+
+    Cada cópia é gravada em um arquivo temporário, verificada (``PRAGMA integrity_check``) e só então
+    renomeada para ``<nome do banco>-AAAAMMDD-HHMMSS-ffffff.db``. Depois de uma cópia bem-sucedida, apenas as
+    ``keep`` cópias mais recentes são mantidas.
+
+    :ivar database_path: Caminho do banco de dados de origem.
+    :type database_path: Path
+    :ivar backup_dir: Diretório das cópias.
+    :type backup_dir: Path
+    :ivar keep: Número de cópias mantidas (rotação).
+    :type keep: int
+    """
+    # O construtor recebe o banco de origem e os parâmetros da cópia e da rotação.
+    def __init__(self, database_path: str | Path, backup_dir: str | Path | None = None, keep: int = 7,
+                 pages_per_step: int = 256, step_pause: float = 0.005):
+        if keep < 1:
+            raise ValueError("At least one backup must be kept.")
+        if pages_per_step < 1:
+            raise ValueError("pages_per_step must be positive.")
+        self.database_path = Path(database_path)
+        self.backup_dir = Path(backup_dir or BACKUP_DIR)
+        self.keep = keep
+        self.pages_per_step = pages_per_step
+        self.step_pause = step_pause
+        # Impede duas cópias simultâneas (ex: a periódica e uma pedida pelo usuário).
+        self._backup_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    # Método que faz uma cópia de segurança completa, verificada, e aplica a rotação.
+    def create_backup(self, progress=None) -> Path:
+        """
+        Copia o banco de dados para um novo arquivo no diretório de cópias.
+
+        :param progress: Função opcional chamada após cada passo com (páginas restantes, total de páginas).
+        :raises BackupVerificationError: Se a cópia gerada não passar na verificação de integridade.
+        :return: O caminho da cópia criada.
+        """
+        with self._backup_lock:
+            self.backup_dir.mkdir(parents=True, exist_ok=True)
+            timestamp = datetime.now().strftime(_TIMESTAMP_FORMAT)
+            target = self.backup_dir / f"{self.database_path.stem}-{timestamp}.db"
+            partial = target.with_name(target.name + ".partial")
+
+            start = time.perf_counter()
+            try:
+                self._copy(partial, progress)
+                self.verify_backup(partial)
+                # A cópia só recebe o nome final depois de verificada.
+                os.replace(partial, target)
+            except BaseException:
+                partial.unlink(missing_ok=True)
+                raise
+            logging.info(f"Cópia de segurança criada em {target} ({(time.perf_counter() - start) * 1000:.0f} ms).")
+
+            self.prune_backups()
+            return target
+
+    # Método privado que copia o banco, passo a passo, com a API de backup online.
+    def _copy(self, target: Path, progress=None):
+        # A origem é aberta somente leitura: a cópia nunca escreve no banco da aplicação.
+        source = sqlite3.connect(f"{self.database_path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        destination = sqlite3.connect(target)
+        try:
+            if source.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal":
+                # Em modo WAL, uma transação de leitura fixa o retrato do banco sem bloquear as escritas,
+                # evitando que cada escrita de outra conexão reinicie a cópia.
+                source.execute("BEGIN")
+                source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+            def on_step(status, remaining, total):
+                if progress:
+                    progress(remaining, total)
+                # Entre os passos, nenhum bloqueio é mantido pela cópia; a pausa dá vez às outras conexões.
+                if remaining and self.step_pause:
+                    time.sleep(self.step_pause)
+
+            source.backup(destination, pages=self.pages_per_step, progress=on_step)
+        finally:
+            source.close()
+            destination.close()
+
+    # Método que verifica a integridade de uma cópia.
+    @staticmethod
+    def verify_backup(path: str | Path):
+        """
+        Verifica a integridade de uma cópia com ``PRAGMA integrity_check``.
+
+        :param path: Caminho da cópia.
+        :raises BackupVerificationError: Se a cópia estiver corrompida ou não puder ser aberta.
+        """
+        try:
+            connection = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+            try:
+                problems = [row[0] for row in connection.execute("PRAGMA integrity_check")]
+            finally:
+                connection.close()
+        except sqlite3.DatabaseError as e:
+            raise BackupVerificationError(f"Backup {path} could not be read: {e}") from e
+        if problems != ["ok"]:
+            raise BackupVerificationError(f"Backup {path} failed the integrity check: {'; '.join(problems[:5])}")
+
+    # Método que lista as cópias existentes, da mais antiga para a mais recente.
+    def list_backups(self) -> list[Path]:
+        """Retorna as cópias existentes no diretório de cópias, da mais antiga para a mais recente."""
+        if not self.backup_dir.is_dir():
+            return []
+        # O nome termina com a data e a hora (AAAAMMDD-HHMMSS-ffffff), então a ordem alfabética é a cronológica.
+        return sorted(self.backup_dir.glob(f"{self.database_path.stem}-*.db"))
+
+    # Método que remove as cópias mais antigas além do limite de retenção.
+    def prune_backups(self) -> list[Path]:
+        """
+        Remove as cópias mais antigas, mantendo apenas as ``keep`` mais recentes.
+
+        :return: Os caminhos das cópias removidas.
+        """
+        backups = self.list_backups()
+        removed = backups[:-self.keep]
+        for path in removed:
+            path.unlink(missing_ok=True)
+        if removed:
+            logging.info(f"{len(removed)} cópia(s) de segurança antiga(s) removida(s).")
+        return removed
+
+    # Método que inicia as cópias periódicas em uma thread de segundo plano.
+    def start(self, interval_seconds: float, initial_delay: float = 60.0):
+        """
+        Inicia as cópias periódicas em uma thread de segundo plano.
+
+        :param interval_seconds: Intervalo entre as cópias, em segundos.
+        :param initial_delay: Espera antes da primeira cópia, para não disputar o disco com a inicialização.
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_periodically, args=(interval_seconds, initial_delay),
+                                        name="backup", daemon=True)
+        self._thread.start()
+
+    # Método que interrompe as cópias periódicas.
+    def stop(self, timeout: float | None = None):
+        """Interrompe as cópias periódicas. Uma cópia em andamento termina normalmente."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    # Laço da thread de segundo plano.
+    def _run_periodically(self, interval_seconds: float, initial_delay: float):
+        delay = initial_delay
+        while not self._stop_event.wait(delay):
+            try:
+                self.create_backup()
+            except Exception as e:
+                # Uma falha não interrompe as próximas tentativas.
+                logging.error(f"Falha na cópia de segurança do banco de dados: {e}", exc_info=True)
+            delay = interval_seconds
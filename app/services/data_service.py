@@ -1,11 +1,25 @@
 # Importa a classe 'date' e 'datetime' para manipulação de datas.
 from datetime import date, datetime
-# Importa a função 'func' do SQLAlchemy para usar funções SQL como COUNT, MAX, etc.
-from sqlalchemy import func
+# Importa o módulo de logging para registrar a duração das importações.
+import logging
+# Importa 'time' para medir a duração das etapas da importação.
+import time
+# Importa a função 'func' do SQLAlchemy para usar funções SQL como COUNT, MAX, etc., e 'text' para SQL textual.
+from sqlalchemy import bindparam, case, delete, func, insert, or_, text, tuple_, column, literal, null, select, type_coerce, union_all, Integer, String
 # Importa 'joinedload' para carregamento otimizado de relacionamentos (evita N+1 queries) e 'Session' para type hinting.
 from sqlalchemy.orm import joinedload, Session
+# Importa o INSERT do dialeto SQLite, que oferece o 'ON CONFLICT ... DO UPDATE' (upsert).
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 # Importa o gerenciador de contexto para obter uma sessão de banco de dados.
 from app.data.database import get_db_session
+# Importa o arquivamento de anos letivos em bancos de arquivo morto anexados.
+from app.data.archives import attach_archives, archive_schema, list_archives, move_classes_to_archive, schema_tables
+# Importa a instrumentação que conta os comandos SQL por método e os orçamentos de consultas.
+from app.data.instrumentation import instrument_queries, query_budget
+# Importa o cache de leitura dos dados de referência, invalidado pelas versões das tabelas.
+from app.data.query_cache import QueryCache, get_table_versions
+# Importa os eventos de alteração, entregues às telas depois do commit de cada escrita.
+from app.data.change_events import CREATED, DELETED, UPDATED, pending_changes, publish_change
 # Importa todos os modelos de dados necessários para as operações do serviço.
 from app.models.student import Student
 from app.models.course import Course
@@ -16,12 +30,96 @@ from app.models.class_enrollment import ClassEnrollment
 from app.models.assessment import Assessment
 from app.models.lesson import Lesson
 from app.models.incident import Incident
+from app.models.student_subject_average import StudentSubjectAverage, build_refresh_statements
+# Importa o quadro de notas de uma turma (matriz alunos × avaliações).
+from app.services.gradebook import ClassGradebook
+# Importa os tipos de resultado compactos (registros com '__slots__' e lotes colunares de notas).
+from app.services.records import GradeBatch, record_type, records_from_result
 # Importa a função de parsing de CSV de alunos.
 from app.utils.student_csv_parser import parse_student_csv
+# Importa a conversão de textos livres em consultas de busca textual (FTS5).
+from app.models.full_text import build_match_query
+# Importa a normalização usada na chave de busca por nome dos alunos.
+from app.utils.text_normalization import normalize_name
 # Importa o gerenciador de contexto para criar blocos 'with'.
 from contextlib import contextmanager
+# Importa 'ContextVar' para guardar a unidade de trabalho ativa por thread/tarefa asyncio e 'threading' para identificar a thread.
+from contextvars import ContextVar
+import threading
+# Importa 'wraps' para preservar o nome e os atributos dos métodos com cache.
+from functools import wraps
+
+# Unidade de trabalho ativa no contexto atual: uma tupla (sessão, id da thread que a abriu) ou None.
+# Uma ContextVar é isolada por thread e por tarefa asyncio, então unidades de trabalho simultâneas não se misturam.
+# É compartilhada por todas as instâncias de DataService, para que serviços criados pelas ferramentas também participem.
+_active_unit_of_work: ContextVar[tuple[Session, int] | None] = ContextVar("active_unit_of_work", default=None)
+
+# Número máximo de valores em uma cláusula IN. Listas maiores são consultadas em blocos.
+_MAX_IN_PARAMETERS = 900
+
+# Colunas dos registros compactos de matrícula, as mesmas chaves dos dicionários de get_enrollments_for_class.
+_ENROLLMENT_FIELDS = ("id", "call_number", "status", "student_id", "student_first_name", "student_last_name", "student_birth_date")
+
+
+# Define a exceção levantada quando um comando falhou dentro de um savepoint sem que o erro chegasse até ele.
+class UnitOfWorkError(RuntimeError):
+    """Levantada quando as alterações de um savepoint foram revertidas por um comando que falhou dentro dele."""
+
+
+# Abre um savepoint na sessão e o confirma ao final do bloco, verificando se ele ainda está ativo.
+@contextmanager
+def _checked_savepoint(db: Session):
+    """
+    Executa o bloco em um savepoint: se o bloco levantar uma exceção, suas alterações são revertidas.
+
+    Quando um comando falha, o SQLAlchemy reverte o savepoint mais interno. Se a exceção for capturada
+    dentro do bloco (ex: por uma ferramenta do assistente, que devolve o erro como texto), as alterações
+    feitas antes dela no bloco também se perdem; nesse caso o savepoint levanta UnitOfWorkError ao final,
+    em vez de terminar como se tudo tivesse sido salvo.
+    """
+    savepoint = db.begin_nested()
+    try:
+        yield
+    except BaseException:
+        savepoint.rollback()
+        raise
+    if not savepoint.is_active:
+        savepoint.rollback()
+        raise UnitOfWorkError("A statement failed and its changes were rolled back.")
+    savepoint.commit()
+
+
+# Define o decorador que serve um método de leitura a partir do cache da instância (se houver um).
+def _cached_query(*table_names: str):
+    """
+    Serve o resultado do método a partir do QueryCache do DataService, quando ele foi configurado.
+
+    A chave é o nome do método e os argumentos. A entrada depende das tabelas informadas: uma escrita
+    em qualquer uma delas a invalida. Dentro de uma unidade de trabalho o cache não é usado, pois a
+    sessão pode conter alterações ainda não confirmadas.
+
+    :param table_names: Tabelas lidas pelo método.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            cache = self._query_cache
+            if cache is None or _active_unit_of_work.get() is not None:
+                return func(self, *args, **kwargs)
+            key = (func.__name__, args, tuple(sorted(kwargs.items())))
+            try:
+                hash(key)
+            except TypeError:
+                # Argumentos não hasheáveis (ex: listas) não podem compor a chave.
+                return func(self, *args, **kwargs)
+            return self._from_query_cache(key, table_names, lambda: func(self, *args, **kwargs))
+        return wrapper
+    return decorator
 
 # Define a classe DataService, que encapsula toda a lógica de acesso e manipulação de dados.
+# O decorador registra o número de comandos SQL e o tempo gasto por método; métodos com @query_budget
+# declaram quantos comandos podem executar (o limite é imposto nos testes, para detectar consultas N+1).
+@instrument_queries
 class DataService:
     """
     Serviço responsável por gerenciar operações relacionadas a estudantes, incluindo
@@ -33,11 +131,49 @@ class DataService:
 
     :ivar _db_session: Sessão injetada do banco de dados, utilizada se provida.
     :type _db_session: Session
+    :ivar _query_cache: Cache opcional das consultas de dados de referência (cursos, turmas, disciplinas,
+        avaliações). Sem ele, todas as consultas vão ao banco.
+    :type _query_cache: QueryCache
     """
-    # O construtor permite a injeção de uma sessão de banco de dados, útil para testes.
-    def __init__(self, db_session: Session = None):
+    # O construtor permite a injeção de uma sessão de banco de dados, útil para testes, e de um cache de leitura.
+    def __init__(self, db_session: Session = None, query_cache: QueryCache | None = None):
         # Armazena a sessão de banco de dados injetada, se houver.
         self._db_session = db_session
+        self._query_cache = query_cache
+
+    # Método privado que serve o resultado de 'compute' a partir do cache de leitura (usado por @_cached_query).
+    def _from_query_cache(self, key, table_names, compute, db: Session | None = None):
+        """
+        Retorna o valor guardado para a chave, ou executa 'compute' e guarda o resultado.
+
+        Sem cache, ou dentro de uma unidade de trabalho, apenas executa 'compute'.
+
+        :param key: Chave da entrada (hasheável).
+        :param table_names: Tabelas lidas por 'compute'.
+        :param compute: Função sem argumentos que faz a consulta.
+        :param db: Sessão já aberta pelo chamador, usada para verificar commits de outras conexões.
+        """
+        cache = self._query_cache
+        if cache is None or _active_unit_of_work.get() is not None:
+            return compute()
+        # Commits feitos por outras conexões não passam pelas versões das tabelas.
+        if db is not None:
+            cache.check_data_version(db.connection().connection)
+        else:
+            with self._get_db() as db:
+                cache.check_data_version(db.connection().connection)
+        hit, value = cache.lookup(key, table_names)
+        if hit:
+            return value
+        # As versões são lidas antes da consulta: se houver uma escrita durante ela, o resultado não é guardado.
+        versions = get_table_versions(table_names)
+        value = compute()
+        cache.store(key, value, table_names, versions)
+        return value
+
+    # Retorna as estatísticas do cache de leitura (None se o cache não estiver ativo).
+    def get_query_cache_stats(self) -> dict | None:
+        return self._query_cache.stats() if self._query_cache is not None else None
 
     # Cria um gerenciador de contexto privado para fornecer uma sessão de banco de dados.
     @contextmanager
@@ -45,7 +181,105 @@ class DataService:
         # Se uma sessão foi injetada no construtor (modo de teste), usa essa sessão.
         if self._db_session:
             yield self._db_session
+            return
+
+        # Se houver uma unidade de trabalho ativa, usa a sessão dela. O commit fica a cargo da unidade de trabalho.
+        unit_of_work = _active_unit_of_work.get()
+        if unit_of_work is not None:
+            session, owner_thread = unit_of_work
+            # Uma sessão não pode ser usada por duas threads ao mesmo tempo.
+            if owner_thread != threading.get_ident():
+                raise RuntimeError("A unit of work cannot be shared between threads.")
+            yield session
+            # Envia as alterações ao banco para que as próximas chamadas da mesma unidade de trabalho as vejam.
+            session.flush()
+            return
+
         # Caso contrário (modo de produção), cria uma nova sessão usando o gerenciador de contexto padrão.
+        with get_db_session() as db:
+            yield db
+
+    # Define o gerenciador de contexto da unidade de trabalho.
+    @contextmanager
+    def unit_of_work(self):
+        """
+        Agrupa várias chamadas ao DataService em uma única sessão e transação.
+
+        Todas as chamadas feitas dentro do bloco 'with' (por esta ou por outras instâncias de DataService,
+        na mesma thread ou tarefa asyncio) compartilham a mesma sessão e fazem um único commit ao final.
+        Se ocorrer uma exceção, todas as alterações são revertidas. Se um comando falhar e a exceção for
+        capturada dentro do bloco, nada é salvo e o bloco levanta UnitOfWorkError; use ``savepoint()``
+        para que a falha de um passo reverta só as alterações dele.
+
+        O gerenciador é reentrante: blocos aninhados participam da unidade de trabalho mais externa.
+        Cada thread tem sua própria unidade de trabalho; usar a unidade de outra thread gera RuntimeError.
+
+        Exemplo:
+            with data_service.unit_of_work():
+                student = data_service.add_student("Ana", "Lima")
+                data_service.add_student_to_class(student['id'], class_id, 1)
+        """
+        current = _active_unit_of_work.get()
+        # Bloco aninhado na mesma thread: participa da unidade de trabalho já aberta.
+        if current is not None and current[1] == threading.get_ident():
+            yield
+            return
+
+        with self._open_session() as db:
+            token = _active_unit_of_work.set((db, threading.get_ident()))
+            try:
+                # O savepoint garante o "tudo ou nada" mesmo quando a sessão é injetada (e o commit não é nosso).
+                with _checked_savepoint(db):
+                    yield
+            finally:
+                _active_unit_of_work.reset(token)
+
+    # Define o gerenciador de contexto que isola um passo de uma unidade de trabalho.
+    @contextmanager
+    def savepoint(self):
+        """
+        Isola um passo da unidade de trabalho ativa (ex: uma chamada de ferramenta do assistente).
+
+        Se um comando falhar no passo, só as alterações dele são revertidas, e o bloco levanta a exceção
+        original ou UnitOfWorkError (se a exceção foi capturada dentro do passo). Os passos anteriores e
+        seguintes continuam na unidade de trabalho. Fora de uma unidade de trabalho, cada chamada ao
+        DataService já tem sua própria transação, e o bloco não faz nada.
+
+        Exemplo:
+            with data_service.unit_of_work():
+                for call in calls:
+                    try:
+                        with data_service.savepoint():
+                            call()
+                    except Exception:
+                        ...  # só as alterações de 'call' foram revertidas
+        """
+        current = _active_unit_of_work.get()
+        if current is None or current[1] != threading.get_ident():
+            yield
+            return
+        with _checked_savepoint(current[0]):
+            yield
+
+    # Retorna os eventos de alteração da unidade de trabalho ativa que ainda não foram confirmados.
+    def get_pending_changes(self) -> list:
+        """
+        Lista as alterações feitas na unidade de trabalho ativa e ainda não confirmadas.
+
+        Os eventos só são entregues aos assinantes após o commit; quem mantém dados em memória (ex: o
+        resolvedor de nomes) usa esta lista para não ignorar as escritas anteriores da mesma unidade de
+        trabalho. Fora de uma unidade de trabalho, retorna uma lista vazia.
+        """
+        current = _active_unit_of_work.get()
+        if current is None or current[1] != threading.get_ident():
+            return []
+        return pending_changes(current[0])
+
+    # Método privado que abre uma sessão própria, ignorando a unidade de trabalho ativa.
+    @contextmanager
+    def _open_session(self):
+        if self._db_session:
+            yield self._db_session
         else:
             with get_db_session() as db:
                 yield db
@@ -55,6 +289,9 @@ class DataService:
         # Inicializa listas para armazenar erros e contar o número de alunos importados.
         errors = []
         imported_count = 0
+        # Duração de cada etapa da importação, em milissegundos.
+        timings = {}
+        start = time.perf_counter()
         try:
             # Usa o parser de CSV para extrair os dados dos alunos do conteúdo do arquivo.
             parsed_data = parse_student_csv(file_content)
@@ -80,20 +317,29 @@ class DataService:
                     "last_name": student_row["last_name"], "birth_date": birth_date_obj,
                     "status": student_row["status"], "status_detail": student_row.get("status_detail", "")
                 })
-            # Abre uma sessão de banco de dados para realizar a operação em lote.
+            timings["parse_ms"] = (time.perf_counter() - start) * 1000
+            # Abre uma sessão de banco de dados: a importação inteira é gravada em uma única transação.
+            database_start = time.perf_counter()
             with self._get_db() as db:
-                # Chama o método que insere/atualiza os alunos e suas matrículas de forma otimizada.
-                self._batch_upsert_students_and_enroll(db, class_id, student_data_for_db)
+                # Chama o método que insere/atualiza os alunos e suas matrículas com comandos em conjunto.
+                counts = self._batch_upsert_students_and_enroll(db, class_id, student_data_for_db)
+            timings["database_ms"] = (time.perf_counter() - database_start) * 1000
             # Conta o número de alunos únicos (pelo nome completo) que foram processados.
             imported_count = len({d['full_name'].lower() for d in student_data_for_db})
+            logging.info(
+                f"Importação de CSV: {imported_count} aluno(s) ({counts['students_created']} novo(s), "
+                f"{counts['enrollments_created']} matrícula(s) nova(s)) em {timings['parse_ms']:.0f} ms de leitura "
+                f"e {timings['database_ms']:.0f} ms de banco de dados."
+            )
         # Captura erros específicos de valor, como os lançados pelo parser.
         except ValueError as ve:
             errors.append(str(ve))
         # Captura quaisquer outros erros inesperados.
         except Exception as e:
             errors.append(f"Ocorreu um erro inesperado durante a importação: {e}")
+        timings["total_ms"] = (time.perf_counter() - start) * 1000
         # Retorna o resultado da importação.
-        return {"imported_count": imported_count, "errors": errors}
+        return {"imported_count": imported_count, "errors": errors, "timings": timings}
 
     # Método para adicionar um novo aluno.
     def add_student(self, first_name: str, last_name: str, birth_date: date | None = None) -> dict | None:
@@ -105,8 +351,8 @@ class DataService:
 
         # Abre uma sessão de banco de dados.
         with self._get_db() as db:
-            # Verifica se um aluno com o mesmo nome completo (ignorando maiúsculas/minúsculas) já existe.
-            existing = db.query(Student).filter(func.lower(Student.first_name + " " + Student.last_name) == f"{first_name} {last_name}".lower()).first()
+            # Verifica se um aluno com o mesmo nome completo (ignorando maiúsculas/minúsculas e acentos) já existe.
+            existing = db.query(Student).filter(Student.search_name == normalize_name(f"{first_name} {last_name}")).first()
             # Se existir, retorna os dados do aluno existente.
             if existing:
                 return {
@@ -115,13 +361,14 @@ class DataService:
                 }
             # Se não existir, cria um novo objeto Student.
             today = date.today()
-            new_student = Student(first_name=first_name, last_name=last_name, enrollment_date=today.isoformat(), birth_date=birth_date)
+            new_student = Student(first_name=first_name, last_name=last_name, enrollment_date=today, birth_date=birth_date)
             # Adiciona o novo aluno à sessão.
             db.add(new_student)
             # 'flush' envia a operação para o banco de dados para que o ID seja gerado.
             db.flush()
             # 'refresh' atualiza o objeto 'new_student' com os dados do banco (como o ID).
             db.refresh(new_student)
+            publish_change(db, "student", CREATED, [new_student.id])
             # Retorna os dados do novo aluno criado.
             return {
                 "id": new_student.id, "first_name": new_student.first_name,
@@ -129,24 +376,27 @@ class DataService:
             }
 
     # Método para buscar todos os alunos.
+    @query_budget(1)
     def get_all_students(self) -> list[dict]:
         with self._get_db() as db:
-            # Busca todos os alunos, ordenados pelo primeiro nome.
-            students = db.query(Student).order_by(Student.first_name).all()
+            # Busca apenas as colunas usadas, ordenadas pelo primeiro nome (sem montar objetos do ORM).
+            rows = db.query(Student.id, Student.first_name, Student.last_name, Student.birth_date).order_by(Student.first_name).all()
             # Retorna uma lista de dicionários com os dados dos alunos (padrão DTO - Data Transfer Object).
-            return [{"id": s.id, "first_name": s.first_name, "last_name": s.last_name, "birth_date": s.birth_date.isoformat() if s.birth_date else None} for s in students]
+            return [self._student_row_to_dict(row) for row in rows]
 
     # Método para obter a contagem total de alunos.
+    @query_budget(1)
     def get_student_count(self) -> int:
         with self._get_db() as db:
             # Usa a função `count` do SQLAlchemy e `scalar` para obter um único valor.
             return db.query(func.count(Student.id)).scalar()
 
     # Método para buscar um aluno pelo nome completo.
+    @query_budget(1)
     def get_student_by_name(self, name: str) -> dict | None:
         with self._get_db() as db:
-            # Filtra pelo nome completo, ignorando maiúsculas/minúsculas.
-            student = db.query(Student).filter(func.lower(Student.first_name + " " + Student.last_name) == name.lower()).first()
+            # Filtra pelo nome completo normalizado, ignorando maiúsculas/minúsculas e acentos.
+            student = db.query(Student).filter(Student.search_name == normalize_name(name)).first()
             # Se encontrar, retorna os dados em formato de dicionário.
             if student:
                 return {
@@ -164,56 +414,55 @@ class DataService:
             if student:
                 student.first_name = first_name
                 student.last_name = last_name
+                publish_change(db, "student", UPDATED, [student_id])
 
     # Método para deletar um aluno.
     def delete_student(self, student_id: int):
+        self.delete_students([student_id])
+
+    # Método para deletar vários alunos de uma vez.
+    def delete_students(self, student_ids: list[int]) -> int:
+        """
+        Exclui alunos com um único comando DELETE, na mesma transação.
+
+        As notas, matrículas, incidentes e médias dos alunos são removidos pelo banco (ON DELETE CASCADE),
+        sem serem carregados na memória.
+
+        :param student_ids: IDs dos alunos.
+        :return: Número de alunos excluídos.
+        """
         with self._get_db() as db:
-            # Deleta manualmente os registros dependentes (notas, matrículas) para evitar erros de chave estrangeira.
-            db.query(Grade).filter(Grade.student_id == student_id).delete()
-            db.query(ClassEnrollment).filter(ClassEnrollment.student_id == student_id).delete()
-            # Busca o aluno pelo ID.
-            student = db.query(Student).filter(Student.id == student_id).first()
-            # Se encontrar, deleta o aluno.
-            if student:
-                db.delete(student)
+            deleted = self._delete_where(db, Student, Student.id.in_(list(student_ids)))
+            if deleted:
+                publish_change(db, "student", DELETED, student_ids)
+            return deleted
 
     # Método para buscar todos os alunos com pelo menos uma matrícula ativa.
+    @query_budget(1)
     def get_students_with_active_enrollment(self) -> list[dict]:
         with self._get_db() as db:
             # Usa 'join' para conectar Student com ClassEnrollment e filtra pelo status 'Active'.
-            active_students = db.query(Student).join(ClassEnrollment).filter(ClassEnrollment.status == 'Active').all()
-            return [{"id": s.id, "first_name": s.first_name, "last_name": s.last_name} for s in active_students]
+            rows = (db.query(Student.id, Student.first_name, Student.last_name)
+                    .join(ClassEnrollment).filter(ClassEnrollment.status == 'Active').all())
+            return [{"id": student_id, "first_name": first_name, "last_name": last_name} for student_id, first_name, last_name in rows]
 
     # Método para buscar alunos com paginação e filtro.
+    @query_budget(2)
     def get_paginated_students(self, page: int, page_size: int, search_term: str = None, active_only: bool = False) -> dict:
         with self._get_db() as db:
-            query = db.query(Student)
-
-            if active_only:
-                query = query.join(ClassEnrollment).filter(ClassEnrollment.status == 'Active').distinct()
-
-            if search_term:
-                search_pattern = f"%{search_term.lower()}%"
-                query = query.filter(func.lower(Student.first_name + " " + Student.last_name).like(search_pattern))
+            filters = self._student_list_filters(search_term, active_only)
+            if filters is None:
+                return {"students": [], "total_count": 0, "total_pages": 0, "current_page": page}
 
-            total_count = query.count()
+            total_count = self._count_students(db, filters, search_term, active_only)
 
-            # Ordena por nome
-            query = query.order_by(Student.first_name, Student.last_name)
+            # Ordena por nome (o ID desempata alunos homônimos, mantendo a ordem estável entre as páginas).
+            query = (db.query(Student.id, Student.first_name, Student.last_name, Student.birth_date)
+                     .filter(*filters).order_by(Student.first_name, Student.last_name, Student.id))
 
             # Aplica paginação
             offset = (page - 1) * page_size
-            students = query.offset(offset).limit(page_size).all()
-
-            student_list = [
-                {
-                    "id": s.id,
-                    "first_name": s.first_name,
-                    "last_name": s.last_name,
-                    "birth_date": s.birth_date.isoformat() if s.birth_date else None
-                }
-                for s in students
-            ]
+            student_list = [self._student_row_to_dict(row) for row in query.offset(offset).limit(page_size).all()]
 
             return {
                 "students": student_list,
@@ -222,16 +471,118 @@ class DataService:
                 "current_page": page
             }
 
+    # Método para buscar uma página de alunos com paginação por cursor (keyset).
+    @query_budget(3)
+    def get_students_page(self, page_size: int, after: tuple | None = None, before: tuple | None = None,
+                          search_term: str = None, active_only: bool = False) -> dict:
+        """
+        Busca uma página de alunos ordenados por (first_name, last_name, id), a partir de um cursor.
+
+        Em vez de pular as linhas das páginas anteriores (OFFSET), a consulta continua do último aluno
+        exibido pelo índice de nomes, então virar a página custa o mesmo na página 1 e na página 500.
+        O total é lido do cache de leitura (se houver um) e só é recalculado depois de uma escrita nas tabelas
+        de alunos ou matrículas, inclusive por outra conexão.
+
+        Sem cursores, retorna a primeira página. Se a página seguinte a 'after' estiver vazia (ex: o último
+        aluno da última página foi excluído), retorna a última página.
+
+        :param page_size: Número de alunos por página.
+        :param after: Cursor 'next_cursor' de uma página: retorna os alunos seguintes.
+        :param before: Cursor 'previous_cursor' de uma página: retorna os alunos anteriores.
+        :param search_term: Termo de busca por nome (opcional).
+        :param active_only: Se True, retorna apenas alunos com alguma matrícula ativa.
+        :return: Dicionário com "students", "total_count", "next_cursor" e "previous_cursor"
+            (os cursores são None quando não há página seguinte ou anterior).
+        """
+        if after is not None and before is not None:
+            raise ValueError("Use either 'after' or 'before', not both.")
+        with self._get_db() as db:
+            filters = self._student_list_filters(search_term, active_only)
+            if filters is None:
+                return {"students": [], "total_count": 0, "next_cursor": None, "previous_cursor": None}
+
+            total_count = self._count_students(db, filters, search_term, active_only)
+            students, has_previous, has_next = self._fetch_student_keyset_page(db, filters, page_size, after, before)
+            if not students and after is not None:
+                students, has_previous, has_next = self._fetch_student_keyset_page(db, filters, page_size, None, ())
+
+            return {
+                "students": [self._student_row_to_dict(row) for row in students],
+                "total_count": total_count,
+                "next_cursor": (students[-1][1], students[-1][2], students[-1][0]) if has_next else None,
+                "previous_cursor": (students[0][1], students[0][2], students[0][0]) if has_previous else None,
+            }
+
+    # Método privado que busca as linhas de uma página a partir de um cursor (before=() busca a última página).
+    @staticmethod
+    def _fetch_student_keyset_page(db: Session, filters: list, page_size: int, after: tuple | None,
+                                   before: tuple | None) -> tuple[list, bool, bool]:
+        sort_key = tuple_(Student.first_name, Student.last_name, Student.id)
+        query = select(Student.id, Student.first_name, Student.last_name, Student.birth_date).where(*filters)
+        # Uma linha a mais indica se existe outra página na direção da leitura.
+        if before is None:
+            if after is not None:
+                query = query.where(sort_key > tuple_(*after))
+            query = query.order_by(Student.first_name, Student.last_name, Student.id)
+        else:
+            # Páginas anteriores são lidas de trás para frente e depois reordenadas.
+            if before:
+                query = query.where(sort_key < tuple_(*before))
+            query = query.order_by(Student.first_name.desc(), Student.last_name.desc(), Student.id.desc())
+        rows = db.execute(query.limit(page_size + 1)).all()
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if before is None:
+            return rows, after is not None, has_more
+        rows.reverse()
+        return rows, has_more, bool(before)
+
+    # Método privado que converte uma linha (id, first_name, last_name, birth_date) em dicionário.
+    @staticmethod
+    def _student_row_to_dict(row) -> dict:
+        student_id, first_name, last_name, birth_date = row
+        return {
+            "id": student_id, "first_name": first_name, "last_name": last_name,
+            "birth_date": birth_date.isoformat() if birth_date else None
+        }
+
+    # Método privado que monta os filtros das listas de alunos (None se a busca não puder encontrar nada).
+    @staticmethod
+    def _student_list_filters(search_term: str | None, active_only: bool) -> list | None:
+        filters = []
+        if active_only:
+            filters.append(Student.id.in_(select(ClassEnrollment.student_id).where(ClassEnrollment.status == 'Active')))
+        if search_term:
+            # Usa o índice de busca textual: cada termo digitado deve ser o início de uma palavra do nome.
+            match_query = build_match_query(search_term)
+            if match_query is None:
+                return None
+            matching_ids = (text("SELECT rowid FROM students_fts WHERE students_fts MATCH :match")
+                            .bindparams(match=match_query).columns(column("rowid", Integer)))
+            filters.append(Student.id.in_(matching_ids))
+        return filters
+
+    # Método privado que conta os alunos de uma lista, usando o cache de leitura (se houver um).
+    def _count_students(self, db: Session, filters: list, search_term: str | None, active_only: bool) -> int:
+        # Termos que geram a mesma busca textual (ex: "Lima" e "lima ") compartilham a contagem.
+        key = ("_count_students", build_match_query(search_term) if search_term else None, active_only)
+        return self._from_query_cache(
+            key, ("students", "class_enrollments"),
+            lambda: db.execute(select(func.count()).select_from(Student).where(*filters)).scalar(), db=db,
+        )
+
     # Método para buscar alunos que não estão matriculados em uma turma específica.
+    @query_budget(1)
     def get_unenrolled_students(self, class_id: int) -> list[dict]:
         with self._get_db() as db:
             # Cria uma subconsulta para obter os IDs de todos os alunos já matriculados na turma.
             enrolled_student_ids = db.query(ClassEnrollment.student_id).filter(ClassEnrollment.class_id == class_id)
             # Busca todos os alunos cujo ID não está na lista de IDs de matriculados.
-            students = db.query(Student).filter(Student.id.notin_(enrolled_student_ids)).all()
-            return [{"id": s.id, "first_name": s.first_name, "last_name": s.last_name} for s in students]
+            rows = db.query(Student.id, Student.first_name, Student.last_name).filter(Student.id.notin_(enrolled_student_ids)).all()
+            return [{"id": student_id, "first_name": first_name, "last_name": last_name} for student_id, first_name, last_name in rows]
 
     # Método para buscar alunos (ativos) que fazem aniversário no dia de hoje.
+    @query_budget(1)
     def get_students_with_birthday_today(self) -> list[dict]:
         today = date.today()
         # Converte para strings com zero à esquerda (ex: '01', '02', ..., '12').
@@ -243,7 +594,7 @@ class DataService:
             # Filtra apenas matrículas 'Active'.
             # Usa strftime para extrair dia e mês da data de nascimento no SQLite.
             students = (
-                db.query(Student, Class.name.label("class_name"))
+                db.query(Student.id, Student.first_name, Student.last_name, Student.birth_date, Class.name)
                 .join(ClassEnrollment, Student.id == ClassEnrollment.student_id)
                 .join(Class, ClassEnrollment.class_id == Class.id)
                 .filter(ClassEnrollment.status == 'Active')
@@ -255,17 +606,41 @@ class DataService:
             )
 
             results = []
-            for student, class_name in students:
+            for student_id, first_name, last_name, birth_date, class_name in students:
                 # Calcula a idade que o aluno está completando hoje.
-                age = today.year - student.birth_date.year if student.birth_date else 0
+                age = today.year - birth_date.year if birth_date else 0
                 results.append({
-                    "id": student.id,
-                    "name": f"{student.first_name} {student.last_name}",
+                    "id": student_id,
+                    "name": f"{first_name} {last_name}",
                     "age": age,
                     "class_name": class_name
                 })
             return results
 
+    # Método para buscar os alunos matriculados em um período.
+    @query_budget(1)
+    def get_students_enrolled_between(self, date_from: date | None = None, date_to: date | None = None) -> list[dict]:
+        """
+        Retorna os alunos cuja data de matrícula está no período (ex: "matriculados desde março").
+
+        A busca é feita por intervalo no índice 'ix_students_enrollment_date'.
+
+        :param date_from: Data de matrícula mínima (inclusiva). None não limita o início.
+        :param date_to: Data de matrícula máxima (inclusiva). None não limita o fim.
+        :return: Lista de dicionários com "id", "first_name", "last_name" e "enrollment_date" (AAAA-MM-DD),
+            ordenada pela data de matrícula.
+        """
+        query = select(Student.id, Student.first_name, Student.last_name, Student.enrollment_date)
+        if date_from is not None:
+            query = query.where(Student.enrollment_date >= date_from)
+        if date_to is not None:
+            query = query.where(Student.enrollment_date <= date_to)
+        with self._get_db() as db:
+            rows = db.execute(query.order_by(Student.enrollment_date, Student.id)).all()
+            return [{"id": student_id, "first_name": first_name, "last_name": last_name,
+                     "enrollment_date": enrollment_date.isoformat()}
+                    for student_id, first_name, last_name, enrollment_date in rows]
+
     # Método para adicionar um novo curso.
     def add_course(self, course_name: str, course_code: str) -> dict | None:
         if not course_name or not course_code: return None
@@ -274,53 +649,61 @@ class DataService:
             db.add(new_course)
             db.flush()
             db.refresh(new_course)
+            publish_change(db, "course", CREATED, [new_course.id])
             return {"id": new_course.id, "course_name": new_course.course_name, "course_code": new_course.course_code}
 
     # Método para buscar todos os cursos.
+    @query_budget(1)
+    @_cached_query("courses")
     def get_all_courses(self) -> list[dict]:
         with self._get_db() as db:
-            courses = db.query(Course).order_by(Course.course_name).all()
-            return [{"id": c.id, "course_name": c.course_name, "course_code": c.course_code} for c in courses]
+            rows = db.execute(select(Course.id, Course.course_name, Course.course_code).order_by(Course.course_name)).mappings()
+            return [dict(row) for row in rows]
 
     # Método para obter a contagem total de cursos.
+    @query_budget(1)
     def get_course_count(self) -> int:
         with self._get_db() as db:
             return db.query(func.count(Course.id)).scalar()
 
     # Método para buscar um curso pelo nome.
+    @query_budget(1)
+    @_cached_query("courses")
     def get_course_by_name(self, name: str) -> dict | None:
         with self._get_db() as db:
-            course = db.query(Course).filter(func.lower(Course.course_name) == name.lower()).first()
-            if course:
-                return {"id": course.id, "course_name": course.course_name, "course_code": course.course_code}
-            return None
+            course = db.execute(
+                select(Course.id, Course.course_name, Course.course_code).where(func.lower(Course.course_name) == name.lower()).limit(1)
+            ).mappings().first()
+            return dict(course) if course else None
 
     # Método para buscar um curso pelo ID.
+    @query_budget(1)
+    @_cached_query("courses", "class_subjects", "classes")
     def get_course_by_id(self, course_id: int) -> dict | None:
         with self._get_db() as db:
-            # Carrega também as turmas associadas através de class_subjects
-            course = db.query(Course).options(
-                joinedload(Course.class_subjects).joinedload(ClassSubject.class_)
-            ).filter(Course.id == course_id).first()
+            # Busca o curso e as turmas onde ele é ministrado (através de class_subjects) em uma única junção.
+            rows = (
+                db.query(Course.id, Course.course_name, Course.course_code, Class.id, Class.name, ClassSubject.id)
+                .outerjoin(ClassSubject, ClassSubject.course_id == Course.id)
+                .outerjoin(Class, ClassSubject.class_id == Class.id)
+                .filter(Course.id == course_id)
+                .order_by(ClassSubject.id)
+                .all()
+            )
+            if not rows:
+                return None
 
-            if course:
+            course_id, course_name, course_code = rows[0][:3]
+            return {
+                "id": course_id,
+                "course_name": course_name,
+                "course_code": course_code,
                 # Monta a lista de turmas onde este curso é ministrado
-                classes_list = []
-                for cs in course.class_subjects:
-                    if cs.class_:
-                        classes_list.append({
-                            "id": cs.class_.id,
-                            "name": cs.class_.name,
-                            "class_subject_id": cs.id
-                        })
-
-                return {
-                    "id": course.id,
-                    "course_name": course.course_name,
-                    "course_code": course.course_code,
-                    "classes": classes_list
-                }
-            return None
+                "classes": [
+                    {"id": class_id, "name": class_name, "class_subject_id": class_subject_id}
+                    for _, _, _, class_id, class_name, class_subject_id in rows if class_id is not None
+                ]
+            }
 
     # Método para atualizar um curso.
     def update_course(self, course_id: int, course_name: str, course_code: str):
@@ -329,6 +712,7 @@ class DataService:
             if course:
                 course.course_name = course_name
                 course.course_code = course_code
+                publish_change(db, "course", UPDATED, [course_id])
 
     # Método para deletar um curso.
     def delete_course(self, course_id: int):
@@ -338,9 +722,8 @@ class DataService:
             if subjects:
                 raise ValueError("Cannot delete course because it is associated with one or more classes.")
 
-            course = db.query(Course).filter(Course.id == course_id).first()
-            if course:
-                db.delete(course)
+            if db.execute(delete(Course).where(Course.id == course_id)).rowcount:
+                publish_change(db, "course", DELETED, [course_id])
 
     # Método para criar uma nova turma (Agora sem vincular um curso obrigatório).
     def create_class(self, name: str, calculation_method: str = 'arithmetic') -> dict | None:
@@ -355,6 +738,7 @@ class DataService:
             db.add(new_class)
             db.flush()
             db.refresh(new_class)
+            publish_change(db, "class", CREATED, [new_class.id])
             return {"id": new_class.id, "name": new_class.name}
 
     # Adiciona uma disciplina a uma turma.
@@ -371,37 +755,66 @@ class DataService:
             db.add(new_subject)
             db.flush()
             db.refresh(new_subject)
+            publish_change(db, "class_subject", CREATED, [new_subject.id], class_id=class_id, class_subject_id=new_subject.id)
             return {"id": new_subject.id, "class_id": new_subject.class_id, "course_id": new_subject.course_id}
 
     # Busca todas as disciplinas de uma turma.
+    @query_budget(1)
+    @_cached_query("class_subjects", "courses")
     def get_subjects_for_class(self, class_id: int) -> list[dict]:
         with self._get_db() as db:
-            subjects = db.query(ClassSubject).options(joinedload(ClassSubject.course)).filter(ClassSubject.class_id == class_id).all()
-            return [{"id": s.id, "course_id": s.course.id, "course_name": s.course.course_name, "course_code": s.course.course_code} for s in subjects]
+            rows = db.execute(
+                select(ClassSubject.id, Course.id.label("course_id"), Course.course_name, Course.course_code)
+                .join(Course, ClassSubject.course_id == Course.id)
+                .where(ClassSubject.class_id == class_id)
+                .order_by(ClassSubject.id)
+            ).mappings()
+            return [dict(row) for row in rows]
 
     # Método para buscar uma turma pelo nome.
+    @query_budget(1)
+    @_cached_query("classes")
     def get_class_by_name(self, name: str) -> dict | None:
         with self._get_db() as db:
-            class_ = db.query(Class).filter(func.lower(Class.name) == name.lower()).first()
-            if class_:
-                return {"id": class_.id, "name": class_.name}
-            return None
+            class_ = db.execute(select(Class.id, Class.name).where(func.lower(Class.name) == name.lower()).limit(1)).mappings().first()
+            return dict(class_) if class_ else None
 
     # Método para buscar todas as turmas.
-    def get_all_classes(self) -> list[dict]:
+    @query_budget(1)
+    def get_all_classes(self, include_archives: bool = False) -> list[dict]:
+        """
+        Retorna as turmas com a contagem de alunos matriculados, ordenadas pelo nome.
+
+        :param include_archives: Se True, inclui as turmas dos anos letivos arquivados. Cada turma
+            recebe a chave "archive", com o ano letivo do arquivo (None para o banco principal).
+        :return: Lista de dicionários com "id", "name" e "student_count".
+        """
         with self._get_db() as db:
-            # Carrega as matrículas relacionadas para evitar consultas extras.
-            classes = db.query(Class).options(joinedload(Class.enrollments)).order_by(Class.name).all()
-            # Calcula a contagem de alunos para cada turma.
-            return [{"id": c.id, "name": c.name, "student_count": len(c.enrollments)} for c in classes]
+            selects = []
+            for schema, school_year in self._archive_sources(db, include_archives):
+                tables = schema_tables(schema)
+                classes, enrollments = tables["classes"], tables["class_enrollments"]
+                # A contagem é feita no banco, com uma junção agrupada por turma.
+                columns = [classes.c.id, classes.c.name, func.count(enrollments.c.id).label("student_count")]
+                if include_archives:
+                    columns.append(self._archive_label(school_year))
+                selects.append(
+                    select(*columns)
+                    .select_from(classes.outerjoin(enrollments, enrollments.c.class_id == classes.c.id))
+                    .group_by(classes.c.id)
+                )
+            # Combina o banco principal e os arquivos anexados em um único comando.
+            statement = union_all(*selects) if len(selects) > 1 else selects[0]
+            rows = db.execute(statement.order_by("name")).mappings()
+            return [dict(row) for row in rows]
 
     # Método para buscar uma turma pelo ID.
+    @query_budget(1)
+    @_cached_query("classes")
     def get_class_by_id(self, class_id: int) -> dict | None:
         with self._get_db() as db:
-            class_ = db.query(Class).filter(Class.id == class_id).first()
-            if class_:
-                return {"id": class_.id, "name": class_.name}
-            return None
+            class_ = db.execute(select(Class.id, Class.name).where(Class.id == class_id)).mappings().first()
+            return dict(class_) if class_ else None
 
     # Método para atualizar uma turma.
     def update_class(self, class_id: int, name: str):
@@ -409,15 +822,39 @@ class DataService:
             class_ = db.query(Class).filter(Class.id == class_id).first()
             if class_:
                 class_.name = name
+                publish_change(db, "class", UPDATED, [class_id])
 
     # Método para deletar uma turma.
     def delete_class(self, class_id: int):
+        self.delete_classes([class_id])
+
+    # Método para deletar várias turmas de uma vez.
+    def delete_classes(self, class_ids: list[int]) -> int:
+        """
+        Exclui turmas com um único comando DELETE, na mesma transação.
+
+        As disciplinas, matrículas, incidentes, avaliações, notas, aulas e médias das turmas são removidos
+        pelo banco (ON DELETE CASCADE), sem serem carregados na memória.
+
+        :param class_ids: IDs das turmas.
+        :return: Número de turmas excluídas.
+        """
         with self._get_db() as db:
-            # Deleta as matrículas associadas antes de deletar a turma.
-            db.query(ClassEnrollment).filter(ClassEnrollment.class_id == class_id).delete()
-            class_ = db.query(Class).filter(Class.id == class_id).first()
-            if class_:
-                db.delete(class_)
+            deleted = self._delete_where(db, Class, Class.id.in_(list(class_ids)))
+            if deleted:
+                publish_change(db, "class", DELETED, class_ids)
+            return deleted
+
+    # Método privado que exclui as linhas de um modelo com um único comando (as dependentes saem em cascata).
+    @staticmethod
+    def _delete_where(db: Session, model, condition) -> int:
+        # Envia as alterações pendentes antes da exclusão em lote.
+        db.flush()
+        result = db.execute(delete(model).where(condition), execution_options={"synchronize_session": False})
+        # As linhas removidas em cascata pelo banco podem estar no mapa de identidade da sessão: os objetos
+        # carregados são expirados para que não sejam usados com dados que já não existem.
+        db.expire_all()
+        return result.rowcount
 
     # Método para adicionar (ou atualizar) um aluno em uma turma.
     def add_student_to_class(self, student_id: int, class_id: int, call_number: int, status: str = "Active") -> dict | None:
@@ -430,27 +867,50 @@ class DataService:
                 existing.call_number = call_number
                 existing.status = status
                 db.flush()
+                publish_change(db, "enrollment", UPDATED, [existing.id], class_id=class_id)
                 return {"id": existing.id, "student_id": existing.student_id, "class_id": existing.class_id, "status": existing.status}
             # Se não existir, cria uma nova matrícula.
             enrollment = ClassEnrollment(student_id=student_id, class_id=class_id, call_number=call_number, status=status)
             db.add(enrollment)
             db.flush()
             db.refresh(enrollment)
+            publish_change(db, "enrollment", CREATED, [enrollment.id], class_id=class_id)
             return {"id": enrollment.id, "student_id": enrollment.student_id, "class_id": enrollment.class_id, "status": enrollment.status}
 
     # Método para buscar todas as matrículas de uma turma.
-    def get_enrollments_for_class(self, class_id: int) -> list[dict]:
+    @query_budget(1)
+    def get_enrollments_for_class(self, class_id: int, compact: bool = False) -> list[dict]:
+        """
+        Retorna as matrículas da turma, pelo número de chamada, com os dados de cada aluno.
+
+        :param compact: Se True, retorna registros compactos ('__slots__', compatíveis com dicionários
+            somente leitura) em vez de dicionários.
+        """
         with self._get_db() as db:
-            # Carrega os dados do aluno junto com a matrícula e ordena pelo número de chamada.
-            enrollments = db.query(ClassEnrollment).options(joinedload(ClassEnrollment.student)).filter(ClassEnrollment.class_id == class_id).order_by(ClassEnrollment.call_number).all()
+            # Busca as colunas da matrícula e do aluno em uma junção, ordenadas pelo número de chamada.
+            rows = (
+                db.query(ClassEnrollment.id, ClassEnrollment.call_number, ClassEnrollment.status,
+                         Student.id, Student.first_name, Student.last_name, Student.birth_date)
+                .join(Student, ClassEnrollment.student_id == Student.id)
+                .filter(ClassEnrollment.class_id == class_id)
+                .order_by(ClassEnrollment.call_number)
+                .all()
+            )
+            if compact:
+                record = record_type("EnrollmentRecord", _ENROLLMENT_FIELDS)
+                return [
+                    record(enrollment_id, call_number, status, student_id, first_name, last_name,
+                           birth_date.isoformat() if birth_date else None)
+                    for enrollment_id, call_number, status, student_id, first_name, last_name, birth_date in rows
+                ]
             # Retorna uma lista de dicionários com dados combinados da matrícula e do aluno.
             return [
                 {
-                    "id": e.id, "call_number": e.call_number, "status": e.status,
-                    "student_id": e.student.id,
-                    "student_first_name": e.student.first_name, "student_last_name": e.student.last_name,
-                    "student_birth_date": e.student.birth_date.isoformat() if e.student.birth_date else None
-                } for e in enrollments
+                    "id": enrollment_id, "call_number": call_number, "status": status,
+                    "student_id": student_id,
+                    "student_first_name": first_name, "student_last_name": last_name,
+                    "student_birth_date": birth_date.isoformat() if birth_date else None
+                } for enrollment_id, call_number, status, student_id, first_name, last_name, birth_date in rows
             ]
 
     # Método para atualizar o status de uma matrícula (ex: "Active", "Inactive").
@@ -459,6 +919,7 @@ class DataService:
             enrollment = db.query(ClassEnrollment).filter(ClassEnrollment.id == enrollment_id).first()
             if enrollment:
                 enrollment.status = status
+                publish_change(db, "enrollment", UPDATED, [enrollment_id], class_id=enrollment.class_id)
 
     # Método privado para calcular o próximo número de chamada disponível em uma turma.
     @staticmethod
@@ -485,6 +946,9 @@ class DataService:
             db.add(assessment)
             db.flush()
             db.refresh(assessment)
+            # O peso total da disciplina mudou: recalcula as médias de todos os alunos da disciplina.
+            self._refresh_subject_averages(db, [class_subject_id])
+            publish_change(db, "assessment", CREATED, [assessment.id], class_subject_id=class_subject_id)
             return {"id": assessment.id, "name": assessment.name, "weight": assessment.weight, "class_subject_id": assessment.class_subject_id}
 
     # Método para atualizar uma avaliação.
@@ -496,70 +960,356 @@ class DataService:
             assessment = db.query(Assessment).filter(Assessment.id == assessment_id).first()
             if assessment:
                 assessment.name = name
-                assessment.weight = weight
+                # Se o peso mudou, recalcula as médias de todos os alunos da disciplina.
+                if assessment.weight != weight:
+                    assessment.weight = weight
+                    self._refresh_subject_averages(db, [assessment.class_subject_id])
+                publish_change(db, "assessment", UPDATED, [assessment_id], class_subject_id=assessment.class_subject_id)
 
     # Método para deletar uma avaliação.
     def delete_assessment(self, assessment_id: int):
         with self._get_db() as db:
-            # Deleta as notas associadas antes de deletar a avaliação.
-            db.query(Grade).filter(Grade.assessment_id == assessment_id).delete()
-            assessment = db.query(Assessment).filter(Assessment.id == assessment_id).first()
-            if assessment:
-                db.delete(assessment)
+            # As notas da avaliação são removidas pelo banco (ON DELETE CASCADE).
+            # 'RETURNING' informa a disciplina da avaliação sem uma consulta extra.
+            db.flush()
+            class_subject_id = db.execute(
+                delete(Assessment).where(Assessment.id == assessment_id).returning(Assessment.class_subject_id),
+                execution_options={"synchronize_session": False},
+            ).scalar()
+            db.expire_all()
+            if class_subject_id is not None:
+                # Recalcula as médias de todos os alunos da disciplina (notas e peso total mudaram).
+                self._refresh_subject_averages(db, [class_subject_id])
+                publish_change(db, "assessment", DELETED, [assessment_id], class_subject_id=class_subject_id)
 
     # Método para buscar avaliações de uma disciplina da turma.
+    @query_budget(1)
+    @_cached_query("assessments")
     def get_assessments_for_subject(self, class_subject_id: int) -> list[dict]:
         with self._get_db() as db:
-            assessments = db.query(Assessment).filter(Assessment.class_subject_id == class_subject_id).all()
-            return [{"id": a.id, "name": a.name, "weight": a.weight} for a in assessments]
+            rows = db.execute(
+                select(Assessment.id, Assessment.name, Assessment.weight)
+                .where(Assessment.class_subject_id == class_subject_id).order_by(Assessment.id)
+            ).mappings()
+            return [dict(row) for row in rows]
+
+    # Método para listar os nomes indexados pelo resolvedor de nomes das ferramentas do assistente.
+    @query_budget(1)
+    def get_resolvable_names(self, kind: str) -> list[tuple[int, str, int | None]]:
+        """
+        Retorna os nomes de um tipo de entidade, com o escopo em que cada nome deve ser único.
+
+        :param kind: "student" (nome completo), "class", "course", "subject" (nome do curso, no escopo da
+            turma) ou "assessment" (no escopo da disciplina da turma).
+        :raises ValueError: Se o tipo for desconhecido.
+        :return: Lista de tuplas (id, nome, id do escopo ou None).
+        """
+        queries = {
+            "student": lambda: select(Student.id, Student.first_name + " " + Student.last_name, null()),
+            "class": lambda: select(Class.id, Class.name, null()),
+            "course": lambda: select(Course.id, Course.course_name, null()),
+            "subject": lambda: select(ClassSubject.id, Course.course_name, ClassSubject.class_id)
+                               .join_from(ClassSubject, Course, ClassSubject.course_id == Course.id),
+            "assessment": lambda: select(Assessment.id, Assessment.name, Assessment.class_subject_id),
+        }
+        if kind not in queries:
+            raise ValueError(f"Unknown name kind: {kind!r}.")
+        with self._get_db() as db:
+            return [tuple(row) for row in db.execute(queries[kind]())]
 
     # Método para buscar todas as notas (geralmente para fins administrativos).
     def get_all_grades(self) -> list[dict]:
         with self._get_db() as db:
-            grades = db.query(Grade).all()
-            return [{"id": g.id, "student_id": g.student_id, "assessment_id": g.assessment_id, "score": g.score} for g in grades]
+            rows = db.execute(select(Grade.id, Grade.student_id, Grade.assessment_id, Grade.score)).mappings()
+            return [dict(row) for row in rows]
 
     # Método para buscar todas as notas de uma disciplina específica da turma.
+    @query_budget(1)
     def get_grades_for_subject(self, class_subject_id: int) -> list[dict]:
         with self._get_db() as db:
             # Consulta complexa que busca notas apenas de alunos com status 'Active' na turma associada à disciplina.
             # Grade -> Assessment -> ClassSubject -> Class -> Enrollment
-            grades = (db.query(Grade).options(joinedload(Grade.assessment))
-                      .join(Assessment, Grade.assessment_id == Assessment.id)
-                      .join(ClassSubject, Assessment.class_subject_id == ClassSubject.id)
-                      .join(ClassEnrollment, (Grade.student_id == ClassEnrollment.student_id) & (ClassSubject.class_id == ClassEnrollment.class_id))
-                      .filter(Assessment.class_subject_id == class_subject_id)
-                      .filter(ClassEnrollment.status == 'Active').all())
-            return [
-                {"id": g.id, "student_id": g.student_id, "assessment_id": g.assessment_id, "score": g.score, "assessment_name": g.assessment.name}
-                for g in grades
-            ]
-
-    # Método para buscar todas as notas com detalhes completos (aluno, avaliação, turma, curso).
-    def get_all_grades_with_details(self) -> list[dict]:
-        with self._get_db() as db:
-            # Query otimizada que junta todas as tabelas relacionadas e seleciona colunas específicas.
-            grades_query = (
-                db.query(
-                    Grade.id, Grade.score, Student.id.label("student_id"),
-                    Student.first_name.label("student_first_name"), Student.last_name.label("student_last_name"),
-                    Assessment.id.label("assessment_id"), Assessment.name.label("assessment_name"),
-                    Class.id.label("class_id"), Class.name.label("class_name"),
-                    Course.id.label("course_id"), Course.course_name.label("course_name")
-                )
-                .join(Student, Grade.student_id == Student.id)
+            # O nome da avaliação vem da mesma junção (sem carregar os objetos Assessment).
+            rows = db.execute(
+                select(Grade.id, Grade.student_id, Grade.assessment_id, Grade.score, Assessment.name.label("assessment_name"))
                 .join(Assessment, Grade.assessment_id == Assessment.id)
                 .join(ClassSubject, Assessment.class_subject_id == ClassSubject.id)
-                .join(Class, ClassSubject.class_id == Class.id)
-                .join(Course, ClassSubject.course_id == Course.id)
-                .all()
+                .join(ClassEnrollment, (Grade.student_id == ClassEnrollment.student_id) & (ClassSubject.class_id == ClassEnrollment.class_id))
+                .where(Assessment.class_subject_id == class_subject_id)
+                .where(ClassEnrollment.status == 'Active')
+            ).mappings()
+            return [dict(row) for row in rows]
+
+    # Método para buscar todas as notas com detalhes completos (aluno, avaliação, turma, curso).
+    @query_budget(1)
+    def get_all_grades_with_details(self, include_archives: bool = False, compact: bool = False) -> list[dict]:
+        """
+        Retorna todas as notas com o aluno, a avaliação, a turma e o curso de cada uma.
+
+        :param include_archives: Se True, inclui as notas dos anos letivos arquivados. Cada nota
+            recebe a chave "archive", com o ano letivo do arquivo (None para o banco principal).
+        :param compact: Se True, retorna registros compactos em vez de dicionários.
+        :return: Lista de dicionários, um por nota.
+        """
+        with self._get_db() as db:
+            selects = []
+            for schema, school_year in self._archive_sources(db, include_archives):
+                statement = self._grade_details_select(schema_tables(schema))
+                if include_archives:
+                    statement = statement.add_columns(self._archive_label(school_year))
+                selects.append(statement)
+            # Combina o banco principal e os arquivos anexados em um único comando.
+            statement = union_all(*selects) if len(selects) > 1 else selects[0]
+            if compact:
+                return records_from_result("GradeRecord", db.execute(statement))
+            return [dict(row) for row in db.execute(statement).mappings()]
+
+    # Método para buscar notas com detalhes, filtradas no banco de dados.
+    @query_budget(1)
+    def query_grades(self, student_id: int | None = None, course_id: int | None = None, class_id: int | None = None,
+                     assessment_id: int | None = None, date_from: date | None = None, date_to: date | None = None,
+                     compact: bool = False) -> list[dict]:
+        """
+        Retorna as notas que atendem a todos os filtros informados, com os mesmos detalhes de
+        ``get_all_grades_with_details`` e a data de registro ("date_recorded").
+
+        Os filtros são aplicados no SQL: o custo depende do número de notas encontradas, não do
+        tamanho da tabela de notas. Filtros omitidos (None) não restringem o resultado.
+
+        :param student_id: ID do aluno.
+        :param course_id: ID do curso (disciplina do catálogo), em qualquer turma.
+        :param class_id: ID da turma.
+        :param assessment_id: ID da avaliação.
+        :param date_from: Data de registro mínima (inclusiva).
+        :param date_to: Data de registro máxima (inclusiva).
+        :param compact: Se True, retorna registros compactos em vez de dicionários.
+        :return: Lista de dicionários, um por nota, ordenada pela data de registro.
+        """
+        statement = self._filtered_grades_select(student_id, course_id, class_id, assessment_id, date_from, date_to)
+        with self._get_db() as db:
+            if compact:
+                return records_from_result("GradeRecord", db.execute(statement))
+            return [dict(row) for row in db.execute(statement).mappings()]
+
+    # Método para buscar notas filtradas em um lote colunar (IDs e notas em 'array').
+    @query_budget(1)
+    def query_grade_batch(self, student_id: int | None = None, course_id: int | None = None, class_id: int | None = None,
+                          assessment_id: int | None = None, date_from: date | None = None, date_to: date | None = None,
+                          chunk_size: int = 1000) -> GradeBatch:
+        """
+        Retorna as mesmas notas de :meth:`query_grades` em um :class:`GradeBatch`: as colunas numéricas
+        ficam em vetores compactos e os nomes são guardados uma única vez por entidade. Indicado para
+        exportações e cálculos sobre muitas notas (ex: ``statistics.mean(batch.scores)``).
+
+        :param chunk_size: Número de linhas buscadas do banco por vez ('yield_per').
+        """
+        statement = self._filtered_grades_select(student_id, course_id, class_id, assessment_id, date_from, date_to)
+        batch = GradeBatch()
+        with self._get_db() as db:
+            for row in db.execute(statement, execution_options={"yield_per": chunk_size}):
+                batch.append(row)
+        return batch
+
+    # Método que percorre as notas filtradas sem carregar o resultado inteiro na memória.
+    def iter_grades(self, student_id: int | None = None, course_id: int | None = None, class_id: int | None = None,
+                    assessment_id: int | None = None, date_from: date | None = None, date_to: date | None = None,
+                    chunk_size: int = 500, compact: bool = False):
+        """
+        Versão em fluxo de :meth:`query_grades`: gera as notas uma a uma, buscando-as do banco em blocos
+        de ``chunk_size`` linhas ('yield_per'). A memória usada depende do tamanho do bloco, não do resultado.
+
+        A sessão fica aberta enquanto o gerador é percorrido; feche-o (ou percorra-o até o fim) logo após o uso.
+
+        :param chunk_size: Número de linhas buscadas do banco por vez.
+        :param compact: Se True, gera registros compactos em vez de dicionários.
+        :return: Gerador de dicionários, um por nota, na mesma ordem de ``query_grades``.
+        """
+        statement = self._filtered_grades_select(student_id, course_id, class_id, assessment_id, date_from, date_to)
+        with self._get_db() as db:
+            result = db.execute(statement, execution_options={"yield_per": chunk_size})
+            record = record_type("GradeRecord", tuple(result.keys())) if compact else None
+            for row in result:
+                yield record(*row) if compact else row._asdict()
+
+    # Método privado que monta a consulta de notas com detalhes (aluno, avaliação, turma e curso) de uma origem.
+    @staticmethod
+    def _grade_details_select(t: dict):
+        grades, students, assessments = t["grades"], t["students"], t["assessments"]
+        class_subjects, classes, courses = t["class_subjects"], t["classes"], t["courses"]
+        # Consulta que junta todas as tabelas relacionadas e seleciona colunas específicas.
+        return (
+            select(
+                grades.c.id, grades.c.score, students.c.id.label("student_id"),
+                students.c.first_name.label("student_first_name"), students.c.last_name.label("student_last_name"),
+                assessments.c.id.label("assessment_id"), assessments.c.name.label("assessment_name"),
+                classes.c.id.label("class_id"), classes.c.name.label("class_name"),
+                courses.c.id.label("course_id"), courses.c.course_name.label("course_name"),
             )
-            # Converte o resultado (que é uma lista de Row objects) em uma lista de dicionários.
-            return [row._asdict() for row in grades_query]
+            .join_from(grades, students, grades.c.student_id == students.c.id)
+            .join(assessments, grades.c.assessment_id == assessments.c.id)
+            .join(class_subjects, assessments.c.class_subject_id == class_subjects.c.id)
+            .join(classes, class_subjects.c.class_id == classes.c.id)
+            .join(courses, class_subjects.c.course_id == courses.c.id)
+        )
+
+    # Método privado que aplica os filtros de query_grades/iter_grades à consulta de notas com detalhes.
+    def _filtered_grades_select(self, student_id, course_id, class_id, assessment_id, date_from, date_to):
+        t = schema_tables()
+        grades, class_subjects = t["grades"], t["class_subjects"]
+        # A data de registro é lida como o texto ISO gravado (AAAA-MM-DD), como as demais datas dos dicionários.
+        statement = self._grade_details_select(t).add_columns(type_coerce(grades.c.date_recorded, String).label("date_recorded"))
+        if student_id is not None:
+            statement = statement.where(grades.c.student_id == student_id)
+        if assessment_id is not None:
+            statement = statement.where(grades.c.assessment_id == assessment_id)
+        if course_id is not None:
+            statement = statement.where(class_subjects.c.course_id == course_id)
+        if class_id is not None:
+            statement = statement.where(class_subjects.c.class_id == class_id)
+        # Os filtros de data são buscas por intervalo no índice 'ix_grades_date_recorded'.
+        if date_from is not None:
+            statement = statement.where(grades.c.date_recorded >= date_from)
+        if date_to is not None:
+            statement = statement.where(grades.c.date_recorded <= date_to)
+        return statement.order_by(grades.c.date_recorded, grades.c.id)
+
+    # Método privado que lista as origens de uma consulta: o banco principal e, se pedido, os arquivos mortos.
+    @staticmethod
+    def _archive_sources(db: Session, include_archives: bool) -> list[tuple[str | None, int | None]]:
+        sources = [(None, None)]
+        if include_archives:
+            # Anexa (somente leitura) os arquivos que ainda não estão anexados a esta conexão.
+            dbapi_connection = db.connection().connection.dbapi_connection
+            sources += [(archive_schema(year), year) for year in attach_archives(dbapi_connection)]
+        return sources
+
+    # Método privado que monta a coluna "archive" (ano letivo do arquivo, ou NULL para o banco principal).
+    @staticmethod
+    def _archive_label(school_year: int | None):
+        return (literal(school_year) if school_year is not None else null()).label("archive")
+
+    # Método para arquivar turmas encerradas em um banco de arquivo morto.
+    def archive_classes(self, class_ids: list[int], school_year: int) -> dict[str, int]:
+        """
+        Move turmas inteiras (disciplinas, matrículas, avaliações, notas, aulas, incidentes e médias)
+        para o arquivo morto do ano letivo, mantendo o banco principal pequeno.
+
+        Os dados arquivados continuam disponíveis, somente leitura, nas consultas com 'include_archives=True'.
+
+        :param class_ids: IDs das turmas a arquivar.
+        :param school_year: Ano letivo do arquivo (ex: 2023).
+        :return: Número de linhas copiadas por tabela.
+        """
+        with self._get_db() as db:
+            copied = move_classes_to_archive(db, class_ids, school_year)
+            # As turmas arquivadas saem do banco principal.
+            publish_change(db, "class", DELETED, class_ids)
+            return copied
+
+    # Método para listar os anos letivos arquivados.
+    def get_archived_school_years(self) -> list[int]:
+        return list(list_archives())
+
+    # Método para buscar tudo o que se sabe de um aluno em todas as turmas (matrículas, disciplinas, notas e incidentes).
+    @query_budget(2)
+    def get_student_overview(self, student_id: int, latest_grades: int = 10) -> dict | None:
+        """
+        Retorna a visão geral de um aluno em duas consultas, independentemente do número de turmas da escola:
+        uma para o aluno, suas matrículas, as disciplinas de cada turma, as médias e os incidentes, e outra
+        para as notas mais recentes.
+
+        As médias são as do agregado persistido (a mesma regra de :meth:`get_subject_averages`); disciplinas
+        sem notas do aluno têm média 0.
+
+        :param student_id: ID do aluno.
+        :param latest_grades: Número máximo de notas mais recentes retornadas.
+        :return: Dicionário com os dados do aluno, "enrollments" (cada uma com "subjects" e "incident_count"),
+            "incident_count" (todos os incidentes do aluno) e "latest_grades" (as mais recentes primeiro),
+            ou None se o aluno não existir.
+        """
+        # Incidentes do aluno por turma e no total.
+        incident_counts = (
+            select(Incident.class_id, func.count(Incident.id).label("incident_count"))
+            .where(Incident.student_id == student_id)
+            .group_by(Incident.class_id)
+            .subquery("incident_counts")
+        )
+        total_incidents = select(func.count(Incident.id)).where(Incident.student_id == student_id).scalar_subquery()
+
+        # Consulta 1: o aluno, com uma linha por disciplina de cada turma em que está matriculado
+        # (as junções externas retornam o aluno sem matrículas e a matrícula em turma sem disciplinas).
+        overview = (
+            select(
+                Student.first_name, Student.last_name, Student.birth_date, total_incidents.label("total_incidents"),
+                ClassEnrollment.id.label("enrollment_id"), ClassEnrollment.call_number, ClassEnrollment.status,
+                Class.id.label("class_id"), Class.name.label("class_name"),
+                func.coalesce(incident_counts.c.incident_count, 0).label("incident_count"),
+                ClassSubject.id.label("class_subject_id"), Course.id.label("course_id"), Course.course_name,
+                func.coalesce(self._average_column(), 0.0).label("average"),
+            )
+            .select_from(Student)
+            .outerjoin(ClassEnrollment, ClassEnrollment.student_id == Student.id)
+            .outerjoin(Class, ClassEnrollment.class_id == Class.id)
+            .outerjoin(incident_counts, incident_counts.c.class_id == Class.id)
+            .outerjoin(ClassSubject, ClassSubject.class_id == Class.id)
+            .outerjoin(Course, ClassSubject.course_id == Course.id)
+            .outerjoin(StudentSubjectAverage, (StudentSubjectAverage.class_subject_id == ClassSubject.id)
+                       & (StudentSubjectAverage.student_id == Student.id))
+            .where(Student.id == student_id)
+            .order_by(Class.name, ClassEnrollment.id, ClassSubject.id)
+        )
+        # Consulta 2: as notas mais recentes do aluno (a turma e a disciplina vêm da consulta 1).
+        grades = (
+            select(Grade.id, Grade.score, type_coerce(Grade.date_recorded, String).label("date_recorded"),
+                   Assessment.id.label("assessment_id"), Assessment.name.label("assessment_name"),
+                   Assessment.class_subject_id)
+            .join(Assessment, Grade.assessment_id == Assessment.id)
+            .where(Grade.student_id == student_id)
+            .order_by(Grade.date_recorded.desc(), Grade.id.desc())
+            .limit(latest_grades)
+        )
+
+        with self._get_db() as db:
+            rows = db.execute(overview).all()
+            if not rows:
+                return None
+            first = rows[0]
+            enrollments, subjects = {}, {}
+            for row in rows:
+                if row.enrollment_id is None:
+                    continue
+                enrollment = enrollments.setdefault(row.enrollment_id, {
+                    "id": row.enrollment_id, "class_id": row.class_id, "class_name": row.class_name,
+                    "call_number": row.call_number, "status": row.status, "incident_count": row.incident_count,
+                    "subjects": [],
+                })
+                if row.class_subject_id is not None:
+                    subject = {"id": row.class_subject_id, "course_id": row.course_id,
+                               "course_name": row.course_name, "average": row.average}
+                    enrollment["subjects"].append(subject)
+                    subjects[row.class_subject_id] = (enrollment, subject)
+
+            latest = []
+            for grade in db.execute(grades).mappings():
+                grade = dict(grade)
+                # Notas de disciplinas de turmas em que o aluno não está mais matriculado ficam sem turma.
+                enrollment, subject = subjects.get(grade["class_subject_id"], (None, None))
+                grade["class_name"] = enrollment["class_name"] if enrollment else None
+                grade["course_name"] = subject["course_name"] if subject else None
+                latest.append(grade)
+
+            return {
+                "id": student_id, "first_name": first.first_name, "last_name": first.last_name,
+                "birth_date": first.birth_date.isoformat() if first.birth_date else None,
+                "enrollments": list(enrollments.values()),
+                "incident_count": first.total_incidents,
+                "latest_grades": latest,
+            }
 
     # Método para gerar um resumo de desempenho de um aluno em uma turma (geral ou por disciplina?).
     # Vou manter a assinatura, mas internamente vou considerar todas as disciplinas.
     # No futuro, isso poderia ser filtrado por disciplina.
+    @query_budget(3)
     def get_student_performance_summary(self, student_id: int, class_id: int) -> dict | None:
         # Como agora temos várias disciplinas, calcular uma média global pode ser complexo (média das médias?).
         # Vou calcular a média de todas as notas existentes, ponderadas pelos seus pesos, ignorando a separação de matérias por enquanto,
@@ -567,60 +1317,123 @@ class DataService:
         # Para manter a compatibilidade, vou calcular uma média simples de todas as avaliações de todas as matérias da turma.
 
         with self._get_db() as db:
-            # Pega todas as disciplinas da turma
-            subjects = db.query(ClassSubject).filter(ClassSubject.class_id == class_id).all()
-            if not subjects:
-                return {"weighted_average": 0.0, "incident_count": 0}
-
-            subject_ids = [s.id for s in subjects]
+            # Peso total de todas as avaliações de todas as disciplinas da turma (o denominador da média).
+            total_weight = (db.query(func.sum(Assessment.weight))
+                            .join(ClassSubject, Assessment.class_subject_id == ClassSubject.id)
+                            .filter(ClassSubject.class_id == class_id).scalar()) or 0.0
 
-            # Pega todas as avaliações de todas as disciplinas
-            assessments = db.query(Assessment).filter(Assessment.class_subject_id.in_(subject_ids)).all()
-            assessment_ids = [a.id for a in assessments]
-            assessments_data = [{"id": a.id, "weight": a.weight} for a in assessments]
-
-            if not assessments:
-                # Se não há avaliações, retorna 0
-                # Incidentes ainda contam
-                incidents_count = db.query(func.count(Incident.id)).filter(Incident.class_id == class_id, Incident.student_id == student_id).scalar()
-                return {"weighted_average": 0.0, "incident_count": incidents_count}
-
-            # Pega todas as notas do aluno nessas avaliações
-            grades = db.query(Grade).filter(Grade.student_id == student_id, Grade.assessment_id.in_(assessment_ids)).all()
-            grades_data = [{"assessment_id": g.assessment_id, "score": g.score, "student_id": g.student_id} for g in grades]
-
-            # Calcula a média
-            weighted_average = self.calculate_weighted_average(student_id, grades_data, assessments_data)
+            # Soma ponderada das notas do aluno em todas as disciplinas da turma, lida do agregado persistido.
+            weighted_sum = (db.query(func.sum(StudentSubjectAverage.weighted_sum))
+                            .join(ClassSubject, StudentSubjectAverage.class_subject_id == ClassSubject.id)
+                            .filter(ClassSubject.class_id == class_id, StudentSubjectAverage.student_id == student_id)
+                            .scalar()) or 0.0
 
             # Incidentes
             incidents_count = db.query(func.count(Incident.id)).filter(Incident.class_id == class_id, Incident.student_id == student_id).scalar()
 
             return {
-                "weighted_average": weighted_average,
+                "weighted_average": weighted_sum / total_weight if total_weight else 0.0,
                 "incident_count": incidents_count
             }
 
     # Método para identificar alunos em situação de risco (notas baixas ou muitos incidentes).
+    @query_budget(1)
     def get_students_at_risk(self, class_id: int, grade_threshold: float = 5.0, incident_threshold: int = 2) -> list[dict]:
-        enrollments = self.get_enrollments_for_class(class_id)
-        at_risk_students = []
-        # Itera sobre cada aluno matriculado na turma.
-        for enrollment in enrollments:
-            student_id = enrollment['student_id']
-            # Obtém o resumo de desempenho.
-            summary = self.get_student_performance_summary(student_id, class_id)
-            if summary:
-                # Aplica a lógica para determinar se o aluno está em risco.
-                is_at_risk = (summary['weighted_average'] < grade_threshold) or \
-                             (summary['incident_count'] >= incident_threshold)
-                if is_at_risk:
-                    at_risk_students.append({
-                        "student_id": student_id,
-                        "student_name": f"{enrollment['student_first_name']} {enrollment['student_last_name']}",
-                        "average_grade": summary['weighted_average'],
-                        "incident_count": summary['incident_count']
-                    })
-        return at_risk_students
+        with self._get_db() as db:
+            # Uma única consulta agregada calcula a média e os incidentes de todos os alunos da turma.
+            risk = self._build_risk_query(grade_threshold, incident_threshold, class_id=class_id)
+            rows = db.execute(risk.order_by(ClassEnrollment.call_number)).all()
+            return [self._risk_row_to_dict(row) for row in rows]
+
+    # Método para identificar os alunos mais em risco de toda a escola, em todas as turmas.
+    @query_budget(1)
+    def get_school_students_at_risk(self, limit: int = 10, grade_threshold: float = 5.0,
+                                    incident_threshold: int = 2) -> list[dict]:
+        """
+        Ranking dos alunos em risco de todas as turmas, calculado em uma única consulta.
+
+        Os alunos são ordenados do mais para o menos em risco: menor média primeiro e, em caso de
+        empate, mais incidentes primeiro. Um aluno matriculado em várias turmas pode aparecer uma vez
+        por turma.
+
+        :param limit: Número máximo de alunos retornados (os k mais em risco).
+        :param grade_threshold: Média abaixo da qual o aluno está em risco.
+        :param incident_threshold: Número de incidentes a partir do qual o aluno está em risco.
+        :return: Lista de dicionários com os dados do aluno, da turma, a média e o número de incidentes.
+        """
+        with self._get_db() as db:
+            risk = self._build_risk_query(grade_threshold, incident_threshold)
+            average = risk.selected_columns.average_grade
+            incidents = risk.selected_columns.incident_count
+            rows = db.execute(
+                risk.order_by(average, incidents.desc(), Student.first_name, Student.last_name).limit(limit)
+            ).all()
+            return [self._risk_row_to_dict(row) for row in rows]
+
+    # Método privado que monta a consulta agregada de risco (uma linha por matrícula em risco).
+    @staticmethod
+    def _build_risk_query(grade_threshold: float, incident_threshold: int, class_id: int | None = None):
+        # A média segue a regra de get_student_performance_summary: soma ponderada do aluno em todas as
+        # disciplinas da turma (lida do agregado persistido) dividida pelo peso total das avaliações da turma.
+        total_weights = (
+            select(ClassSubject.class_id, func.sum(Assessment.weight).label("total_weight"))
+            .join(Assessment, Assessment.class_subject_id == ClassSubject.id)
+            .group_by(ClassSubject.class_id)
+        )
+        weighted_sums = (
+            select(ClassSubject.class_id, StudentSubjectAverage.student_id,
+                   func.sum(StudentSubjectAverage.weighted_sum).label("weighted_sum"))
+            .join(StudentSubjectAverage, StudentSubjectAverage.class_subject_id == ClassSubject.id)
+            .group_by(ClassSubject.class_id, StudentSubjectAverage.student_id)
+        )
+        incident_counts = (
+            select(Incident.class_id, Incident.student_id, func.count(Incident.id).label("incident_count"))
+            .group_by(Incident.class_id, Incident.student_id)
+        )
+        # No modo por turma, os filtros são aplicados dentro das subconsultas para agregar só a turma.
+        if class_id is not None:
+            total_weights = total_weights.where(ClassSubject.class_id == class_id)
+            weighted_sums = weighted_sums.where(ClassSubject.class_id == class_id)
+            incident_counts = incident_counts.where(Incident.class_id == class_id)
+        total_weights = total_weights.subquery("total_weights")
+        weighted_sums = weighted_sums.subquery("weighted_sums")
+        incident_counts = incident_counts.subquery("incident_counts")
+
+        average = case(
+            (total_weights.c.total_weight > 0,
+             func.coalesce(weighted_sums.c.weighted_sum, 0.0) / total_weights.c.total_weight),
+            else_=0.0,
+        ).label("average_grade")
+        incident_count = func.coalesce(incident_counts.c.incident_count, 0).label("incident_count")
+
+        query = (
+            select(Student.id, Student.first_name, Student.last_name, Class.id, Class.name, average, incident_count)
+            .select_from(ClassEnrollment)
+            .join(Student, ClassEnrollment.student_id == Student.id)
+            .join(Class, ClassEnrollment.class_id == Class.id)
+            .outerjoin(total_weights, total_weights.c.class_id == ClassEnrollment.class_id)
+            .outerjoin(weighted_sums, (weighted_sums.c.class_id == ClassEnrollment.class_id)
+                       & (weighted_sums.c.student_id == ClassEnrollment.student_id))
+            .outerjoin(incident_counts, (incident_counts.c.class_id == ClassEnrollment.class_id)
+                       & (incident_counts.c.student_id == ClassEnrollment.student_id))
+            .where(or_(average < grade_threshold, incident_count >= incident_threshold))
+        )
+        if class_id is not None:
+            query = query.where(ClassEnrollment.class_id == class_id)
+        return query
+
+    # Método privado que converte uma linha da consulta de risco em dicionário.
+    @staticmethod
+    def _risk_row_to_dict(row) -> dict:
+        student_id, first_name, last_name, class_id, class_name, average, incident_count = row
+        return {
+            "student_id": student_id,
+            "student_name": f"{first_name} {last_name}",
+            "class_id": class_id,
+            "class_name": class_name,
+            "average_grade": average,
+            "incident_count": incident_count,
+        }
 
     # Método para criar um novo registro de aula.
     def create_lesson(self, class_subject_id: int, title: str, content: str, lesson_date: date) -> dict | None:
@@ -630,6 +1443,7 @@ class DataService:
             db.add(new_lesson)
             db.flush()
             db.refresh(new_lesson)
+            publish_change(db, "lesson", CREATED, [new_lesson.id], class_subject_id=class_subject_id)
             return {"id": new_lesson.id, "title": new_lesson.title, "content": new_lesson.content, "date": new_lesson.date.isoformat()}
 
     # Método para atualizar uma aula.
@@ -640,19 +1454,24 @@ class DataService:
                 lesson.title = title
                 lesson.content = content
                 lesson.date = lesson_date
+                publish_change(db, "lesson", UPDATED, [lesson_id], class_subject_id=lesson.class_subject_id)
 
     # Método para deletar uma aula.
     def delete_lesson(self, lesson_id: int):
         with self._get_db() as db:
-            lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
-            if lesson:
-                db.delete(lesson)
+            # 'RETURNING' informa a disciplina da aula para o evento de alteração, sem uma consulta extra.
+            class_subject_id = db.execute(delete(Lesson).where(Lesson.id == lesson_id).returning(Lesson.class_subject_id)).scalar()
+            if class_subject_id is not None:
+                publish_change(db, "lesson", DELETED, [lesson_id], class_subject_id=class_subject_id)
 
     # Método para buscar todas as aulas de uma disciplina da turma.
+    @query_budget(1)
     def get_lessons_for_subject(self, class_subject_id: int) -> list[dict]:
         with self._get_db() as db:
-            lessons = db.query(Lesson).filter(Lesson.class_subject_id == class_subject_id).order_by(Lesson.date.desc()).all()
-            return [{"id": l.id, "title": l.title, "content": l.content, "date": l.date.isoformat()} for l in lessons]
+            rows = (db.query(Lesson.id, Lesson.title, Lesson.content, Lesson.date)
+                    .filter(Lesson.class_subject_id == class_subject_id).order_by(Lesson.date.desc()).all())
+            return [{"id": lesson_id, "title": title, "content": content, "date": lesson_date.isoformat()}
+                    for lesson_id, title, content, lesson_date in rows]
 
     # Método para criar um novo incidente.
     def create_incident(self, class_id: int, student_id: int, description: str, incident_date: date) -> dict | None:
@@ -662,19 +1481,83 @@ class DataService:
             db.add(new_incident)
             db.flush()
             db.refresh(new_incident)
+            publish_change(db, "incident", CREATED, [new_incident.id], class_id=class_id)
             return {"id": new_incident.id}
 
     # Método para buscar todos os incidentes de uma turma.
+    @query_budget(1)
     def get_incidents_for_class(self, class_id: int) -> list[dict]:
         with self._get_db() as db:
-            incidents = db.query(Incident).options(joinedload(Incident.student)).filter(Incident.class_id == class_id).order_by(Incident.date.desc()).all()
+            rows = (
+                db.query(Incident.id, Incident.description, Incident.date, Student.id, Student.first_name, Student.last_name)
+                .join(Student, Incident.student_id == Student.id)
+                .filter(Incident.class_id == class_id)
+                .order_by(Incident.date.desc())
+                .all()
+            )
             return [
                 {
-                    "id": i.id, "description": i.description, "date": i.date.isoformat(),
-                    "student_id": i.student.id, "student_first_name": i.student.first_name, "student_last_name": i.student.last_name
-                } for i in incidents
+                    "id": incident_id, "description": description, "date": incident_date.isoformat(),
+                    "student_id": student_id, "student_first_name": first_name, "student_last_name": last_name
+                } for incident_id, description, incident_date, student_id, first_name, last_name in rows
             ]
 
+    # Consultas de busca textual por tipo. 'bm25' retorna a relevância (valores menores são mais relevantes)
+    # e 'snippet' retorna um trecho do texto com os termos encontrados entre colchetes.
+    _SEARCH_QUERIES = {
+        "student": """
+            SELECT s.id, s.first_name || ' ' || s.last_name AS title,
+                   snippet(students_fts, -1, '[', ']', '…', 12) AS snippet, bm25(students_fts) AS rank
+            FROM students_fts JOIN students s ON s.id = students_fts.rowid
+            WHERE students_fts MATCH :match ORDER BY rank LIMIT :limit
+        """,
+        "lesson": """
+            SELECT l.id, l.title, snippet(lessons_fts, -1, '[', ']', '…', 12) AS snippet, bm25(lessons_fts) AS rank,
+                   l.date, l.class_subject_id
+            FROM lessons_fts JOIN lessons l ON l.id = lessons_fts.rowid
+            WHERE lessons_fts MATCH :match ORDER BY rank LIMIT :limit
+        """,
+        "incident": """
+            SELECT i.id, st.first_name || ' ' || st.last_name AS title,
+                   snippet(incidents_fts, -1, '[', ']', '…', 12) AS snippet, bm25(incidents_fts) AS rank,
+                   i.date, i.class_id, i.student_id
+            FROM incidents_fts JOIN incidents i ON i.id = incidents_fts.rowid
+            JOIN students st ON st.id = i.student_id
+            WHERE incidents_fts MATCH :match ORDER BY rank LIMIT :limit
+        """,
+    }
+
+    # Método para buscar texto em alunos, aulas e incidentes usando os índices de busca textual (FTS5).
+    @query_budget(3)
+    def search(self, query: str, kinds: list[str] | None = None, limit: int = 20) -> list[dict]:
+        """
+        Busca os termos informados nos nomes dos alunos, no título e conteúdo das aulas e na descrição dos incidentes.
+
+        :param query: Texto de busca. Cada termo deve aparecer (como início de palavra) no registro encontrado.
+        :param kinds: Tipos a pesquisar: "student", "lesson" e/ou "incident". Se None, pesquisa todos.
+        :param limit: Número máximo de resultados retornados.
+        :return: Lista de resultados ordenados por relevância, cada um com as chaves "kind", "id", "title",
+            "snippet" e "rank", além de "date", "class_subject_id", "class_id" e "student_id" quando aplicável.
+        """
+        kinds = list(kinds) if kinds else list(self._SEARCH_QUERIES)
+        unknown_kinds = set(kinds) - set(self._SEARCH_QUERIES)
+        if unknown_kinds:
+            raise ValueError(f"Unknown search kinds: {', '.join(sorted(unknown_kinds))}.")
+
+        match_query = build_match_query(query)
+        if match_query is None or limit <= 0:
+            return []
+
+        results = []
+        with self._get_db() as db:
+            for kind in kinds:
+                rows = db.execute(text(self._SEARCH_QUERIES[kind]), {"match": match_query, "limit": limit}).mappings()
+                results.extend({"kind": kind, **row} for row in rows)
+
+        # Combina os resultados de todos os tipos pela relevância.
+        results.sort(key=lambda hit: hit["rank"])
+        return results[:limit]
+
     # Método para adicionar uma nova nota.
     def add_grade(self, student_id: int, assessment_id: int, score: float) -> dict | None:
         if not all([student_id, assessment_id, score is not None]): return None
@@ -683,50 +1566,111 @@ class DataService:
             raise ValueError("Score must be between 0 and 10.")
 
         today = date.today()
-        new_grade = Grade(student_id=student_id, assessment_id=assessment_id, score=score, date_recorded=today.isoformat())
         with self._get_db() as db:
-            db.add(new_grade)
+            # Um aluno tem no máximo uma nota por avaliação (índice único 'ix_grades_student_assessment').
+            # Se a nota já existir, ela é atualizada em vez de duplicada.
+            existing_grade = db.query(Grade).filter(Grade.student_id == student_id, Grade.assessment_id == assessment_id).first()
+            if existing_grade:
+                existing_grade.score = score
+                existing_grade.date_recorded = today
+                grade = existing_grade
+            else:
+                grade = Grade(student_id=student_id, assessment_id=assessment_id, score=score, date_recorded=today)
+                db.add(grade)
             db.flush()
-            db.refresh(new_grade)
-            return {"id": new_grade.id, "score": new_grade.score}
+
+            # Atualiza a média agregada do aluno na disciplina da avaliação, na mesma transação.
+            class_subject_id = db.query(Assessment.class_subject_id).filter(Assessment.id == assessment_id).scalar()
+            self._refresh_subject_averages(db, [class_subject_id], [student_id])
+            publish_change(db, "grade", UPDATED if existing_grade else CREATED, [grade.id], class_subject_id=class_subject_id)
+            return {"id": grade.id, "score": grade.score}
 
     # Método para deletar uma nota.
     def delete_grade(self, grade_id: int):
         with self._get_db() as db:
-            grade = db.query(Grade).filter(Grade.id == grade_id).first()
+            grade = db.query(Grade).options(joinedload(Grade.assessment)).filter(Grade.id == grade_id).first()
             if grade:
                 db.delete(grade)
+                # Atualiza a média agregada do aluno na disciplina da avaliação.
+                self._refresh_subject_averages(db, [grade.assessment.class_subject_id], [grade.student_id])
+                publish_change(db, "grade", DELETED, [grade_id], class_subject_id=grade.assessment.class_subject_id)
+
+    # Método para inserir ou atualizar várias notas de uma disciplina de uma vez (usado pelo quadro de notas).
+    @query_budget(4)
+    def upsert_grades_for_subject(self, class_subject_id: int, grades_data: list[dict]) -> dict[str, int]:
+        """
+        Grava as notas do quadro de notas de uma disciplina com um único INSERT ... ON CONFLICT DO UPDATE.
+
+        As notas atuais da disciplina são lidas (só as colunas da chave e a nota) para separar as novas,
+        as alteradas e as que não mudaram; apenas as novas e as alteradas são enviadas, em um único
+        'executemany'. O número de comandos não depende do tamanho do quadro: uma leitura, uma escrita e
+        o recálculo das médias dos alunos afetados.
+
+        :param class_subject_id: ID da disciplina da turma.
+        :param grades_data: Lista de dicionários com "student_id", "assessment_id" e "score". Registros com
+            IDs inválidos são ignorados; se o mesmo par aluno/avaliação aparecer mais de uma vez, vale o último.
+        :raises ValueError: Se alguma nota estiver fora do intervalo de 0 a 10 (nada é gravado).
+        :return: Dicionário com o número de notas inseridas ("inserted") e atualizadas ("updated").
+        """
+        # Normaliza e valida todas as notas antes de gravar qualquer uma.
+        scores = {}
+        for grade_info in grades_data:
+            # Garante que os IDs sejam inteiros para evitar duplicações causadas por incompatibilidade de tipos (ex: string vs int).
+            try:
+                key = (int(grade_info['student_id']), int(grade_info['assessment_id']))
+            except (ValueError, TypeError):
+                # Se a conversão falhar, pula este registro para evitar inconsistências.
+                continue
+            score = grade_info['score']
+            if not (0 <= score <= 10):
+                raise ValueError(f"Score must be between 0 and 10.")
+            scores[key] = score
+
+        if not scores:
+            return {"inserted": 0, "updated": 0}
 
-    # Método para inserir ou atualizar notas em lote para uma disciplina de uma turma (upsert).
-    def upsert_grades_for_subject(self, class_subject_id: int, grades_data: list[dict]):
-        with self._get_db() as db:
-            # Busca todas as notas existentes para a disciplina e as armazena em um mapa para acesso rápido.
-            existing_grades_query = db.query(Grade).join(Assessment).filter(Assessment.class_subject_id == class_subject_id)
-            existing_grades_map = {(g.student_id, g.assessment_id): g for g in existing_grades_query}
-            # Itera sobre os novos dados de nota.
-            for grade_info in grades_data:
-                # Garante que os IDs sejam inteiros para evitar duplicações causadas por incompatibilidade de tipos (ex: string vs int).
-                try:
-                    student_id = int(grade_info['student_id'])
-                    assessment_id = int(grade_info['assessment_id'])
-                except (ValueError, TypeError):
-                    # Se a conversão falhar, pula este registro para evitar inconsistências.
-                    continue
-
-                score = grade_info['score']
-
-                if not (0 <= score <= 10):
-                    raise ValueError(f"Score must be between 0 and 10.")
+        with self._get_db() as db:
+            # Notas atuais da disciplina, para separar as novas das alteradas e descartar as que não mudaram.
+            existing = {
+                (student_id, assessment_id): score
+                for student_id, assessment_id, score in db.execute(
+                    select(Grade.student_id, Grade.assessment_id, Grade.score)
+                    .join(Assessment, Grade.assessment_id == Assessment.id)
+                    .where(Assessment.class_subject_id == class_subject_id)
+                )
+            }
+            changed = [(key, score) for key, score in scores.items() if existing.get(key) != score]
+            if not changed:
+                return {"inserted": 0, "updated": 0}
+            inserted = sum(1 for key, _ in changed if key not in existing)
 
-                existing_grade = existing_grades_map.get((student_id, assessment_id))
-                # Se a nota já existe, atualiza o valor se for diferente.
-                if existing_grade:
-                    if existing_grade.score != score:
-                        existing_grade.score = score
-                # Se a nota não existe, cria um novo registro.
-                else:
-                    new_grade = Grade(student_id=student_id, assessment_id=assessment_id, score=score, date_recorded=date.today().isoformat())
-                    db.add(new_grade)
+            # Envia as alterações pendentes da sessão antes do comando em lote.
+            db.flush()
+            today = date.today()
+            upsert = sqlite_insert(Grade)
+            db.execute(
+                upsert.on_conflict_do_update(
+                    index_elements=[Grade.student_id, Grade.assessment_id],
+                    set_={"score": upsert.excluded.score, "date_recorded": upsert.excluded.date_recorded},
+                    # Uma nota igual à gravada não é reescrita.
+                    where=Grade.score != upsert.excluded.score,
+                ),
+                [
+                    {"student_id": student_id, "assessment_id": assessment_id, "score": score, "date_recorded": today}
+                    for (student_id, assessment_id), score in changed
+                ],
+            )
+            # Notas carregadas na sessão podem ter sido alteradas pelo comando em lote.
+            db.expire_all()
+
+            # Atualiza as médias agregadas dos alunos afetados, na mesma transação.
+            self._refresh_subject_averages(db, [class_subject_id], sorted({student_id for (student_id, _), _ in changed}))
+            # O comando em lote não informa os IDs das notas: o evento vale para a disciplina inteira.
+            if inserted:
+                publish_change(db, "grade", CREATED, class_subject_id=class_subject_id)
+            if len(changed) > inserted:
+                publish_change(db, "grade", UPDATED, class_subject_id=class_subject_id)
+            return {"inserted": inserted, "updated": len(changed) - inserted}
 
     # Método para calcular a média ponderada de um aluno.
     @staticmethod
@@ -741,49 +1685,223 @@ class DataService:
         # Retorna a média ponderada.
         return weighted_sum / total_weight
 
-    # Método privado para inserir/atualizar alunos e matrículas em lote (usado pela importação de CSV).
-    def _batch_upsert_students_and_enroll(self, db: Session, class_id: int, student_data_list: list[dict]):
-        # Garante que cada aluno no CSV seja processado apenas uma vez, mesmo que haja duplicatas no arquivo.
-        unique_student_data = {data['full_name'].lower(): data for data in student_data_list}
-        # Obtém o próximo número de chamada para a turma.
-        next_call_number = self._get_next_call_number(db, class_id)
+    # Método privado que recalcula as médias agregadas (StudentSubjectAverage) das chaves afetadas por uma escrita.
+    @staticmethod
+    def _refresh_subject_averages(db: Session, class_subject_ids: list[int], student_ids: list[int] | None = None):
+        # Envia as alterações pendentes, para que o recálculo (feito no banco) as considere.
+        db.flush()
+        for statement in build_refresh_statements(class_subject_ids, student_ids):
+            db.execute(statement)
+
+    # Método para buscar as médias ponderadas de todos os alunos de uma disciplina da turma.
+    @query_budget(1)
+    def get_subject_averages(self, class_subject_id: int) -> dict[int, float]:
+        """
+        Retorna as médias ponderadas da disciplina lidas do agregado persistido.
+
+        :param class_subject_id: ID da disciplina da turma.
+        :return: Dicionário {student_id: média}. Alunos sem notas não aparecem (média 0).
+        """
+        with self._get_db() as db:
+            rows = (db.query(StudentSubjectAverage.student_id, self._average_column())
+                    .filter(StudentSubjectAverage.class_subject_id == class_subject_id).all())
+            return dict(rows)
+
+    # Método para calcular as médias de cada aluno por período (ex: bimestres), a partir da data de registro das notas.
+    @query_budget(1)
+    def get_term_averages(self, terms: dict[str, tuple[date, date]], class_id: int | None = None) -> dict[str, dict[int, dict[int, float]]]:
+        """
+        Calcula, para cada período, a média ponderada das notas registradas nele, por disciplina e aluno.
+
+        Como as avaliações não têm data, a média de um período considera as notas registradas entre o início
+        e o fim do período (inclusive), ponderadas pelo peso de suas avaliações; avaliações sem nota no período
+        não entram no cálculo. Todos os períodos são calculados em um único comando, e cada um é uma busca por
+        intervalo no índice 'ix_grades_date_recorded' (ou, com 'class_id', pelas avaliações da turma).
+
+        :param terms: Períodos, no formato {nome: (início, fim)} (ex: {"1º bimestre": (date(2024, 2, 1), date(2024, 4, 30))}).
+            Os períodos podem se sobrepor.
+        :param class_id: Se informado, calcula apenas as disciplinas da turma.
+        :raises ValueError: Se algum período terminar antes de começar.
+        :return: Dicionário {nome do período: {class_subject_id: {student_id: média}}}. Períodos sem notas
+            aparecem vazios.
+        """
+        for name, (start, end) in terms.items():
+            if start > end:
+                raise ValueError(f"Term '{name}' ends before it starts.")
+        if not terms:
+            return {}
+
+        weighted_sum = func.sum(Grade.score * Assessment.weight)
+        total_weight = func.sum(Assessment.weight)
+        selects = []
+        for name, (start, end) in terms.items():
+            statement = (
+                select(literal(name).label("term"), Assessment.class_subject_id, Grade.student_id,
+                       case((total_weight != 0, weighted_sum / total_weight), else_=0.0).label("average"))
+                .join_from(Grade, Assessment, Grade.assessment_id == Assessment.id)
+                .where(Grade.date_recorded >= start, Grade.date_recorded <= end)
+                .group_by(Assessment.class_subject_id, Grade.student_id)
+            )
+            if class_id is not None:
+                statement = (statement.join(ClassSubject, Assessment.class_subject_id == ClassSubject.id)
+                             .where(ClassSubject.class_id == class_id))
+            selects.append(statement)
 
-        # Itera sobre os dados únicos dos alunos.
-        for full_name_lower, data in unique_student_data.items():
-            # Verifica se o aluno já existe no banco de dados.
-            student = db.query(Student).filter(func.lower(Student.first_name + " " + Student.last_name) == full_name_lower).first()
-            # Se o aluno já existe:
-            if student:
-                # Atualiza a data de nascimento se ela for fornecida no CSV e for diferente da existente.
-                if data['birth_date'] and student.birth_date != data['birth_date']:
-                    student.birth_date = data['birth_date']
-            # Se o aluno não existe:
-            else:
-                # Cria um novo objeto Student.
-                student = Student(
-                    first_name=data['first_name'], last_name=data['last_name'],
-                    birth_date=data['birth_date'], enrollment_date=date.today().isoformat()
-                )
-                db.add(student)
-                db.flush()  # Garante que o ID do aluno seja gerado antes de criar a matrícula.
+        averages = {name: {} for name in terms}
+        with self._get_db() as db:
+            statement = union_all(*selects) if len(selects) > 1 else selects[0]
+            for term, class_subject_id, student_id, average in db.execute(statement):
+                averages[term].setdefault(class_subject_id, {})[student_id] = average
+        return averages
 
-            # Obtém o status do aluno do CSV.
-            status = data['status']
+    # Método privado que calcula, no banco, a média do agregado (a regra de StudentSubjectAverage.average).
+    @staticmethod
+    def _average_column():
+        return case(
+            (StudentSubjectAverage.total_weight != 0, StudentSubjectAverage.weighted_sum / StudentSubjectAverage.total_weight),
+            else_=0.0,
+        )
+
+    # Método para buscar o quadro de notas completo de uma turma.
+    @query_budget(2)
+    def get_class_gradebook(self, class_id: int) -> ClassGradebook | None:
+        """
+        Retorna o quadro de notas da turma: a matriz alunos × avaliações e as médias por disciplina.
+
+        Usa duas consultas, independentemente do número de alunos, disciplinas e avaliações:
+        uma para a turma e seus alunos e outra para as disciplinas, avaliações e notas, com a média
+        persistida (StudentSubjectAverage) de cada aluno na disciplina.
+
+        :param class_id: ID da turma.
+        :return: O quadro de notas, ou None se a turma não existir.
+        """
+        with self._get_db() as db:
+            # Consulta 1: a turma e seus alunos matriculados (a junção externa retorna a turma mesmo sem alunos).
+            student_rows = (
+                db.query(Class.name, ClassEnrollment.call_number, ClassEnrollment.status,
+                         Student.id, Student.first_name, Student.last_name)
+                .outerjoin(ClassEnrollment, ClassEnrollment.class_id == Class.id)
+                .outerjoin(Student, ClassEnrollment.student_id == Student.id)
+                .filter(Class.id == class_id)
+                .order_by(ClassEnrollment.call_number)
+                .all()
+            )
+            if not student_rows:
+                return None
+            students = [
+                {"student_id": student_id, "call_number": call_number, "status": status,
+                 "first_name": first_name, "last_name": last_name}
+                for _, call_number, status, student_id, first_name, last_name in student_rows
+                if student_id is not None
+            ]
 
-            # Verifica se a matrícula para este aluno nesta turma já existe.
-            enrollment = db.query(ClassEnrollment).filter_by(student_id=student.id, class_id=class_id).first()
-            # Se a matrícula já existe:
-            if enrollment:
-                # Atualiza o status se for diferente.
-                if enrollment.status != status:
-                    enrollment.status = status
-            # Se a matrícula não existe:
-            else:
-                # Cria um novo registro de matrícula.
-                new_enrollment = ClassEnrollment(
-                    class_id=class_id, student_id=student.id,
-                    call_number=next_call_number, status=status
-                )
-                db.add(new_enrollment)
-                # Incrementa o número de chamada para o próximo aluno.
+            # Consulta 2: disciplinas, avaliações e notas, ordenadas para formar as colunas da matriz.
+            # A média do agregado é repetida em cada nota do aluno na disciplina.
+            assessment_rows = (
+                db.query(ClassSubject.id, Course.course_name, Assessment.id, Assessment.name, Assessment.weight,
+                         Grade.student_id, Grade.score, self._average_column())
+                .join(Course, ClassSubject.course_id == Course.id)
+                .outerjoin(Assessment, Assessment.class_subject_id == ClassSubject.id)
+                .outerjoin(Grade, Grade.assessment_id == Assessment.id)
+                .outerjoin(StudentSubjectAverage, (StudentSubjectAverage.class_subject_id == ClassSubject.id)
+                           & (StudentSubjectAverage.student_id == Grade.student_id))
+                .filter(ClassSubject.class_id == class_id)
+                .order_by(ClassSubject.id, Assessment.id)
+                .all()
+            )
+            return ClassGradebook.from_rows(class_id, student_rows[0][0], students, assessment_rows)
+
+    # Método privado para inserir/atualizar alunos e matrículas em lote (usado pela importação de CSV).
+    def _batch_upsert_students_and_enroll(self, db: Session, class_id: int, student_data_list: list[dict]) -> dict[str, int]:
+        """
+        Insere ou atualiza os alunos e as matrículas de uma importação com comandos em conjunto.
+
+        O número de comandos não depende do tamanho do arquivo: uma consulta IN por bloco de nomes para
+        os alunos existentes, uma consulta para as matrículas da turma, um UPDATE (executemany) para as
+        datas de nascimento e outro para os status alterados, e um INSERT (executemany) para os alunos
+        novos e outro para as matrículas novas, com os números de chamada já atribuídos.
+
+        :return: Número de alunos criados ("students_created") e de matrículas criadas ("enrollments_created").
+        """
+        # Garante que cada aluno no CSV seja processado apenas uma vez, mesmo que haja duplicatas no arquivo.
+        # A chave é o nome normalizado, o mesmo valor armazenado em Student.search_name; vale a última ocorrência.
+        unique_student_data = {normalize_name(f"{data['first_name']} {data['last_name']}"): data for data in student_data_list}
+        search_names = list(unique_student_data)
+        # Envia as alterações pendentes da sessão antes dos comandos em lote.
+        db.flush()
+
+        # Busca os alunos já cadastrados, em blocos para respeitar o limite de parâmetros do SQLite.
+        student_ids, birth_dates = {}, {}
+        for start in range(0, len(search_names), _MAX_IN_PARAMETERS):
+            rows = db.execute(
+                select(Student.id, Student.search_name, Student.birth_date)
+                .where(Student.search_name.in_(search_names[start:start + _MAX_IN_PARAMETERS]))
+            )
+            for student_id, search_name, birth_date in rows:
+                # Em bases antigas com homônimos, usa o primeiro aluno encontrado, como a busca por nome.
+                if search_name not in student_ids or student_id < student_ids[search_name]:
+                    student_ids[search_name] = student_id
+                    birth_dates[search_name] = birth_date
+
+        # Atualiza a data de nascimento dos alunos existentes quando o CSV traz uma data diferente.
+        birth_date_updates = [
+            {"row_id": student_ids[search_name], "birth_date": data['birth_date']}
+            for search_name, data in unique_student_data.items()
+            if search_name in student_ids and data['birth_date'] and birth_dates[search_name] != data['birth_date']
+        ]
+        if birth_date_updates:
+            db.execute(
+                Student.__table__.update().where(Student.id == bindparam("row_id")).values(birth_date=bindparam("birth_date")),
+                birth_date_updates,
+            )
+            publish_change(db, "student", UPDATED, [update["row_id"] for update in birth_date_updates])
+
+        # Cria os alunos novos em um único INSERT. O RETURNING traz a chave de busca junto com o ID,
+        # então a ordem das linhas retornadas não importa (e o SQLAlchemy pode agrupar as linhas em um só comando).
+        new_students = [
+            {"first_name": data['first_name'], "last_name": data['last_name'], "birth_date": data['birth_date'],
+             "enrollment_date": date.today(), "search_name": search_name}
+            for search_name, data in unique_student_data.items() if search_name not in student_ids
+        ]
+        if new_students:
+            created = db.execute(
+                insert(Student).returning(Student.id, Student.search_name), new_students
+            )
+            created_ids = dict((search_name, student_id) for student_id, search_name in created)
+            student_ids.update(created_ids)
+            publish_change(db, "student", CREATED, created_ids.values())
+
+        # Matrículas atuais da turma, para decidir entre atualizar o status ou matricular.
+        enrollments = {
+            student_id: (enrollment_id, status)
+            for enrollment_id, student_id, status in db.execute(
+                select(ClassEnrollment.id, ClassEnrollment.student_id, ClassEnrollment.status)
+                .where(ClassEnrollment.class_id == class_id)
+            )
+        }
+        # Os novos números de chamada continuam a partir do maior número existente, na ordem do arquivo.
+        next_call_number = self._get_next_call_number(db, class_id)
+        status_updates, new_enrollments = [], []
+        for search_name, data in unique_student_data.items():
+            student_id = student_ids[search_name]
+            enrollment = enrollments.get(student_id)
+            if enrollment is None:
+                new_enrollments.append({"class_id": class_id, "student_id": student_id,
+                                        "call_number": next_call_number, "status": data['status']})
                 next_call_number += 1
+            elif enrollment[1] != data['status']:
+                status_updates.append({"row_id": enrollment[0], "status": data['status']})
+
+        if status_updates:
+            db.execute(
+                ClassEnrollment.__table__.update().where(ClassEnrollment.id == bindparam("row_id")).values(status=bindparam("status")),
+                status_updates,
+            )
+            publish_change(db, "enrollment", UPDATED, [update["row_id"] for update in status_updates], class_id=class_id)
+        if new_enrollments:
+            db.execute(insert(ClassEnrollment), new_enrollments)
+            publish_change(db, "enrollment", CREATED, class_id=class_id)
+
+        # Os objetos carregados na sessão podem ter sido alterados pelos comandos em lote.
+        db.expire_all()
+        return {"students_created": len(new_students), "enrollments_created": len(new_enrollments)}
@@ -0,0 +1,135 @@
+# Importa 'array' para guardar as notas e as médias em vetores compactos de números de ponto flutuante.
+from array import array
+# Importa 'math' para representar e reconhecer as notas ausentes (NaN).
+import math
+
+# Valor que representa "sem nota" na matriz de notas.
+_MISSING = math.nan
+
+
+# Define a classe ClassGradebook, o quadro de notas completo de uma turma.
+class ClassGradebook:
+    """
+    Quadro de notas de uma turma: a matriz alunos × avaliações e as médias ponderadas por disciplina.
+
+    É montado pelo DataService (``get_class_gradebook``) com duas consultas e depois lido sem nenhum
+    acesso ao banco. As notas ficam em um único ``array('d')`` em ordem de linha (um aluno por linha,
+    uma avaliação por coluna, NaN para "sem nota"); as avaliações de cada disciplina ocupam colunas
+    contíguas. As médias por disciplina não são recalculadas aqui: vêm do agregado persistido
+    (``StudentSubjectAverage``), lido na mesma consulta das notas.
+
+    :ivar class_id: ID da turma.
+    :type class_id: int
+    :ivar class_name: Nome da turma.
+    :type class_name: str
+    :ivar students: Alunos matriculados, pelo número de chamada ("student_id", "call_number", "status",
+        "first_name", "last_name").
+    :type students: list[dict]
+    :ivar subjects: Disciplinas da turma ("id", "course_name").
+    :type subjects: list[dict]
+    :ivar assessments: Avaliações, agrupadas por disciplina ("id", "name", "weight", "class_subject_id").
+    :type assessments: list[dict]
+    """
+    # O construtor recebe a estrutura da turma e a matriz de notas já montada.
+    def __init__(self, class_id: int, class_name: str, students: list[dict], subjects: list[dict],
+                 assessments: list[dict], scores: array, averages: array):
+        self.class_id = class_id
+        self.class_name = class_name
+        self.students = students
+        self.subjects = subjects
+        self.assessments = assessments
+        self._scores = scores
+        # Médias por disciplina, uma linha por aluno e uma coluna por disciplina (na ordem de 'subjects').
+        self._averages = averages
+        # Índices de acesso rápido: linha de cada aluno e coluna de cada avaliação.
+        self._student_rows = {s["student_id"]: row for row, s in enumerate(students)}
+        self._assessment_columns = {a["id"]: column for column, a in enumerate(assessments)}
+        self._subject_positions = {s["id"]: position for position, s in enumerate(subjects)}
+        # Intervalo de colunas [início, fim) das avaliações de cada disciplina.
+        self._subject_columns = {s["id"]: [len(assessments), len(assessments)] for s in subjects}
+        for column, assessment in enumerate(assessments):
+            bounds = self._subject_columns[assessment["class_subject_id"]]
+            bounds[0] = min(bounds[0], column)
+            bounds[1] = column + 1
+
+    # Monta o quadro de notas a partir das linhas retornadas pelas consultas do DataService.
+    @classmethod
+    def from_rows(cls, class_id: int, class_name: str, students: list[dict], assessment_rows) -> "ClassGradebook":
+        """
+        Monta o quadro de notas a partir das linhas da consulta de disciplinas, avaliações e notas.
+
+        :param students: Alunos matriculados, pelo número de chamada.
+        :param assessment_rows: Linhas (class_subject_id, course_name, assessment_id, assessment_name,
+            weight, student_id, score, average), ordenadas por disciplina e avaliação, em que 'average' é
+            a média persistida do aluno na disciplina. Disciplinas sem avaliações e avaliações sem notas
+            vêm com as colunas seguintes nulas.
+        """
+        subjects, assessments, grades, subject_averages = {}, {}, [], {}
+        for subject_id, course_name, assessment_id, name, weight, student_id, score, average in assessment_rows:
+            subjects.setdefault(subject_id, {"id": subject_id, "course_name": course_name})
+            if assessment_id is None:
+                continue
+            assessments.setdefault(assessment_id, {"id": assessment_id, "name": name, "weight": weight,
+                                                   "class_subject_id": subject_id})
+            if student_id is not None:
+                grades.append((student_id, assessment_id, score))
+                if average is not None:
+                    subject_averages[student_id, subject_id] = average
+
+        gradebook_assessments = list(assessments.values())
+        scores = array("d", [_MISSING]) * (len(students) * len(gradebook_assessments))
+        rows = {s["student_id"]: row for row, s in enumerate(students)}
+        columns = {assessment_id: column for column, assessment_id in enumerate(assessments)}
+        width = len(gradebook_assessments)
+        for student_id, assessment_id, score in grades:
+            # Notas de alunos que não estão matriculados na turma são ignoradas.
+            row = rows.get(student_id)
+            if row is not None:
+                scores[row * width + columns[assessment_id]] = score
+
+        # Alunos sem notas em uma disciplina não têm linha no agregado (média 0).
+        positions = {subject_id: position for position, subject_id in enumerate(subjects)}
+        averages = array("d", [0.0]) * (len(students) * len(subjects))
+        for (student_id, subject_id), average in subject_averages.items():
+            row = rows.get(student_id)
+            if row is not None:
+                averages[row * len(subjects) + positions[subject_id]] = average
+        return cls(class_id, class_name, students, list(subjects.values()), gradebook_assessments, scores, averages)
+
+    # Retorna os dados de um aluno matriculado, ou None.
+    def student(self, student_id: int) -> dict | None:
+        row = self._student_rows.get(student_id)
+        return self.students[row] if row is not None else None
+
+    # Retorna a nota de um aluno em uma avaliação, ou None se não houver nota.
+    def score(self, student_id: int, assessment_id: int) -> float | None:
+        row, column = self._student_rows.get(student_id), self._assessment_columns.get(assessment_id)
+        if row is None or column is None:
+            return None
+        value = self._scores[row * len(self.assessments) + column]
+        return None if math.isnan(value) else value
+
+    # Retorna as avaliações de uma disciplina, na ordem das colunas.
+    def assessments_for_subject(self, subject_id: int) -> list[dict]:
+        start, end = self._subject_columns.get(subject_id, (0, 0))
+        return self.assessments[start:end]
+
+    # Retorna a média ponderada de um aluno em uma disciplina (0 se não houver notas ou avaliações).
+    def subject_average(self, student_id: int, subject_id: int) -> float:
+        row, position = self._student_rows.get(student_id), self._subject_positions.get(subject_id)
+        if row is None or position is None:
+            return 0.0
+        return self._averages[row * len(self.subjects) + position]
+
+    # Retorna as médias de um aluno em todas as disciplinas, na ordem de 'subjects'.
+    def subject_averages(self, student_id: int) -> list[float]:
+        row = self._student_rows.get(student_id)
+        if row is None:
+            return [0.0] * len(self.subjects)
+        width = len(self.subjects)
+        return list(self._averages[row * width:(row + 1) * width])
+
+    # Retorna a média global de um aluno: a média simples das médias por disciplina.
+    def global_average(self, student_id: int) -> float:
+        averages = self.subject_averages(student_id)
+        return sum(averages) / len(averages) if averages else 0.0
@@ -0,0 +1,304 @@
+# Importa 'heapq' para obter a menor das melhores semelhanças já calculadas.
+import heapq
+# Importa 'threading' para proteger os índices, usados pelo pool de threads do banco e pela thread que faz o commit.
+import threading
+# Importa 'Counter' para contar os trigramas e as palavras em comum com o nome procurado.
+from collections import Counter
+# Importa 'dataclass' para definir os resultados da resolução como registros imutáveis.
+from dataclasses import dataclass
+# Importa o barramento de eventos, que avisa quando os nomes indexados mudam.
+from app.data.change_events import change_events
+# Importa a normalização usada também na chave de busca dos alunos (sem acentos e em minúsculas).
+from app.utils.text_normalization import normalize_name
+
+# Este módulo resolve os nomes informados pelo assistente (alunos, turmas, cursos, disciplinas de uma turma
+# e avaliações) tolerando erros de digitação e acentos ausentes, sem consultar o banco a cada chamada.
+#
+# - Cada tipo de entidade tem um índice de trigramas em memória, montado com uma consulta na primeira
+#   resolução e descartado quando um evento de alteração informa que os nomes daquele tipo mudaram.
+# - A semelhança entre dois nomes é o coeficiente de Dice dos trigramas (2 × comuns / total), multiplicado
+#   pela fração das palavras informadas que correspondem a alguma palavra do nome (assim, "Turma A" não é
+#   confundida com "Turma B", apesar dos trigramas em comum) e reduzida quando essas palavras aparecem no
+#   nome em outra ordem. Só um nome normalizado idêntico vale 1.0, e um nome cujas palavras começam com as
+#   palavras informadas (ex: "Ana" para "Ana Lima") vale ao menos PREFIX_SCORE.
+# - As palavras distintas dos nomes formam um vocabulário indexado por trigramas, então cada busca compara
+#   as palavras informadas só com o vocabulário e calcula a semelhança só dos nomes que contêm alguma delas.
+
+# Tipos de entidade que podem ser resolvidos.
+KINDS = ("student", "class", "course", "subject", "assessment")
+
+# Tipos cujos nomes mudam quando cada entidade é alterada (a exclusão de uma turma ou de um curso remove,
+# em cascata, suas disciplinas e avaliações).
+_STALE_KINDS = {
+    "student": ("student",),
+    "class": ("class", "subject", "assessment"),
+    "course": ("course", "subject", "assessment"),
+    "class_subject": ("subject", "assessment"),
+    "assessment": ("assessment",),
+}
+
+# Semelhança mínima de um nome cujas palavras começam com as palavras informadas.
+PREFIX_SCORE = 0.8
+
+# Redução máxima da semelhança quando as palavras aparecem no nome em outra ordem (os trigramas de
+# "Ana Lima Dias" e "Ana Dias Lima" são os mesmos; sem isso, um erro de digitação deixaria os dois empatados).
+ORDER_PENALTY = 0.3
+
+# Semelhança mínima (Dice dos trigramas) para que duas palavras sejam consideradas correspondentes.
+WORD_SCORE = 0.5
+
+
+# Retorna os trigramas de uma palavra, delimitada por espaços (como no pg_trgm).
+def _word_trigrams(word: str) -> frozenset[str]:
+    padded = f"  {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+# Retorna os trigramas de um nome normalizado (a união dos trigramas de suas palavras).
+def trigrams(normalized: str) -> frozenset[str]:
+    return frozenset().union(*(_word_trigrams(word) for word in normalized.split()))
+
+
+# Define um candidato da resolução.
+@dataclass(frozen=True)
+class NameMatch:
+    """
+    Entidade cujo nome corresponde ao nome procurado.
+
+    :ivar id: ID da entidade.
+    :type id: int
+    :ivar name: Nome cadastrado (ex: "Ana Lima").
+    :type name: str
+    :ivar score: Semelhança, de 0 a 1 (1 para o nome idêntico, sem considerar acentos e maiúsculas).
+    :type score: float
+    """
+    id: int
+    name: str
+    score: float
+
+
+# Define o resultado de uma resolução.
+@dataclass(frozen=True)
+class NameResolution:
+    """
+    Resultado de :meth:`NameResolver.resolve`.
+
+    :ivar match: O candidato escolhido, ou None se não houver candidato ou se a escolha for ambígua.
+    :type match: NameMatch | None
+    :ivar candidates: Os candidatos mais semelhantes, do mais para o menos semelhante.
+    :type candidates: tuple[NameMatch, ...]
+    """
+    match: NameMatch | None
+    candidates: tuple[NameMatch, ...] = ()
+
+
+# Define o índice de trigramas dos nomes de um tipo de entidade.
+class _TrigramIndex:
+    """
+    Índice dos nomes de um tipo de entidade, em dois níveis: as palavras distintas (o vocabulário, bem menor
+    que o número de nomes) são indexadas por trigramas, e cada palavra aponta para as entidades que a contêm.
+
+    Uma busca aproximada compara cada palavra procurada só com o vocabulário e depois calcula a semelhança
+    apenas das entidades que contêm alguma palavra correspondente.
+    """
+
+    def __init__(self, rows):
+        # Dados de cada entidade: {id: (nome, palavras, trigramas, id do escopo)}.
+        self.entries = {}
+        # Nomes normalizados idênticos: {nome normalizado: [ids]}.
+        self.exact = {}
+        # Vocabulário: {palavra: trigramas}, {palavra: ids das entidades} e {trigrama: [palavras]}.
+        self.word_grams = {}
+        self.word_entities = {}
+        self.word_postings = {}
+        # Entidades de cada escopo: {id do escopo: {ids}}.
+        self.scopes = {}
+        for entity_id, name, scope_id in rows:
+            normalized = normalize_name(name)
+            words = tuple(normalized.split())
+            for word in words:
+                if word not in self.word_grams:
+                    grams = self.word_grams[word] = _word_trigrams(word)
+                    self.word_entities[word] = set()
+                    for gram in grams:
+                        self.word_postings.setdefault(gram, []).append(word)
+                self.word_entities[word].add(entity_id)
+            grams = frozenset().union(*(self.word_grams[word] for word in words))
+            self.entries[entity_id] = (name, words, grams, scope_id)
+            self.exact.setdefault(normalized, []).append(entity_id)
+            self.scopes.setdefault(scope_id, set()).add(entity_id)
+
+    # Retorna as palavras do vocabulário que correspondem à palavra procurada e, entre elas, as que começam com ela.
+    def _similar_words(self, query_word: str) -> tuple[set[str], set[str]]:
+        query_grams = _word_trigrams(query_word)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self.word_postings.get(gram, ()))
+        similar, prefixed = set(), set()
+        for word, count in shared.items():
+            if word.startswith(query_word):
+                prefixed.add(word)
+                similar.add(word)
+            elif 2 * count / (len(query_grams) + len(self.word_grams[word])) >= WORD_SCORE:
+                similar.add(word)
+        return similar, prefixed
+
+    # Retorna {id: semelhança} das entidades com semelhança de ao menos 'floor' ao nome procurado (com 'limit',
+    # os 'limit' mais semelhantes estão sempre no resultado, mas os demais podem faltar).
+    def score(self, normalized: str, scope_id=None, floor: float = 0.0, limit: int | None = None) -> dict[int, float]:
+        members = self.scopes.get(scope_id, set()) if scope_id is not None else None
+        exact = [entity_id for entity_id in self.exact.get(normalized, ()) if members is None or entity_id in members]
+        if exact:
+            return dict.fromkeys(exact, 1.0)
+
+        query_words = tuple(dict.fromkeys(normalized.split()))
+        if not query_words:
+            return {}
+        # Conta, para cada entidade, quantas palavras procuradas têm correspondente no nome (e quantas são prefixos).
+        matched, prefixed = Counter(), Counter()
+        similar_words = []
+        for query_word in query_words:
+            similar, prefixes = self._similar_words(query_word)
+            similar_words.append(similar)
+            matched.update(set().union(*(self.word_entities[word] for word in similar)))
+            prefixed.update(set().union(*(self.word_entities[word] for word in prefixes)))
+
+        # A semelhança nunca passa da fração de palavras correspondentes, então os nomes são avaliados da maior
+        # para a menor fração, parando quando a fração não alcança mais o mínimo nem o pior dos 'limit' melhores.
+        groups = {}
+        for entity_id, count in matched.items():
+            if members is None or entity_id in members:
+                groups.setdefault(count, []).append(entity_id)
+        query_grams = trigrams(normalized)
+        scores = {}
+        for count in sorted(groups, reverse=True):
+            coverage = count / len(query_words)
+            if coverage < floor or (limit and len(scores) >= limit and heapq.nlargest(limit, scores.values())[-1] > coverage):
+                break
+            for entity_id in groups[count]:
+                name, words, grams, _ = self.entries[entity_id]
+                score = 2 * len(query_grams & grams) / (len(query_grams) + len(grams)) * coverage
+                score *= 1 - ORDER_PENALTY * self._unordered_fraction(similar_words, words)
+                if prefixed[entity_id] == len(query_words) and self._words_are_prefixes(query_words, words):
+                    score = max(score, PREFIX_SCORE)
+                # Só o nome idêntico vale 1.0 (ex: "Ana Lima Dias" e "Ana Dias Lima" têm os mesmos trigramas).
+                score = min(score, 0.99)
+                if score >= floor:
+                    scores[entity_id] = score
+        return scores
+
+    # Retorna a fração dos pares de palavras procuradas vizinhas que aparecem no nome em ordem inversa.
+    @staticmethod
+    def _unordered_fraction(similar_words, words) -> float:
+        positions = [next((i for i, word in enumerate(words) if word in similar), None) for similar in similar_words]
+        positions = [position for position in positions if position is not None]
+        if len(positions) < 2:
+            return 0.0
+        return sum(1 for a, b in zip(positions, positions[1:]) if a > b) / (len(positions) - 1)
+
+    # Indica se cada palavra procurada é o início de uma palavra diferente do nome, na mesma ordem.
+    @staticmethod
+    def _words_are_prefixes(query_words, words) -> bool:
+        position = 0
+        for query_word in query_words:
+            while position < len(words) and not words[position].startswith(query_word):
+                position += 1
+            if position == len(words):
+                return False
+            position += 1
+        return True
+
+
+# Define o resolvedor de nomes usado pelas ferramentas do assistente.
+class NameResolver:
+    """
+    Resolve nomes aproximados (erros de digitação, acentos, maiúsculas, só o primeiro nome) para IDs,
+    usando índices de trigramas em memória.
+
+    Cada índice é montado com uma consulta ao banco na primeira resolução do tipo e descartado quando
+    uma escrita confirmada altera os nomes daquele tipo; depois disso, cada resolução é feita na memória.
+    Dentro de uma unidade de trabalho que já alterou os nomes do tipo (ex: uma turma criada por uma
+    ferramenta anterior do mesmo turno), o índice é montado a partir da sessão a cada resolução, até o commit.
+
+    :param data_service: Serviço usado para ler os nomes (``get_resolvable_names``).
+    :param min_score: Semelhança mínima para escolher um candidato que não é idêntico ao nome procurado.
+    :param margin: Diferença mínima entre o melhor e o segundo candidato para que a escolha não seja ambígua.
+    :param min_candidate_score: Semelhança mínima para que um nome seja sugerido como candidato.
+    """
+
+    def __init__(self, data_service, min_score: float = 0.5, margin: float = 0.1, min_candidate_score: float = 0.3):
+        self.data_service = data_service
+        self.min_score = min_score
+        self.margin = margin
+        self.min_candidate_score = min_candidate_score
+        self._indexes = {}
+        # Número de invalidações de cada tipo, para não guardar um índice lido antes de uma alteração.
+        self._versions = dict.fromkeys(KINDS, 0)
+        self._lock = threading.Lock()
+        self._unsubscribe = change_events.subscribe(self._on_data_changed, entities=_STALE_KINDS.keys())
+
+    # Descarta os índices dos tipos afetados por uma alteração (o índice é montado de novo na próxima resolução).
+    def _on_data_changed(self, change):
+        self.invalidate(*_STALE_KINDS[change.entity])
+
+    # Descarta os índices informados (todos, se nenhum for informado).
+    def invalidate(self, *kinds: str):
+        with self._lock:
+            for kind in kinds or KINDS:
+                self._indexes.pop(kind, None)
+                self._versions[kind] += 1
+
+    # Cancela a assinatura dos eventos de alteração.
+    def close(self):
+        self._unsubscribe()
+
+    # Retorna o índice do tipo, montando-o se necessário.
+    def _index(self, kind: str) -> _TrigramIndex:
+        if kind not in KINDS:
+            raise ValueError(f"Unknown name kind: {kind!r}.")
+        # Alterações ainda não confirmadas da unidade de trabalho ativa: o índice guardado não as contém.
+        if any(kind in _STALE_KINDS.get(change.entity, ()) for change in self.data_service.get_pending_changes()):
+            return _TrigramIndex(self.data_service.get_resolvable_names(kind))
+        with self._lock:
+            index, version = self._indexes.get(kind), self._versions[kind]
+        if index is None:
+            # A consulta é feita fora do lock. O índice só é guardado se nenhuma alteração chegou enquanto
+            # ele era montado; caso contrário, é usado só nesta resolução.
+            index = _TrigramIndex(self.data_service.get_resolvable_names(kind))
+            with self._lock:
+                if self._versions[kind] == version:
+                    self._indexes[kind] = index
+        return index
+
+    # Resolve um nome para a entidade mais semelhante.
+    def resolve(self, kind: str, name: str, scope_id: int | None = None, limit: int = 5,
+                exact: bool = False) -> NameResolution:
+        """
+        Procura o nome entre as entidades do tipo informado.
+
+        O melhor candidato é escolhido se o nome normalizado for idêntico (havendo homônimos, vale o de menor
+        ID, como em ``DataService.get_student_by_name``) ou se a semelhança for de ao menos ``min_score`` e
+        superar a do segundo candidato em ``margin``. Caso contrário, ``match`` é None e ``candidates`` traz
+        as sugestões para o assistente.
+
+        :param kind: "student", "class", "course", "subject" ou "assessment".
+        :param name: Nome procurado.
+        :param scope_id: Para "subject", o ID da turma; para "assessment", o ID da disciplina da turma.
+            None procura em todas.
+        :param limit: Número máximo de candidatos retornados.
+        :param exact: Se True, só um nome idêntico é escolhido; os parecidos vêm apenas em ``candidates``
+            (usado pelas ferramentas que alteram dados).
+        :raises ValueError: Se o tipo for desconhecido.
+        """
+        index = self._index(kind)
+        scores = index.score(normalize_name(name), scope_id, floor=self.min_candidate_score, limit=max(limit, 2))
+        ranked = sorted(scores, key=lambda entity_id: (-scores[entity_id], entity_id))[:max(limit, 2)]
+        candidates = tuple(NameMatch(entity_id, index.entries[entity_id][0], scores[entity_id]) for entity_id in ranked)
+        if not candidates:
+            return NameResolution(None)
+
+        best = candidates[0]
+        runner_up = candidates[1].score if len(candidates) > 1 else 0.0
+        if best.score == 1.0 or (not exact and best.score >= self.min_score and best.score - runner_up >= self.margin):
+            return NameResolution(best, candidates[:limit])
+        return NameResolution(None, candidates[:limit])
@@ -0,0 +1,169 @@
+# Importa 'array' para guardar as colunas numéricas dos lotes em vetores compactos.
+from array import array
+# Importa 'Mapping' para que os registros se comportem como dicionários somente leitura.
+from collections.abc import Mapping
+# Importa 'lru_cache' para reutilizar o tipo de registro de cada conjunto de colunas.
+from functools import lru_cache
+
+# Este módulo define os tipos de resultado compactos do DataService, usados quando o chamador pede
+# 'compact=True' (ex: exportações e varreduras da escola inteira):
+#
+# - Registros com '__slots__': um objeto por linha, sem o dicionário de chaves repetidas de cada linha.
+#   Implementam Mapping, então 'registro["score"]', 'registro.get(...)', 'dict(registro)' e a comparação
+#   com dicionários continuam funcionando.
+# - GradeBatch: notas em colunas ('array'), com os nomes de alunos, avaliações, turmas e cursos guardados
+#   uma única vez por entidade.
+
+# Nomes que não podem ser colunas de um registro, pois são métodos da interface de dicionário.
+_RESERVED_NAMES = frozenset(dir(Mapping)) | {"to_dict"}
+
+
+# Define a classe base dos registros compactos.
+class Record(Mapping):
+    """
+    Linha de resultado com '__slots__' e interface de dicionário somente leitura.
+
+    As subclasses são criadas por :func:`record_type`; os valores são passados na ordem das colunas.
+    """
+    __slots__ = ()
+
+    def __init__(self, *values):
+        if len(values) != len(self.__slots__):
+            raise TypeError(f"{type(self).__name__} expects {len(self.__slots__)} values, got {len(values)}.")
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    # Os registros são somente leitura; use to_dict() para obter uma cópia alterável.
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only.")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is read-only.")
+
+    def __getitem__(self, key):
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+    # Permite copiar e serializar o registro (objetos com '__slots__' não têm '__dict__').
+    def __reduce__(self):
+        return type(self)._rebuild, (type(self).__name__, self.__slots__, tuple(getattr(self, n) for n in self.__slots__))
+
+    @staticmethod
+    def _rebuild(name, fields, values):
+        return record_type(name, fields)(*values)
+
+    # Converte o registro em um dicionário comum (ex: para serializar em JSON ou acrescentar chaves).
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# Retorna (criando na primeira vez) o tipo de registro com as colunas informadas.
+@lru_cache(maxsize=None)
+def record_type(name: str, fields: tuple[str, ...]) -> type:
+    """
+    Cria um tipo de registro compacto com as colunas informadas, na ordem informada.
+
+    :param name: Nome da classe (ex: "EnrollmentRecord").
+    :param fields: Nomes das colunas (identificadores Python).
+    :raises ValueError: Se uma coluna tiver o nome de um método da interface de dicionário.
+    """
+    clashes = _RESERVED_NAMES.intersection(fields)
+    if clashes:
+        raise ValueError(f"Record fields clash with mapping methods: {sorted(clashes)}.")
+    return type(name, (Record,), {"__slots__": tuple(fields)})
+
+
+# Converte as linhas de um resultado do SQLAlchemy em registros compactos.
+def records_from_result(name: str, result) -> list[Record]:
+    """
+    Converte as linhas em registros. Textos iguais (nomes de turmas, de alunos, datas) passam a ser o
+    mesmo objeto em todas as linhas, em vez de uma cópia por linha vinda do banco.
+
+    :param name: Nome do tipo de registro.
+    :param result: Resultado de ``session.execute(...)`` (as colunas viram os campos do registro).
+    """
+    record = record_type(name, tuple(result.keys()))
+    shared = {}
+    return [record(*[shared.setdefault(value, value) if type(value) is str else value for value in row])
+            for row in result]
+
+
+# Define o lote colunar de notas.
+class GradeBatch:
+    """
+    Notas com detalhes (como em ``DataService.query_grades``) guardadas em colunas.
+
+    Os IDs ficam em ``array('q')`` e as notas em ``array('d')``; os nomes de cada aluno, avaliação,
+    turma e curso são guardados uma única vez, e as datas repetidas compartilham o mesmo texto.
+    Cada posição pode ser lida como um registro com as mesmas chaves dos dicionários de ``query_grades``.
+
+    :ivar scores: Notas, na ordem do lote.
+    :type scores: array
+    """
+    # Colunas dos registros gerados por posição, na ordem de 'query_grades'.
+    FIELDS = ("id", "score", "student_id", "student_first_name", "student_last_name", "assessment_id",
+              "assessment_name", "class_id", "class_name", "course_id", "course_name", "date_recorded")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.scores = array("d")
+        self.student_ids = array("q")
+        self.assessment_ids = array("q")
+        self.class_ids = array("q")
+        self.course_ids = array("q")
+        self.dates = []
+        # Dados de cada entidade, guardados uma única vez: {id: nome} ou {id: (nome, sobrenome)}.
+        self.student_names = {}
+        self.assessment_names = {}
+        self.class_names = {}
+        self.course_names = {}
+        self._shared_dates = {}
+
+    # Acrescenta uma linha de 'query_grades' (na ordem de FIELDS) ao lote.
+    def append(self, row):
+        (grade_id, score, student_id, first_name, last_name, assessment_id, assessment_name,
+         class_id, class_name, course_id, course_name, date_recorded) = row
+        self.ids.append(grade_id)
+        self.scores.append(score)
+        self.student_ids.append(student_id)
+        self.assessment_ids.append(assessment_id)
+        self.class_ids.append(class_id)
+        self.course_ids.append(course_id)
+        self.dates.append(self._shared_dates.setdefault(date_recorded, date_recorded))
+        if student_id not in self.student_names:
+            self.student_names[student_id] = (first_name, last_name)
+        self.assessment_names.setdefault(assessment_id, assessment_name)
+        self.class_names.setdefault(class_id, class_name)
+        self.course_names.setdefault(course_id, course_name)
+
+    def __len__(self):
+        return len(self.ids)
+
+    # Retorna a nota da posição informada como um registro compatível com dicionários.
+    def __getitem__(self, index: int) -> Record:
+        student_id, assessment_id = self.student_ids[index], self.assessment_ids[index]
+        class_id, course_id = self.class_ids[index], self.course_ids[index]
+        first_name, last_name = self.student_names[student_id]
+        return record_type("GradeRecord", self.FIELDS)(
+            self.ids[index], self.scores[index], student_id, first_name, last_name, assessment_id,
+            self.assessment_names[assessment_id], class_id, self.class_names[class_id], course_id,
+            self.course_names[course_id], self.dates[index],
+        )
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+    # Converte o lote em uma lista de dicionários, no formato de 'query_grades'.
+    def to_dicts(self) -> list[dict]:
+        return [record.to_dict() for record in self]
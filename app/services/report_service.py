@@ -6,7 +6,10 @@ import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 from app.services.data_service import DataService
+from app.data.instrumentation import instrument_queries, query_budget
 
+# Records the SQL statements issued by each report, including the DataService calls it makes.
+@instrument_queries
 class ReportService:
     """
     Service responsible for generating reports and visualizations.
@@ -28,6 +31,8 @@ class ReportService:
         """Returns the full path for a report file."""
         return os.path.join(self.REPORTS_DIR, filename)
 
+    # Every report reads the whole class from a single gradebook (two SQL statements), whatever its size.
+    @query_budget(2)
     def generate_student_grade_chart(self, student_id: int, class_id: int) -> str:
         """
         Generates a bar chart of a student's grades in a specific class, separated by Subject.
@@ -36,37 +41,25 @@ class ReportService:
         :param class_id: ID of the class.
         :return: Path to the generated image file.
         """
-        student = next((g for g in self.data_service.get_all_students() if g['id'] == student_id), None)
-        class_info = self.data_service.get_class_by_id(class_id)
+        gradebook = self.data_service.get_class_gradebook(class_id)
+        student = gradebook.student(student_id) if gradebook else None
 
-        if not student or not class_info:
+        if not student:
             raise ValueError("Student or Class not found.")
 
-        # Fetch subjects for the class
-        subjects = self.data_service.get_subjects_for_class(class_id)
-        if not subjects:
-            raise ValueError(f"No subjects found for {class_info['name']}.")
+        if not gradebook.subjects:
+            raise ValueError(f"No subjects found for {gradebook.class_name}.")
 
-        # Prepare data
-        subject_names = []
-        averages = []
-
-        for subject in subjects:
-            # For each subject, calculate the weighted average
-            assessments = self.data_service.get_assessments_for_subject(subject['id'])
-            grades = self.data_service.get_grades_for_subject(subject['id'])
-            student_grades = [g for g in grades if g['student_id'] == student_id]
-
-            avg = self.data_service.calculate_weighted_average(student_id, student_grades, assessments)
-            subject_names.append(subject['course_name'])
-            averages.append(avg)
+        # Prepare data: one weighted average per subject
+        subject_names = [subject['course_name'] for subject in gradebook.subjects]
+        averages = gradebook.subject_averages(student_id)
 
         # Plotting
         plt.figure(figsize=(12, 6))
         plt.bar(subject_names, averages, color='skyblue')
         plt.xlabel('Disciplinas')
         plt.ylabel('Média')
-        plt.title(f"Desempenho de {student['first_name']} {student['last_name']} - {class_info['name']}")
+        plt.title(f"Desempenho de {student['first_name']} {student['last_name']} - {gradebook.class_name}")
         plt.ylim(0, 10)
         plt.grid(axis='y', linestyle='--', alpha=0.7)
         plt.xticks(rotation=45, ha='right')
@@ -80,6 +73,7 @@ class ReportService:
 
         return filepath
 
+    @query_budget(2)
     def generate_class_grade_distribution(self, class_id: int) -> str:
         """
         Generates a histogram of global grade distribution for a class (averaging all subjects).
@@ -87,32 +81,11 @@ class ReportService:
         :param class_id: ID of the class.
         :return: Path to the generated image file.
         """
-        class_info = self.data_service.get_class_by_id(class_id)
-        if not class_info:
+        gradebook = self.data_service.get_class_gradebook(class_id)
+        if not gradebook:
             raise ValueError("Class not found.")
 
-        enrollments = self.data_service.get_enrollments_for_class(class_id)
-        subjects = self.data_service.get_subjects_for_class(class_id)
-
-        global_averages = []
-
-        for enrollment in enrollments:
-            student_id = enrollment['student_id']
-            student_subject_averages = []
-
-            for subject in subjects:
-                assessments = self.data_service.get_assessments_for_subject(subject['id'])
-                grades = self.data_service.get_grades_for_subject(subject['id'])
-                student_grades = [g for g in grades if g['student_id'] == student_id]
-
-                avg = self.data_service.calculate_weighted_average(student_id, student_grades, assessments)
-                student_subject_averages.append(avg)
-
-            if student_subject_averages:
-                global_avg = sum(student_subject_averages) / len(student_subject_averages)
-                global_averages.append(global_avg)
-            else:
-                global_averages.append(0.0)
+        global_averages = [gradebook.global_average(student['student_id']) for student in gradebook.students]
 
         if not global_averages:
              raise ValueError("No data to generate distribution.")
@@ -122,7 +95,7 @@ class ReportService:
         plt.hist(global_averages, bins=[0, 2, 4, 6, 8, 10], edgecolor='black', alpha=0.7)
         plt.xlabel('Média Global (Todas as Disciplinas)')
         plt.ylabel('Número de Alunos')
-        plt.title(f"Distribuição de Notas Global - {class_info['name']}")
+        plt.title(f"Distribuição de Notas Global - {gradebook.class_name}")
         plt.xticks([1, 3, 5, 7, 9])
         plt.grid(axis='y', linestyle='--', alpha=0.7)
 
@@ -134,6 +107,7 @@ class ReportService:
 
         return filepath
 
+    @query_budget(2)
     def export_class_grades_csv(self, class_id: int) -> str:
         """
         Exports grades for a class to a CSV file, listing all subjects and averages.
@@ -141,40 +115,20 @@ class ReportService:
         :param class_id: ID of the class.
         :return: Path to the generated CSV file.
         """
-        class_info = self.data_service.get_class_by_id(class_id)
-        if not class_info:
+        gradebook = self.data_service.get_class_gradebook(class_id)
+        if not gradebook:
             raise ValueError("Class not found.")
 
-        enrollments = self.data_service.get_enrollments_for_class(class_id)
-        subjects = self.data_service.get_subjects_for_class(class_id)
-
         # Prepare CSV Data
         # Header: Nº, Aluno, Subject 1 Avg, Subject 2 Avg, ..., Global Average
-        header = ["Nº", "Aluno"] + [s['course_name'] for s in subjects] + ["Média Global"]
+        header = ["Nº", "Aluno"] + [s['course_name'] for s in gradebook.subjects] + ["Média Global"]
 
         rows = []
-        for enrollment in enrollments:
-            student_id = enrollment['student_id']
-            student_name = f"{enrollment['student_first_name']} {enrollment['student_last_name']}"
-
-            row = [enrollment['call_number'], student_name]
-
-            subject_averages = []
-            for subject in subjects:
-                assessments = self.data_service.get_assessments_for_subject(subject['id'])
-                grades = self.data_service.get_grades_for_subject(subject['id'])
-                student_grades = [g for g in grades if g['student_id'] == student_id]
-
-                avg = self.data_service.calculate_weighted_average(student_id, student_grades, assessments)
-                row.append(f"{avg:.2f}")
-                subject_averages.append(avg)
-
-            if subject_averages:
-                global_avg = sum(subject_averages) / len(subject_averages)
-                row.append(f"{global_avg:.2f}")
-            else:
-                row.append("0.00")
-
+        for student in gradebook.students:
+            student_id = student['student_id']
+            row = [student['call_number'], f"{student['first_name']} {student['last_name']}"]
+            row.extend(f"{avg:.2f}" for avg in gradebook.subject_averages(student_id))
+            row.append(f"{gradebook.global_average(student_id):.2f}")
             rows.append(row)
 
         # Save file
@@ -188,6 +142,7 @@ class ReportService:
 
         return filepath
 
+    @query_budget(3)
     def generate_student_report_card(self, student_id: int, class_id: int) -> str:
         """
         Generates a text-based report card for a student, grouping grades by subject.
@@ -196,13 +151,12 @@ class ReportService:
         :param class_id: ID of the class.
         :return: Path to the generated text file.
         """
-        class_info = self.data_service.get_class_by_id(class_id)
-        student_obj = next((s for s in self.data_service.get_all_students() if s['id'] == student_id), None)
+        gradebook = self.data_service.get_class_gradebook(class_id)
+        student_obj = gradebook.student(student_id) if gradebook else None
 
-        if not class_info or not student_obj:
+        if not student_obj:
             raise ValueError("Class or Student not found.")
 
-        subjects = self.data_service.get_subjects_for_class(class_id)
         incidents = self.data_service.get_incidents_for_class(class_id)
         student_incidents = [i for i in incidents if i['student_id'] == student_id]
 
@@ -212,32 +166,30 @@ class ReportService:
             "BOLETIM ESCOLAR",
             "=" * 50,
             f"Aluno: {student_obj['first_name']} {student_obj['last_name']}",
-            f"Turma: {class_info['name']}",
+            f"Turma: {gradebook.class_name}",
             f"Data de Emissão: {datetime.now().strftime('%d/%m/%Y')}",
             "-" * 50,
             "DESEMPENHO POR DISCIPLINA:",
             ""
         ]
 
-        if not subjects:
+        if not gradebook.subjects:
             lines.append("Nenhuma disciplina cadastrada nesta turma.")
 
-        for subject in subjects:
+        for subject in gradebook.subjects:
             lines.append(f"DISCIPLINA: {subject['course_name'].upper()}")
 
-            assessments = self.data_service.get_assessments_for_subject(subject['id'])
-            grades = self.data_service.get_grades_for_subject(subject['id'])
-            student_grades = [g for g in grades if g['student_id'] == student_id]
+            assessments = gradebook.assessments_for_subject(subject['id'])
 
             if not assessments:
                 lines.append("  - Nenhuma avaliação registrada.")
             else:
                 for assessment in assessments:
-                    grade_item = next((g for g in student_grades if g['assessment_id'] == assessment['id']), None)
-                    score_str = f"{grade_item['score']:.2f}" if grade_item else "N/A"
+                    score = gradebook.score(student_id, assessment['id'])
+                    score_str = f"{score:.2f}" if score is not None else "N/A"
                     lines.append(f"  - {assessment['name']} (Peso {assessment['weight']}): {score_str}")
 
-            avg = self.data_service.calculate_weighted_average(student_id, student_grades, assessments)
+            avg = gradebook.subject_average(student_id, subject['id'])
             lines.append(f"  >> MÉDIA FINAL: {avg:.2f}")
             lines.append("-" * 30)
 
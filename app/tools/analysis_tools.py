@@ -63,12 +63,20 @@ def get_student_performance_summary_tool(student_name: str, class_name: str) ->
         return f"Erro: Ocorreu um erro inesperado: {e}"
 
 @tool
-def get_students_at_risk_tool(class_name: str) -> str:
+def get_students_at_risk_tool(class_name: str = None, limit: int = 10) -> str:
     """
-    Identifica e lista alunos que estão em risco em uma turma específica com base em notas baixas ou um alto número de incidentes.
+    Identifica alunos em risco (notas baixas ou muitos incidentes) em uma turma ou, sem turma informada, em toda a escola.
     Use esta ferramenta para responder a perguntas como "Quais alunos precisam de ajuda?" ou "Mostre-me os alunos com problemas de desempenho."
+    Sem 'class_name', retorna os 'limit' alunos mais em risco de todas as turmas, do mais para o menos em risco.
     """
     try:
+        # Sem turma informada, responde para a escola inteira com uma única consulta.
+        if not class_name:
+            students_at_risk = data_service.get_school_students_at_risk(limit=limit)
+            if not students_at_risk:
+                return "Nenhum aluno foi identificado como em risco na escola."
+            return json.dumps(students_at_risk, indent=2)
+
         # Busca a turma pelo nome.
         target_class = data_service.get_class_by_name(class_name)
 
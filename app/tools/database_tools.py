@@ -1,7 +1,18 @@
 from datetime import datetime
 from sqlalchemy.exc import SQLAlchemyError
 from app.core.tools.tool_decorator import tool
-from app.services import data_service
+from app.services import data_service, name_resolver
+
+
+# Retorna a sugestão de nomes parecidos para a mensagem de "não encontrado" (vazia se não houver candidatos).
+# As ferramentas de escrita (confirm=True) só aceitam nomes idênticos e pedem a confirmação do nome exato.
+def _suggestions(resolution, confirm: bool = False) -> str:
+    if not resolution.candidates:
+        return ""
+    suggestion = " Você quis dizer: " + ", ".join(f"'{candidate.name}'" for candidate in resolution.candidates) + "?"
+    if confirm:
+        suggestion += " Nada foi alterado; confirme o nome exato com o professor."
+    return suggestion
 
 # --- READ TOOLS ---
 
@@ -14,20 +25,18 @@ def get_student_grades_by_course(student_name: str, course_name: str) -> str:
     :param course_name: Nome da disciplina (ex: "Matemática").
     :return: Lista de notas encontradas.
     """
-    student = data_service.get_student_by_name(student_name)
-    if not student:
-        return f"Aluno '{student_name}' não encontrado."
+    # Os nomes são resolvidos na memória, tolerando erros de digitação e acentos ausentes.
+    student = name_resolver.resolve("student", student_name)
+    if not student.match:
+        return f"Aluno '{student_name}' não encontrado.{_suggestions(student)}"
 
-    course = data_service.get_course_by_name(course_name)
-    if not course:
-        return f"Disciplina '{course_name}' não encontrada."
+    course = name_resolver.resolve("course", course_name)
+    if not course.match:
+        return f"Disciplina '{course_name}' não encontrada.{_suggestions(course)}"
+    student_name, course_name = student.match.name, course.match.name
 
-    # Busca todas as notas detalhadas e filtra
-    all_grades = data_service.get_all_grades_with_details()
-    student_grades = [
-        g for g in all_grades
-        if g['student_id'] == student['id'] and g['course_id'] == course['id']
-    ]
+    # Busca apenas as notas do aluno na disciplina (o filtro é feito no banco de dados).
+    student_grades = data_service.query_grades(student_id=student.match.id, course_id=course.match.id)
 
     if not student_grades:
         return f"Nenhuma nota encontrada para {student_name} em {course_name}."
@@ -45,25 +54,20 @@ def list_courses_for_student(student_name: str) -> str:
 
     :param student_name: O nome do aluno.
     """
-    student = data_service.get_student_by_name(student_name)
-    if not student:
-        return f"Aluno '{student_name}' não encontrado."
+    student = name_resolver.resolve("student", student_name)
+    if not student.match:
+        return f"Aluno '{student_name}' não encontrado.{_suggestions(student)}"
+    student_name = student.match.name
 
     # Como a matrícula é por Turma, e a Turma tem várias disciplinas,
     # listar as disciplinas "do aluno" significa listar as disciplinas das turmas onde ele está matriculado.
-
-    # Precisamos iterar todas as turmas para achar as matrículas desse aluno
-    # (Idealmente o DataService teria get_student_enrollments, mas vamos usar o que tem)
-    classes = data_service.get_all_classes()
-    student_courses = set()
-
-    for cls in classes:
-        class_enrollments = data_service.get_enrollments_for_class(cls['id'])
-        if any(e['student_id'] == student['id'] for e in class_enrollments):
-            # O aluno está nesta turma. Pega as disciplinas da turma.
-            subjects = data_service.get_subjects_for_class(cls['id'])
-            for s in subjects:
-                student_courses.add(s['course_name'])
+    # A visão geral do aluno traz as matrículas e as disciplinas em uma consulta, qualquer que seja o número de turmas.
+    overview = data_service.get_student_overview(student.match.id)
+    student_courses = {
+        subject['course_name']
+        for enrollment in (overview['enrollments'] if overview else [])
+        for subject in enrollment['subjects']
+    }
 
     if not student_courses:
         return f"{student_name} não está matriculado em turmas com disciplinas cadastradas."
@@ -98,11 +102,12 @@ def get_class_roster(class_name: str) -> str:
     Obtém a lista de chamada (roster) de uma turma específica.
     """
     try:
-        target_class = data_service.get_class_by_name(class_name)
-        if not target_class:
-            return f"Erro: Turma '{class_name}' não encontrada."
+        target_class = name_resolver.resolve("class", class_name)
+        if not target_class.match:
+            return f"Erro: Turma '{class_name}' não encontrada.{_suggestions(target_class)}"
+        class_name = target_class.match.name
 
-        enrollments = data_service.get_enrollments_for_class(target_class['id'])
+        enrollments = data_service.get_enrollments_for_class(target_class.match.id)
 
         if not enrollments:
             return f"A turma '{class_name}' não possui alunos matriculados."
@@ -116,6 +121,43 @@ def get_class_roster(class_name: str) -> str:
     except Exception as e:
         return f"Erro ao obter lista de alunos: {e}"
 
+@tool
+def search_school_records(query: str, kinds: str = None) -> str:
+    """
+    Busca um texto nos nomes dos alunos, nas aulas (título e conteúdo) e nos incidentes registrados.
+
+    :param query: Termos a buscar (ex: "frações", "briga recreio").
+    :param kinds: Opcional. Tipos separados por vírgula: "aluno", "aula", "incidente". Se vazio, busca em todos.
+    :return: Os resultados mais relevantes, com um trecho do texto encontrado.
+    """
+    kind_names = {"aluno": "student", "aula": "lesson", "incidente": "incident"}
+    labels = {"student": "Aluno", "lesson": "Aula", "incident": "Incidente"}
+
+    selected_kinds = None
+    if kinds:
+        requested = [k.strip().lower() for k in kinds.split(",") if k.strip()]
+        invalid = [k for k in requested if k not in kind_names]
+        if invalid:
+            return f"Erro: Tipo(s) de busca inválido(s): {', '.join(invalid)}. Use 'aluno', 'aula' ou 'incidente'."
+        selected_kinds = [kind_names[k] for k in requested]
+
+    try:
+        hits = data_service.search(query, kinds=selected_kinds, limit=10)
+        if not hits:
+            return f"Nenhum resultado encontrado para '{query}'."
+
+        result = [f"Resultados para '{query}':"]
+        for hit in hits:
+            line = f"- [{labels[hit['kind']]}] {hit['title']}"
+            if hit.get('date'):
+                line += f" ({hit['date']})"
+            if hit['snippet'] and hit['kind'] != "student":
+                line += f": {hit['snippet']}"
+            result.append(line)
+        return "\n".join(result)
+    except Exception as e:
+        return f"Erro ao buscar registros: {e}"
+
 # --- WRITE TOOLS ---
 
 @tool
@@ -140,17 +182,18 @@ def add_new_student(first_name: str, last_name: str, date_of_birth: str = None,
             response_msg = f"Novo aluno adicionado com sucesso: {first_name} {last_name} com ID {student['id']}."
 
             if enroll_in_class:
-                target_class = data_service.get_class_by_name(enroll_in_class)
+                resolution = name_resolver.resolve("class", enroll_in_class, exact=True)
+                target_class = resolution.match
 
                 if target_class:
-                    next_call_number = data_service.get_next_call_number(target_class['id'])
-                    enrollment = data_service.add_student_to_class(student['id'], target_class['id'], next_call_number)
+                    next_call_number = data_service.get_next_call_number(target_class.id)
+                    enrollment = data_service.add_student_to_class(student['id'], target_class.id, next_call_number)
                     if enrollment:
-                        response_msg += f" Matriculado na turma '{target_class['name']}'."
+                        response_msg += f" Matriculado na turma '{target_class.name}'."
                     else:
-                        response_msg += f" Falha ao matricular na turma '{target_class['name']}'."
+                        response_msg += f" Falha ao matricular na turma '{target_class.name}'."
                 else:
-                    response_msg += f" Turma '{enroll_in_class}' não encontrada para matrícula."
+                    response_msg += f" Turma '{enroll_in_class}' não encontrada para matrícula.{_suggestions(resolution, confirm=True)}"
 
             return response_msg
         else:
@@ -192,13 +235,14 @@ def add_subject_to_class(class_name: str, course_name: str) -> str:
     :param course_name: Nome da disciplina (ex: "Matemática").
     """
     try:
-        cls = data_service.get_class_by_name(class_name)
-        if not cls: return f"Turma '{class_name}' não encontrada."
+        cls = name_resolver.resolve("class", class_name, exact=True)
+        if not cls.match: return f"Turma '{class_name}' não encontrada.{_suggestions(cls, confirm=True)}"
 
-        course = data_service.get_course_by_name(course_name)
-        if not course: return f"Disciplina '{course_name}' não encontrada. Crie a disciplina primeiro."
+        course = name_resolver.resolve("course", course_name, exact=True)
+        if not course.match: return f"Disciplina '{course_name}' não encontrada.{_suggestions(course, confirm=True)} Crie a disciplina primeiro."
+        class_name, course_name = cls.match.name, course.match.name
 
-        result = data_service.add_subject_to_class(cls['id'], course['id'])
+        result = data_service.add_subject_to_class(cls.match.id, course.match.id)
         if result:
             return f"Disciplina '{course_name}' adicionada à turma '{class_name}' com sucesso."
         return f"Erro ao adicionar disciplina."
@@ -217,22 +261,23 @@ def add_new_lesson(class_name: str, subject_name: str, topic: str, content: str,
     :param date_str: Data (DD/MM/AAAA).
     """
     try:
-        cls = data_service.get_class_by_name(class_name)
-        if not cls: return f"Turma '{class_name}' não encontrada."
+        cls = name_resolver.resolve("class", class_name, exact=True)
+        if not cls.match: return f"Turma '{class_name}' não encontrada.{_suggestions(cls, confirm=True)}"
+        class_name = cls.match.name
 
-        # Busca a disciplina na turma
-        subjects = data_service.get_subjects_for_class(cls['id'])
-        target_subject = next((s for s in subjects if s['course_name'].lower() == subject_name.lower()), None)
+        # Busca a disciplina entre as da turma
+        target_subject = name_resolver.resolve("subject", subject_name, scope_id=cls.match.id, exact=True)
 
-        if not target_subject:
-            return f"Erro: A disciplina '{subject_name}' não faz parte da turma '{class_name}'."
+        if not target_subject.match:
+            return f"Erro: A disciplina '{subject_name}' não faz parte da turma '{class_name}'.{_suggestions(target_subject, confirm=True)}"
+        subject_name = target_subject.match.name
 
         try:
             lesson_date = datetime.strptime(date_str, "%d/%m/%Y").date()
         except ValueError:
             return f"Erro: Formato de data inválido '{date_str}'."
 
-        lesson = data_service.create_lesson(target_subject['id'], topic, content, lesson_date)
+        lesson = data_service.create_lesson(target_subject.match.id, topic, content, lesson_date)
 
         if lesson:
             return f"Aula '{topic}' de {subject_name} registrada com sucesso para a turma '{class_name}' em {date_str}."
@@ -253,16 +298,17 @@ def create_new_assessment(class_name: str, subject_name: str, assessment_name: s
     :param weight: Peso (float).
     """
     try:
-        cls = data_service.get_class_by_name(class_name)
-        if not cls: return f"Turma '{class_name}' não encontrada."
+        cls = name_resolver.resolve("class", class_name, exact=True)
+        if not cls.match: return f"Turma '{class_name}' não encontrada.{_suggestions(cls, confirm=True)}"
+        class_name = cls.match.name
 
-        subjects = data_service.get_subjects_for_class(cls['id'])
-        target_subject = next((s for s in subjects if s['course_name'].lower() == subject_name.lower()), None)
+        target_subject = name_resolver.resolve("subject", subject_name, scope_id=cls.match.id, exact=True)
 
-        if not target_subject:
-            return f"Erro: A disciplina '{subject_name}' não faz parte da turma '{class_name}'."
+        if not target_subject.match:
+            return f"Erro: A disciplina '{subject_name}' não faz parte da turma '{class_name}'.{_suggestions(target_subject, confirm=True)}"
+        subject_name = target_subject.match.name
 
-        assessment = data_service.add_assessment(target_subject['id'], assessment_name, weight)
+        assessment = data_service.add_assessment(target_subject.match.id, assessment_name, weight)
         if assessment:
             return f"Avaliação '{assessment_name}' criada para {subject_name} na turma '{class_name}'."
         return "Erro ao criar avaliação."
@@ -275,26 +321,26 @@ def add_new_grade(student_name: str, class_name: str, subject_name: str, assessm
     Adiciona uma nota para um aluno.
     """
     try:
-        student = data_service.get_student_by_name(student_name)
-        if not student: return f"Aluno '{student_name}' não encontrado."
+        student = name_resolver.resolve("student", student_name, exact=True)
+        if not student.match: return f"Aluno '{student_name}' não encontrado.{_suggestions(student, confirm=True)}"
 
-        cls = data_service.get_class_by_name(class_name)
-        if not cls: return f"Turma '{class_name}' não encontrada."
+        cls = name_resolver.resolve("class", class_name, exact=True)
+        if not cls.match: return f"Turma '{class_name}' não encontrada.{_suggestions(cls, confirm=True)}"
 
-        subjects = data_service.get_subjects_for_class(cls['id'])
-        target_subject = next((s for s in subjects if s['course_name'].lower() == subject_name.lower()), None)
+        target_subject = name_resolver.resolve("subject", subject_name, scope_id=cls.match.id, exact=True)
 
-        if not target_subject:
-            return f"Erro: Disciplina '{subject_name}' não encontrada na turma."
+        if not target_subject.match:
+            return f"Erro: Disciplina '{subject_name}' não encontrada na turma.{_suggestions(target_subject, confirm=True)}"
+        subject_name = target_subject.match.name
 
-        # Busca avaliações dessa disciplina
-        assessments = data_service.get_assessments_for_subject(target_subject['id'])
-        target_assessment = next((a for a in assessments if a['name'].lower() == assessment_name.lower()), None)
+        # Busca a avaliação entre as dessa disciplina
+        target_assessment = name_resolver.resolve("assessment", assessment_name, scope_id=target_subject.match.id, exact=True)
 
-        if not target_assessment:
-            return f"Erro: Avaliação '{assessment_name}' não encontrada em {subject_name}."
+        if not target_assessment.match:
+            return f"Erro: Avaliação '{assessment_name}' não encontrada em {subject_name}.{_suggestions(target_assessment, confirm=True)}"
+        student_name, assessment_name = student.match.name, target_assessment.match.name
 
-        grade = data_service.add_grade(student['id'], target_assessment['id'], score)
+        grade = data_service.add_grade(student.match.id, target_assessment.match.id, score)
         if grade:
             return f"Nota {score} adicionada para {student_name} em {assessment_name} ({subject_name})."
         return "Erro ao adicionar nota."
@@ -307,18 +353,19 @@ def register_incident(student_name: str, class_name: str, description: str, date
     Registra um incidente (comportamental/geral) para um aluno em uma turma.
     """
     try:
-        student = data_service.get_student_by_name(student_name)
-        if not student: return f"Aluno '{student_name}' não encontrado."
+        student = name_resolver.resolve("student", student_name, exact=True)
+        if not student.match: return f"Aluno '{student_name}' não encontrado.{_suggestions(student, confirm=True)}"
 
-        target_class = data_service.get_class_by_name(class_name)
-        if not target_class: return f"Turma '{class_name}' não encontrada."
+        target_class = name_resolver.resolve("class", class_name, exact=True)
+        if not target_class.match: return f"Turma '{class_name}' não encontrada.{_suggestions(target_class, confirm=True)}"
+        student_name, class_name = student.match.name, target_class.match.name
 
         try:
             incident_date = datetime.strptime(date_str, "%d/%m/%Y").date()
         except ValueError:
             return f"Erro: Data inválida '{date_str}'."
 
-        incident = data_service.create_incident(target_class['id'], student['id'], description, incident_date)
+        incident = data_service.create_incident(target_class.match.id, student.match.id, description, incident_date)
         if incident:
             return f"Incidente registrado para {student_name} na turma {class_name}."
         return "Erro ao registrar incidente."
@@ -345,23 +392,23 @@ def add_new_course(course_name: str, course_code: str) -> str:
 @tool
 def update_student_name(current_name: str, new_first_name: str, new_last_name: str) -> str:
     try:
-        student = data_service.get_student_by_name(current_name)
-        if not student: return "Aluno não encontrado."
-        data_service.update_student(student['id'], new_first_name, new_last_name)
-        return f"Nome atualizado para {new_first_name} {new_last_name}."
+        student = name_resolver.resolve("student", current_name, exact=True)
+        if not student.match: return f"Aluno '{current_name}' não encontrado.{_suggestions(student, confirm=True)}"
+        data_service.update_student(student.match.id, new_first_name, new_last_name)
+        return f"Nome de {student.match.name} (ID {student.match.id}) atualizado para {new_first_name} {new_last_name}."
     except Exception as e: return f"Erro: {e}"
 
 @tool
 def enroll_existing_student(student_name: str, class_name: str) -> str:
     try:
-        student = data_service.get_student_by_name(student_name)
-        if not student: return "Aluno não encontrado."
-        cls = data_service.get_class_by_name(class_name)
-        if not cls: return "Turma não encontrada."
-
-        next_num = data_service.get_next_call_number(cls['id'])
-        res = data_service.add_student_to_class(student['id'], cls['id'], next_num)
-        if res: return f"Aluno matriculado na turma {class_name}."
+        student = name_resolver.resolve("student", student_name, exact=True)
+        if not student.match: return f"Aluno '{student_name}' não encontrado.{_suggestions(student, confirm=True)}"
+        cls = name_resolver.resolve("class", class_name, exact=True)
+        if not cls.match: return f"Turma '{class_name}' não encontrada.{_suggestions(cls, confirm=True)}"
+
+        next_num = data_service.get_next_call_number(cls.match.id)
+        res = data_service.add_student_to_class(student.match.id, cls.match.id, next_num)
+        if res: return f"Aluno {student.match.name} matriculado na turma {cls.match.name}."
         return "Erro na matrícula."
     except Exception as e: return f"Erro: {e}"
 
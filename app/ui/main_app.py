@@ -16,6 +16,7 @@ from app.core.config import load_setting
 # Importa as classes de serviço que contêm a lógica de negócios e da IA.
 from app.services.data_service import DataService
 from app.services.assistant_service import AssistantService
+from app.services.async_data_service import AsyncDataService
 
 # Define a classe principal da aplicação, que herda de ctk.CTk (a janela principal).
 class MainApp(ctk.CTk):
@@ -32,6 +33,9 @@ class MainApp(ctk.CTk):
     :ivar assistant_service: Serviço para funcionalidades de assistente inteligente
                              baseado em IA.
     :type assistant_service: AssistantService
+    :ivar async_data_service: Fachada assíncrona do DataService, que executa as consultas
+                              em um pool de threads para não bloquear a interface.
+    :type async_data_service: AsyncDataService
     :ivar loop: Loop de eventos asyncio, utilizado para integrar tarefas assíncronas
                 com o loop de eventos do tkinter.
     :type loop: asyncio.AbstractEventLoop
@@ -62,13 +66,14 @@ class MainApp(ctk.CTk):
     :type views: dict
     """
     # O método construtor, que recebe as instâncias dos serviços por injeção de dependência.
-    def __init__(self, data_service: DataService, assistant_service: AssistantService):
+    def __init__(self, data_service: DataService, assistant_service: AssistantService, async_data_service: AsyncDataService | None = None):
         # Chama o construtor da classe pai (ctk.CTk).
         super().__init__()
 
         # Armazena as instâncias dos serviços como atributos da classe.
         self.data_service = data_service
         self.assistant_service = assistant_service
+        self.async_data_service = async_data_service or AsyncDataService(data_service)
 
         # Define o título e o tamanho inicial da janela principal.
         ctk.set_appearance_mode("Dark")
@@ -153,12 +158,15 @@ class MainApp(ctk.CTk):
     # Método para processar a fila de tarefas assíncronas de forma contínua.
     def _process_queue(self):
         try:
-            # Tenta obter uma tarefa da fila sem bloquear a execução.
-            callback, args = self.async_queue.get_nowait()
-            # Se uma tarefa for encontrada, executa a função (callback) com seus argumentos.
-            callback(*args)
+            # Executa todas as tarefas já enfileiradas (ex: vários eventos de alteração de uma mesma escrita),
+            # em vez de uma por verificação.
+            while True:
+                # Tenta obter uma tarefa da fila sem bloquear a execução.
+                callback, args = self.async_queue.get_nowait()
+                # Se uma tarefa for encontrada, executa a função (callback) com seus argumentos.
+                callback(*args)
         except Empty:
-            # Se a fila estiver vazia, não faz nada.
+            # Quando a fila esvazia, não faz nada.
             pass
         finally:
             # Agenda a próxima verificação da fila para daqui a 100 milissegundos.
@@ -224,6 +232,9 @@ class MainApp(ctk.CTk):
             if hasattr(self, '_poll_id'):
                 self.after_cancel(self._poll_id)
 
+            # Encerra o pool de threads do banco de dados, descartando as consultas que ainda não começaram.
+            self.async_data_service.shutdown(wait=False)
+
             # Agora, destrói a janela principal de forma segura.
             self.destroy()
         # Se a tarefa ainda não terminou, agenda uma nova verificação para daqui a 50ms.
@@ -5,6 +5,10 @@ import csv
 from datetime import date, datetime
 # Importa o serviço de dados para interagir com o banco de dados.
 from app.services import data_service
+# Importa o barramento de eventos de alteração, usado para atualizar apenas as partes afetadas da tela.
+from app.data.change_events import change_events, CREATED, DELETED
+# Importa o agendamento das atualizações disparadas pelos eventos de alteração.
+from app.ui.views.deferred_refresh import DeferredRefreshMixin
 # Importa as janelas de diálogo personalizadas para adicionar e editar registros.
 from app.ui.views.add_dialog import AddDialog
 from app.ui.views.edit_dialog import EditDialog
@@ -18,7 +22,14 @@ import os
 from PIL import Image
 
 # Define a classe para a tela de detalhes da turma.
-class ClassDetailView(ctk.CTkFrame):
+class ClassDetailView(DeferredRefreshMixin, ctk.CTkFrame):
+    # Recarregar uma lista inteira já traz as alterações das atualizações por linha da mesma lista.
+    _superseded_refreshes = {
+        "populate_grade_grid": ("_refresh_grade_values",),
+        "populate_student_list": ("_update_enrollment_rows",),
+        "populate_incident_list": ("_add_incident_rows",),
+    }
+
     # Método construtor.
     def __init__(self, parent, main_app):
         super().__init__(parent)
@@ -33,6 +44,21 @@ class ClassDetailView(ctk.CTkFrame):
 
         # Inicializa o dicionário de entradas de notas para evitar AttributeError
         self.grade_entries = {}
+        # Valor carregado do banco em cada entrada de nota e rótulo da média de cada aluno no quadro de notas.
+        self._grade_loaded_values = {}
+        self._average_labels = {}
+        # Widgets de cada linha do quadro de notas (por aluno) e avaliações das colunas (None sem quadro montado).
+        self._grade_rows = {}
+        self._grid_assessments = None
+        # Matrículas da turma exibida, por ID (para filtrar os eventos de alunos), e widgets de cada linha da lista.
+        self._enrollments_by_id = {}
+        self._student_rows = {}
+        # Widgets de cada linha da lista de incidentes, por ID do incidente.
+        self._incident_rows = {}
+        # Atualizações agendadas pelos eventos de alteração, executadas uma única vez quando a UI fica ociosa.
+        self._pending_refreshes = {}
+        # Recebe os eventos de alteração na fila da UI (inclusive os das escritas feitas pelo assistente).
+        change_events.subscribe(self._on_data_changed, queue=self.main_app.async_queue)
 
         # Mapeamento entre o status exibido na UI (português) e o armazenado no banco (inglês).
         self.status_map = {"Ativo": "Active", "Inativo": "Inactive"}
@@ -284,12 +310,8 @@ class ClassDetailView(ctk.CTkFrame):
             selected_course = next((c for c in available_courses if c['course_name'] == course_name), None)
 
             if selected_course:
+                # A lista de disciplinas é atualizada pelo evento de alteração (e a primeira é selecionada automaticamente).
                 data_service.add_subject_to_class(self.class_id, selected_course['id'])
-                self.populate_subject_combo()
-                # Se for a primeira, seleciona ela automaticamente
-                if self.current_subject_id is None:
-                     self.subject_combo.set(course_name)
-                     self.on_subject_change(course_name)
 
         dropdowns = {"course": ("Disciplina", course_names)}
         AddDialog(self, "Adicionar Disciplina à Turma", fields={}, dropdowns=dropdowns, save_callback=save_callback)
@@ -406,17 +428,25 @@ class ClassDetailView(ctk.CTkFrame):
             return
 
         # Chama o DataService para salvar os dados em lote (agora por disciplina/class_subject).
-        data_service.upsert_grades_for_subject(self.current_subject_id, grades_to_upsert)
+        result = data_service.upsert_grades_for_subject(self.current_subject_id, grades_to_upsert)
 
-        messagebox.showinfo("Sucesso", "Todas as notas foram salvas com sucesso.")
-        # Atualiza o quadro de notas para recalcular e exibir as médias.
-        self.populate_grade_grid()
+        # As notas digitadas passam a ser os valores gravados; as médias são atualizadas pelo evento de alteração.
+        for (student_id, assessment_id), entry_widget in self.grade_entries.items():
+            self._grade_loaded_values[(student_id, assessment_id)] = entry_widget.get()
+        messagebox.showinfo("Sucesso", f"Notas salvas com sucesso: {result['inserted']} nova(s) e {result['updated']} alterada(s).")
 
     # Método para construir e preencher o quadro de notas.
     def populate_grade_grid(self):
         # Limpa todos os widgets existentes no frame do quadro.
         for widget in self.grade_grid_frame.winfo_children():
             widget.destroy()
+        # Dicionários para guardar a referência dos widgets de entrada de nota, o valor carregado em cada uma,
+        # o rótulo da média e os widgets da linha de cada aluno.
+        self.grade_entries = {}
+        self._grade_loaded_values = {}
+        self._average_labels = {}
+        self._grade_rows = {}
+        self._grid_assessments = None
 
         if not self.class_id: return
         if not self.current_subject_id:
@@ -425,48 +455,80 @@ class ClassDetailView(ctk.CTkFrame):
 
         # Busca os dados necessários do banco.
         enrollments = data_service.get_enrollments_for_class(self.class_id)
-
-        # Filtra por alunos ativos se o checkbox estiver marcado.
-        if self.show_active_only_grades_checkbox.get():
-            enrollments = [e for e in enrollments if e['status'] == 'Active']
-
         # Busca avaliações específicas desta disciplina
-        assessments = data_service.get_assessments_for_subject(self.current_subject_id)
+        self._grid_assessments = data_service.get_assessments_for_subject(self.current_subject_id)
 
         # Cria o cabeçalho da tabela.
-        headers = ["Nome do Aluno"] + [a['name'] for a in assessments] + ["Média Final"]
+        headers = ["Nome do Aluno"] + [a['name'] for a in self._grid_assessments] + ["Média Final"]
         for col, header in enumerate(headers):
             label = ctk.CTkLabel(self.grade_grid_frame, text=header, font=ctk.CTkFont(weight="bold"))
             label.grid(row=0, column=col, padx=5, pady=5, sticky="w")
 
-        # Cria as linhas, uma para cada aluno.
-        # Dicionário para guardar a referência dos widgets de entrada de nota.
-        self.grade_entries = {}
-        grades = data_service.get_grades_for_subject(self.current_subject_id)
-
-        for row, enrollment in enumerate(enrollments, start=1):
-            student_name = f"{enrollment['student_first_name']} {enrollment['student_last_name']}"
-            name_label = ctk.CTkLabel(self.grade_grid_frame, text=student_name)
-            name_label.grid(row=row, column=0, padx=5, pady=5, sticky="w")
-
-            # Cria os campos de entrada para cada avaliação.
-            for col, assessment in enumerate(assessments, start=1):
-                entry = ctk.CTkEntry(self.grade_grid_frame, width=80)
-                entry.grid(row=row, column=col, padx=5, pady=5)
-
-                # Procura a nota existente para este aluno e avaliação.
-                existing_grade = next((g for g in grades if g['student_id'] == enrollment['student_id'] and g['assessment_id'] == assessment['id']), None)
-                if existing_grade:
-                    # Se existir, preenche o campo com o valor.
-                    entry.insert(0, str(existing_grade['score']))
-
-                # Armazena a referência do widget de entrada.
-                self.grade_entries[(enrollment['student_id'], assessment['id'])] = entry
-
-            # Calcula e exibe a média final ponderada do aluno para esta disciplina.
-            average = data_service.calculate_weighted_average(enrollment['student_id'], grades, assessments)
-            average_label = ctk.CTkLabel(self.grade_grid_frame, text=f"{average:.2f}")
-            average_label.grid(row=row, column=len(assessments) + 1, padx=5, pady=5, sticky="w")
+        grades = self._grades_by_key()
+        # Médias ponderadas já agregadas no banco (uma leitura para todos os alunos da disciplina).
+        averages = data_service.get_subject_averages(self.current_subject_id)
+
+        # Cria as linhas, uma para cada aluno (só os ativos, se o checkbox estiver marcado).
+        for enrollment in enrollments:
+            if self._is_listed(enrollment, self.show_active_only_grades_checkbox):
+                self._create_grade_row(enrollment, len(self._grade_rows) + 1, grades, averages)
+
+    # Cria a linha de um aluno no quadro de notas, com as notas carregadas e a média persistida.
+    def _create_grade_row(self, enrollment, row, grades, averages):
+        student_id = enrollment['student_id']
+        name_label = ctk.CTkLabel(self.grade_grid_frame, text=self._student_name(enrollment))
+        name_label.grid(row=row, column=0, padx=5, pady=5, sticky="w")
+        widgets = [name_label]
+
+        # Cria os campos de entrada para cada avaliação, preenchidos com a nota existente.
+        for col, assessment in enumerate(self._grid_assessments, start=1):
+            entry = ctk.CTkEntry(self.grade_grid_frame, width=80)
+            entry.grid(row=row, column=col, padx=5, pady=5)
+            key = (student_id, assessment['id'])
+            if key in grades:
+                entry.insert(0, str(grades[key]))
+            # Armazena a referência do widget de entrada e o valor carregado.
+            self.grade_entries[key] = entry
+            self._grade_loaded_values[key] = entry.get()
+            widgets.append(entry)
+
+        # Exibe a média final ponderada do aluno para esta disciplina.
+        average_label = ctk.CTkLabel(self.grade_grid_frame, text=f"{averages.get(student_id, 0.0):.2f}")
+        average_label.grid(row=row, column=len(self._grid_assessments) + 1, padx=5, pady=5, sticky="w")
+        self._average_labels[student_id] = average_label
+        widgets.append(average_label)
+        self._grade_rows[student_id] = widgets
+
+    # Remove a linha de um aluno do quadro de notas.
+    def _remove_grade_row(self, student_id):
+        for widget in self._grade_rows.pop(student_id, ()):
+            widget.destroy()
+        for assessment in self._grid_assessments:
+            self.grade_entries.pop((student_id, assessment['id']), None)
+            self._grade_loaded_values.pop((student_id, assessment['id']), None)
+        self._average_labels.pop(student_id, None)
+
+    # Retorna as notas da disciplina atual no formato {(student_id, assessment_id): nota}.
+    def _grades_by_key(self) -> dict:
+        return {(g['student_id'], g['assessment_id']): g['score'] for g in data_service.get_grades_for_subject(self.current_subject_id)}
+
+    # Atualiza as notas e as médias do quadro sem reconstruí-lo (ex: notas gravadas pelo assistente).
+    def _refresh_grade_values(self):
+        if not self.current_subject_id or not self.grade_entries:
+            return
+        grades = self._grades_by_key()
+        averages = data_service.get_subject_averages(self.current_subject_id)
+        for key, entry in self.grade_entries.items():
+            new_value = str(grades[key]) if key in grades else ""
+            # Entradas editadas e ainda não salvas são preservadas.
+            if entry.get() != self._grade_loaded_values.get(key, ""):
+                continue
+            if entry.get() != new_value:
+                entry.delete(0, "end")
+                entry.insert(0, new_value)
+            self._grade_loaded_values[key] = new_value
+        for student_id, label in self._average_labels.items():
+            label.configure(text=f"{averages.get(student_id, 0.0):.2f}")
 
     # Abre o pop-up para adicionar um novo incidente.
     def add_incident_popup(self):
@@ -489,9 +551,8 @@ class ClassDetailView(ctk.CTkFrame):
 
             if selected_enrollment and description:
                 # Chama o serviço para criar o incidente no banco de dados.
+                # A lista de incidentes é atualizada pelo evento de alteração.
                 data_service.create_incident(self.class_id, selected_enrollment['student_id'], description, date.today())
-                # Atualiza a lista de incidentes na tela.
-                self.populate_incident_list()
 
         # Configuração dos campos para o diálogo genérico.
         fields = {"description": "Descrição"}
@@ -501,6 +562,7 @@ class ClassDetailView(ctk.CTkFrame):
     # Preenche a lista de incidentes na respectiva aba.
     def populate_incident_list(self):
         for widget in self.incident_list_frame.winfo_children(): widget.destroy()
+        self._incident_rows = {}
         if not self.class_id: return
 
         incidents = data_service.get_incidents_for_class(self.class_id)
@@ -512,11 +574,28 @@ class ClassDetailView(ctk.CTkFrame):
             label.grid(row=0, column=i, padx=10, pady=5, sticky="w")
 
         # Cria as linhas com os dados dos incidentes.
-        for i, incident in enumerate(incidents, start=1):
-            student_name = f"{incident['student_first_name']} {incident['student_last_name']}"
-            ctk.CTkLabel(self.incident_list_frame, text=student_name).grid(row=i, column=0, padx=10, pady=5, sticky="w")
-            ctk.CTkLabel(self.incident_list_frame, text=incident['date']).grid(row=i, column=1, padx=10, pady=5, sticky="w")
-            ctk.CTkLabel(self.incident_list_frame, text=incident['description'], wraplength=400, justify="left").grid(row=i, column=2, padx=10, pady=5, sticky="w")
+        for incident in incidents:
+            self._incident_rows[incident['id']] = self._create_incident_row(incident, len(self._incident_rows) + 1)
+
+    # Cria a linha de um incidente e retorna seus widgets.
+    def _create_incident_row(self, incident, row) -> list:
+        student_name = f"{incident['student_first_name']} {incident['student_last_name']}"
+        widgets = [
+            ctk.CTkLabel(self.incident_list_frame, text=student_name),
+            ctk.CTkLabel(self.incident_list_frame, text=incident['date']),
+            ctk.CTkLabel(self.incident_list_frame, text=incident['description'], wraplength=400, justify="left"),
+        ]
+        for column, widget in enumerate(widgets):
+            widget.grid(row=row, column=column, padx=10, pady=5, sticky="w")
+        return widgets
+
+    # Acrescenta as linhas dos incidentes registrados, mantendo a ordem da lista (do mais recente ao mais antigo).
+    def _add_incident_rows(self, incident_ids):
+        incidents = data_service.get_incidents_for_class(self.class_id)
+        for incident in incidents:
+            if incident['id'] in incident_ids and incident['id'] not in self._incident_rows:
+                self._incident_rows[incident['id']] = self._create_incident_row(incident, len(self._incident_rows) + 1)
+        self._layout_rows(self._incident_rows, [incident['id'] for incident in incidents])
 
     # Mostra a view de edição/criação de aula.
     def show_lesson_editor(self, lesson=None):
@@ -573,8 +652,7 @@ class ClassDetailView(ctk.CTkFrame):
         else:
             data_service.create_lesson(self.current_subject_id, title, content, lesson_date)
 
-        # Atualiza a lista de aulas e esconde o editor.
-        self.populate_lesson_list()
+        # Esconde o editor; a lista de aulas é atualizada pelo evento de alteração.
         self.hide_lesson_editor()
 
     # Abre o pop-up para adicionar uma nova avaliação.
@@ -591,7 +669,6 @@ class ClassDetailView(ctk.CTkFrame):
                 try:
                     weight = float(weight_str)
                     data_service.add_assessment(self.current_subject_id, name, weight)
-                    self.populate_assessment_list()
                 except ValueError as e:
                     messagebox.showerror("Erro", f"Erro ao adicionar avaliação: {e}")
 
@@ -633,7 +710,6 @@ class ClassDetailView(ctk.CTkFrame):
         user_input = dialog.get_input()
         if user_input == "DELETE":
             data_service.delete_assessment(assessment_id)
-            self.populate_assessment_list()
 
     # Abre o pop-up para editar uma avaliação.
     def edit_assessment_popup(self, assessment):
@@ -644,7 +720,6 @@ class ClassDetailView(ctk.CTkFrame):
                 try:
                     weight = float(weight_str)
                     data_service.update_assessment(assessment_id, name, weight)
-                    self.populate_assessment_list()
                 except ValueError as e:
                     messagebox.showerror("Erro", f"Erro ao editar avaliação: {e}")
 
@@ -668,10 +743,10 @@ class ClassDetailView(ctk.CTkFrame):
             student = next((s for s in unenrolled_students if f"{s['first_name']} {s['last_name']}" == student_name), None)
 
             if student:
-                next_call_number = data_service.get_next_call_number(self.class_id)
-                data_service.add_student_to_class(student['id'], self.class_id, next_call_number)
-                self.populate_student_list()
-                self.populate_report_student_combo()
+                # Lê o próximo número de chamada e matricula na mesma transação.
+                with data_service.unit_of_work():
+                    next_call_number = data_service.get_next_call_number(self.class_id)
+                    data_service.add_student_to_class(student['id'], self.class_id, next_call_number)
 
         dropdowns = {"student": ("Aluno", student_names)}
         AddDialog(self, "Matricular Novo Aluno", fields={}, dropdowns=dropdowns, save_callback=save_callback)
@@ -679,51 +754,115 @@ class ClassDetailView(ctk.CTkFrame):
     # Preenche a lista de alunos matriculados.
     def populate_student_list(self):
         for widget in self.student_list_frame.winfo_children(): widget.destroy()
+        self._student_rows = {}
         if not self.class_id: return
 
         enrollments = data_service.get_enrollments_for_class(self.class_id)
-
-        # Filtra por alunos ativos se o checkbox estiver marcado.
-        if self.show_active_only_checkbox.get():
-            enrollments = [e for e in enrollments if e['status'] == 'Active']
+        self._enrollments_by_id = {e['id']: e for e in enrollments}
 
         headers = ["Nº de Chamada", "Nome do Aluno", "Data de Nascimento", "Status", "Ações"]
         for i, header in enumerate(headers):
             label = ctk.CTkLabel(self.student_list_frame, text=header, font=ctk.CTkFont(weight="bold"))
             label.grid(row=0, column=i, padx=10, pady=5, sticky="w")
 
-        for i, enrollment in enumerate(enrollments, start=1):
-            ctk.CTkLabel(self.student_list_frame, text=str(enrollment['call_number'])).grid(row=i, column=0, padx=10, pady=5, sticky="w")
-            ctk.CTkLabel(self.student_list_frame, text=f"{enrollment['student_first_name']} {enrollment['student_last_name']}").grid(row=i, column=1, padx=10, pady=5, sticky="w")
-
-            birth_date_str = ""
-            if enrollment['student_birth_date']:
-                try:
-                    birth_date = datetime.strptime(enrollment['student_birth_date'], '%Y-%m-%d')
-                    birth_date_str = birth_date.strftime("%d/%m/%Y")
-                except (ValueError, TypeError):
-                    birth_date_str = "Data Inválida"
-            ctk.CTkLabel(self.student_list_frame, text=birth_date_str).grid(row=i, column=2, padx=10, pady=5, sticky="w")
-
-            display_status = self.status_map_rev.get(enrollment['status'], enrollment['status'])
-            ctk.CTkLabel(self.student_list_frame, text=display_status).grid(row=i, column=3, padx=10, pady=5, sticky="w")
+        # Cria as linhas (só os alunos ativos, se o checkbox estiver marcado).
+        for enrollment in enrollments:
+            if self._is_listed(enrollment, self.show_active_only_checkbox):
+                self._student_rows[enrollment['id']] = self._create_student_row(enrollment, len(self._student_rows) + 1)
 
-            status_menu = ctk.CTkOptionMenu(self.student_list_frame, values=["Ativo", "Inativo"],
-                                            command=lambda status, eid=enrollment['id']: self.update_status(eid, status))
-            status_menu.set(display_status)
-            status_menu.grid(row=i, column=4, padx=10, pady=5, sticky="w")
+    # Cria a linha de uma matrícula na lista de alunos e retorna seus widgets.
+    def _create_student_row(self, enrollment, row) -> list:
+        birth_date_str = ""
+        if enrollment['student_birth_date']:
+            try:
+                birth_date = datetime.strptime(enrollment['student_birth_date'], '%Y-%m-%d')
+                birth_date_str = birth_date.strftime("%d/%m/%Y")
+            except (ValueError, TypeError):
+                birth_date_str = "Data Inválida"
+        display_status = self.status_map_rev.get(enrollment['status'], enrollment['status'])
+
+        status_menu = ctk.CTkOptionMenu(self.student_list_frame, values=["Ativo", "Inativo"],
+                                        command=lambda status, eid=enrollment['id']: self.update_status(eid, status))
+        status_menu.set(display_status)
+        widgets = [
+            ctk.CTkLabel(self.student_list_frame, text=str(enrollment['call_number'])),
+            ctk.CTkLabel(self.student_list_frame, text=self._student_name(enrollment)),
+            ctk.CTkLabel(self.student_list_frame, text=birth_date_str),
+            ctk.CTkLabel(self.student_list_frame, text=display_status),
+            status_menu,
+        ]
+        for column, widget in enumerate(widgets):
+            widget.grid(row=row, column=column, padx=10, pady=5, sticky="w")
+        return widgets
+
+    # Atualiza, insere ou remove só as linhas das matrículas alteradas (lista de alunos, quadro de notas e relatórios).
+    def _update_enrollment_rows(self, enrollment_ids):
+        previous = self._enrollments_by_id
+        enrollments = data_service.get_enrollments_for_class(self.class_id)
+        self._enrollments_by_id = {e['id']: e for e in enrollments}
+
+        # Lista de alunos: a linha de cada matrícula alterada é recriada, ou removida se saiu da turma ou do filtro.
+        for enrollment_id in enrollment_ids:
+            for widget in self._student_rows.pop(enrollment_id, ()):
+                widget.destroy()
+            enrollment = self._enrollments_by_id.get(enrollment_id)
+            if enrollment and self._is_listed(enrollment, self.show_active_only_checkbox):
+                self._student_rows[enrollment_id] = self._create_student_row(enrollment, len(self._student_rows) + 1)
+        self._layout_rows(self._student_rows, [e['id'] for e in enrollments])
+
+        # Quadro de notas: as linhas que continuam são mantidas (com as notas ainda não salvas) e só o nome muda.
+        if self._grid_assessments is not None:
+            new_enrollments = []
+            for enrollment_id in enrollment_ids:
+                enrollment = self._enrollments_by_id.get(enrollment_id)
+                known = enrollment or previous.get(enrollment_id)
+                if known is None:
+                    continue
+                student_id = known['student_id']
+                listed = enrollment is not None and self._is_listed(enrollment, self.show_active_only_grades_checkbox)
+                if student_id in self._grade_rows and listed:
+                    self._grade_rows[student_id][0].configure(text=self._student_name(enrollment))
+                elif student_id in self._grade_rows:
+                    self._remove_grade_row(student_id)
+                elif listed:
+                    new_enrollments.append(enrollment)
+            if new_enrollments:
+                grades = self._grades_by_key()
+                averages = data_service.get_subject_averages(self.current_subject_id)
+                for enrollment in new_enrollments:
+                    self._create_grade_row(enrollment, len(self._grade_rows) + 1, grades, averages)
+            self._layout_rows(self._grade_rows, [e['student_id'] for e in enrollments])
+
+        self.populate_report_student_combo(enrollments)
+
+    # Reposiciona as linhas de uma tabela na ordem informada, sem recriá-las (a linha 0 é o cabeçalho).
+    @staticmethod
+    def _layout_rows(rows: dict, order):
+        for row, key in enumerate((key for key in order if key in rows), start=1):
+            for widget in rows[key]:
+                widget.grid_configure(row=row)
+
+    # Indica se a matrícula aparece na lista, conforme o checkbox "apenas ativos" da lista.
+    @staticmethod
+    def _is_listed(enrollment, active_only_checkbox) -> bool:
+        return not active_only_checkbox.get() or enrollment['status'] == 'Active'
+
+    # Retorna o nome completo do aluno de uma matrícula.
+    @staticmethod
+    def _student_name(enrollment) -> str:
+        return f"{enrollment['student_first_name']} {enrollment['student_last_name']}"
 
     # Atualiza o status de uma matrícula.
     def update_status(self, enrollment_id, status):
         db_status = self.status_map.get(status, status)
         data_service.update_enrollment_status(enrollment_id, db_status)
-        self.populate_student_list()
 
-    def populate_report_student_combo(self):
-        """Atualiza o combobox de alunos na aba de relatórios."""
+    def populate_report_student_combo(self, enrollments=None):
+        """Atualiza o combobox de alunos na aba de relatórios (com as matrículas já lidas, se informadas)."""
         if not self.class_id: return
 
-        enrollments = data_service.get_enrollments_for_class(self.class_id)
+        if enrollments is None:
+            enrollments = data_service.get_enrollments_for_class(self.class_id)
         student_names = [f"{e['student_first_name']} {e['student_last_name']}" for e in enrollments]
 
         self.report_student_combo.configure(values=student_names)
@@ -771,10 +910,8 @@ class ClassDetailView(ctk.CTkFrame):
             return
 
         # Desempacota o resultado.
+        # A lista de alunos é atualizada pelos eventos de alteração da importação.
         success_count, errors = result
-        # Atualiza a lista de alunos na tela.
-        self.populate_student_list()
-        self.populate_report_student_combo()
 
         # Mostra um relatório de sucesso ou de erros.
         if errors:
@@ -820,3 +957,53 @@ class ClassDetailView(ctk.CTkFrame):
 
             # Atualiza o combobox de alunos na aba de relatórios
             self.populate_report_student_combo()
+
+    # Recebe um evento de alteração (na thread da UI) e agenda a atualização das partes afetadas.
+    def _on_data_changed(self, change):
+        # Sem turma ou com a tela escondida não há nada a atualizar: 'on_show' recarrega tudo.
+        if not self.class_id or not self.winfo_ismapped():
+            return
+        in_class = change.class_id == self.class_id
+        in_subject = change.class_subject_id is not None and change.class_subject_id == self.current_subject_id
+
+        if change.entity == "class" and self.class_id in change.ids:
+            if change.operation == DELETED:
+                self.class_id = None
+                self.main_app.show_view("class_selection")
+            else:
+                self._schedule_refresh(self._refresh_title)
+        elif change.entity == "class_subject" and in_class:
+            self._schedule_refresh(self.populate_subject_combo)
+        elif change.entity == "enrollment" and in_class:
+            if change.ids:
+                self._schedule_refresh(self._update_enrollment_rows, ids=change.ids)
+            else:
+                # Matrículas em lote sem IDs (ex: importação de CSV): recarrega as listas de alunos.
+                self._schedule_refresh(self.populate_student_list, self.populate_report_student_combo, self.populate_grade_grid)
+        elif change.entity == "student":
+            # Alterações de alunos matriculados atualizam as linhas das suas matrículas.
+            enrollment_ids = [e['id'] for e in self._enrollments_by_id.values() if e['student_id'] in change.ids]
+            if enrollment_ids:
+                self._schedule_refresh(self._update_enrollment_rows, ids=enrollment_ids)
+        elif change.entity == "incident" and in_class:
+            if change.operation == CREATED and change.ids:
+                self._schedule_refresh(self._add_incident_rows, ids=change.ids)
+            else:
+                self._schedule_refresh(self.populate_incident_list)
+        # Avaliações mudam as colunas do quadro de notas, e as aulas são poucas por disciplina: essas listas são recarregadas.
+        elif change.entity == "assessment" and in_subject:
+            self._schedule_refresh(self.populate_assessment_list, self.populate_grade_grid)
+        elif change.entity == "lesson" and in_subject:
+            self._schedule_refresh(self.populate_lesson_list)
+        elif change.entity == "grade" and in_subject:
+            self._schedule_refresh(self._refresh_grade_values)
+
+    # As atualizações agendadas só valem enquanto uma turma estiver exibida.
+    def _can_refresh(self) -> bool:
+        return bool(self.class_id)
+
+    # Atualiza o título com o nome atual da turma.
+    def _refresh_title(self):
+        class_data = data_service.get_class_by_id(self.class_id)
+        if class_data:
+            self.title_label.configure(text=f"Detalhes da Turma: {class_data['name']}")
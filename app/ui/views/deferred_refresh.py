@@ -0,0 +1,50 @@
+# Este módulo define o agendamento das atualizações disparadas pelos eventos de alteração nas views.
+#
+# Vários eventos seguidos (ex: uma importação, ou várias ferramentas do assistente em um turno) geram uma
+# única execução de cada atualização quando a UI fica ociosa. Uma atualização pode receber IDs (ex: as
+# matrículas alteradas): os IDs dos eventos agrupados são acumulados e passados de uma vez.
+
+
+# Define o mixin usado pelas views que assinam o barramento de eventos de alteração.
+class DeferredRefreshMixin:
+    """
+    Agenda as atualizações de uma view para quando a UI ficar ociosa.
+
+    Deve vir antes da classe do widget na lista de bases (ex: ``class View(DeferredRefreshMixin, ctk.CTkFrame)``),
+    pois usa ``after_idle``. As subclasses podem definir:
+
+    - ``_superseded_refreshes``: {nome da atualização: nomes das atualizações que ela torna desnecessárias}
+      (ex: reconstruir o quadro de notas já traz as notas atuais).
+    - ``_can_refresh()``: indica se ainda há o que atualizar quando as atualizações são executadas.
+    """
+    _superseded_refreshes: dict[str, tuple[str, ...]] = {}
+
+    # Agenda as atualizações informadas; com 'ids', cada uma é chamada com os IDs acumulados.
+    def _schedule_refresh(self, *refreshes, ids=None):
+        pending = self.__dict__.setdefault("_pending_refreshes", {})
+        if not pending:
+            self.after_idle(self._run_pending_refreshes)
+        for refresh in refreshes:
+            if ids is None:
+                pending[refresh.__name__] = (refresh, None)
+            else:
+                pending.setdefault(refresh.__name__, (refresh, set()))[1].update(ids)
+
+    # Executa as atualizações agendadas (na thread da UI).
+    def _run_pending_refreshes(self):
+        refreshes, self._pending_refreshes = self._pending_refreshes, {}
+        for name, superseded in self._superseded_refreshes.items():
+            if name in refreshes:
+                for other in superseded:
+                    refreshes.pop(other, None)
+        if not self._can_refresh():
+            return
+        for refresh, ids in refreshes.values():
+            if ids is None:
+                refresh()
+            else:
+                refresh(ids)
+
+    # Indica se as atualizações agendadas ainda devem ser executadas.
+    def _can_refresh(self) -> bool:
+        return True
@@ -6,9 +6,16 @@ from app.ui.views.add_dialog import AddDialog
 # Importa o diálogo de entrada de texto padrão para confirmação de exclusão.
 from customtkinter import CTkInputDialog
 from tkinter import messagebox
+# Importa o barramento de eventos de alteração, usado para atualizar as listas quando os dados mudam.
+from app.data.change_events import change_events
+# Importa o agendamento das atualizações disparadas pelos eventos de alteração.
+from app.ui.views.deferred_refresh import DeferredRefreshMixin
 
 # Define a classe para a tela de Gestão de Dados.
-class ManagementView(ctk.CTkFrame):
+class ManagementView(DeferredRefreshMixin, ctk.CTkFrame):
+    # Recarregar a lista de cursos já traz as alterações das atualizações por linha.
+    _superseded_refreshes = {"_populate_courses": ("_update_course_rows",)}
+
     # Método construtor.
     def __init__(self, parent, main_app):
         super().__init__(parent)
@@ -18,6 +25,20 @@ class ManagementView(ctk.CTkFrame):
         self.current_page = 1
         self.page_size = 20
         self.total_pages = 1
+        # Paginação por cursor: o cursor que carregou a página atual e os cursores das páginas vizinhas.
+        self._page_anchor = {}
+        self._next_cursor = None
+        self._previous_cursor = None
+        # Identificador da última consulta de página solicitada.
+        self._student_page_request = 0
+        # Linhas exibidas, por ID: {id: (frame, dados da linha)}, para redesenhar só as linhas alteradas.
+        self._student_rows = {}
+        self._course_rows = {}
+        # Atualizações agendadas pelos eventos de alteração, executadas uma única vez quando a UI fica ociosa.
+        self._pending_refreshes = {}
+        # Recebe na fila da UI os eventos de alunos, matrículas e disciplinas (inclusive os das escritas do assistente).
+        change_events.subscribe(self._on_data_changed, entities={"student", "enrollment", "course"},
+                                queue=self.main_app.async_queue)
 
         # Configura o layout de grade da view.
         self.grid_rowconfigure(1, weight=1) # A linha 1 (com as abas) se expande.
@@ -114,74 +135,139 @@ class ManagementView(ctk.CTkFrame):
     def _clear_frame(self, frame): [w.destroy() for w in frame.winfo_children()]
 
     def _prev_page(self):
-        if self.current_page > 1:
-            self._load_student_page(self.current_page - 1)
+        if self._previous_cursor is not None:
+            self._load_student_page(self.current_page - 1, before=self._previous_cursor)
 
     def _next_page(self):
-        if self.current_page < self.total_pages:
-            self._load_student_page(self.current_page + 1)
+        if self._next_cursor is not None:
+            self._load_student_page(self.current_page + 1, after=self._next_cursor)
+
+    # Recarrega a página atual a partir do mesmo cursor (ex: depois de editar ou excluir um aluno).
+    def _reload_student_page(self):
+        self._load_student_page(self.current_page, **self._page_anchor)
 
-    # Carrega uma página específica de alunos
-    def _load_student_page(self, page_number):
-        self._clear_frame(self.students_frame)
+    # Carrega uma página de alunos. Sem cursores, carrega a primeira página (ex: uma nova busca).
+    def _load_student_page(self, page_number, after=None, before=None):
         self.current_page = page_number
+        self._page_anchor = {"after": after} if after is not None else {"before": before} if before is not None else {}
 
         search_term = self.search_entry.get().strip()
         active_only = bool(self.show_active_only.get())
 
-        result = self.data_service.get_paginated_students(
-            page=self.current_page,
+        # A consulta roda no pool de threads do banco; a página é desenhada quando o resultado chega na fila da UI.
+        # O contador descarta respostas de buscas antigas que cheguem depois de uma mais recente.
+        self._student_page_request += 1
+        request_id = self._student_page_request
+        self.lbl_page.configure(text="Carregando...")
+        self.main_app.async_data_service.submit_to_queue(
+            self.main_app.async_queue,
+            lambda result: self._render_student_page(request_id, result),
+            "get_students_page",
             page_size=self.page_size,
+            after=after,
+            before=before,
             search_term=search_term if search_term else None,
             active_only=active_only
         )
 
-        # Se a página solicitada estiver vazia e não for a primeira, volta uma página
-        # Isso acontece, por exemplo, ao excluir o último item da última página
-        if not result["students"] and self.current_page > 1 and result["total_count"] > 0:
-             self._load_student_page(self.current_page - 1)
-             return
+    # Desenha a página de alunos recebida do banco de dados (executado na thread da UI).
+    def _render_student_page(self, request_id, result):
+        if request_id != self._student_page_request:
+            return
+        if isinstance(result, Exception):
+            self.lbl_page.configure(text="Erro ao carregar alunos.")
+            messagebox.showerror("Erro", f"Não foi possível carregar a lista de alunos:\n\n{result}")
+            return
 
         students = result["students"]
         total_count = result["total_count"]
-        self.total_pages = result["total_pages"]
-        self.current_page = result["current_page"] # Garante sincronia
+        self.total_pages = max(1, (total_count + self.page_size - 1) // self.page_size)
+        self._next_cursor = result["next_cursor"]
+        self._previous_cursor = result["previous_cursor"]
+        # Mantém o número da página coerente com os cursores: sem página anterior é a primeira; sem
+        # página seguinte é a última (ex: depois de excluir o único aluno da última página, o serviço
+        # devolve a nova última página).
+        if self._previous_cursor is None:
+            self.current_page = 1
+        elif self._next_cursor is None:
+            self.current_page = self.total_pages
 
         # Atualiza controles de paginação
         self.lbl_page.configure(text=f"Página {self.current_page} de {self.total_pages} (Total: {total_count})")
 
-        state_prev = "normal" if self.current_page > 1 else "disabled"
-        state_next = "normal" if self.current_page < self.total_pages else "disabled"
+        state_prev = "normal" if self._previous_cursor is not None else "disabled"
+        state_next = "normal" if self._next_cursor is not None else "disabled"
         self.btn_prev.configure(state=state_prev)
         self.btn_next.configure(state=state_next)
 
-        # Itera sobre os alunos e cria uma linha para cada um.
+        # Só as linhas novas ou alteradas são criadas; as demais são mantidas e reposicionadas.
+        previous, self._student_rows = self._student_rows, {}
         for student in students:
-            f = ctk.CTkFrame(self.students_frame)
-            f.pack(fill="x", pady=2)
-
-            # ID
-            ctk.CTkLabel(f, text=str(student['id']), width=50, anchor="w").pack(side="left", padx=10)
-
-            # Nome
-            name_text = f"{student['first_name']} {student['last_name']}"
-            ctk.CTkLabel(f, text=name_text, anchor="w").pack(side="left", padx=10, fill="x", expand=True)
-
-            # Botões
-            btn_frame = ctk.CTkFrame(f, fg_color="transparent")
-            btn_frame.pack(side="right", padx=5)
-
-            ctk.CTkButton(btn_frame, text="Excluir", fg_color="red", width=60, command=lambda s_id=student['id']: self.delete_student(s_id)).pack(side="right", padx=5)
-            ctk.CTkButton(btn_frame, text="Editar", width=60, command=lambda s=student: self.edit_student(s)).pack(side="right", padx=5)
+            kept = previous.pop(student['id'], None)
+            if kept is not None and kept[1] == student:
+                self._student_rows[student['id']] = kept
+                continue
+            if kept is not None:
+                kept[0].destroy()
+            self._student_rows[student['id']] = (self._create_student_row(student), student)
+        for frame, _ in previous.values():
+            frame.destroy()
+        self._repack([frame for frame, _ in self._student_rows.values()], pady=2)
+
+    # Cria (sem posicionar) a linha de um aluno na lista.
+    def _create_student_row(self, student):
+        f = ctk.CTkFrame(self.students_frame)
+
+        # ID
+        ctk.CTkLabel(f, text=str(student['id']), width=50, anchor="w").pack(side="left", padx=10)
+
+        # Nome
+        name_text = f"{student['first_name']} {student['last_name']}"
+        ctk.CTkLabel(f, text=name_text, anchor="w").pack(side="left", padx=10, fill="x", expand=True)
+
+        # Botões
+        btn_frame = ctk.CTkFrame(f, fg_color="transparent")
+        btn_frame.pack(side="right", padx=5)
+
+        ctk.CTkButton(btn_frame, text="Excluir", fg_color="red", width=60, command=lambda s_id=student['id']: self.delete_student(s_id)).pack(side="right", padx=5)
+        ctk.CTkButton(btn_frame, text="Editar", width=60, command=lambda s=student: self.edit_student(s)).pack(side="right", padx=5)
+        return f
+
+    # Reposiciona as linhas de uma lista na ordem informada, sem recriá-las.
+    @staticmethod
+    def _repack(frames, pady):
+        for frame in frames:
+            frame.pack_forget()
+        for frame in frames:
+            frame.pack(fill="x", pady=pady)
 
     # Preenche a lista de cursos na aba "Disciplinas".
     def _populate_courses(self):
         self._clear_frame(self.courses_frame)
+        self._course_rows = {}
         for course in self.data_service.get_all_courses():
-            f = ctk.CTkFrame(self.courses_frame); f.pack(fill="x", pady=5)
-            ctk.CTkLabel(f, text=f"ID: {course['id']} | {course['course_name']} ({course['course_code']})").pack(side="left", padx=10)
-            ctk.CTkButton(f, text="Excluir", fg_color="red", command=lambda c_id=course['id']: self.delete_course(c_id)).pack(side="right", padx=5)
-            ctk.CTkButton(f, text="Editar", command=lambda c=course: self.edit_course(c)).pack(side="right", padx=5)
+            self._course_rows[course['id']] = (self._create_course_row(course), course)
+        self._repack([frame for frame, _ in self._course_rows.values()], pady=5)
+
+    # Cria (sem posicionar) a linha de um curso na lista.
+    def _create_course_row(self, course):
+        f = ctk.CTkFrame(self.courses_frame)
+        ctk.CTkLabel(f, text=f"ID: {course['id']} | {course['course_name']} ({course['course_code']})").pack(side="left", padx=10)
+        ctk.CTkButton(f, text="Excluir", fg_color="red", command=lambda c_id=course['id']: self.delete_course(c_id)).pack(side="right", padx=5)
+        ctk.CTkButton(f, text="Editar", command=lambda c=course: self.edit_course(c)).pack(side="right", padx=5)
+        return f
+
+    # Recria só as linhas dos cursos alterados (inserindo os novos e removendo os excluídos), na ordem por nome.
+    def _update_course_rows(self, course_ids):
+        courses = self.data_service.get_all_courses()
+        for course_id in course_ids:
+            row = self._course_rows.pop(course_id, None)
+            if row is not None:
+                row[0].destroy()
+        for course in courses:
+            if course['id'] in course_ids:
+                self._course_rows[course['id']] = (self._create_course_row(course), course)
+        self._repack([self._course_rows[c['id']][0] for c in courses if c['id'] in self._course_rows], pady=5)
 
     # Preenche a lista de notas na aba "Notas". (Código Legado - Comentado)
     # def _populate_grades(self):
@@ -212,8 +298,8 @@ class ManagementView(ctk.CTkFrame):
     def delete_student(self, sid):
         if self._confirm_delete():
             try:
+                # A página atual é recarregada pelo evento de alteração.
                 self.data_service.delete_student(sid)
-                self._load_student_page(self.current_page) # Recarrega a página atual
             except Exception as e:
                 messagebox.showerror("Erro", f"Erro ao excluir aluno: {e}")
 
@@ -221,7 +307,6 @@ class ManagementView(ctk.CTkFrame):
         if self._confirm_delete():
             try:
                 self.data_service.delete_course(cid)
-                self.populate_data()
             except Exception as e:
                 messagebox.showerror("Erro", f"Erro ao excluir disciplina: {e}")
 
@@ -238,23 +323,36 @@ class ManagementView(ctk.CTkFrame):
         # Define o callback que será executado ao salvar no diálogo.
         def cb(id, data):
             self.data_service.update_student(id, data['first_name'], data['last_name'])
-            self._load_student_page(self.current_page)
         initial_data = { "id": s['id'], "first_name": s['first_name'], "last_name": s['last_name'] }
         EditDialog(self, "Editar Aluno", {"first_name":"Nome", "last_name":"Sobrenome"}, initial_data, cb)
 
     # Abre o diálogo de edição para um curso.
     def edit_course(self, c):
-        def cb(id, data): self.data_service.update_course(id, data['course_name'], data['course_code']); self.populate_data()
+        def cb(id, data): self.data_service.update_course(id, data['course_name'], data['course_code'])
         EditDialog(self, "Editar Disciplina", {"course_name":"Nome", "course_code":"Código"}, c, cb)
 
     # Abre o diálogo de adição para um novo aluno.
     def add_student_popup(self):
         def cb(data):
             self.data_service.add_student(data['first_name'], data['last_name'])
-            self._load_student_page(self.current_page)
         AddDialog(self, "Adicionar Aluno", {"first_name":"Nome", "last_name":"Sobrenome"}, save_callback=cb)
 
     # Abre o diálogo de adição para um novo curso.
     def add_course_popup(self):
-        def cb(data): self.data_service.add_course(data['course_name'], data['course_code']); self.populate_data()
+        def cb(data): self.data_service.add_course(data['course_name'], data['course_code'])
         AddDialog(self, "Adicionar Disciplina", {"course_name":"Nome", "course_code":"Código"}, save_callback=cb)
+
+    # Recebe um evento de alteração (na thread da UI) e agenda a atualização da lista afetada.
+    def _on_data_changed(self, change):
+        # Com a tela escondida não há nada a atualizar: 'on_show' recarrega tudo.
+        if not self.winfo_ismapped():
+            return
+        if change.entity == "course":
+            if change.ids:
+                self._schedule_refresh(self._update_course_rows, ids=change.ids)
+            else:
+                self._schedule_refresh(self._populate_courses)
+        # As matrículas só mudam a lista de alunos quando o filtro de alunos ativos está marcado. Como a página
+        # é delimitada pela ordem dos nomes, ela é lida de novo, mas só as linhas alteradas são redesenhadas.
+        elif change.entity == "student" or self.show_active_only.get():
+            self._schedule_refresh(self._reload_student_page)
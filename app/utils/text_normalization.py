@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+"""
+Este módulo fornece a normalização de textos usada nas buscas por nome,
+de forma que variações de acentuação, maiúsculas e espaços não impeçam uma correspondência.
+"""
+
+import unicodedata
+
+
+def normalize_name(name: str | None) -> str:
+    """
+    Normaliza um nome para uso como chave de busca.
+
+    Remove acentos (ex: "Ã" -> "A"), converte para minúsculas e reduz
+    sequências de espaços a um único espaço.
+
+    Exemplo:
+        normalize_name("  JOÃO   da Silva ") -> "joao da silva"
+
+    Args:
+        name (str | None): O nome a ser normalizado.
+
+    Returns:
+        str: O nome normalizado. Retorna uma string vazia se o nome for vazio ou None.
+    """
+    if not name:
+        return ""
+
+    # A decomposição NFKD separa as letras dos seus acentos (marcas combinantes), que são então descartadas.
+    decomposed = unicodedata.normalize("NFKD", name)
+    without_accents = "".join(char for char in decomposed if not unicodedata.combining(char))
+
+    # 'casefold' é uma versão mais agressiva de 'lower' (ex: "ß" -> "ss").
+    return " ".join(without_accents.casefold().split())
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark dos métodos de listagem do DataService em uma turma grande.
+
+Compara, para cada listagem:
+
+- Hidratação do ORM: a consulta anterior, que montava um objeto do modelo (e os relacionamentos
+  carregados com 'joinedload') por linha só para copiar alguns atributos em um dicionário.
+- Projeção de colunas: o método atual do DataService, que seleciona apenas as colunas usadas.
+
+Mede o tempo médio por chamada e o pico de memória alocada (tracemalloc) em uma chamada.
+
+Uso (a partir da raiz do repositório):
+
+    python -m benchmarks.list_queries --students 3000 --assessments 8 --runs 5
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload, sessionmaker
+
+from app.data.database import create_app_engine, session_scope
+from app.models.base import Base
+import app.models  # noqa: F401  (registra todos os modelos nos metadados)
+from app.models.assessment import Assessment
+from app.models.class_ import Class
+from app.models.class_enrollment import ClassEnrollment
+from app.models.class_subject import ClassSubject
+from app.models.grade import Grade
+from app.models.incident import Incident
+from app.models.student import Student
+from app.services.data_service import DataService
+
+
+# Consultas anteriores, com hidratação de objetos do ORM.
+def legacy_enrollments(db, class_id):
+    enrollments = (db.query(ClassEnrollment).options(joinedload(ClassEnrollment.student))
+                   .filter(ClassEnrollment.class_id == class_id).order_by(ClassEnrollment.call_number).all())
+    return [
+        {
+            "id": e.id, "call_number": e.call_number, "status": e.status, "student_id": e.student.id,
+            "student_first_name": e.student.first_name, "student_last_name": e.student.last_name,
+            "student_birth_date": e.student.birth_date.isoformat() if e.student.birth_date else None
+        } for e in enrollments
+    ]
+
+
+def legacy_grades(db, class_subject_id):
+    grades = (db.query(Grade).options(joinedload(Grade.assessment))
+              .join(Assessment, Grade.assessment_id == Assessment.id)
+              .join(ClassSubject, Assessment.class_subject_id == ClassSubject.id)
+              .join(ClassEnrollment, (Grade.student_id == ClassEnrollment.student_id) & (ClassSubject.class_id == ClassEnrollment.class_id))
+              .filter(Assessment.class_subject_id == class_subject_id)
+              .filter(ClassEnrollment.status == 'Active').all())
+    return [
+        {"id": g.id, "student_id": g.student_id, "assessment_id": g.assessment_id, "score": g.score, "assessment_name": g.assessment.name}
+        for g in grades
+    ]
+
+
+def legacy_incidents(db, class_id):
+    incidents = (db.query(Incident).options(joinedload(Incident.student))
+                 .filter(Incident.class_id == class_id).order_by(Incident.date.desc()).all())
+    return [
+        {
+            "id": i.id, "description": i.description, "date": i.date.isoformat(),
+            "student_id": i.student.id, "student_first_name": i.student.first_name, "student_last_name": i.student.last_name
+        } for i in incidents
+    ]
+
+
+def legacy_classes(db):
+    classes = db.query(Class).options(joinedload(Class.enrollments)).order_by(Class.name).all()
+    return [{"id": c.id, "name": c.name, "student_count": len(c.enrollments)} for c in classes]
+
+
+# Cria uma turma com 'num_students' alunos, 'num_assessments' avaliações com nota e um incidente por aluno.
+def populate(factory, num_students: int, num_assessments: int) -> dict:
+    with session_scope(factory) as db:
+        service = DataService(db)
+        course = service.add_course("Matemática", "MAT")
+        class_ = service.create_class("Benchmark")
+        subject = service.add_subject_to_class(class_['id'], course['id'])
+        db.execute(insert(Student), [
+            {"id": i, "first_name": "Aluno", "last_name": f"{i:05d}", "search_name": f"aluno {i:05d}",
+             "birth_date": date(2010, 1, 1), "enrollment_date": date(2024, 1, 1)}
+            for i in range(1, num_students + 1)
+        ])
+        db.execute(insert(ClassEnrollment), [
+            {"class_id": class_['id'], "student_id": i, "call_number": i, "status": "Active"}
+            for i in range(1, num_students + 1)
+        ])
+        assessment_ids = [service.add_assessment(subject['id'], f"Prova {a}", 1.0)['id'] for a in range(num_assessments)]
+        db.execute(insert(Grade), [
+            {"student_id": i, "assessment_id": a, "score": 7.0, "date_recorded": date(2024, 3, 1)}
+            for a in assessment_ids for i in range(1, num_students + 1)
+        ])
+        db.execute(insert(Incident), [
+            {"class_id": class_['id'], "student_id": i, "description": "Atraso", "date": date(2024, 3, 1)}
+            for i in range(1, num_students + 1)
+        ])
+    return {"class_id": class_['id'], "class_subject_id": subject['id']}
+
+
+# Mede o tempo médio (ms) e o pico de memória (KiB) de uma listagem, cada chamada em uma sessão nova.
+def measure(factory, call, runs: int) -> tuple[float, float]:
+    timings = []
+    for _ in range(runs):
+        with session_scope(factory) as db:
+            start = time.perf_counter()
+            call(db)
+            timings.append((time.perf_counter() - start) * 1000)
+    with session_scope(factory) as db:
+        tracemalloc.start()
+        call(db)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return statistics.mean(timings), peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara as listagens com hidratação do ORM e com projeção de colunas.")
+    parser.add_argument("--students", type=int, default=3000, help="Número de alunos na turma.")
+    parser.add_argument("--assessments", type=int, default=8, help="Número de avaliações (com nota para todos os alunos).")
+    parser.add_argument("--runs", type=int, default=5, help="Número de repetições de cada listagem.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_app_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        ids = populate(factory, args.students, args.assessments)
+
+        cases = [
+            ("get_enrollments_for_class",
+             lambda db: legacy_enrollments(db, ids["class_id"]),
+             lambda db: DataService(db).get_enrollments_for_class(ids["class_id"])),
+            ("get_grades_for_subject",
+             lambda db: legacy_grades(db, ids["class_subject_id"]),
+             lambda db: DataService(db).get_grades_for_subject(ids["class_subject_id"])),
+            ("get_incidents_for_class",
+             lambda db: legacy_incidents(db, ids["class_id"]),
+             lambda db: DataService(db).get_incidents_for_class(ids["class_id"])),
+            ("get_all_classes",
+             legacy_classes,
+             lambda db: DataService(db).get_all_classes()),
+        ]
+
+        print(f"{'Listagem':<28} {'ORM (ms)':>10} {'Colunas (ms)':>13} {'ORM (KiB)':>11} {'Colunas (KiB)':>14}")
+        for name, legacy, current in cases:
+            legacy_ms, legacy_kib = measure(factory, legacy, args.runs)
+            current_ms, current_kib = measure(factory, current, args.runs)
+            print(f"{name:<28} {legacy_ms:>10.1f} {current_ms:>13.1f} {legacy_kib:>11.0f} {current_kib:>14.0f}")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark da resolução de nomes das ferramentas do assistente em uma escola grande.
+
+Compara, para os mesmos nomes de alunos:
+
+- Busca exata no banco: ``DataService.get_student_by_name``, uma consulta por chamada, que falha com
+  qualquer erro de digitação.
+- Resolvedor em memória: ``NameResolver.resolve``, com os índices de trigramas já montados.
+
+Os nomes procurados são de três tipos: exatos, com acentos e maiúsculas trocados e com um erro de digitação.
+Mede o tempo médio por chamada, a taxa de acerto e o tempo de montagem do índice.
+
+Uso (a partir da raiz do repositório):
+
+    python -m benchmarks.name_resolver --students 10000 --lookups 2000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.data.database import create_app_engine, session_scope
+from app.models.base import Base
+import app.models  # noqa: F401  (registra todos os modelos nos metadados)
+from app.models.student import Student
+from app.services.data_service import DataService
+from app.services.name_resolver import NameResolver
+from app.utils.text_normalization import normalize_name
+
+FIRST_NAMES = ["Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Heitor", "Isabela", "João",
+               "Júlia", "Lucas", "Maria", "Mateus", "Natália", "Otávio", "Paula", "Rafael", "Sofia", "Tiago",
+               "Alice", "Beatriz", "Caio", "Davi", "Elisa", "Fábio", "Giovana", "Hugo", "Igor", "Larissa",
+               "Lorena", "Marcelo", "Nicolas", "Olívia", "Pedro", "Renata", "Samuel", "Thaís", "Vitor", "Yasmin"]
+LAST_NAMES = ["Almeida", "Barbosa", "Cardoso", "Conceição", "Dias", "Esteves", "Fernandes", "Gonçalves", "Lima",
+              "Magalhães", "Nogueira", "Oliveira", "Pereira", "Ribeiro", "Santos", "Souza", "Teixeira", "Vieira"]
+
+
+# Gera nomes completos distintos, combinando primeiros nomes e dois sobrenomes.
+def student_names(count: int) -> list[tuple[str, str]]:
+    names = [(first, f"{middle} {last}") for first in FIRST_NAMES for middle in LAST_NAMES for last in LAST_NAMES
+             if middle != last]
+    random.Random(1).shuffle(names)
+    if count > len(names):
+        raise SystemExit(f"No máximo {len(names)} alunos.")
+    return names[:count]
+
+
+# Troca uma letra do meio do nome (um erro de digitação).
+def with_typo(name: str, rng: random.Random) -> str:
+    position = rng.randrange(1, len(name) - 1)
+    return name[:position] + rng.choice("aeiou") + name[position + 1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a busca exata de alunos com o resolvedor de nomes em memória.")
+    parser.add_argument("--students", type=int, default=10000, help="Número de alunos cadastrados.")
+    parser.add_argument("--lookups", type=int, default=2000, help="Número de nomes procurados de cada tipo.")
+    args = parser.parse_args()
+
+    rng = random.Random(2)
+    names = student_names(args.students)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_app_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        with session_scope(factory) as db:
+            db.execute(insert(Student), [
+                {"first_name": first, "last_name": last, "search_name": normalize_name(f"{first} {last}"),
+                 "enrollment_date": date(2024, 1, 1)}
+                for first, last in names
+            ])
+
+        sample = [f"{first} {last}" for first, last in rng.sample(names, args.lookups)]
+        queries = {
+            "Exatos": sample,
+            "Sem acentos/maiúsculas": [normalize_name(name).upper() for name in sample],
+            "Com erro de digitação": [with_typo(name, rng) for name in sample],
+        }
+
+        with session_scope(factory) as db:
+            service = DataService(db)
+            resolver = NameResolver(service)
+            start = time.perf_counter()
+            resolver.resolve("student", sample[0])
+            print(f"Montagem do índice de {args.students} alunos: {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+            print(f"{'Nomes':<24} {'Busca exata (µs)':>17} {'Acertos':>8} {'Resolvedor (µs)':>16} {'Acertos':>8}")
+            for label, lookups in queries.items():
+                start = time.perf_counter()
+                exact_hits = sum(1 for name in lookups if service.get_student_by_name(name))
+                exact_time = (time.perf_counter() - start) / len(lookups) * 1e6
+
+                start = time.perf_counter()
+                resolved = [resolver.resolve("student", name).match for name in lookups]
+                resolver_time = (time.perf_counter() - start) / len(lookups) * 1e6
+                resolver_hits = sum(1 for match, expected in zip(resolved, sample) if match and match.name == expected)
+
+                print(f"{label:<24} {exact_time:>17.0f} {exact_hits / len(lookups):>8.0%} "
+                      f"{resolver_time:>16.0f} {resolver_hits / len(lookups):>8.0%}")
+            resolver.close()
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark da memória ocupada pelos resultados de notas do DataService em uma base grande
+(por padrão, 1 milhão de notas: 10 000 alunos × 100 avaliações).
+
+Compara, para as mesmas notas (``query_grades`` sem filtros):
+
+- Dicionários: o formato padrão, um dicionário com as chaves repetidas por nota.
+- Registros: ``compact=True``, um objeto com '__slots__' por nota, compatível com dicionários.
+- Lote colunar: ``query_grade_batch``, IDs e notas em 'array' e nomes guardados uma vez por entidade.
+
+Mede a memória retida pelo resultado, o pico de memória durante a consulta (tracemalloc) e o tempo.
+
+Uso (a partir da raiz do repositório):
+
+    python -m benchmarks.result_memory --students 10000 --assessments 100
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy.orm import sessionmaker
+
+from app.data.database import create_app_engine, session_scope
+from app.models.base import Base
+import app.models  # noqa: F401  (registra todos os modelos nos metadados)
+from app.services.data_service import DataService
+from benchmarks.list_queries import populate
+
+
+# Executa a consulta e retorna (memória retida em MiB, pico em MiB, tempo em s, número de notas).
+def measure(factory, call) -> tuple[float, float, float, int]:
+    gc.collect()
+    with session_scope(factory) as db:
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = call(DataService(db))
+        elapsed = time.perf_counter() - start
+        db.expunge_all()
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return retained / 2 ** 20, peak / 2 ** 20, elapsed, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a memória dos resultados de notas em dicionários, registros e colunas.")
+    parser.add_argument("--students", type=int, default=10000, help="Número de alunos na turma.")
+    parser.add_argument("--assessments", type=int, default=100, help="Número de avaliações (com nota para todos os alunos).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_app_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        populate(factory, args.students, args.assessments)
+
+        cases = [
+            ("Dicionários", lambda service: service.query_grades()),
+            ("Registros (compact)", lambda service: service.query_grades(compact=True)),
+            ("Lote colunar", lambda service: service.query_grade_batch()),
+        ]
+        print(f"{'Formato':<22} {'Notas':>9} {'Retida (MiB)':>13} {'Pico (MiB)':>11} {'Tempo (s)':>10}")
+        baseline = None
+        for name, call in cases:
+            retained, peak, elapsed, count = measure(factory, call)
+            baseline = baseline or retained
+            saved = f"  ({(1 - retained / baseline) * 100:.0f}% menos)" if retained < baseline else ""
+            print(f"{name:<22} {count:>9} {retained:>13.1f} {peak:>11.1f} {elapsed:>10.2f}{saved}")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
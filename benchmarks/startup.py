@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark da inicialização do banco de dados (main.initialize_database).
+
+Compara, em um banco já criado e atualizado:
+
+- Verificação anterior: 'inspect(engine).get_table_names()' seguido de 'Base.metadata.create_all',
+  que consulta o catálogo de cada tabela a cada inicialização.
+- Verificação por versão: 'ensure_schema', que lê apenas 'PRAGMA user_version'.
+
+Cada repetição cria uma engine nova, como acontece ao abrir a aplicação.
+
+Uso (a partir da raiz do repositório):
+
+    python -m benchmarks.startup --runs 50
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import inspect
+
+from app.data.database import create_app_engine
+from app.data.migrations import ensure_schema
+from app.models.base import Base
+import app.models  # noqa: F401  (registra todos os modelos nos metadados)
+
+
+# Verificação feita pela inicialização antes do versionamento do esquema.
+def legacy_initialize(engine):
+    inspect(engine).get_table_names()
+    Base.metadata.create_all(bind=engine)
+
+
+# Mede o tempo (em ms) de cada inicialização usando uma engine nova por repetição.
+def measure(url: str, initialize, runs: int) -> list[float]:
+    timings = []
+    for _ in range(runs):
+        engine = create_app_engine(url)
+        start = time.perf_counter()
+        initialize(engine)
+        timings.append((time.perf_counter() - start) * 1000)
+        engine.dispose()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o tempo de inicialização do banco de dados.")
+    parser.add_argument("--runs", type=int, default=50, help="Número de inicializações medidas.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        url = f"sqlite:///{os.path.join(tmp_dir, 'startup.db')}"
+        # Cria o banco e o deixa na versão atual do esquema.
+        engine = create_app_engine(url)
+        ensure_schema(engine)
+        engine.dispose()
+
+        print(f"{'Verificação':<22} {'Mediana (ms)':>14} {'Máximo (ms)':>13}")
+        for label, initialize in (("inspect + create_all", legacy_initialize), ("user_version", ensure_schema)):
+            timings = measure(url, initialize, args.runs)
+            print(f"{label:<22} {statistics.median(timings):>14.2f} {max(timings):>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark dos perfis de armazenamento do SQLite (app.data.database.STORAGE_PROFILES).
+
+Para cada perfil, cria um banco de dados temporário em disco e mede:
+
+- Salvamento de notas: uma nota por transação, como acontece quando o professor
+  salva notas individualmente pela interface ou pelo assistente.
+- Importação de CSV: importação completa de uma turma via DataService.import_students_from_csv.
+
+Uso (a partir da raiz do repositório):
+
+    python -m benchmarks.storage_profiles --grades 500 --students 500 --imports 5
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date
+
+from sqlalchemy.orm import sessionmaker
+
+from app.data.database import STORAGE_PROFILES, create_app_engine, session_scope
+from app.models.base import Base
+import app.models  # noqa: F401  (registra todos os modelos nos metadados)
+from app.services.data_service import DataService
+
+
+# Gera o conteúdo de um CSV de alunos no formato aceito pelo parser da aplicação.
+def build_student_csv(num_students: int, prefix: str) -> str:
+    lines = ["Nº de chamada;Nome do Aluno;Data de Nascimento;Situação do Aluno"]
+    for i in range(1, num_students + 1):
+        lines.append(f"{i};ALUNO {prefix} NUMERO {i:05d};01/02/2010;Ativo")
+    return "\n".join(lines) + "\n"
+
+
+# Executa o benchmark de um único perfil e retorna as métricas medidas.
+def run_profile(profile_name: str, num_grades: int, num_students: int, num_imports: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench.db")
+        engine = create_app_engine(f"sqlite:///{db_path}", profile_name)
+        Base.metadata.create_all(engine)
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        # Prepara uma turma, uma disciplina e uma avaliação por aluno de teste.
+        with session_scope(factory) as db:
+            service = DataService(db)
+            course = service.add_course("Matemática", "MAT")
+            class_ = service.create_class("Benchmark")
+            subject = service.add_subject_to_class(class_['id'], course['id'])
+            students = [service.add_student("Aluno", f"Nota {i}", birth_date=date(2010, 1, 1)) for i in range(num_grades)]
+            assessment = service.add_assessment(subject['id'], "Prova", 1.0)
+
+        # Salvamento de notas: um commit (e os fsyncs correspondentes) por nota.
+        start = time.perf_counter()
+        for student in students:
+            with session_scope(factory) as db:
+                DataService(db).add_grade(student['id'], assessment['id'], 7.5)
+        grade_seconds = time.perf_counter() - start
+
+        # Importação de CSV: cada importação cria uma turma nova com alunos novos.
+        start = time.perf_counter()
+        for i in range(num_imports):
+            with session_scope(factory) as db:
+                class_id = DataService(db).create_class(f"Importação {i}")['id']
+            with session_scope(factory) as db:
+                result = DataService(db).import_students_from_csv(class_id, build_student_csv(num_students, f"T{i}"))
+                if result["errors"]:
+                    raise RuntimeError(result["errors"])
+        import_seconds = time.perf_counter() - start
+
+        engine.dispose()
+
+    return {
+        "profile": profile_name,
+        "grades_per_second": num_grades / grade_seconds if grade_seconds else float("inf"),
+        "students_per_second": (num_students * num_imports) / import_seconds if import_seconds else float("inf"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara os perfis de armazenamento do SQLite.")
+    parser.add_argument("--grades", type=int, default=500, help="Número de notas salvas uma a uma.")
+    parser.add_argument("--students", type=int, default=500, help="Número de alunos por arquivo CSV.")
+    parser.add_argument("--imports", type=int, default=5, help="Número de importações de CSV.")
+    args = parser.parse_args()
+
+    print(f"{'Perfil':<14} {'Notas/s':>12} {'Alunos importados/s':>22}")
+    for profile_name in STORAGE_PROFILES:
+        metrics = run_profile(profile_name, args.grades, args.students, args.imports)
+        print(f"{metrics['profile']:<14} {metrics['grades_per_second']:>12.1f} {metrics['students_per_second']:>22.1f}")
+
+
+if __name__ == "__main__":
+    main()
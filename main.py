@@ -1,11 +1,15 @@
 import logging
-from sqlalchemy import inspect
+import time
 from app.ui.main_app import MainApp
-from app.data.database import engine, Base
+from app.data.database import engine
+from app.core.config import get_backup_settings
+from app.data.migrations import ensure_schema, SCHEMA_VERSION
 # Importa o DataService singleton (instância compartilhada) para garantir consistência com as ferramentas da IA
-from app.services import data_service
+from app.services import data_service, async_data_service
 # Importa o AssistantService
 from app.services.assistant_service import AssistantService
+# Importa o serviço de cópias de segurança do banco de dados
+from app.services.backup_service import BackupService
 
 # Configuração básica de logging
 logging.basicConfig(
@@ -19,36 +23,47 @@ logging.basicConfig(
 
 def initialize_database():
     """
-    Verifica e inicializa o banco de dados de forma robusta.
-    Usa 'inspect' para verificar tabelas em vez de apenas a existência do arquivo.
-    Isso previne erros quando o arquivo existe mas está vazio ou corrompido.
+    Verifica e inicializa o banco de dados.
+    A versão do esquema gravada no banco ('PRAGMA user_version') indica se há algo a fazer:
+    se estiver atualizada, a inicialização consiste em uma única leitura;
+    caso contrário, as tabelas que faltam são criadas e as migrações pendentes são aplicadas.
     """
     try:
-        inspector = inspect(engine)
-        # Obtém as tabelas existentes no banco
-        existing_tables = inspector.get_table_names()
+        start = time.perf_counter()
+        previous_version = ensure_schema(engine)
+        elapsed_ms = (time.perf_counter() - start) * 1000
 
-        if not existing_tables:
-            logging.info("Banco de dados vazio ou inexistente. Criando nova estrutura de tabelas...")
-            Base.metadata.create_all(bind=engine)
-            logging.info("Banco de dados inicializado com sucesso.")
+        if previous_version == SCHEMA_VERSION:
+            logging.info(f"Esquema do banco de dados atualizado (versão {SCHEMA_VERSION}), verificado em {elapsed_ms:.1f} ms.")
         else:
-            logging.info(f"Banco de dados encontrado com as seguintes tabelas: {', '.join(existing_tables)}")
-            # Executa create_all mesmo assim para garantir que qualquer nova tabela definida no código seja criada.
-            # O create_all do SQLAlchemy é inteligente e ignora tabelas que já existem.
-            Base.metadata.create_all(bind=engine)
+            logging.info(f"Esquema do banco de dados atualizado da versão {previous_version} para {SCHEMA_VERSION} em {elapsed_ms:.1f} ms.")
 
     except Exception as e:
         logging.critical(f"Falha crítica na inicialização do banco de dados: {e}")
         # Relança a exceção para ser capturada no bloco principal e encerrar o programa
         raise
 
+def start_backups() -> BackupService | None:
+    """
+    Inicia as cópias de segurança periódicas do banco de dados, conforme as configurações.
+    As cópias são feitas em segundo plano, com a API de backup online do SQLite.
+    """
+    settings = get_backup_settings()
+    if not settings["enabled"]:
+        logging.info("Cópias de segurança automáticas desativadas.")
+        return None
+    backup_service = BackupService(engine.url.database, keep=settings["keep"])
+    backup_service.start(interval_seconds=settings["interval_hours"] * 3600)
+    return backup_service
+
 def main():
+    backup_service = None
     try:
         logging.info("Iniciando o Profgent...")
 
         # 1. Inicializa a camada de dados
         initialize_database()
+        backup_service = start_backups()
 
         # 2. Inicializa os serviços
         # O data_service já foi importado como singleton.
@@ -57,7 +72,7 @@ def main():
 
         # 3. Inicializa a Interface Gráfica
         logging.info("Inicializando interface gráfica...")
-        app = MainApp(data_service=data_service, assistant_service=assistant_service)
+        app = MainApp(data_service=data_service, assistant_service=assistant_service, async_data_service=async_data_service)
 
         # 4. Inicia o loop principal
         app.mainloop()
@@ -67,6 +82,10 @@ def main():
     except Exception as e:
         logging.critical(f"A aplicação encontrou um erro fatal e não pôde iniciar: {e}", exc_info=True)
         print(f"\nERRO FATAL: A aplicação falhou. Verifique o arquivo 'app.log' para detalhes.\nErro: {e}")
+    finally:
+        # Interrompe as cópias periódicas (uma cópia em andamento termina antes do encerramento).
+        if backup_service:
+            backup_service.stop()
 
 if __name__ == "__main__":
     main()
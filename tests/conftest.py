@@ -1,13 +1,15 @@
 # Importa as bibliotecas necessárias para os testes.
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 from pytest_mock import MockerFixture
 from contextlib import contextmanager
 
 # Importa a Base e os serviços/modelos da aplicação.
 from app.models.base import Base
+from app.data.database import create_app_engine, enable_foreign_keys, session_scope
 from app.services.data_service import DataService
+from app.data.instrumentation import QueryCounter, enforce_query_budgets
 # É crucial importar todos os modelos aqui para garantir que a Base.metadata
 # conheça todas as tabelas antes de `create_all` ser chamado.
 from app.models.student import Student  # noqa: F401
@@ -30,6 +32,8 @@ def db_session() -> Session:
     """
     # Cria uma 'engine' do SQLAlchemy para um banco de dados SQLite que existe apenas na memória RAM.
     engine = create_engine("sqlite:///:memory:")
+    # Ativa as chaves estrangeiras (e o ON DELETE CASCADE) em cada conexão, como na engine da aplicação.
+    event.listen(engine, "connect", lambda dbapi_connection, _: enable_foreign_keys(dbapi_connection))
     # Cria todas as tabelas definidas nos modelos importados neste banco de dados em memória.
     Base.metadata.create_all(engine)
     # Cria uma fábrica de sessões ligada a este banco de dados.
@@ -67,6 +71,38 @@ def data_service(db_session: Session, mocker: MockerFixture) -> DataService:
     service = DataService()
     return service
 
+@pytest.fixture(scope="function")
+def file_data_service(request, tmp_path, mocker: MockerFixture) -> DataService:
+    """
+    Fixture do Pytest que cria um DataService ligado a um banco SQLite em arquivo, com sessões e commits
+    reais (que publicam os eventos de alteração e são vistos por outras conexões).
+
+    O serviço expõe a engine ('engine'), a fábrica de sessões ('session_factory') e as sessões abertas
+    pelo serviço ('opened_sessions'). Argumentos do DataService (ex: 'query_cache') podem ser passados
+    por parametrização indireta:
+
+        @pytest.mark.parametrize("file_data_service", [{"query_cache": QueryCache()}], indirect=True)
+    """
+    engine = create_app_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    opened_sessions = []
+
+    # Substitui `get_db_session` por sessões reais do banco em arquivo, registrando cada sessão aberta.
+    @contextmanager
+    def file_get_db_session():
+        with session_scope(session_factory) as db:
+            opened_sessions.append(db)
+            yield db
+
+    mocker.patch("app.services.data_service.get_db_session", new=file_get_db_session)
+    service = DataService(**getattr(request, "param", {}))
+    service.engine = engine
+    service.session_factory = session_factory
+    service.opened_sessions = opened_sessions
+    yield service
+    engine.dispose()
+
 @pytest.fixture(scope="function")
 def assistant_service(mocker: MockerFixture) -> "AssistantService":
     """
@@ -89,6 +125,25 @@ def assistant_service(mocker: MockerFixture) -> "AssistantService":
 
     return service
 
+# Fixture aplicada automaticamente a todos os testes: métodos do DataService que executarem mais comandos SQL
+# do que o orçamento declarado com @query_budget levantam QueryBudgetExceeded, fazendo o teste falhar.
+# Assim, uma regressão N+1 é detectada por qualquer teste que passe pelo método.
+@pytest.fixture(autouse=True)
+def enforce_budgets():
+    with enforce_query_budgets():
+        yield
+
+@pytest.fixture
+def query_counter():
+    """
+    Fixture que fornece uma fábrica de QueryCounter, para limitar os comandos SQL de um trecho do teste.
+
+    Exemplo:
+        with query_counter(max_statements=2):
+            data_service.get_grades_for_subject(subject_id)
+    """
+    return QueryCounter
+
 # Fixture com escopo de 'session' (executada apenas uma vez por sessão de teste).
 @pytest.fixture(scope="session")
 def anyio_backend():
@@ -0,0 +1,82 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from app.data.archives import attach_archives
+
+
+@pytest.fixture
+def archiving_data_service(file_data_service, tmp_path, mocker):
+    """DataService ligado a um banco em arquivo, com arquivos mortos em um diretório temporário."""
+    mocker.patch("app.data.archives.ARCHIVE_DIR", tmp_path / "archives")
+    return file_data_service
+
+
+def _create_class_with_grades(service, class_name, student):
+    course = service.get_course_by_name("Math") or service.add_course("Math", "MAT")
+    class_ = service.create_class(class_name)
+    subject = service.add_subject_to_class(class_['id'], course['id'])
+    service.add_student_to_class(student['id'], class_['id'], 1)
+    assessment = service.add_assessment(subject['id'], "Prova", 1.0)
+    service.add_grade(student['id'], assessment['id'], 7.5)
+    service.create_lesson(subject['id'], "Frações", "Frações equivalentes", date(2023, 3, 1))
+    return class_
+
+
+def test_archive_moves_classes_out_of_the_main_database(archiving_data_service, tmp_path):
+    service = archiving_data_service
+    student = service.add_student("Ana", "Lima")
+    old_class = _create_class_with_grades(service, "8A 2023", student)
+    _create_class_with_grades(service, "9A 2024", student)
+
+    copied = service.archive_classes([old_class['id']], 2023)
+
+    assert copied["classes"] == 1 and copied["grades"] == 1 and copied["students"] == 1
+    assert service.get_archived_school_years() == [2023]
+    assert [c['name'] for c in service.get_all_classes()] == ["9A 2024"]
+    # As aulas arquivadas também saem do índice de busca textual do banco principal.
+    assert len(service.search("fracoes", kinds=["lesson"])) == 1
+    # O aluno continua no banco principal.
+    assert service.get_student_by_name("Ana Lima") is not None
+
+    with service.engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM grades")).scalar() == 1
+        assert conn.execute(text("SELECT COUNT(*) FROM class_subjects")).scalar() == 1
+    assert (tmp_path / "archives" / "academic_management_2023.db").exists()
+
+
+def test_archives_are_read_only_and_included_on_request(archiving_data_service):
+    service = archiving_data_service
+    student = service.add_student("Ana", "Lima")
+    old_class = _create_class_with_grades(service, "8A 2023", student)
+    _create_class_with_grades(service, "9A 2024", student)
+    service.archive_classes([old_class['id']], 2023)
+
+    classes = service.get_all_classes(include_archives=True)
+    assert [(c['name'], c['archive'], c['student_count']) for c in classes] == [("8A 2023", 2023, 1), ("9A 2024", None, 1)]
+
+    grades = service.get_all_grades_with_details(include_archives=True)
+    assert sorted((g['class_name'], g['archive'], g['student_first_name']) for g in grades) == [
+        ("8A 2023", 2023, "Ana"), ("9A 2024", None, "Ana"),
+    ]
+    assert len(service.get_all_grades_with_details()) == 1
+
+    with service.engine.connect() as conn:
+        attach_archives(conn.connection.dbapi_connection)
+        with pytest.raises(Exception, match="readonly"):
+            conn.execute(text("DELETE FROM archive_2023.grades"))
+
+
+def test_archiving_more_classes_into_the_same_year_keeps_earlier_ones(archiving_data_service):
+    service = archiving_data_service
+    student = service.add_student("Ana", "Lima")
+    first = _create_class_with_grades(service, "8A 2023", student)
+    second = _create_class_with_grades(service, "8B 2023", student)
+
+    service.archive_classes([first['id']], 2023)
+    # O mesmo aluno é copiado de novo para o arquivo, sem apagar os dados já arquivados.
+    service.archive_classes([second['id']], 2023)
+
+    grades = service.get_all_grades_with_details(include_archives=True)
+    assert sorted(g['class_name'] for g in grades) == ["8A 2023", "8B 2023"]
@@ -0,0 +1,73 @@
+import asyncio
+import threading
+from queue import Queue
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.async_data_service import AsyncDataService, DatabaseBusyError
+
+
+@pytest.fixture
+def gate():
+    """Evento que mantém uma chamada 'lenta' bloqueada até ser liberado."""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+@pytest.fixture
+def service():
+    data_service = MagicMock()
+    data_service.get_class_by_name.side_effect = lambda name: {"id": 1, "name": name, "thread": threading.current_thread().name}
+    async_service = AsyncDataService(data_service, max_workers=1, max_pending=1, default_timeout=5)
+    yield async_service
+    async_service.shutdown(wait=False)
+
+
+def test_methods_run_on_the_database_pool(service):
+    result = asyncio.run(service.get_class_by_name("9A"))
+
+    assert result["name"] == "9A"
+    assert result["thread"].startswith("database")
+
+
+def test_full_queue_is_rejected(service, gate):
+    service.submit_call(gate.wait)
+    service.submit_call(gate.wait)
+
+    with pytest.raises(DatabaseBusyError):
+        service.submit("get_class_by_name", "9A")
+
+    gate.set()
+
+
+def test_timeout_cancels_calls_that_have_not_started(service, gate):
+    service.submit_call(gate.wait)
+
+    async def scenario():
+        with pytest.raises(TimeoutError):
+            await service.get_class_by_name("9A", timeout=0.05)
+
+    asyncio.run(scenario())
+    gate.set()
+    # A chamada cancelada liberou sua vaga: a fila volta a aceitar chamadas.
+    assert service.submit("get_class_by_name", "9B").result(timeout=1)["name"] == "9B"
+
+
+def test_submit_to_queue_delivers_result_and_timeout(service, gate):
+    queue = Queue()
+    service.submit_to_queue(queue, "done", "get_class_by_name", "9A")
+    callback, (result,) = queue.get(timeout=1)
+    assert callback == "done" and result["name"] == "9A"
+
+    service.submit_call(gate.wait)
+    service.submit_to_queue(queue, "late", "get_class_by_name", "9B", timeout=0.05)
+    callback, (result,) = queue.get(timeout=1)
+    assert callback == "late" and isinstance(result, TimeoutError)
+    gate.set()
+
+
+def test_private_methods_are_not_exposed(service):
+    with pytest.raises(AttributeError):
+        service.submit("_get_db")
@@ -0,0 +1,83 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from app.services.backup_service import BackupService, BackupVerificationError
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Banco em arquivo, em modo WAL, com algumas páginas de dados."""
+    path = tmp_path / "school.db"
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT)")
+    connection.executemany("INSERT INTO notes (body) VALUES (?)", [("x" * 500,) for _ in range(2000)])
+    connection.commit()
+    connection.close()
+    return path
+
+
+def _count(path):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def test_backup_is_verified_and_complete(database, tmp_path):
+    service = BackupService(database, backup_dir=tmp_path / "backups", pages_per_step=16, step_pause=0)
+    steps = []
+
+    backup = service.create_backup(progress=lambda remaining, total: steps.append(remaining))
+
+    assert backup.exists() and _count(backup) == 2000
+    assert len(steps) > 1 and steps[-1] == 0
+    assert not list((tmp_path / "backups").glob("*.partial"))
+
+
+def test_writers_are_not_blocked_during_backup(database, tmp_path):
+    service = BackupService(database, backup_dir=tmp_path / "backups", pages_per_step=4, step_pause=0.002)
+    slowest_write = 0.0
+    done = threading.Event()
+
+    def writer():
+        nonlocal slowest_write
+        connection = sqlite3.connect(database, timeout=5)
+        while not done.is_set():
+            start = time.perf_counter()
+            connection.execute("INSERT INTO notes (body) VALUES ('novo')")
+            connection.commit()
+            slowest_write = max(slowest_write, time.perf_counter() - start)
+        connection.close()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        backup = service.create_backup()
+    finally:
+        done.set()
+        thread.join()
+
+    # A cópia é um retrato consistente, tirado no início, e as escritas seguiram sem esperar por ela.
+    assert _count(backup) >= 2000
+    assert slowest_write < 0.5
+
+
+def test_rotation_keeps_only_the_most_recent_backups(database, tmp_path):
+    service = BackupService(database, backup_dir=tmp_path / "backups", keep=2, step_pause=0)
+
+    created = [service.create_backup() for _ in range(3)]
+
+    assert service.list_backups() == created[1:]
+
+
+def test_corrupted_backup_fails_verification(tmp_path):
+    corrupted = tmp_path / "corrupted.db"
+    corrupted.write_bytes(b"SQLite format 3\x00" + b"\xff" * 4096)
+
+    with pytest.raises(BackupVerificationError):
+        BackupService.verify_backup(corrupted)
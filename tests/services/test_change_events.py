@@ -0,0 +1,94 @@
+from queue import Queue
+
+import pytest
+
+from app.data.change_events import CREATED, DELETED, UPDATED, ChangeEvent, change_events
+from app.services.data_service import DataService
+
+
+@pytest.fixture
+def received():
+    """Lista dos eventos entregues ao barramento durante o teste."""
+    events = []
+    unsubscribe = change_events.subscribe(events.append)
+    yield events
+    unsubscribe()
+
+
+def test_writes_publish_events_after_commit(file_data_service, received):
+    class_ = file_data_service.create_class("Turma A")
+    student = file_data_service.add_student("Ana", "Lima")
+    file_data_service.update_student(student['id'], "Ana", "Souza")
+
+    assert received == [
+        ChangeEvent("class", CREATED, (class_['id'],)),
+        ChangeEvent("student", CREATED, (student['id'],)),
+        ChangeEvent("student", UPDATED, (student['id'],)),
+    ]
+
+
+def test_unit_of_work_delivers_events_only_when_it_commits(file_data_service, received):
+    with file_data_service.unit_of_work():
+        class_ = file_data_service.create_class("Turma A")
+        student = file_data_service.add_student("Ana", "Lima")
+        enrollment = file_data_service.add_student_to_class(student['id'], class_['id'], 1)
+        # Nada é entregue antes do commit.
+        assert received == []
+    assert [(e.entity, e.operation) for e in received] == [("class", CREATED), ("student", CREATED), ("enrollment", CREATED)]
+    assert received[-1].ids == (enrollment['id'],) and received[-1].class_id == class_['id']
+
+    # Uma unidade de trabalho revertida não publica nada.
+    received.clear()
+    with pytest.raises(RuntimeError):
+        with file_data_service.unit_of_work():
+            file_data_service.add_course("Matemática", "MAT")
+            raise RuntimeError("falha")
+    assert received == []
+
+
+def test_savepoint_rollback_discards_only_its_events(file_data_service, received):
+    with file_data_service.session_factory() as session:
+        service = DataService(session)
+        service.add_course("Matemática", "MAT")
+        with pytest.raises(RuntimeError):
+            with service.unit_of_work():
+                service.add_course("Física", "FIS")
+                raise RuntimeError("falha")
+        session.commit()
+
+    assert [e.entity for e in received] == ["course"] and len(received[0].ids) == 1
+
+
+def test_bulk_writes_publish_one_event_with_scope(file_data_service, received):
+    class_ = file_data_service.create_class("Turma A")
+    course = file_data_service.add_course("Matemática", "MAT")
+    subject = file_data_service.add_subject_to_class(class_['id'], course['id'])
+    assessment = file_data_service.add_assessment(subject['id'], "Prova", 1.0)
+    students = [file_data_service.add_student("Aluno", str(i)) for i in range(3)]
+    received.clear()
+
+    file_data_service.upsert_grades_for_subject(subject['id'], [
+        {"student_id": s['id'], "assessment_id": assessment['id'], "score": 7.0} for s in students
+    ])
+    assert received == [ChangeEvent("grade", CREATED, (), class_subject_id=subject['id'])]
+
+    received.clear()
+    file_data_service.delete_students([s['id'] for s in students])
+    file_data_service.delete_lesson(12345)
+    assert received == [ChangeEvent("student", DELETED, tuple(s['id'] for s in students))]
+
+
+def test_subscribers_filter_by_entity_and_receive_through_a_queue(file_data_service):
+    queue = Queue()
+    callback = lambda change: None
+    unsubscribe = change_events.subscribe(callback, entities={"course"}, queue=queue)
+    try:
+        file_data_service.create_class("Turma A")
+        course = file_data_service.add_course("Matemática", "MAT")
+    finally:
+        unsubscribe()
+    file_data_service.add_course("Física", "FIS")
+
+    # Só o curso criado enquanto a assinatura estava ativa chega, no formato consumido pela UI.
+    assert queue.get_nowait() == (callback, (ChangeEvent("course", CREATED, (course['id'],)),))
+    assert queue.empty()
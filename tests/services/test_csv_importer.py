@@ -127,3 +127,31 @@ def test_batch_upsert_students_and_enroll_scenarios(data_service: DataService, d
 
     # 'commit' finaliza a transação do teste.
     db_session.commit()
+
+# Testa que a importação grava o arquivo inteiro com um número fixo de comandos SQL.
+def test_import_uses_a_fixed_number_of_statements(data_service: DataService, db_session: Session, query_counter):
+    class_ = data_service.create_class("Big Class")
+    db_session.flush()
+    header = "Nº de chamada;Nome do Aluno;Data de Nascimento;Situação do Aluno"
+    students = [
+        {"full_name": f"Aluno Numero {i:03d}", "birth_date": date(2010, 1, 1), "status": "Ativo"}
+        for i in range(500)
+    ]
+
+    with query_counter(max_statements=10):
+        result = data_service.import_students_from_csv(class_['id'], dict_to_csv_string(students, header))
+    assert result["imported_count"] == 500
+    assert set(result["timings"]) == {"parse_ms", "database_ms", "total_ms"}
+
+    enrollments = data_service.get_enrollments_for_class(class_['id'])
+    assert [e["call_number"] for e in enrollments] == list(range(1, 501))
+    assert enrollments[0]["student_first_name"] == "Aluno"
+
+    # Reimportar com uma data e um status alterados atualiza os registros sem criar novos.
+    students[0]["birth_date"] = date(2011, 5, 5)
+    students[1]["status"] = "Transferido"
+    with query_counter(max_statements=10):
+        data_service.import_students_from_csv(class_['id'], dict_to_csv_string(students, header))
+    assert data_service.get_student_count() == 500
+    assert data_service.get_student_by_name("Aluno Numero 000")["birth_date"] == "2011-05-05"
+    assert data_service.get_enrollments_for_class(class_['id'])[1]["status"] == "Inactive"
@@ -1,7 +1,16 @@
 # Importa a classe 'date' para usar nasfixtures de teste.
 from datetime import date
+import copy
+import pytest
+import sqlite3
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
 # Importa a classe DataService para ser testada.
 from app.services.data_service import DataService
+from app.models.student import Student
+from app.models.base import Base
+from app.data.database import create_app_engine
+from app.data.query_cache import QueryCache
 
 # Cada função de teste recebe a fixture `data_service` como argumento.
 # Esta fixture (de conftest.py) fornece uma instância limpa do serviço
@@ -285,9 +294,12 @@ def test_grade_grid_logic(data_service: DataService, db_session):
         {'student_id': student1['id'], 'assessment_id': assess2['id'], 'score': 7.0}, # Adiciona
         {'student_id': student2['id'], 'assessment_id': assess1['id'], 'score': 10.0} # Adiciona
     ]
-    data_service.upsert_grades_for_subject(subject['id'], grades_to_upsert)
+    assert data_service.upsert_grades_for_subject(subject['id'], grades_to_upsert) == {"inserted": 2, "updated": 1}
     db_session.flush()
 
+    # Reenviar o quadro inteiro sem alterações não grava nada.
+    assert data_service.upsert_grades_for_subject(subject['id'], grades_to_upsert) == {"inserted": 0, "updated": 0}
+
     # Verificação 3: Calcula as novas médias.
     final_grades = data_service.get_grades_for_subject(subject['id'])
     assert len(final_grades) == 3
@@ -343,3 +355,479 @@ def test_get_all_grades_with_details(data_service: DataService):
     assert retrieved_grade['assessment_name'] == "Final Exam"
     assert retrieved_grade['class_name'] == "Class"
     assert retrieved_grade['course_name'] == "Course"
+
+def test_add_grade_updates_existing_grade(data_service: DataService):
+    """Salvar uma nota para um par (aluno, avaliação) já existente deve atualizá-la, não duplicá-la."""
+    course = data_service.add_course("Física", "FIS")
+    class_ = data_service.create_class("Turma Única")
+    subject = data_service.add_subject_to_class(class_['id'], course['id'])
+    student = data_service.add_student("Ana", "Lima")
+    data_service.add_student_to_class(student['id'], class_['id'], 1)
+    assessment = data_service.add_assessment(subject['id'], "P1", 1.0)
+
+    first = data_service.add_grade(student['id'], assessment['id'], 6.0)
+    second = data_service.add_grade(student['id'], assessment['id'], 9.0)
+
+    assert first['id'] == second['id']
+    grades = data_service.get_grades_for_subject(subject['id'])
+    assert len(grades) == 1
+    assert grades[0]['score'] == 9.0
+
+def test_student_name_lookup_ignores_case_and_accents(data_service: DataService, db_session):
+    """A busca por nome deve encontrar o aluno independentemente de acentos e maiúsculas."""
+    student = data_service.add_student("JOÃO", "Conceição")
+
+    assert data_service.get_student_by_name("joao conceicao")['id'] == student['id']
+    # Adicionar o mesmo nome com outra grafia retorna o aluno existente.
+    assert data_service.add_student("Joao", "CONCEICAO")['id'] == student['id']
+    assert data_service.get_paginated_students(1, 10, search_term="CONCEI")['total_count'] == 1
+
+    # A chave de busca acompanha a atualização do nome.
+    data_service.update_student(student['id'], "José", "Conceição")
+    # A sessão de teste não usa autoflush; o flush simula o commit feito em produção.
+    db_session.flush()
+    assert data_service.get_student_by_name("Joao Conceicao") is None
+    assert data_service.get_student_by_name("jose conceicao")['id'] == student['id']
+
+def test_search_ranks_lessons_and_incidents(data_service: DataService, db_session):
+    """A busca textual deve encontrar aulas e incidentes pelo conteúdo e acompanhar as alterações."""
+    course = data_service.add_course("Matemática", "MAT")
+    class_ = data_service.create_class("Turma Busca")
+    subject = data_service.add_subject_to_class(class_['id'], course['id'])
+    student = data_service.add_student("Maria", "Conceição")
+    lesson = data_service.create_lesson(subject['id'], "Frações", "Introdução às frações equivalentes", date(2024, 3, 1))
+    data_service.create_lesson(subject['id'], "Geometria", "Ângulos e triângulos", date(2024, 3, 8))
+    data_service.create_incident(class_['id'], student['id'], "Conversou durante a explicação de frações", date(2024, 3, 1))
+
+    hits = data_service.search("fracoes")
+    assert {(h['kind'], h['id']) for h in hits} == {("lesson", lesson['id']), ("incident", 1)}
+    # O resultado mais relevante é a aula, que cita o termo no título e no conteúdo.
+    assert hits[0]['kind'] == "lesson"
+    assert "[" in hits[0]['snippet']
+
+    assert [h['kind'] for h in data_service.search("conceicao", kinds=["student", "incident"])] == ["student"]
+    assert data_service.search("   ") == []
+    with pytest.raises(ValueError):
+        data_service.search("frações", kinds=["course"])
+
+    # Os gatilhos mantêm o índice sincronizado com as alterações.
+    data_service.update_lesson(lesson['id'], "Decimais", "Números decimais", date(2024, 3, 1))
+    db_session.flush()
+    assert [h['kind'] for h in data_service.search("frações")] == ["incident"]
+
+def test_subject_averages_follow_grade_and_assessment_changes(data_service: DataService, db_session):
+    """Testa que o agregado de médias acompanha as alterações de notas e avaliações."""
+    student1 = data_service.add_student("Student", "One")
+    student2 = data_service.add_student("Student", "Two")
+    course = data_service.add_course("Course", "C101")
+    class_ = data_service.create_class("Class")
+    subject = data_service.add_subject_to_class(class_['id'], course['id'])
+    data_service.add_student_to_class(student1['id'], class_['id'], 1)
+    data_service.add_student_to_class(student2['id'], class_['id'], 2)
+    assess1 = data_service.add_assessment(subject['id'], "Test 1", 1.0)
+    assess2 = data_service.add_assessment(subject['id'], "Test 2", 2.0)
+
+    def expected():
+        # As médias persistidas devem ser iguais às calculadas a partir das notas.
+        grades = data_service.get_grades_for_subject(subject['id'])
+        assessments = data_service.get_assessments_for_subject(subject['id'])
+        return {s: round(data_service.calculate_weighted_average(s, grades, assessments), 6)
+                for s in (student1['id'], student2['id'])}
+
+    def stored():
+        averages = data_service.get_subject_averages(subject['id'])
+        return {s: round(averages.get(s, 0.0), 6) for s in (student1['id'], student2['id'])}
+
+    grade = data_service.add_grade(student1['id'], assess1['id'], 8.0)
+    assert stored() == expected()
+    assert round(stored()[student1['id']], 2) == 2.67
+
+    data_service.upsert_grades_for_subject(subject['id'], [
+        {'student_id': student1['id'], 'assessment_id': assess2['id'], 'score': 7.0},
+        {'student_id': student2['id'], 'assessment_id': assess1['id'], 'score': 10.0},
+    ])
+    assert stored() == expected()
+
+    # Mudar o peso ou remover uma avaliação altera o denominador de todos os alunos.
+    data_service.update_assessment(assess2['id'], "Test 2", 3.0)
+    db_session.flush()
+    assert stored() == expected()
+
+    data_service.delete_grade(grade['id'])
+    db_session.flush()
+    assert stored() == expected()
+
+    data_service.delete_assessment(assess1['id'])
+    db_session.flush()
+    assert stored() == expected()
+    gradebook = data_service.get_class_gradebook(class_['id'])
+    assert {s: round(gradebook.subject_average(s, subject['id']), 6) for s in (student1['id'], student2['id'])} == stored()
+
+def test_bulk_deletes_cascade_in_the_database(data_service: DataService, db_session, query_counter):
+    """Testa que as exclusões em lote removem os dependentes em cascata, com um único comando."""
+    student1 = data_service.add_student("Student", "One")
+    student2 = data_service.add_student("Student", "Two")
+    course = data_service.add_course("Course", "C101")
+    class_a = data_service.create_class("Class A")
+    class_b = data_service.create_class("Class B")
+    for class_ in (class_a, class_b):
+        subject = data_service.add_subject_to_class(class_['id'], course['id'])
+        data_service.add_student_to_class(student1['id'], class_['id'], 1)
+        data_service.add_student_to_class(student2['id'], class_['id'], 2)
+        assessment = data_service.add_assessment(subject['id'], "Test", 1.0)
+        data_service.add_grade(student1['id'], assessment['id'], 8.0)
+        data_service.add_grade(student2['id'], assessment['id'], 6.0)
+        data_service.create_lesson(subject['id'], "Aula", "Conteúdo", date(2024, 3, 1))
+        data_service.create_incident(class_['id'], student2['id'], "Atraso", date(2024, 3, 1))
+    db_session.flush()
+
+    # Ação 1: Exclui um aluno. Suas notas, matrículas, incidentes e médias saem junto.
+    with query_counter(max_statements=1):
+        assert data_service.delete_students([student2['id']]) == 1
+    assert {g['student_id'] for g in data_service.get_all_grades()} == {student1['id']}
+    assert data_service.get_incidents_for_class(class_a['id']) == []
+    assert len(data_service.get_enrollments_for_class(class_a['id'])) == 1
+
+    # Ação 2: Exclui as duas turmas com um único comando, sem carregar os dependentes.
+    with query_counter(max_statements=1):
+        assert data_service.delete_classes([class_a['id'], class_b['id']]) == 2
+    assert data_service.get_all_grades() == []
+    assert data_service.get_all_classes() == []
+    assert db_session.execute(text("SELECT COUNT(*) FROM lessons")).scalar() == 0
+    assert db_session.execute(text("SELECT COUNT(*) FROM assessments")).scalar() == 0
+    assert db_session.execute(text("SELECT COUNT(*) FROM student_subject_averages")).scalar() == 0
+    # O aluno e o curso continuam cadastrados.
+    assert data_service.get_student_count() == 1 and data_service.get_course_count() == 1
+
+def test_get_class_gradebook_matches_persisted_averages(data_service: DataService, query_counter):
+    """Testa que o quadro de notas, montado com duas consultas, tem as mesmas notas e médias do banco."""
+    students = [data_service.add_student("Student", str(i)) for i in range(3)]
+    class_ = data_service.create_class("Class")
+    for call_number, student in enumerate(students, start=1):
+        data_service.add_student_to_class(student['id'], class_['id'], call_number)
+    subjects = [data_service.add_subject_to_class(class_['id'], data_service.add_course(f"Course {i}", f"C{i}")['id'])
+                for i in range(2)]
+    # A segunda disciplina não tem avaliações.
+    assess1 = data_service.add_assessment(subjects[0]['id'], "P1", 1.0)
+    assess2 = data_service.add_assessment(subjects[0]['id'], "P2", 3.0)
+    data_service.add_grade(students[0]['id'], assess1['id'], 6.0)
+    data_service.add_grade(students[0]['id'], assess2['id'], 10.0)
+    data_service.add_grade(students[1]['id'], assess2['id'], 4.0)
+
+    with query_counter(max_statements=2):
+        gradebook = data_service.get_class_gradebook(class_['id'])
+
+    assert [s['student_id'] for s in gradebook.students] == [s['id'] for s in students]
+    assert [a['id'] for a in gradebook.assessments_for_subject(subjects[0]['id'])] == [assess1['id'], assess2['id']]
+    assert gradebook.assessments_for_subject(subjects[1]['id']) == []
+    assert gradebook.score(students[1]['id'], assess2['id']) == 4.0
+    assert gradebook.score(students[1]['id'], assess1['id']) is None
+    persisted = data_service.get_subject_averages(subjects[0]['id'])
+    for student in students:
+        assert gradebook.subject_average(student['id'], subjects[0]['id']) == pytest.approx(persisted.get(student['id'], 0.0))
+    assert gradebook.subject_averages(students[0]['id']) == [pytest.approx(9.0), 0.0]
+    assert gradebook.global_average(students[0]['id']) == pytest.approx(4.5)
+    assert data_service.get_class_gradebook(class_['id'] + 1) is None
+
+def test_students_page_walks_forward_and_backward_with_cursors(data_service: DataService, db_session, query_counter):
+    """A paginação por cursor percorre a lista nos dois sentidos e reaproveita a contagem total do cache de leitura."""
+    cached_service = DataService(query_cache=QueryCache())
+    for first_name in ["Eva", "Ana", "Caio", "Bia", "Davi"]:
+        data_service.add_student(first_name, "Lima")
+    # Um homônimo (inserido diretamente, pois add_student reaproveita nomes iguais) é desempatado pelo ID.
+    db_session.add(Student(first_name="Ana", last_name="Lima", enrollment_date=date(2024, 1, 1)))
+    db_session.flush()
+
+    first = cached_service.get_students_page(2)
+    assert [s["first_name"] for s in first["students"]] == ["Ana", "Ana"]
+    assert first["students"][0]["id"] < first["students"][1]["id"]
+    assert first["total_count"] == 6
+    assert first["previous_cursor"] is None
+
+    # A contagem fica em cache: as páginas seguintes executam apenas a consulta da página.
+    with query_counter(max_statements=1):
+        second = cached_service.get_students_page(2, after=first["next_cursor"])
+    assert [s["first_name"] for s in second["students"]] == ["Bia", "Caio"]
+    third = cached_service.get_students_page(2, after=second["next_cursor"])
+    assert [s["first_name"] for s in third["students"]] == ["Davi", "Eva"]
+    assert third["next_cursor"] is None
+
+    back = cached_service.get_students_page(2, before=third["previous_cursor"])
+    assert back["students"] == second["students"]
+    assert back["next_cursor"] == second["next_cursor"]
+    assert cached_service.get_students_page(2, before=back["previous_cursor"])["previous_cursor"] is None
+
+    # Uma escrita invalida a contagem.
+    data_service.add_student("Fabio", "Lima")
+    assert cached_service.get_students_page(2, search_term="lima")["total_count"] == 7
+
+    # Se a página seguinte ficar vazia, a última página é retornada.
+    data_service.delete_students([s["id"] for s in third["students"]] + [data_service.get_student_by_name("Fabio Lima")["id"]])
+    last = cached_service.get_students_page(2, after=second["next_cursor"])
+    assert [s["first_name"] for s in last["students"]] == ["Bia", "Caio"]
+    assert last["next_cursor"] is None
+    assert last["total_count"] == 4
+
+def test_upsert_grades_writes_a_large_grid_in_one_statement(data_service: DataService, db_session, query_counter):
+    """Salvar um quadro de 1.000 células usa um único comando de escrita e só reescreve as notas alteradas."""
+    course = data_service.add_course("Math", "M1")
+    class_ = data_service.create_class("Big Class")
+    subject = data_service.add_subject_to_class(class_['id'], course['id'])
+    db_session.add_all(Student(first_name="Aluno", last_name=str(i), enrollment_date=date(2024, 1, 1)) for i in range(100))
+    db_session.flush()
+    student_ids = [s['id'] for s in data_service.get_all_students()]
+    assessment_ids = [data_service.add_assessment(subject['id'], f"P{i}", 1.0)['id'] for i in range(10)]
+    grid = [{'student_id': s, 'assessment_id': a, 'score': 5.0} for s in student_ids for a in assessment_ids]
+
+    with query_counter() as counter:
+        assert data_service.upsert_grades_for_subject(subject['id'], grid) == {"inserted": 1000, "updated": 0}
+    # Leitura das notas atuais, o upsert em lote e o recálculo das médias (DELETE + INSERT).
+    assert counter.count == 4
+    assert sum(1 for sql in counter.statements if "ON CONFLICT" in sql) == 1
+
+    grid[0]['score'] = 9.0
+    assert data_service.upsert_grades_for_subject(subject['id'], grid) == {"inserted": 0, "updated": 1}
+    assert data_service.get_subject_averages(subject['id'])[student_ids[0]] == 5.4
+
+def test_query_cache_serves_reference_data_until_a_table_is_written(data_service: DataService, db_session, query_counter):
+    """Testa que o cache de leitura responde sem ir ao banco e é invalidado pelas escritas nas tabelas lidas."""
+    cached_service = DataService(query_cache=QueryCache())
+    course = data_service.add_course("Math", "M101")
+    class_ = data_service.create_class("Class A")
+    subject = data_service.add_subject_to_class(class_['id'], course['id'])
+    data_service.add_assessment(subject['id'], "Test 1", 1.0)
+    db_session.flush()
+
+    # Primeira leitura vai ao banco; a segunda vem do cache, sem nenhum comando SQL.
+    assert [c['course_name'] for c in cached_service.get_all_courses()] == ["Math"]
+    assert cached_service.get_class_by_name("class a")['id'] == class_['id']
+    with query_counter(max_statements=0):
+        assert [c['course_name'] for c in cached_service.get_all_courses()] == ["Math"]
+        assert cached_service.get_class_by_name("class a")['id'] == class_['id']
+    # O resultado devolvido é uma cópia: alterá-lo não altera o cache.
+    cached_service.get_all_courses()[0]['course_name'] = "Changed"
+    assert cached_service.get_all_courses()[0]['course_name'] == "Math"
+
+    # Escritas pelo ORM e por comandos em lote invalidam apenas as entradas das tabelas escritas.
+    data_service.add_course("Physics", "P101")
+    data_service.update_class(class_['id'], "Class B")
+    db_session.flush()
+    assert [c['course_name'] for c in cached_service.get_all_courses()] == ["Math", "Physics"]
+    assert cached_service.get_class_by_name("class a") is None
+    assert len(cached_service.get_assessments_for_subject(subject['id'])) == 1
+
+    # Excluir a turma remove as avaliações em cascata no banco, e o cache das avaliações também é invalidado.
+    assert data_service.delete_classes([class_['id']]) == 1
+    assert cached_service.get_assessments_for_subject(subject['id']) == []
+
+    stats = cached_service.get_query_cache_stats()
+    assert stats['hits'] == 4 and stats['misses'] == 6 and stats['size'] == 3
+    assert stats['hit_rate'] == pytest.approx(0.4)
+    # Sem cache configurado, não há estatísticas.
+    assert data_service.get_query_cache_stats() is None
+
+def test_query_cache_evicts_the_least_recently_used_entry(data_service: DataService, db_session):
+    """Testa que o cache respeita o limite de entradas, descartando a menos usada recentemente."""
+    cache = QueryCache(max_entries=2)
+    cached_service = DataService(query_cache=cache)
+    class_ids = [data_service.create_class(f"Class {i}")['id'] for i in range(3)]
+    db_session.flush()
+
+    cached_service.get_class_by_id(class_ids[0])
+    cached_service.get_class_by_id(class_ids[1])
+    cached_service.get_class_by_id(class_ids[0])  # Torna a turma 0 a mais recente.
+    cached_service.get_class_by_id(class_ids[2])  # Descarta a turma 1.
+    cached_service.get_class_by_id(class_ids[0])
+    stats = cache.stats()
+    assert stats['evictions'] == 1 and stats['size'] == 2 and stats['hits'] == 2
+
+def test_query_cache_sees_commits_from_other_connections(tmp_path):
+    """Testa que escritas feitas fora da aplicação (outra conexão ao mesmo arquivo) descartam o cache."""
+    db_path = tmp_path / "shared.db"
+    engine = create_app_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        cache = QueryCache()
+        cached_service = DataService(session, query_cache=cache)
+        cached_service.add_course("Math", "M101")
+        session.commit()
+        assert len(cached_service.get_all_courses()) == 1
+        assert len(cached_service.get_all_courses()) == 1
+
+        # Outro processo grava diretamente no arquivo, sem passar pelas sessões da aplicação.
+        other = sqlite3.connect(db_path)
+        other.execute("INSERT INTO courses (course_name, course_code) VALUES ('Physics', 'P101')")
+        other.commit()
+        other.close()
+
+        assert len(cached_service.get_all_courses()) == 2
+        assert cache.stats()['invalidations'] == 1
+    finally:
+        session.close()
+        engine.dispose()
+
+def test_query_grades_filters_in_sql_and_streams(data_service: DataService, db_session, query_counter):
+    """Testa que query_grades aplica os filtros no banco e que iter_grades percorre o mesmo resultado em blocos."""
+    math = data_service.add_course("Math", "M101")
+    physics = data_service.add_course("Physics", "P101")
+    class_a = data_service.create_class("Class A")
+    class_b = data_service.create_class("Class B")
+    students = [data_service.add_student("Student", str(i)) for i in range(3)]
+    assessments = {}
+    for class_ in (class_a, class_b):
+        for course in (math, physics):
+            subject = data_service.add_subject_to_class(class_['id'], course['id'])
+            assessments[class_['id'], course['id']] = data_service.add_assessment(subject['id'], "Test", 1.0)
+    for (class_id, course_id), assessment in assessments.items():
+        for student in students:
+            data_service.add_grade(student['id'], assessment['id'], 7.0)
+    # Notas antigas: a data de registro vem do dia da gravação, então é ajustada diretamente.
+    db_session.execute(text("UPDATE grades SET date_recorded = '2024-03-01' WHERE assessment_id = :id"),
+                       {"id": assessments[class_a['id'], math['id']]['id']})
+    db_session.flush()
+
+    with query_counter(max_statements=1):
+        grades = data_service.query_grades(student_id=students[0]['id'], course_id=math['id'])
+    assert {(g['class_name'], g['course_name']) for g in grades} == {("Class A", "Math"), ("Class B", "Math")}
+    assert all(g['student_id'] == students[0]['id'] for g in grades)
+    # Ordenadas pela data de registro: a nota antiga vem primeiro.
+    assert grades[0]['date_recorded'] == '2024-03-01'
+
+    assert len(data_service.query_grades(class_id=class_b['id'])) == 6
+    assert len(data_service.query_grades(assessment_id=assessments[class_b['id'], physics['id']]['id'])) == 3
+    assert len(data_service.query_grades(date_to=date(2024, 12, 31))) == 3
+    assert len(data_service.query_grades(course_id=math['id'], date_from=date(2025, 1, 1))) == 3
+    assert data_service.query_grades(student_id=-1) == []
+
+    # A versão em fluxo devolve as mesmas notas, buscadas em blocos.
+    with query_counter(max_statements=1):
+        streamed = list(data_service.iter_grades(course_id=physics['id'], chunk_size=2))
+    assert streamed == data_service.query_grades(course_id=physics['id'])
+    assert len(streamed) == 6
+
+def test_compact_results_match_the_dictionaries(data_service: DataService):
+    """Testa que os registros compactos e o lote colunar de notas trazem os mesmos dados dos dicionários."""
+    course = data_service.add_course("Math", "M101")
+    class_ = data_service.create_class("Class")
+    subject = data_service.add_subject_to_class(class_['id'], course['id'])
+    assessments = [data_service.add_assessment(subject['id'], f"Test {i}", 1.0) for i in range(2)]
+    students = [data_service.add_student("Student", str(i), date(2010, 1, i + 1)) for i in range(3)]
+    for call_number, student in enumerate(students, start=1):
+        data_service.add_student_to_class(student['id'], class_['id'], call_number)
+        for assessment in assessments:
+            data_service.add_grade(student['id'], assessment['id'], 5.0 + call_number)
+
+    enrollments = data_service.get_enrollments_for_class(class_['id'], compact=True)
+    assert enrollments == data_service.get_enrollments_for_class(class_['id'])
+    record = enrollments[0]
+    # Os registros se comportam como dicionários somente leitura e não têm '__dict__'.
+    assert record['student_first_name'] == record.student_first_name == "Student"
+    assert record.get('missing', 'default') == 'default' and 'status' in record
+    assert dict(record) == record.to_dict() and not hasattr(record, '__dict__')
+    with pytest.raises(KeyError):
+        record['missing']
+    with pytest.raises(AttributeError):
+        record.status = 'Inactive'
+    assert record['status'] == 'Active'
+    assert copy.deepcopy(record) == record
+
+    assert data_service.get_all_grades_with_details(compact=True) == data_service.get_all_grades_with_details()
+    grades = data_service.query_grades(class_id=class_['id'])
+    assert data_service.query_grades(class_id=class_['id'], compact=True) == grades
+    assert list(data_service.iter_grades(class_id=class_['id'], compact=True)) == grades
+
+    # O lote colunar guarda as notas em um 'array' e os nomes uma única vez por entidade.
+    batch = data_service.query_grade_batch(class_id=class_['id'])
+    assert len(batch) == 6 and batch.to_dicts() == grades
+    assert list(batch.scores) == [g['score'] for g in grades]
+    assert len(batch.student_names) == 3 and len(batch.assessment_names) == 2
+
+def test_windowed_queries_use_the_date_indexes(data_service: DataService, db_session):
+    """Testa as médias por período, as matrículas por período e o uso dos índices de data."""
+    course = data_service.add_course("Math", "M101")
+    class_a = data_service.create_class("Class A")
+    class_b = data_service.create_class("Class B")
+    subject_a = data_service.add_subject_to_class(class_a['id'], course['id'])
+    subject_b = data_service.add_subject_to_class(class_b['id'], course['id'])
+    test = data_service.add_assessment(subject_a['id'], "Test", 1.0)
+    exam = data_service.add_assessment(subject_a['id'], "Exam", 3.0)
+    other = data_service.add_assessment(subject_b['id'], "Test", 1.0)
+    ana = data_service.add_student("Ana", "Lima")
+    bruno = data_service.add_student("Bruno", "Souza")
+    for assessment, score in ((test, 6.0), (exam, 10.0), (other, 4.0)):
+        data_service.add_grade(ana['id'], assessment['id'], score)
+    data_service.add_grade(bruno['id'], test['id'], 8.0)
+    # A data de registro vem do dia da gravação, então é ajustada diretamente.
+    for assessment_id, recorded in ((test['id'], "2024-03-10"), (exam['id'], "2024-05-20"), (other['id'], "2024-03-15")):
+        db_session.execute(text("UPDATE grades SET date_recorded = :d WHERE assessment_id = :id"),
+                           {"d": recorded, "id": assessment_id})
+    db_session.execute(text("UPDATE students SET enrollment_date = '2024-03-04' WHERE id = :id"), {"id": bruno['id']})
+    db_session.execute(text("UPDATE students SET enrollment_date = '2024-01-15' WHERE id = :id"), {"id": ana['id']})
+    db_session.flush()
+
+    terms = {"B1": (date(2024, 2, 1), date(2024, 4, 30)), "B2": (date(2024, 5, 1), date(2024, 7, 15)),
+             "Year": (date(2024, 1, 1), date(2024, 12, 31)), "B3": (date(2024, 8, 1), date(2024, 9, 30))}
+    averages = data_service.get_term_averages(terms)
+    assert averages["B1"] == {subject_a['id']: {ana['id']: 6.0, bruno['id']: 8.0}, subject_b['id']: {ana['id']: 4.0}}
+    assert averages["B2"] == {subject_a['id']: {ana['id']: 10.0}}
+    # Os períodos podem se sobrepor: a média do ano pondera as notas dos dois bimestres.
+    assert averages["Year"][subject_a['id']][ana['id']] == pytest.approx(9.0)
+    assert averages["B3"] == {}
+    assert data_service.get_term_averages(terms, class_id=class_b['id'])["B1"] == {subject_b['id']: {ana['id']: 4.0}}
+    assert data_service.get_term_averages({}) == {}
+    with pytest.raises(ValueError):
+        data_service.get_term_averages({"B1": (date(2024, 4, 30), date(2024, 2, 1))})
+
+    since_march = data_service.get_students_enrolled_between(date_from=date(2024, 3, 1))
+    assert [(s['first_name'], s['enrollment_date']) for s in since_march] == [("Bruno", "2024-03-04")]
+    assert [s['id'] for s in data_service.get_students_enrolled_between()] == [ana['id'], bruno['id']]
+    assert [g['date_recorded'] for g in data_service.query_grades(date_from=date(2024, 5, 1))] == ["2024-05-20"]
+
+    # As consultas por período são buscas por intervalo nos índices das datas.
+    statement = data_service._filtered_grades_select(None, None, None, None, date(2024, 3, 1), date(2024, 3, 31))
+    sql = str(statement.compile(db_session.bind, compile_kwargs={"literal_binds": True}))
+    plan = " ".join(row[-1] for row in db_session.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+    assert "USING INDEX ix_grades_date_recorded" in plan
+    plan = " ".join(row[-1] for row in db_session.execute(
+        text("EXPLAIN QUERY PLAN SELECT id FROM students WHERE enrollment_date >= '2024-03-01'")))
+    assert "ix_students_enrollment_date" in plan
+
+def test_student_overview_uses_two_queries(data_service: DataService, db_session, query_counter):
+    """Testa que a visão geral do aluno reúne matrículas, disciplinas, médias, notas e incidentes em duas consultas."""
+    math = data_service.add_course("Math", "M101")
+    physics = data_service.add_course("Physics", "P101")
+    ana = data_service.add_student("Ana", "Lima", date(2010, 5, 1))
+    other = data_service.add_student("Bruno", "Souza")
+    classes = [data_service.create_class(f"Class {i}") for i in range(5)]
+    # O aluno está matriculado em duas das cinco turmas; a segunda não tem disciplinas.
+    subjects = [data_service.add_subject_to_class(classes[0]['id'], course['id']) for course in (math, physics)]
+    data_service.add_subject_to_class(classes[2]['id'], math['id'])
+    data_service.add_student_to_class(ana['id'], classes[0]['id'], 3)
+    data_service.add_student_to_class(ana['id'], classes[1]['id'], 1)
+    data_service.add_student_to_class(other['id'], classes[0]['id'], 1)
+    test = data_service.add_assessment(subjects[0]['id'], "Test", 1.0)
+    exam = data_service.add_assessment(subjects[0]['id'], "Exam", 1.0)
+    data_service.add_grade(ana['id'], test['id'], 6.0)
+    data_service.add_grade(ana['id'], exam['id'], 9.0)
+    data_service.add_grade(other['id'], test['id'], 2.0)
+    db_session.execute(text("UPDATE grades SET date_recorded = '2024-03-01' WHERE assessment_id = :id"), {"id": test['id']})
+    for _ in range(2):
+        data_service.create_incident(classes[0]['id'], ana['id'], "Atraso", date(2024, 3, 1))
+    data_service.create_incident(classes[0]['id'], other['id'], "Atraso", date(2024, 3, 1))
+
+    with query_counter(max_statements=2):
+        overview = data_service.get_student_overview(ana['id'], latest_grades=1)
+
+    assert (overview['first_name'], overview['birth_date'], overview['incident_count']) == ("Ana", "2010-05-01", 2)
+    first, second = overview['enrollments']
+    assert (first['class_name'], first['call_number'], first['incident_count']) == ("Class 0", 3, 2)
+    assert [(s['course_name'], s['average']) for s in first['subjects']] == [("Math", 7.5), ("Physics", 0.0)]
+    assert (second['class_name'], second['subjects'], second['incident_count']) == ("Class 1", [], 0)
+    # Só a nota mais recente é retornada, com a turma e a disciplina.
+    assert [(g['assessment_name'], g['score'], g['class_name'], g['course_name']) for g in overview['latest_grades']] == [
+        ("Exam", 9.0, "Class 0", "Math")]
+
+    loner = data_service.add_student("Carla", "Dias")
+    assert data_service.get_student_overview(loner['id'])['enrollments'] == []
+    assert data_service.get_student_overview(-1) is None
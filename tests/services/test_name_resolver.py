@@ -0,0 +1,104 @@
+import pytest
+
+from app.services.data_service import DataService
+from app.services.name_resolver import NameResolver
+from app.tools import database_tools
+
+
+@pytest.fixture
+def resolver(data_service):
+    name_resolver = NameResolver(data_service)
+    yield name_resolver
+    name_resolver.close()
+
+
+def test_resolves_typos_accents_and_first_names(data_service: DataService, resolver, mocker):
+    ana = data_service.add_student("Ana", "Lima")
+    data_service.add_student("Ana", "Souza")
+    joao = data_service.add_student("João", "Conceição")
+    dias_lima = data_service.add_student("Paula", "Dias Lima")
+    data_service.add_student("Paula", "Lima Dias")
+    math = data_service.add_course("Matemática", "MAT")
+    data_service.add_course("Física", "FIS")
+    load = mocker.spy(data_service, "get_resolvable_names")
+
+    assert resolver.resolve("student", "joao conceicao").match.id == joao['id']
+    assert resolver.resolve("student", "Joao Conseicao").match.id == joao['id']
+    assert resolver.resolve("student", "ana lima").match.id == ana['id']
+    assert resolver.resolve("course", "matematca").match.id == math['id']
+    # Os sobrenomes invertidos têm os mesmos trigramas; a ordem das palavras desfaz o empate.
+    assert resolver.resolve("student", "paula diaz lima").match.id == dias_lima['id']
+
+    # Só o primeiro nome, com dois alunos possíveis: nenhum é escolhido, e os dois são sugeridos.
+    ambiguous = resolver.resolve("student", "Ana")
+    assert ambiguous.match is None
+    assert [candidate.name for candidate in ambiguous.candidates] == ["Ana Lima", "Ana Souza"]
+    assert resolver.resolve("student", "Zélia").candidates == ()
+
+    # Com exact=True (ferramentas de escrita), um nome parecido vira só sugestão.
+    near_miss = resolver.resolve("student", "Joao Conseicao", exact=True)
+    assert near_miss.match is None
+    assert [candidate.id for candidate in near_miss.candidates] == [joao['id']]
+    assert resolver.resolve("student", "JOAO CONCEIÇÃO", exact=True).match.id == joao['id']
+
+    # Cada índice é montado com uma única consulta; as resoluções seguintes são feitas na memória.
+    assert [call.args for call in load.call_args_list] == [("student",), ("course",)]
+
+    with pytest.raises(ValueError):
+        resolver.resolve("teacher", "Ana")
+
+
+def test_scoped_kinds_only_match_inside_the_scope(data_service: DataService, resolver):
+    math = data_service.add_course("Matemática", "MAT")
+    history = data_service.add_course("História", "HIS")
+    class_a = data_service.create_class("1A")
+    class_b = data_service.create_class("1B")
+    math_a = data_service.add_subject_to_class(class_a['id'], math['id'])
+    history_b = data_service.add_subject_to_class(class_b['id'], history['id'])
+    exam = data_service.add_assessment(math_a['id'], "Prova 1", 1.0)
+    data_service.add_assessment(math_a['id'], "Prova 2", 1.0)
+
+    assert resolver.resolve("subject", "matematica", scope_id=class_a['id']).match.id == math_a['id']
+    assert resolver.resolve("subject", "matematica", scope_id=class_b['id']).match is None
+    assert resolver.resolve("subject", "historia", scope_id=class_b['id']).match.id == history_b['id']
+    assert resolver.resolve("assessment", "prova 1", scope_id=math_a['id']).match.id == exam['id']
+    assert resolver.resolve("assessment", "Prova", scope_id=math_a['id']).match is None
+
+
+def test_indexes_are_refreshed_after_committed_writes(file_data_service: DataService):
+    resolver = NameResolver(file_data_service)
+    try:
+        class_ = file_data_service.create_class("Turma A")
+        assert resolver.resolve("class", "turma a").match.id == class_['id']
+        assert resolver.resolve("student", "Bruno Souza").match is None
+
+        student = file_data_service.add_student("Bruno", "Souza")
+        file_data_service.update_class(class_['id'], "Turma B")
+
+        assert resolver.resolve("student", "Bruno Souza").match.id == student['id']
+        assert resolver.resolve("class", "turma b").match.id == class_['id']
+        assert resolver.resolve("class", "turma a").match is None
+    finally:
+        resolver.close()
+
+
+def test_names_written_earlier_in_the_unit_of_work_are_resolved(file_data_service: DataService, mocker):
+    resolver = NameResolver(file_data_service)
+    mocker.patch("app.tools.database_tools.data_service", file_data_service)
+    mocker.patch("app.tools.database_tools.name_resolver", resolver)
+    try:
+        file_data_service.add_course("Matemática", "MAT")
+        # Índice de turmas já montado antes do turno.
+        assert resolver.resolve("class", "9B").match is None
+        load = mocker.spy(file_data_service, "get_resolvable_names")
+
+        with file_data_service.unit_of_work():
+            database_tools.create_new_class("9B")
+            # A turma ainda não foi confirmada, mas a ferramenta seguinte do mesmo turno já a encontra.
+            result = database_tools.add_subject_to_class("9B", "Matemática")
+
+        assert result == "Disciplina 'Matemática' adicionada à turma '9B' com sucesso."
+        # Só o índice de turmas foi montado de novo; o de disciplinas não foi alterado no turno.
+        assert [call.args for call in load.call_args_list] == [("class",), ("course",)]
+    finally:
+        resolver.close()
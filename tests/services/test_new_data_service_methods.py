@@ -129,3 +129,25 @@ def test_analysis_methods(data_service: DataService):
     # Verificação: Com os novos limites, apenas a aluna 'Daniela' (3 incidentes) deve ser listada.
     # Bruno (média 4.6) e Carlos (2 incidentes) não atendem mais aos critérios.
     assert len(at_risk_custom) == 1
+
+    # --- TESTE: get_school_students_at_risk ---
+    # Preparação: uma segunda turma, com um aluno de média 2.0 e sem incidentes.
+    other_class = data_service.create_class("Grade 7 Math")
+    other_subject = data_service.add_subject_to_class(other_class['id'], course['id'])
+    student_other = data_service.add_student("Eduardo", "Esforço")
+    data_service.add_student_to_class(student_other['id'], other_class['id'], 1)
+    other_exam = data_service.add_assessment(other_subject['id'], "Quiz", 1.0)
+    data_service.add_grade(student_other['id'], other_exam['id'], 2.0)
+
+    # Ação: Busca os alunos mais em risco da escola inteira.
+    school_at_risk = data_service.get_school_students_at_risk()
+    # Verificação: Os 4 alunos em risco das duas turmas, do mais para o menos em risco (menor média primeiro).
+    assert [s["student_name"] for s in school_at_risk] == [
+        "Eduardo Esforço", "Bruno Baixanota", "Daniela Desafio", "Carlos Comportamento"
+    ]
+    assert school_at_risk[0]["class_name"] == "Grade 7 Math"
+    assert school_at_risk[0]["average_grade"] == 2.0
+    assert school_at_risk[2]["incident_count"] == 3
+
+    # Ação: Limita o ranking aos 2 alunos mais em risco.
+    assert len(data_service.get_school_students_at_risk(limit=2)) == 2
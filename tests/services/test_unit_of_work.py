@@ -0,0 +1,109 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.services.data_service import DataService, UnitOfWorkError
+
+
+def test_calls_share_one_session_and_commit(file_data_service):
+    with file_data_service.unit_of_work():
+        class_ = file_data_service.create_class("Turma A")
+        student = file_data_service.add_student("Ana", "Lima")
+        file_data_service.add_student_to_class(student['id'], class_['id'], 1)
+        # As alterações anteriores já são visíveis dentro da unidade de trabalho.
+        assert len(file_data_service.get_enrollments_for_class(class_['id'])) == 1
+
+    assert len(file_data_service.opened_sessions) == 1
+    assert file_data_service.get_student_by_name("Ana Lima") is not None
+
+
+def test_exception_rolls_back_every_call(file_data_service):
+    with pytest.raises(ValueError):
+        with file_data_service.unit_of_work():
+            file_data_service.create_class("Turma B")
+            file_data_service.add_student("Bruno", "Souza")
+            raise ValueError("falha no meio da operação")
+
+    assert file_data_service.get_class_by_name("Turma B") is None
+    assert file_data_service.get_student_by_name("Bruno Souza") is None
+
+
+def test_unit_of_work_is_reentrant_and_shared_between_instances(file_data_service):
+    other_service = DataService()
+    with file_data_service.unit_of_work():
+        file_data_service.create_class("Turma C")
+        with other_service.unit_of_work():
+            other_service.add_student("Carla", "Dias")
+        # Blocos internos não fazem commit nem rollback próprios; quem decide é o bloco mais externo.
+        with pytest.raises(RuntimeError):
+            with file_data_service.unit_of_work():
+                raise RuntimeError("erro")
+
+    assert len(file_data_service.opened_sessions) == 1
+    assert file_data_service.get_student_by_name("Carla Dias") is not None
+
+
+def test_other_threads_use_their_own_session(file_data_service):
+    results = {}
+
+    def worker():
+        # Uma thread nova não herda o contexto e, portanto, abre sua própria sessão.
+        results["count"] = file_data_service.get_student_count()
+
+    with file_data_service.unit_of_work():
+        file_data_service.add_student("Davi", "Rocha")
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+    assert results["count"] == 0
+    assert len(file_data_service.opened_sessions) == 2
+
+
+def test_session_is_not_shared_with_threads_that_copy_the_context(file_data_service):
+    async def scenario():
+        with file_data_service.unit_of_work():
+            # asyncio.to_thread copia o contexto, mas a sessão não pode ser usada por outra thread.
+            with pytest.raises(RuntimeError):
+                await asyncio.to_thread(file_data_service.get_student_count)
+
+    asyncio.run(scenario())
+
+
+def test_swallowed_error_fails_the_unit_of_work(file_data_service):
+    file_data_service.add_course("Matemática", "MAT")
+
+    with pytest.raises(UnitOfWorkError):
+        with file_data_service.unit_of_work():
+            file_data_service.add_student("Ana", "Lima")
+            # O erro é capturado (como fazem as ferramentas), mas o savepoint já foi revertido.
+            with pytest.raises(IntegrityError):
+                file_data_service.add_course("Matemática", "MAT")
+
+    assert file_data_service.get_student_count() == 0
+
+
+def test_failed_tool_call_rolls_back_only_its_own_changes(file_data_service, assistant_service, mocker):
+    mocker.patch("app.tools.database_tools.data_service", file_data_service)
+    mocker.patch("app.services.assistant_service.data_service", file_data_service)
+    file_data_service.add_course("Matemática", "MAT")
+
+    def call(call_id, name, **arguments):
+        return {"id": call_id, "function": {"name": name, "arguments": json.dumps(arguments)}}
+
+    results = assistant_service._execute_tool_calls([
+        call("1", "add_new_student", first_name="Ana", last_name="Lima"),
+        # A ferramenta captura o IntegrityError e devolve o erro como texto.
+        call("2", "add_new_course", course_name="Matemática", course_code="MAT"),
+        call("3", "add_new_student", first_name="Bia", last_name="Souza"),
+    ])
+
+    assert "Novo aluno adicionado com sucesso" in results[0]["content"]
+    assert "could not be saved" in results[1]["content"]
+    assert "Novo aluno adicionado com sucesso" in results[2]["content"]
+    assert file_data_service.get_student_by_name("Ana Lima") is not None
+    assert file_data_service.get_student_by_name("Bia Souza") is not None
+    assert file_data_service.get_course_count() == 1
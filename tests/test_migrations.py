@@ -0,0 +1,230 @@
+from sqlalchemy import Date, MetaData, String, create_engine, inspect, text
+from app.data import migrations
+from app.data.migrations import SCHEMA_VERSION, ensure_schema, get_schema_version, run_migrations
+from app.models.base import Base
+from app.models.full_text import create_full_text_tables
+
+def _create_legacy_schema(engine):
+    """Cria as tabelas sem os índices, como em um banco criado por uma versão anterior."""
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.tables.values():
+            for index in table.indexes:
+                conn.execute(text(f"DROP INDEX {index.name}"))
+
+def _insert_parents(conn):
+    """Insere os alunos, a turma, a disciplina e a avaliação referenciados pelas linhas dos testes."""
+    conn.execute(text("INSERT INTO students (id, first_name, last_name, enrollment_date, search_name) VALUES "
+                      "(1, 'Ana', 'Lima', '2024-01-01', 'ana lima'), (2, 'Bruno', 'Souza', '2024-01-01', 'bruno souza')"))
+    conn.execute(text("INSERT INTO courses (id, course_name) VALUES (1, 'Matemática')"))
+    conn.execute(text("INSERT INTO classes (id, name, calculation_method) VALUES (1, '9A', 'weighted')"))
+    conn.execute(text("INSERT INTO class_subjects (id, class_id, course_id) VALUES (1, 1, 1)"))
+
+def test_migration_creates_indexes_and_removes_duplicate_grades(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    _create_legacy_schema(engine)
+    with engine.begin() as conn:
+        _insert_parents(conn)
+        conn.execute(text("INSERT INTO assessments (id, name, weight, class_subject_id) VALUES (1, 'P1', 1.0, 1)"))
+        conn.execute(text("INSERT INTO grades (id, student_id, assessment_id, score, date_recorded) VALUES "
+                          "(1, 1, 1, 5.0, '2024-01-01'), (2, 1, 1, 8.0, '2024-01-02'), (3, 2, 1, 7.0, '2024-01-01')"))
+
+    run_migrations(engine)
+    # Executar novamente não deve falhar.
+    run_migrations(engine)
+
+    inspector = inspect(engine)
+    grade_indexes = {ix["name"]: ix for ix in inspector.get_indexes("grades")}
+    assert grade_indexes["ix_grades_student_assessment"]["unique"]
+    assert "ix_grades_assessment_id" in grade_indexes
+    assert "ix_incidents_class_student" in {ix["name"] for ix in inspector.get_indexes("incidents")}
+    assert "ix_lessons_class_subject_date" in {ix["name"] for ix in inspector.get_indexes("lessons")}
+    assert "ix_class_enrollments_student_id" in {ix["name"] for ix in inspector.get_indexes("class_enrollments")}
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, score FROM grades ORDER BY id")).all()
+        # A nota mais recente do par duplicado é mantida.
+        assert [tuple(r) for r in rows] == [(2, 8.0), (3, 7.0)]
+        plan = " ".join(str(r[-1]) for r in conn.execute(
+            text("EXPLAIN QUERY PLAN SELECT * FROM grades WHERE assessment_id = 1")))
+        assert "USING INDEX" in plan
+    engine.dispose()
+
+def test_migration_adds_and_backfills_student_search_name(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    _create_legacy_schema(engine)
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE students DROP COLUMN search_name"))
+        conn.execute(text("INSERT INTO students (id, first_name, last_name, enrollment_date) "
+                          "VALUES (1, 'JOÃO', 'Conceição', '2024-01-01')"))
+
+    run_migrations(engine)
+
+    student_indexes = {ix["name"] for ix in inspect(engine).get_indexes("students")}
+    assert "ix_students_search_name" in student_indexes
+    assert "ix_students_name_order" in student_indexes
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT search_name FROM students WHERE id = 1")).scalar() == "joao conceicao"
+    engine.dispose()
+
+def test_migration_indexes_existing_rows_for_full_text_search(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    _create_legacy_schema(engine)
+    with engine.begin() as conn:
+        for table in ("students", "lessons", "incidents"):
+            for suffix in ("ai", "ad", "au"):
+                conn.execute(text(f"DROP TRIGGER {table}_fts_{suffix}"))
+            conn.execute(text(f"DROP TABLE {table}_fts"))
+        _insert_parents(conn)
+        conn.execute(text("INSERT INTO lessons (id, date, title, content, class_subject_id) "
+                          "VALUES (1, '2024-03-01', 'Frações', 'Frações equivalentes', 1)"))
+
+    run_migrations(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT rowid FROM lessons_fts WHERE lessons_fts MATCH 'fracoes'")).scalar() == 1
+    engine.dispose()
+
+def test_ensure_schema_creates_fresh_database_at_current_version(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+
+    assert ensure_schema(engine) == 0
+
+    with engine.connect() as conn:
+        assert get_schema_version(conn) == SCHEMA_VERSION
+    assert "grades" in inspect(engine).get_table_names()
+    engine.dispose()
+
+def test_ensure_schema_skips_migrations_when_current(tmp_path, mocker):
+    engine = create_engine(f"sqlite:///{tmp_path / 'current.db'}")
+    ensure_schema(engine)
+    create_all = mocker.spy(Base.metadata, "create_all")
+    run = mocker.spy(migrations, "run_migrations")
+
+    assert ensure_schema(engine) == SCHEMA_VERSION
+
+    create_all.assert_not_called()
+    run.assert_not_called()
+    engine.dispose()
+
+def test_ensure_schema_applies_only_pending_migrations(tmp_path, mocker):
+    engine = create_engine(f"sqlite:///{tmp_path / 'behind.db'}")
+    ensure_schema(engine)
+    with engine.begin() as conn:
+        conn.execute(text(f"PRAGMA user_version = {SCHEMA_VERSION - 1}"))
+    applied = []
+    mocker.patch.object(migrations, "MIGRATIONS", [
+        (name, (lambda conn, name=name: applied.append(name))) for name, _ in migrations.MIGRATIONS
+    ])
+
+    ensure_schema(engine)
+
+    assert applied == [migrations.MIGRATIONS[-1][0]]
+    with engine.connect() as conn:
+        assert get_schema_version(conn) == SCHEMA_VERSION
+    engine.dispose()
+
+def test_migration_backfills_student_subject_averages(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    _create_legacy_schema(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE student_subject_averages"))
+        _insert_parents(conn)
+        conn.execute(text("INSERT INTO assessments (id, name, weight, class_subject_id) "
+                          "VALUES (1, 'P1', 1.0, 1), (2, 'P2', 3.0, 1)"))
+        conn.execute(text("INSERT INTO grades (id, student_id, assessment_id, score, date_recorded) "
+                          "VALUES (1, 1, 1, 6.0, '2024-01-01'), (2, 1, 2, 10.0, '2024-01-02')"))
+
+    run_migrations(engine)
+
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT weighted_sum, total_weight, grade_count FROM student_subject_averages "
+                                "WHERE student_id = 1 AND class_subject_id = 1")).one()
+        assert tuple(row) == (36.0, 4.0, 2)
+    engine.dispose()
+
+def test_migration_rebuilds_tables_with_cascading_foreign_keys(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    # Cria as tabelas como nas versões anteriores, com chaves estrangeiras sem ON DELETE.
+    legacy_metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        table.to_metadata(legacy_metadata)
+    for table in legacy_metadata.tables.values():
+        for foreign_key in table.foreign_keys:
+            foreign_key.ondelete = None
+    legacy_metadata.create_all(engine)
+    with engine.begin() as conn:
+        create_full_text_tables(conn)
+        _insert_parents(conn)
+        conn.execute(text("INSERT INTO assessments (id, name, weight, class_subject_id) VALUES (1, 'P1', 1.0, 1)"))
+        # A nota 2 pertence a um aluno que já foi excluído.
+        conn.execute(text("INSERT INTO grades (id, student_id, assessment_id, score, date_recorded) VALUES "
+                          "(1, 1, 1, 8.0, '2024-01-01'), (2, 99, 1, 5.0, '2024-01-01')"))
+        conn.execute(text("INSERT INTO lessons (id, date, title, content, class_subject_id) "
+                          "VALUES (1, '2024-03-01', 'Frações', 'Frações equivalentes', 1)"))
+
+    run_migrations(engine)
+
+    assert all(fk["options"].get("ondelete") == "CASCADE" for fk in inspect(engine).get_foreign_keys("grades"))
+    with engine.begin() as conn:
+        assert conn.execute(text("SELECT id FROM grades")).scalars().all() == [1]
+        # Os gatilhos da busca textual continuam funcionando na tabela recriada.
+        conn.execute(text("INSERT INTO lessons (id, date, title, content, class_subject_id) "
+                          "VALUES (2, '2024-03-02', 'Geometria', 'Ângulos', 1)"))
+        assert conn.execute(text("SELECT rowid FROM lessons_fts WHERE lessons_fts MATCH 'angulos'")).scalar() == 2
+    with engine.begin() as conn:
+        conn.execute(text("PRAGMA foreign_keys=ON"))
+        conn.execute(text("DELETE FROM classes WHERE id = 1"))
+        assert conn.execute(text("SELECT COUNT(*) FROM grades")).scalar() == 0
+        assert conn.execute(text("SELECT COUNT(*) FROM lessons")).scalar() == 0
+    engine.dispose()
+
+def test_migration_converts_text_dates_to_indexed_date_columns(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    # Cria as tabelas como nas versões anteriores, com as datas de registro e de matrícula declaradas como texto.
+    legacy_metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        table.to_metadata(legacy_metadata)
+    legacy_metadata.tables["grades"].c.date_recorded.type = String()
+    legacy_metadata.tables["students"].c.enrollment_date.type = String()
+    legacy_metadata.create_all(engine)
+    with engine.begin() as conn:
+        create_full_text_tables(conn)
+        conn.execute(text("INSERT INTO students (id, first_name, last_name, enrollment_date, search_name) VALUES "
+                          "(1, 'Ana', 'Lima', '2024-02-05', 'ana lima'), (2, 'Bruno', 'Souza', '05/03/2024', 'bruno souza')"))
+        conn.execute(text("INSERT INTO courses (id, course_name) VALUES (1, 'Matemática')"))
+        conn.execute(text("INSERT INTO classes (id, name, calculation_method) VALUES (1, '9A', 'weighted')"))
+        conn.execute(text("INSERT INTO class_subjects (id, class_id, course_id) VALUES (1, 1, 1)"))
+        conn.execute(text("INSERT INTO assessments (id, name, weight, class_subject_id) VALUES (1, 'P1', 1.0, 1), (2, 'P2', 1.0, 1)"))
+        conn.execute(text("INSERT INTO grades (id, student_id, assessment_id, score, date_recorded) VALUES "
+                          "(1, 1, 1, 8.0, '2024-03-01 10:30:00'), (2, 2, 1, 5.0, '01/03/2024'), (3, 1, 2, 7.0, '2024-04-10')"))
+    run_migrations(engine)
+    # Executar novamente não deve falhar.
+    run_migrations(engine, from_version=SCHEMA_VERSION - 1)
+
+    inspector = inspect(engine)
+    grade_columns = {column["name"]: column["type"] for column in inspector.get_columns("grades")}
+    student_columns = {column["name"]: column["type"] for column in inspector.get_columns("students")}
+    assert isinstance(grade_columns["date_recorded"], Date) and isinstance(student_columns["enrollment_date"], Date)
+    assert "ix_grades_date_recorded" in {ix["name"] for ix in inspector.get_indexes("grades")}
+    assert "ix_students_enrollment_date" in {ix["name"] for ix in inspector.get_indexes("students")}
+
+    with engine.begin() as conn:
+        # Os valores fora do padrão foram convertidos para AAAA-MM-DD.
+        assert conn.execute(text("SELECT date_recorded FROM grades ORDER BY id")).scalars().all() == [
+            "2024-03-01", "2024-03-01", "2024-04-10"]
+        assert conn.execute(text("SELECT enrollment_date FROM students ORDER BY id")).scalars().all() == [
+            "2024-02-05", "2024-03-05"]
+        plan = " ".join(str(r[-1]) for r in conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM grades WHERE date_recorded BETWEEN '2024-03-01' AND '2024-03-31'")))
+        assert "ix_grades_date_recorded" in plan
+        # Os gatilhos da busca textual continuam funcionando na tabela de alunos recriada.
+        conn.execute(text("INSERT INTO students (id, first_name, last_name, enrollment_date, search_name) "
+                          "VALUES (3, 'Carla', 'Dias', '2024-05-01', 'carla dias')"))
+        assert conn.execute(text("SELECT rowid FROM students_fts WHERE students_fts MATCH 'carla'")).scalar() == 3
+    with engine.begin() as conn:
+        # As chaves estrangeiras das tabelas dependentes continuam apontando para a tabela recriada.
+        conn.execute(text("PRAGMA foreign_keys=ON"))
+        conn.execute(text("DELETE FROM students WHERE id = 1"))
+        assert conn.execute(text("SELECT id FROM grades")).scalars().all() == [2]
+    engine.dispose()
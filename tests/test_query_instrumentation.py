@@ -0,0 +1,69 @@
+import pytest
+from app.data.instrumentation import (
+    QueryBudgetExceeded, get_query_stats, instrument_queries, query_budget, reset_query_stats
+)
+from app.services.data_service import DataService
+
+
+def _setup_class_with_students(data_service: DataService, count: int) -> dict:
+    course = data_service.add_course("Matemática", "MAT")
+    class_ = data_service.create_class("Turma N+1")
+    data_service.add_subject_to_class(class_['id'], course['id'])
+    for i in range(count):
+        student = data_service.add_student("Aluno", f"Número {i}")
+        data_service.add_student_to_class(student['id'], class_['id'], i + 1)
+    return class_
+
+
+def test_stats_are_recorded_per_method(data_service: DataService):
+    class_ = _setup_class_with_students(data_service, 3)
+    reset_query_stats()
+
+    data_service.get_enrollments_for_class(class_['id'])
+    data_service.get_enrollments_for_class(class_['id'])
+
+    stats = get_query_stats()["DataService.get_enrollments_for_class"]
+    assert stats["calls"] == 2
+    assert stats["statements"] == 2
+    assert stats["total_time"] > 0
+
+
+def test_query_counter_fails_when_budget_is_exceeded(data_service: DataService, query_counter):
+    class_ = _setup_class_with_students(data_service, 3)
+
+    with query_counter(max_statements=1) as counter:
+        data_service.get_enrollments_for_class(class_['id'])
+    assert counter.count == 1
+
+    # Uma consulta por matrícula: o padrão N+1 que o contador deve acusar.
+    with pytest.raises(QueryBudgetExceeded, match="over its budget of 1"):
+        with query_counter(max_statements=1):
+            for enrollment in data_service.get_enrollments_for_class(class_['id']):
+                data_service.get_student_by_name(f"{enrollment['student_first_name']} {enrollment['student_last_name']}")
+
+
+def test_declared_budget_is_enforced_including_nested_calls(data_service: DataService):
+    @instrument_queries
+    class Report:
+        @query_budget(2)
+        def roster_names(self, class_id):
+            enrollments = data_service.get_enrollments_for_class(class_id)
+            return [data_service.get_class_by_id(class_id)['name'] for _ in enrollments]
+
+    class_ = _setup_class_with_students(data_service, 1)
+    assert Report().roster_names(class_['id']) == ["Turma N+1"]
+
+    data_service.add_student_to_class(data_service.add_student("Outro", "Aluno")['id'], class_['id'], 2)
+    with pytest.raises(QueryBudgetExceeded, match="Report.roster_names executed 3 SQL statements"):
+        Report().roster_names(class_['id'])
+
+
+def test_transaction_control_statements_are_not_counted(data_service: DataService, query_counter):
+    data_service.create_class("Turma A")
+
+    with query_counter() as counter:
+        # O SAVEPOINT da unidade de trabalho é aberto sob demanda, no primeiro comando do bloco.
+        with data_service.unit_of_work():
+            assert data_service.get_class_by_name("Turma A") is not None
+
+    assert [sql.split()[0] for sql in counter.statements] == ["SELECT"]
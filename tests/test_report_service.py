@@ -1,6 +1,14 @@
 import pytest
 import os
 from app.services.report_service import ReportService
+from app.services.gradebook import ClassGradebook
+
+
+def make_gradebook(score):
+    """Quadro de notas de uma turma com um aluno, uma disciplina e uma avaliação."""
+    students = [{"student_id": 1, "call_number": 1, "status": "Active", "first_name": "John", "last_name": "Doe"}]
+    rows = [(10, "Math", 100, "Test 1", 1.0, 1, score, score)]
+    return ClassGradebook.from_rows(1, "Class A", students, rows)
 
 class TestReportService:
     @pytest.fixture
@@ -13,19 +21,8 @@ class TestReportService:
 
     def test_generate_student_report_card(self, report_service):
         # Mock data
-        report_service.data_service.get_class_by_id.return_value = {"id": 1, "name": "Class A"}
-        report_service.data_service.get_all_students.return_value = [{"id": 1, "first_name": "John", "last_name": "Doe"}]
-        report_service.data_service.get_subjects_for_class.return_value = [
-            {"id": 10, "course_name": "Math", "weight": 1.0}
-        ]
-        report_service.data_service.get_assessments_for_subject.return_value = [
-            {"id": 100, "name": "Test 1", "weight": 1.0}
-        ]
-        report_service.data_service.get_grades_for_subject.return_value = [
-            {"student_id": 1, "assessment_id": 100, "score": 9.0}
-        ]
+        report_service.data_service.get_class_gradebook.return_value = make_gradebook(9.0)
         report_service.data_service.get_incidents_for_class.return_value = []
-        report_service.data_service.calculate_weighted_average.return_value = 9.0
 
         # Call method
         filepath = report_service.generate_student_report_card(1, 1)
@@ -37,6 +34,7 @@ class TestReportService:
             assert "BOLETIM ESCOLAR" in content
             assert "John Doe" in content
             assert "DISCIPLINA: MATH" in content
+            assert "Test 1 (Peso 1.0): 9.00" in content
             assert "MÉDIA FINAL: 9.00" in content
 
         # Cleanup
@@ -44,12 +42,7 @@ class TestReportService:
 
     def test_generate_class_grade_distribution(self, report_service):
         # Mock data
-        report_service.data_service.get_class_by_id.return_value = {"id": 1, "name": "Class A"}
-        report_service.data_service.get_enrollments_for_class.return_value = [{"student_id": 1}]
-        report_service.data_service.get_subjects_for_class.return_value = [{"id": 10, "course_name": "Math"}]
-        report_service.data_service.get_assessments_for_subject.return_value = [{"id": 100}]
-        report_service.data_service.get_grades_for_subject.return_value = [{"student_id": 1, "assessment_id": 100, "score": 8.0}]
-        report_service.data_service.calculate_weighted_average.return_value = 8.0
+        report_service.data_service.get_class_gradebook.return_value = make_gradebook(8.0)
 
         filepath = report_service.generate_class_grade_distribution(1)
         assert os.path.exists(filepath)
@@ -57,14 +50,7 @@ class TestReportService:
 
     def test_export_class_grades_csv(self, report_service):
         # Mock data
-        report_service.data_service.get_class_by_id.return_value = {"id": 1, "name": "Class A"}
-        report_service.data_service.get_enrollments_for_class.return_value = [
-            {"student_id": 1, "call_number": 1, "student_first_name": "John", "student_last_name": "Doe"}
-        ]
-        report_service.data_service.get_subjects_for_class.return_value = [{"id": 10, "course_name": "Math"}]
-        report_service.data_service.get_assessments_for_subject.return_value = [{"id": 100, "name": "Test"}]
-        report_service.data_service.get_grades_for_subject.return_value = [{"student_id": 1, "assessment_id": 100, "score": 10.0}]
-        report_service.data_service.calculate_weighted_average.return_value = 10.0
+        report_service.data_service.get_class_gradebook.return_value = make_gradebook(10.0)
 
         filepath = report_service.export_class_grades_csv(1)
         assert os.path.exists(filepath)
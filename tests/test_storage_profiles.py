@@ -0,0 +1,26 @@
+import pytest
+from sqlalchemy import text
+from app.core.config import DEFAULT_STORAGE_PROFILE
+from app.data.database import STORAGE_PROFILES, create_app_engine, resolve_storage_profile
+
+@pytest.mark.parametrize("profile_name", list(STORAGE_PROFILES))
+def test_profile_pragmas_are_applied_on_connect(tmp_path, profile_name):
+    """Cada nova conexão deve receber os PRAGMAs do perfil escolhido."""
+    engine = create_app_engine(f"sqlite:///{tmp_path / 'profile.db'}", profile_name)
+    expected = STORAGE_PROFILES[profile_name]
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar().upper() == "WAL"
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == expected["cache_size"]
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == expected["busy_timeout"]
+        # synchronous: 1 = NORMAL, 2 = FULL
+        sync_levels = {"NORMAL": 1, "FULL": 2}
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == sync_levels[expected["synchronous"]]
+
+    engine.dispose()
+
+def test_unknown_profile_falls_back_to_default():
+    """Um nome de perfil inválido nas configurações não deve impedir a aplicação de iniciar."""
+    assert resolve_storage_profile("does-not-exist") == DEFAULT_STORAGE_PROFILE
+    assert resolve_storage_profile(None) == DEFAULT_STORAGE_PROFILE
+    assert resolve_storage_profile("throughput") == "throughput"
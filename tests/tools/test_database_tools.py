@@ -1,4 +1,5 @@
 import pytest
+from app.services.name_resolver import KINDS, NameResolver
 from app.tools import database_tools
 
 class TestDatabaseTools:
@@ -6,6 +7,16 @@ class TestDatabaseTools:
     def mock_data_service(self, mocker):
         return mocker.patch('app.tools.database_tools.data_service')
 
+    @pytest.fixture
+    def names(self, mocker, mock_data_service):
+        """Nomes cadastrados, por tipo ({tipo: [(id, nome, escopo)]}), lidos por um resolvedor real."""
+        rows = {kind: [] for kind in KINDS}
+        mock_data_service.get_resolvable_names.side_effect = lambda kind: rows[kind]
+        resolver = NameResolver(mock_data_service)
+        mocker.patch('app.tools.database_tools.name_resolver', resolver)
+        yield rows
+        resolver.close()
+
     def test_create_new_class(self, mock_data_service):
         mock_data_service.get_class_by_name.return_value = None
         mock_data_service.create_class.return_value = {"id": 1, "name": "1A"}
@@ -15,9 +26,9 @@ class TestDatabaseTools:
         assert "criada com sucesso" in result
         mock_data_service.create_class.assert_called_with("1A")
 
-    def test_add_subject_to_class(self, mock_data_service):
-        mock_data_service.get_class_by_name.return_value = {"id": 1, "name": "1A"}
-        mock_data_service.get_course_by_name.return_value = {"id": 2, "course_name": "Math"}
+    def test_add_subject_to_class(self, mock_data_service, names):
+        names["class"] = [(1, "1A", None)]
+        names["course"] = [(2, "Math", None)]
         mock_data_service.add_subject_to_class.return_value = True
 
         result = database_tools.add_subject_to_class("1A", "Math")
@@ -25,9 +36,9 @@ class TestDatabaseTools:
         assert "adicionada à turma" in result
         mock_data_service.add_subject_to_class.assert_called_with(1, 2)
 
-    def test_add_new_lesson(self, mock_data_service):
-        mock_data_service.get_class_by_name.return_value = {"id": 1}
-        mock_data_service.get_subjects_for_class.return_value = [{"id": 10, "course_name": "Math"}]
+    def test_add_new_lesson(self, mock_data_service, names):
+        names["class"] = [(1, "1A", None)]
+        names["subject"] = [(10, "Math", 1), (11, "Math", 2)]
         mock_data_service.create_lesson.return_value = {"id": 100}
 
         result = database_tools.add_new_lesson("1A", "Math", "Algebra", "Basics", "12/12/2024")
@@ -38,9 +49,9 @@ class TestDatabaseTools:
         args, _ = mock_data_service.create_lesson.call_args
         assert args[0] == 10  # subject_id
 
-    def test_create_new_assessment(self, mock_data_service):
-        mock_data_service.get_class_by_name.return_value = {"id": 1}
-        mock_data_service.get_subjects_for_class.return_value = [{"id": 10, "course_name": "History"}]
+    def test_create_new_assessment(self, mock_data_service, names):
+        names["class"] = [(1, "1A", None)]
+        names["subject"] = [(10, "History", 1)]
         mock_data_service.add_assessment.return_value = {"id": 50}
 
         result = database_tools.create_new_assessment("1A", "History", "Test 1", 1.0)
@@ -48,18 +59,57 @@ class TestDatabaseTools:
         assert "criada para History" in result
         mock_data_service.add_assessment.assert_called_with(10, "Test 1", 1.0)
 
-    def test_add_new_grade(self, mock_data_service):
-        mock_data_service.get_student_by_name.return_value = {"id": 100}
-        mock_data_service.get_class_by_name.return_value = {"id": 1}
-        mock_data_service.get_subjects_for_class.return_value = [{"id": 10, "course_name": "Math"}]
-        mock_data_service.get_assessments_for_subject.return_value = [{"id": 5, "name": "Exam 1"}]
+    def test_add_new_grade(self, mock_data_service, names):
+        names["student"] = [(100, "John Smith", None), (101, "Mary Jones", None)]
+        names["class"] = [(1, "1A", None)]
+        names["subject"] = [(10, "Math", 1)]
+        names["assessment"] = [(5, "Exam 1", 10), (6, "Exam 2", 10), (7, "Exam 1", 99)]
         mock_data_service.add_grade.return_value = {"id": 99}
 
-        result = database_tools.add_new_grade("John", "1A", "Math", "Exam 1", 9.5)
+        # Maiúsculas e acentos não importam, mas o nome precisa ser o cadastrado.
+        result = database_tools.add_new_grade("john smith", "1a", "MATH", "exam 1", 9.5)
 
-        assert "Nota 9.5 adicionada" in result
+        assert result == "Nota 9.5 adicionada para John Smith em Exam 1 (Math)."
         mock_data_service.add_grade.assert_called_with(100, 5, 9.5)
 
+    def test_add_new_grade_suggests_candidates_when_ambiguous(self, mock_data_service, names):
+        names["student"] = [(100, "Ana Lima", None), (101, "Ana Souza", None)]
+
+        result = database_tools.add_new_grade("Ana", "1A", "Math", "Exam 1", 9.5)
+
+        assert result == ("Aluno 'Ana' não encontrado. Você quis dizer: 'Ana Lima', 'Ana Souza'? "
+                          "Nada foi alterado; confirme o nome exato com o professor.")
+        mock_data_service.add_grade.assert_not_called()
+
+    def test_write_tools_do_not_act_on_near_miss_names(self, mock_data_service, names):
+        names["student"] = [(100, "Mariana Silva", None), (101, "Pedro Alves", None)]
+        names["class"] = [(1, "1A", None)]
+        names["subject"] = [(10, "Math", 1)]
+        names["assessment"] = [(5, "Exam 1", 10)]
+
+        renamed = database_tools.update_student_name("Maria Silva", "Maria", "Souza")
+        graded = database_tools.add_new_grade("Pedro", "1A", "Math", "Exam 1", 9.5)
+
+        assert renamed == ("Aluno 'Maria Silva' não encontrado. Você quis dizer: 'Mariana Silva'? "
+                           "Nada foi alterado; confirme o nome exato com o professor.")
+        assert graded == ("Aluno 'Pedro' não encontrado. Você quis dizer: 'Pedro Alves'? "
+                          "Nada foi alterado; confirme o nome exato com o professor.")
+        mock_data_service.update_student.assert_not_called()
+        mock_data_service.add_grade.assert_not_called()
+
+    def test_write_tools_name_the_resolved_student(self, mock_data_service, names):
+        names["student"] = [(100, "Mariana Silva", None)]
+        names["class"] = [(1, "1A", None)]
+        mock_data_service.get_next_call_number.return_value = 3
+
+        renamed = database_tools.update_student_name("mariana silva", "Mariana", "Souza")
+        enrolled = database_tools.enroll_existing_student("Mariana Silva", "1a")
+
+        assert renamed == "Nome de Mariana Silva (ID 100) atualizado para Mariana Souza."
+        assert enrolled == "Aluno Mariana Silva matriculado na turma 1A."
+        mock_data_service.update_student.assert_called_with(100, "Mariana", "Souza")
+        mock_data_service.add_student_to_class.assert_called_with(100, 1, 3)
+
     def test_list_all_classes(self, mock_data_service):
         mock_data_service.get_all_classes.return_value = [
             {"id": 1, "name": "1A", "student_count": 20}
@@ -73,16 +123,47 @@ class TestDatabaseTools:
         assert "Turma: 1A" in result
         assert "Math, History" in result
 
-    def test_get_student_grades_by_course(self, mock_data_service):
-        mock_data_service.get_student_by_name.return_value = {"id": 1, "name": "John"}
-        mock_data_service.get_course_by_name.return_value = {"id": 2, "course_name": "Math"}
-        mock_data_service.get_all_grades_with_details.return_value = [
+    def test_get_student_grades_by_course(self, mock_data_service, names):
+        names["student"] = [(1, "John Smith", None)]
+        names["course"] = [(2, "Matemática", None), (3, "Física", None)]
+        mock_data_service.query_grades.return_value = [
             {"student_id": 1, "course_id": 2, "class_name": "1A", "assessment_name": "Test", "score": 10.0},
-            {"student_id": 1, "course_id": 3, "class_name": "1A", "assessment_name": "Geo Test", "score": 5.0} # Should filter out
         ]
 
-        result = database_tools.get_student_grades_by_course("John", "Math")
+        result = database_tools.get_student_grades_by_course("John", "matematica")
 
         assert "Test" in result
         assert "10.0" in result
-        assert "Geo Test" not in result
+        # O filtro por aluno e disciplina é feito pelo DataService, no banco de dados.
+        mock_data_service.query_grades.assert_called_with(student_id=1, course_id=2)
+        mock_data_service.get_all_grades_with_details.assert_not_called()
+
+    def test_search_school_records(self, mock_data_service):
+        mock_data_service.search.return_value = [
+            {"kind": "lesson", "id": 3, "title": "Frações", "snippet": "Introdução a [frações]", "rank": -1.2, "date": "2024-03-01"},
+        ]
+
+        result = database_tools.search_school_records("frações", kinds="aula")
+
+        assert "[Aula] Frações (2024-03-01): Introdução a [frações]" in result
+        mock_data_service.search.assert_called_with("frações", kinds=["lesson"], limit=10)
+
+    def test_search_school_records_invalid_kind(self, mock_data_service):
+        result = database_tools.search_school_records("frações", kinds="professor")
+
+        assert "Erro" in result
+        mock_data_service.search.assert_not_called()
+
+    def test_list_courses_for_student(self, mock_data_service, names):
+        names["student"] = [(1, "John", None)]
+        mock_data_service.get_student_overview.return_value = {"enrollments": [
+            {"class_name": "1A", "subjects": [{"course_name": "Math"}, {"course_name": "History"}]},
+            {"class_name": "Reforço", "subjects": [{"course_name": "Math"}]},
+        ]}
+
+        result = database_tools.list_courses_for_student("John")
+
+        assert result == "Disciplinas de John:\n- History\n- Math"
+        # As matrículas e disciplinas vêm da visão geral do aluno, sem percorrer as turmas.
+        mock_data_service.get_student_overview.assert_called_with(1)
+        mock_data_service.get_all_classes.assert_not_called()
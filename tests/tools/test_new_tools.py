@@ -86,6 +86,23 @@ def test_get_students_at_risk_tool_no_students(mocker, mock_data_service):
     # Garante que a ferramenta retorna a mensagem informativa correta, em vez de um JSON vazio.
     assert "Nenhum aluno foi identificado" in result_str
 
+# Testa a ferramenta de alunos em risco sem turma informada (ranking da escola inteira).
+def test_get_students_at_risk_tool_school_wide(mocker, mock_data_service):
+    mocker.patch('app.tools.analysis_tools.data_service', mock_data_service)
+
+    # Configura o ranking retornado pelo DataService.
+    ranking = [{"student_name": "Jane Doe", "class_name": "Math Grade 5", "average_grade": 3.0, "incident_count": 0}]
+    mock_data_service.get_school_students_at_risk.return_value = ranking
+
+    # --- AÇÃO ---
+    result_json = json.loads(get_students_at_risk_tool(limit=5))
+
+    # --- VERIFICAÇÕES ---
+    # A turma não é buscada e o ranking é obtido em uma única chamada.
+    mock_data_service.get_class_by_name.assert_not_called()
+    mock_data_service.get_school_students_at_risk.assert_called_with(limit=5)
+    assert result_json[0]["class_name"] == "Math Grade 5"
+
 # Define um teste para a ferramenta pedagógica.
 def test_suggest_lesson_activities_tool():
     # Esta ferramenta não depende de serviços externos, então não precisa de mocks.